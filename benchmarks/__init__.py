@@ -0,0 +1,31 @@
+"""
+Benchmarks
+==========
+
+The benchmarks of the hot paths of fealpy: the mesh data structures and the
+refinements, the function spaces and the assembly, the solvers and the I/O.
+
+Every `bench_*.py` module holds benchmark classes in the asv style
+
+* `params` and `param_names` give the parameters, e.g. the mesh sizes and
+  the polynomial orders, and all combinations of them are run;
+* `setup(*params)` builds the data and is called before every repeat, it
+  raises `NotImplementedError` to skip the combination;
+* every `time_*(*params)` method is one benchmark, its time and its peak
+  memory are measured. The peak memory is the one traced by `tracemalloc`,
+  i.e. the numpy arrays and the python objects, but not the memory of the
+  compiled libraries, e.g. the LU factors of `spsolve`.
+
+So the suite runs with `asv run` (see `asv.conf.json` in the root
+directory), and without asv by the runner in this package
+
+    python -m benchmarks.run run                  # run all and save the results
+    python -m benchmarks.run run -b Lagrange      # only the matched benchmarks
+    python -m benchmarks.run list                 # the saved results
+    python -m benchmarks.run compare              # the last two results
+    python -m benchmarks.run compare OLD NEW -f 1.2
+
+The results are saved as json files into `$FEALPY_BENCHMARK_DIR`, the default
+is `.benchmarks` in the current directory. `compare` exits with the status 1
+if a benchmark becomes slower or uses more memory than the given factor.
+"""
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+from fealpy.writer import save_checkpoint, load_checkpoint
+
+
+class Checkpoint:
+    params = [[64, 256], [1, 2]]
+    param_names = ['n', 'p']
+
+    def setup(self, n, p):
+        self.mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n)
+        space = LagrangeFiniteElementSpace(self.mesh, p=p)
+        self.uh = space.interpolation(lambda x: x[..., 0]*x[..., 1])
+        self.path = tempfile.mkdtemp()
+        self.fname = os.path.join(self.path, 'mesh.npz')
+        save_checkpoint(self.fname, self.mesh, functions={'uh': self.uh})
+
+    def teardown(self, n, p):
+        for f in os.listdir(self.path):
+            os.remove(os.path.join(self.path, f))
+        os.rmdir(self.path)
+
+    def time_save_checkpoint(self, n, p):
+        save_checkpoint(os.path.join(self.path, 'save.npz'), self.mesh,
+                functions={'uh': self.uh})
+
+    def time_load_checkpoint(self, n, p):
+        mesh, functions, data = load_checkpoint(self.fname)
+        mesh.entity_measure('cell')
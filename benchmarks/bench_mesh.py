@@ -0,0 +1,62 @@
+import numpy as np
+
+from fealpy.mesh import Quadtree
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+
+
+class Mesh2dDataStructure:
+    """
+    The construction of the edges and edge2cell from the cells.
+    """
+    params = [[64, 256], ['tri', 'quad']]
+    param_names = ['n', 'meshtype']
+
+    def setup(self, n, meshtype):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n, meshtype=meshtype)
+        self.ds = mesh.ds
+
+    def time_construct(self, n, meshtype):
+        self.ds.construct()
+
+    def time_cell_to_cell(self, n, meshtype):
+        self.ds.cell_to_cell()
+
+
+class TriangleMeshRefine:
+    params = [32, 128]
+    param_names = ['n']
+    number = 1
+
+    def setup(self, n):
+        self.mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n)
+        bc = self.mesh.entity_barycenter('cell')
+        # the cells near the circle r = 0.3 around the center
+        r = np.sqrt(np.sum((bc - 0.5)**2, axis=-1))
+        self.isMarkedCell = np.abs(r - 0.3) < 2/n
+
+    def time_uniform_refine(self, n):
+        self.mesh.uniform_refine()
+
+    def time_bisect(self, n):
+        self.mesh.bisect(self.isMarkedCell)
+
+
+class QuadtreeRefine:
+    params = [32, 128]
+    param_names = ['n']
+    number = 1
+
+    def setup(self, n):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n, meshtype='quad')
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        self.mesh = Quadtree(node, cell)
+        bc = self.mesh.entity_barycenter('cell')
+        r = np.sqrt(np.sum((bc - 0.5)**2, axis=-1))
+        self.isMarkedCell = np.abs(r - 0.3) < 2/n
+
+    def time_refine(self, n):
+        self.mesh.refine(self.isMarkedCell)
+
+    def time_uniform_refine(self, n):
+        self.mesh.uniform_refine()
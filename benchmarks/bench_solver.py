@@ -0,0 +1,39 @@
+import numpy as np
+from scipy.sparse.linalg import spsolve, cg
+
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.boundarycondition import DirichletBC
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+
+
+class PoissonSolver:
+    """
+    The P_p Lagrange finite element system of -\\Delta u = f with the zero
+    Dirichlet boundary condition on the unit square.
+    """
+    params = [[64, 128], [1, 2], ['spsolve', 'amg']]
+    param_names = ['n', 'p', 'solver']
+
+    def setup(self, n, p, solver):
+        if solver == 'amg':
+            try:
+                import pyamg
+            except ImportError:
+                raise NotImplementedError("pyamg is not installed")
+            self.pyamg = pyamg
+
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        A = space.stiff_matrix()
+        F = space.source_vector(lambda x: np.sin(np.pi*x[..., 0])*np.sin(np.pi*x[..., 1]))
+        uh = space.function()
+        bc = DirichletBC(space, lambda x: np.zeros(x.shape[:-1]))
+        self.A, self.F = bc.apply(A, F, uh)
+        self.A = self.A.tocsr()
+
+    def time_solve(self, n, p, solver):
+        if solver == 'spsolve':
+            spsolve(self.A, self.F)
+        else:
+            ml = self.pyamg.ruge_stuben_solver(self.A)
+            cg(self.A, self.F, M=ml.aspreconditioner(), tol=1e-10)
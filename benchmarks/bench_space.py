@@ -0,0 +1,60 @@
+import numpy as np
+
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.functionspace import ConformingVirtualElementSpace2d
+from fealpy.functionspace import FourierSpace
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+
+
+class LagrangeFiniteElementSpaceAssembly:
+    params = [[32, 128], [1, 2, 3]]
+    param_names = ['n', 'p']
+
+    def setup(self, n, p):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n)
+        self.space = LagrangeFiniteElementSpace(mesh, p=p)
+
+    def time_stiff_matrix(self, n, p):
+        self.space.stiff_matrix()
+
+    def time_mass_matrix(self, n, p):
+        self.space.mass_matrix()
+
+    def time_source_vector(self, n, p):
+        self.space.source_vector(lambda x: np.sin(x[..., 0])*np.sin(x[..., 1]))
+
+
+class ConformingVirtualElementSpace2dSetup:
+    params = [[16, 64], [1, 2]]
+    param_names = ['n', 'p']
+
+    def setup(self, n, p):
+        self.mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n,
+                meshtype='polygon')
+        self.space = ConformingVirtualElementSpace2d(self.mesh, p=p)
+
+    def time_setup(self, n, p):
+        ConformingVirtualElementSpace2d(self.mesh, p=p)
+
+    def time_stiff_matrix(self, n, p):
+        self.space.stiff_matrix()
+
+
+class FourierSpaceFFT:
+    params = [[64, 256, 1024], ['pyfftw', 'scipy']]
+    param_names = ['N', 'dft']
+
+    def setup(self, N, dft):
+        box = np.diag([2*np.pi, 2*np.pi])
+        self.space = FourierSpace(box, N, dft=None if dft == 'pyfftw' else dft)
+        x = self.space.interpolation_points()
+        self.u = (np.sin(x[0])*np.sin(x[1])).astype(np.complex128)
+
+    def time_fftn(self, N, dft):
+        self.space.fftn(self.u)
+
+    def time_ifftn(self, N, dft):
+        self.space.ifftn(self.u)
+
+    def time_linear_equation_fft_solver(self, N, dft):
+        self.space.linear_equation_fft_solver(lambda x: 3*np.sin(x[0])*np.sin(x[1]))
@@ -0,0 +1,313 @@
+"""
+The runner of the benchmarks, see the docstring of the `benchmarks` package.
+"""
+import os
+import re
+import sys
+import json
+import time
+import glob
+import platform
+import argparse
+import itertools
+import importlib
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import scipy
+
+# peak memories below this size are noise and are not compared
+MEMORY_THRESHOLD = 1e6
+# the fast benchmarks are called several times in one sample, unless the
+# class sets `number`, e.g. `number = 1` for the benchmarks which change
+# the data made by `setup`
+MIN_SAMPLE_TIME = 0.01
+
+
+def result_directory():
+    return os.environ.get('FEALPY_BENCHMARK_DIR', '.benchmarks')
+
+
+def discover(pattern=None):
+    """
+    Find all benchmarks in the `bench_*.py` modules.
+
+    Returns
+    -------
+    benchmarks : list of (name, cls, method, params), the name is
+        'module.Class.method'
+    """
+    path = os.path.dirname(os.path.abspath(__file__))
+    benchmarks = []
+    for fname in sorted(glob.glob(os.path.join(path, 'bench_*.py'))):
+        mname = os.path.splitext(os.path.basename(fname))[0]
+        module = importlib.import_module('benchmarks.' + mname)
+        for cname, cls in vars(module).items():
+            if (not isinstance(cls, type)) or (cls.__module__ != module.__name__):
+                continue
+            for method in sorted(vars(cls)):
+                if not method.startswith('time_'):
+                    continue
+                name = '.'.join((mname, cname, method))
+                if (pattern is not None) and \
+                        (not any(re.search(p, name) for p in pattern)):
+                    continue
+                benchmarks.append((name, cls, method))
+    return benchmarks
+
+
+def parameters(cls):
+    """
+    All combinations of the parameters of a benchmark class.
+    """
+    params = getattr(cls, 'params', [])
+    if len(params) == 0:
+        return [()], []
+    if not isinstance(params[0], (list, tuple)): # one parameter
+        params = [params]
+    names = getattr(cls, 'param_names', ['param{}'.format(i) for i in
+        range(len(params))])
+    return list(itertools.product(*params)), list(names)
+
+
+def measure(cls, method, args, repeat):
+    """
+    Run one benchmark with the given parameters.
+
+    Returns
+    -------
+    result : dict with the median and the minimal time of one call in
+        seconds and the peak memory in bytes, or None if the benchmark is
+        skipped
+    """
+    number = getattr(cls, 'number', None)
+    times = []
+    for i in range(repeat + 1): # the first run is a warm-up
+        obj = cls()
+        try:
+            if hasattr(obj, 'setup'):
+                obj.setup(*args)
+        except NotImplementedError:
+            return None
+        f = getattr(obj, method)
+        n = 1 if number is None else number
+        t0 = time.perf_counter()
+        for j in range(n):
+            f(*args)
+        t1 = time.perf_counter()
+        if hasattr(obj, 'teardown'):
+            obj.teardown(*args)
+        if i > 0:
+            times.append((t1 - t0)/n)
+        elif number is None:
+            # the calls of one sample take at least MIN_SAMPLE_TIME
+            number = max(1, int(MIN_SAMPLE_TIME/max(t1 - t0, 1e-9)))
+
+    # the peak memory of one call, which is measured in a separate run since
+    # tracemalloc slows down the allocations
+    obj = cls()
+    if hasattr(obj, 'setup'):
+        obj.setup(*args)
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    getattr(obj, method)(*args)
+    peak = tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    if hasattr(obj, 'teardown'):
+        obj.teardown(*args)
+
+    return {'time': float(np.median(times)), 'min': float(np.min(times)),
+            'peakmem': int(peak), 'repeat': repeat, 'number': number}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return out.stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_time(t):
+    if t is None:
+        return 'n/a'
+    for unit, s in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if t >= s:
+            return '{:.3g}{}'.format(t/s, unit)
+    return '{:.3g}ns'.format(t/1e-9)
+
+
+def format_memory(m):
+    if m is None:
+        return 'n/a'
+    for unit, s in (('G', 1e9), ('M', 1e6), ('k', 1e3)):
+        if m >= s:
+            return '{:.3g}{}'.format(m/s, unit)
+    return '{}'.format(m)
+
+
+def run(args):
+    benchmarks = discover(args.bench)
+    commit = git_commit()
+    results = {}
+    for name, cls, method in benchmarks:
+        combinations, names = parameters(cls)
+        repeat = args.repeat or getattr(cls, 'repeat', 5)
+        for p in combinations:
+            key = name + '({})'.format(', '.join(
+                '{}={}'.format(n, v) for n, v in zip(names, p)))
+            r = measure(cls, method, p, repeat)
+            if r is None:
+                print('{:>10} {:>10}  {}'.format('skipped', '', key))
+                continue
+            results[key] = r
+            print('{:>10} {:>10}  {}'.format(format_time(r['time']),
+                format_memory(r['peakmem']), key), flush=True)
+
+    if args.no_save:
+        return 0
+    date = datetime.now()
+    data = {'commit': commit, 'date': date.isoformat(timespec='seconds'),
+            'machine': platform.node(), 'platform': platform.platform(),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'scipy': scipy.__version__, 'results': results}
+    path = result_directory()
+    os.makedirs(path, exist_ok=True)
+    fname = os.path.join(path, '{}-{}.json'.format(
+        date.strftime('%Y%m%d-%H%M%S'), (commit or 'nogit')[:8]))
+    with open(fname, 'w') as f:
+        json.dump(data, f, indent=1)
+    print('The results are saved into', fname)
+    return 0
+
+
+def saved_results():
+    return sorted(glob.glob(os.path.join(result_directory(), '*.json')))
+
+
+def find_result(name):
+    """
+    The result file of a path, a file name in the result directory or a
+    prefix of the commit.
+    """
+    if os.path.exists(name):
+        return name
+    files = saved_results()
+    for fname in files[::-1]:
+        base = os.path.basename(fname)
+        with open(fname) as f:
+            commit = json.load(f)['commit'] or ''
+        if base.startswith(name) or (len(name) >= 4 and commit.startswith(name)):
+            return fname
+    raise ValueError("I can not find the benchmark result {}!".format(name))
+
+
+def compare(args):
+    if args.old is None:
+        files = saved_results()
+        if len(files) < 2:
+            print('There are less than two results in', result_directory())
+            return 1
+        old, new = files[-2:]
+    else:
+        old = find_result(args.old)
+        new = find_result(args.new) if args.new is not None else saved_results()[-1]
+
+    with open(old) as f:
+        r0 = json.load(f)
+    with open(new) as f:
+        r1 = json.load(f)
+    print('before: {} ({}, {})'.format(old, r0['commit'], r0['date']))
+    print('after : {} ({}, {})'.format(new, r1['commit'], r1['date']))
+    print()
+    print('  {:>10} {:>10} {:>6}  {:>8} {:>8} {:>6}  {}'.format('before', 'after',
+        'ratio', 'before', 'after', 'ratio', 'benchmark'))
+
+    factor = args.factor
+    worse = 0
+    for key in sorted(set(r0['results']) | set(r1['results'])):
+        a = r0['results'].get(key)
+        b = r1['results'].get(key)
+        if (a is None) or (b is None):
+            a = a or {}
+            b = b or {}
+            print('  {:>10} {:>10} {:>6}  {:>8} {:>8} {:>6}  {}'.format(
+                format_time(a.get('min')), format_time(b.get('min')), '',
+                format_memory(a.get('peakmem')),
+                format_memory(b.get('peakmem')), '', key))
+            continue
+        # the minimal times are less sensitive to the load of the machine
+        tr = b['min']/a['min']
+        if max(a['peakmem'], b['peakmem']) > MEMORY_THRESHOLD:
+            mr = b['peakmem']/max(a['peakmem'], 1)
+        else:
+            mr = 1.0
+        if (tr > factor) or (mr > factor):
+            mark = '+'
+            worse += 1
+        elif (tr < 1/factor) or (mr < 1/factor):
+            mark = '-'
+        else:
+            mark = ' '
+        print('{} {:>10} {:>10} {:>6.2f}  {:>8} {:>8} {:>6.2f}  {}'.format(mark,
+            format_time(a['min']), format_time(b['min']), tr,
+            format_memory(a['peakmem']), format_memory(b['peakmem']), mr,
+            key))
+
+    if worse > 0:
+        print()
+        print('{} benchmarks are worse by more than the factor {}.'.format(
+            worse, factor))
+        return 1
+    return 0
+
+
+def show(args):
+    for fname in saved_results():
+        with open(fname) as f:
+            data = json.load(f)
+        print('{}  {}  {}  {} benchmarks'.format(os.path.basename(fname),
+            data['date'], data['commit'], len(data['results'])))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+            description='Run and compare the fealpy benchmarks.')
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('run', help='run the benchmarks and save the results')
+    p.add_argument('-b', '--bench', action='append', default=None,
+            help='the regular expression of the benchmark names')
+    p.add_argument('-r', '--repeat', type=int, default=None,
+            help='the number of the timed repeats')
+    p.add_argument('--no-save', action='store_true',
+            help='do not save the results')
+
+    p = sub.add_parser('compare', help='compare two results')
+    p.add_argument('old', nargs='?', default=None,
+            help='the result file, its name or a commit prefix')
+    p.add_argument('new', nargs='?', default=None,
+            help='the default is the latest result')
+    p.add_argument('-f', '--factor', type=float, default=1.1,
+            help='the ratio to report a change')
+
+    sub.add_parser('list', help='list the saved results')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    elif args.command == 'compare':
+        return compare(args)
+    elif args.command == 'list':
+        return show(args)
+    else:
+        parser.print_help()
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Precision
+=========
+
+The policy of the integer type of the index arrays and the float type of the
+work arrays of fealpy.
+
+* The index arrays, i.e. the connectivity of the meshes (`cell`, `edge`,
+  `edge2cell`, ...) and the dof maps (`cell2dof`, ...), are int32 if all the
+  indices fit in it, otherwise int64. This halves the memory of the
+  topology of the large meshes. The type can also be fixed to int32 or
+  int64.
+
+* The work arrays of the assembly, i.e. the tabulations of the basis
+  functions and their gradients and the element matrices, are float64 by
+  default and can be float32, which halves their memory and speeds up the
+  `einsum`s. The nodes, the functions and the global matrices and vectors
+  keep float64, and the element matrices are summed into the global ones in
+  float64.
+
+The types are chosen when the arrays are made, e.g. the data structure of a
+mesh picks the index type of the connectivity when it is constructed or
+rebuilt by a refinement.
+
+The policy is set by
+
+    set_precision(itype='auto', ftype=np.float64)
+
+or temporarily by the context manager `precision(...)`, and at start-up by the
+environment variables
+
+    FEALPY_ITYPE=auto|int32|int64
+    FEALPY_FTYPE=float64|float32
+
+Examples
+--------
+>> from fealpy.common.precision import precision
+>> with precision(itype=np.int64, ftype=np.float32):
+>>     mesh = MeshFactory().regular([0, 1, 0, 1], n=10)
+>>     space = LagrangeFiniteElementSpace(mesh, p=2)
+>>     A = space.stiff_matrix() # float32 element matrices, float64 A
+"""
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+INT32_MAX = np.iinfo(np.int32).max
+
+_policy = {'itype': 'auto', 'ftype': np.dtype(np.float64)}
+
+
+def _check_itype(itype):
+    if isinstance(itype, str) and itype == 'auto':
+        return itype
+    itype = np.dtype(itype)
+    if itype not in {np.dtype(np.int32), np.dtype(np.int64)}:
+        raise ValueError("The index type should be 'auto', int32 or int64,"
+                " but it is {}!".format(itype))
+    return itype
+
+
+def _check_ftype(ftype):
+    ftype = np.dtype(ftype)
+    if ftype not in {np.dtype(np.float32), np.dtype(np.float64)}:
+        raise ValueError("The work type should be float32 or float64, but it"
+                " is {}!".format(ftype))
+    return ftype
+
+
+def set_precision(itype=None, ftype=None):
+    """
+    Set the precision policy, the None arguments are not changed.
+
+    Parameters
+    ----------
+    itype : 'auto', np.int32 or np.int64, the type of the index arrays,
+        'auto' means int32 if the indices fit in it
+    ftype : np.float64 or np.float32, the type of the work arrays of the
+        assembly
+    """
+    if itype is not None:
+        _policy['itype'] = _check_itype(itype)
+    if ftype is not None:
+        _policy['ftype'] = _check_ftype(ftype)
+
+
+def get_precision():
+    """
+    Returns
+    -------
+    itype, ftype : the current policy
+    """
+    return _policy['itype'], _policy['ftype']
+
+
+@contextmanager
+def precision(itype=None, ftype=None):
+    """
+    The context manager which sets the precision policy in its body.
+    """
+    old = dict(_policy)
+    try:
+        set_precision(itype=itype, ftype=ftype)
+        yield
+    finally:
+        _policy.update(old)
+
+
+def index_type(n):
+    """
+    The type of the index arrays whose values are in [0, n].
+
+    Parameters
+    ----------
+    n : int, the upper bound of the indices, e.g. the number of the nodes of
+        the cell array, and of the sizes of the arrays which are indexed
+    """
+    itype = _policy['itype']
+    if isinstance(itype, str): # auto
+        return np.dtype(np.int32) if n <= INT32_MAX else np.dtype(np.int64)
+    if (itype == np.int32) and (n > INT32_MAX):
+        raise ValueError("The indices up to {} do not fit in int32!".format(n))
+    return itype
+
+
+def index_array(a, n=None):
+    """
+    Convert `a` into an index array of the policy, without a copy if it is
+    already of the type.
+
+    Parameters
+    ----------
+    a : array_like, the indices
+    n : the upper bound of the indices, the default is the maximum of `a`
+        and its size
+    """
+    a = np.asarray(a)
+    if n is None:
+        n = max(a.size, int(a.max()) if a.size > 0 else 0)
+    return a.astype(index_type(n), copy=False)
+
+
+def work_type():
+    """
+    The float type of the work arrays of the assembly.
+    """
+    return _policy['ftype']
+
+
+def _setup_from_environment():
+    itype = os.environ.get('FEALPY_ITYPE', '')
+    if itype != '':
+        set_precision(itype=itype)
+    ftype = os.environ.get('FEALPY_FTYPE', '')
+    if ftype != '':
+        set_precision(ftype=ftype)
+
+
+_setup_from_environment()
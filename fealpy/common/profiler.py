@@ -0,0 +1,364 @@
+"""
+Profiler
+========
+
+A lightweight instrumentation layer with named, nested timing regions,
+counters and optional memory sampling.
+
+The library code reports into the global `profiler`
+
+    with profiler.region('assembly'):
+        A = space.stiff_matrix()
+        profiler.count('nnz', A.nnz)
+
+and the regions are nested by the call stack, e.g. the region
+'solve/assembly/stiff_matrix'. A disabled profiler (the default) returns a
+shared no-op region and ignores the counters, so the cost is one attribute
+check per call.
+
+Every region records the number of calls, the total, the minimal and the
+maximal time, the time spent in its own code (without the child regions),
+the sums of its counters and, if the memory sampling is on, the peak of the
+memory traced by `tracemalloc` in it. The results can be printed by
+`report()` or exported by `to_json()`, `to_csv()` and `to_chrome_trace()`;
+the last one can be opened in `chrome://tracing` or Perfetto.
+
+The profiler can be switched on without changing the code by the
+environment variables
+
+    FEALPY_PROFILE=1                # print the report at exit
+    FEALPY_PROFILE=run.csv          # write the CSV table at exit
+    FEALPY_PROFILE=run.json         # write the JSON summary at exit
+    FEALPY_PROFILE=run.trace.json   # write the Chrome trace at exit
+    FEALPY_PROFILE_MEMORY=1         # sample the memory of every region
+
+Examples
+--------
+>> from fealpy.common.profiler import profiler
+>> profiler.enable()
+>> model.solve()
+>> print(profiler.report())
+>> profiler.to_chrome_trace('solve.trace.json')
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+import tracemalloc
+
+
+class NullRegion():
+    """
+    The region of a disabled profiler, which does nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_REGION = NullRegion()
+
+
+class RegionStat():
+    __slots__ = ('calls', 'total', 'min', 'max', 'child', 'counters', 'peak')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.child = 0.0
+        self.counters = {}
+        self.peak = 0
+
+    def to_dict(self):
+        return {'calls': self.calls, 'total': self.total, 'min': self.min,
+                'max': self.max, 'self': self.total - self.child,
+                'counters': dict(self.counters), 'peakmem': self.peak}
+
+
+class Region():
+    __slots__ = ('profiler', 'name', 'path', 'start', 'child', 'counters',
+            'peak')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *args):
+        self.profiler._exit(self)
+        return False
+
+
+class Profiler():
+    def __init__(self, maxevents=100000):
+        """
+        Parameters
+        ----------
+        maxevents : the maximal number of the stored events of the Chrome
+            trace, the later regions are only counted in the statistics
+        """
+        self.enabled = False
+        self.memory = False
+        self.maxevents = maxevents
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def enable(self, memory=False):
+        """
+        Switch on the profiler.
+
+        Parameters
+        ----------
+        memory : bool, whether to sample the memory by `tracemalloc`, which
+            slows down the allocations
+        """
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def reset(self):
+        """
+        Clear all the records.
+        """
+        with self.lock:
+            self.stats = {}
+            self.counters = {}
+            self.events = []
+            self.t0 = time.perf_counter()
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def region(self, name):
+        """
+        The timing region `name`, which is used as a context manager.
+        """
+        if not self.enabled:
+            return NULL_REGION
+        return Region(self, name)
+
+    def timed(self, name=None):
+        """
+        The decorator which runs the function in the region `name`, the
+        default name is the qualified name of the function.
+        """
+        def decorator(f):
+            rname = f.__qualname__ if name is None else name
+
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                with Region(self, rname):
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """
+        Add `value` to the counter `name` of the current region.
+        """
+        if not self.enabled:
+            return
+        stack = self._stack()
+        counters = stack[-1].counters if len(stack) > 0 else self.counters
+        counters[name] = counters.get(name, 0) + value
+
+    def callback(self, name='iterations'):
+        """
+        The callback of the iterative solvers, e.g. `cg(A, b, callback=...)`,
+        which counts the iterations into the counter `name`. It is None if
+        the profiler is disabled.
+        """
+        if not self.enabled:
+            return None
+        def callback(*args):
+            self.count(name)
+        return callback
+
+    def _enter(self, region):
+        stack = self._stack()
+        region.path = region.name if len(stack) == 0 else \
+                stack[-1].path + '/' + region.name
+        region.child = 0.0
+        region.counters = {}
+        region.peak = 0
+        if self.memory and tracemalloc.is_tracing():
+            # keep the peak of the parent before the peak is reset
+            if len(stack) > 0:
+                stack[-1].peak = max(stack[-1].peak,
+                        tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(region)
+        region.start = time.perf_counter()
+
+    def _exit(self, region):
+        end = time.perf_counter()
+        stack = self._stack()
+        stack.pop()
+        dt = end - region.start
+        if self.memory and tracemalloc.is_tracing():
+            region.peak = max(region.peak, tracemalloc.get_traced_memory()[1])
+        if len(stack) > 0:
+            parent = stack[-1]
+            parent.child += dt
+            parent.peak = max(parent.peak, region.peak)
+
+        with self.lock:
+            stat = self.stats.get(region.path)
+            if stat is None:
+                stat = self.stats[region.path] = RegionStat()
+            stat.calls += 1
+            stat.total += dt
+            stat.min = min(stat.min, dt)
+            stat.max = max(stat.max, dt)
+            stat.child += region.child
+            stat.peak = max(stat.peak, region.peak)
+            for key, val in region.counters.items():
+                stat.counters[key] = stat.counters.get(key, 0) + val
+            if len(self.events) < self.maxevents:
+                self.events.append((region.name, region.path,
+                    region.start - self.t0, dt, threading.get_ident(),
+                    region.counters, region.peak))
+
+    def summary(self):
+        """
+        The statistics of all regions.
+
+        Returns
+        -------
+        summary : dict, path -> dict with the keys 'calls', 'total', 'min',
+            'max', 'self', 'counters' and 'peakmem', the times are in seconds
+            and the memory in bytes
+        """
+        with self.lock:
+            return {path: stat.to_dict() for path, stat in self.stats.items()}
+
+    def report(self):
+        """
+        The table of the statistics of all regions.
+        """
+        summary = self.summary()
+        lines = ['{:>8} {:>12} {:>12} {:>12}  {}'.format('calls', 'total(s)',
+            'self(s)', 'peakmem', 'region')]
+        for path in sorted(summary):
+            s = summary[path]
+            depth = path.count('/')
+            name = '  '*depth + path.rsplit('/', 1)[-1]
+            counters = ', '.join('{}={}'.format(k, v) for k, v in
+                    sorted(s['counters'].items()))
+            lines.append('{:>8} {:>12.6f} {:>12.6f} {:>12}  {}{}'.format(
+                s['calls'], s['total'], s['self'], s['peakmem'], name,
+                '  [' + counters + ']' if counters else ''))
+        if len(self.counters) > 0:
+            lines.append('counters: ' + ', '.join('{}={}'.format(k, v)
+                for k, v in sorted(self.counters.items())))
+        return '\n'.join(lines)
+
+    def to_json(self, fname):
+        """
+        Write the statistics and the global counters into a json file.
+        """
+        data = {'regions': self.summary(), 'counters': dict(self.counters)}
+        with open(fname, 'w') as f:
+            json.dump(data, f, indent=1, default=_to_builtin)
+
+    def to_csv(self, fname):
+        """
+        Write the statistics into a CSV file, one row per region and one
+        column per counter.
+        """
+        import csv
+        summary = self.summary()
+        keys = sorted({k for s in summary.values() for k in s['counters']})
+        with open(fname, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['region', 'calls', 'total', 'self', 'min', 'max',
+                'peakmem'] + keys)
+            for path in sorted(summary):
+                s = summary[path]
+                writer.writerow([path, s['calls'], s['total'], s['self'],
+                    s['min'], s['max'], s['peakmem']] +
+                    [_to_builtin(s['counters'].get(k, '')) for k in keys])
+
+    def to_chrome_trace(self, fname):
+        """
+        Write the regions as the complete events of the Chrome trace format.
+        """
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+        trace = []
+        for name, path, start, dt, tid, counters, peak in events:
+            args = dict(counters)
+            args['path'] = path
+            if peak > 0:
+                args['peakmem'] = peak
+            trace.append({'name': name, 'ph': 'X', 'ts': start*1e6,
+                'dur': dt*1e6, 'pid': pid, 'tid': tid, 'args': args})
+        with open(fname, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f,
+                    default=_to_builtin)
+
+    def save(self, fname):
+        """
+        Write the results, the format is chosen by the file name:
+        '.csv', '.trace.json' (Chrome trace) or '.json'.
+        """
+        if fname.endswith('.csv'):
+            self.to_csv(fname)
+        elif fname.endswith('.trace.json'):
+            self.to_chrome_trace(fname)
+        else:
+            self.to_json(fname)
+
+
+def _to_builtin(val):
+    # the numpy integers and floats in the counters
+    if hasattr(val, 'item'):
+        return val.item()
+    return val
+
+
+profiler = Profiler()
+
+
+def _setup_from_environment():
+    value = os.environ.get('FEALPY_PROFILE', '')
+    if value in {'', '0'}:
+        return
+    memory = os.environ.get('FEALPY_PROFILE_MEMORY', '') not in {'', '0'}
+    profiler.enable(memory=memory)
+
+    def output():
+        if value == '1':
+            print(profiler.report(), file=sys.stderr)
+        else:
+            profiler.save(value)
+    atexit.register(output)
+
+
+_setup_from_environment()
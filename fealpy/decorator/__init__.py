@@ -1 +1,2 @@
 from .coordinates import *
+from .cacheable import cacheable
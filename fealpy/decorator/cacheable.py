@@ -0,0 +1,12 @@
+"""
+
+Notes
+-----
+The `cacheable` decorator marks a pure function of the points, whose values
+at the quadrature points can be cached, see
+`fealpy.quadrature.QuadraturePointCache`.
+"""
+
+def cacheable(func):
+    func.__dict__['cacheable'] = True
+    return func
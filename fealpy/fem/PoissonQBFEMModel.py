@@ -7,7 +7,7 @@ from ..boundarycondition import DirichletBC
 
 from scipy.sparse.linalg import spsolve
 
-from timeit import default_timer as timer
+from ..common.profiler import profiler
 
 
 class PoissonQBFEMModel(object):
@@ -81,23 +81,21 @@ class PoissonQBFEMModel(object):
     def get_right_vector(self):
         return self.space.source_vector(self.pde.source)
 
+    @profiler.timed()
     def solve(self):
         bc = DirichletBC(self.space, self.pde.dirichlet)
 
-        start = timer()
-        A = self.get_left_matrix()
-        b = self.get_right_vector()
-        end = timer()
+        with profiler.region('assembly'):
+            A = self.get_left_matrix()
+            b = self.get_right_vector()
+            profiler.count('dofs', A.shape[0])
+            profiler.count('nnz', A.nnz)
         self.A = A
 
-        print("Construct linear system time:", end - start)
-
         AD, b = bc.apply(A, b)
 
-        start = timer()
-        self.uh[:] = spsolve(AD, b)
-        end = timer()
-        print("Solve time:", end-start)
+        with profiler.region('solve'):
+            self.uh[:] = spsolve(AD, b)
 
         ls = {'A': AD, 'b': b, 'solution': self.uh.copy()}
 
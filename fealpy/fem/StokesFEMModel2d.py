@@ -0,0 +1,164 @@
+import numpy as np
+from scipy.sparse import csr_matrix, bmat, block_diag, spdiags
+from scipy.sparse.linalg import spsolve
+
+from ..functionspace import LagrangeFiniteElementSpace
+from ..solver.saddle_point_preconditioner import saddle_point_solve
+from ..common.profiler import profiler
+
+
+class StokesFEMModel2d():
+    """
+    The Taylor-Hood finite element method P_p-P_{p-1} of the Stokes problem
+
+        -nu \Delta u + \nabla p = f, div u = 0 in \Omega,
+                              u = g on the boundary,
+
+    and the saddle point system
+
+        [A  B^T][u] = [F]
+        [B   0 ][p]   [G]
+
+    with (B u)_i = -(div u, q_i).
+
+    Examples
+    --------
+    >> fem = StokesFEMModel2d(pde, mesh, p=2)
+    >> info = fem.block_solve(ptype='lower', schur='mass')
+    >> print(fem.velocity_L2_error(), fem.pressure_L2_error())
+    """
+    def __init__(self, pde, mesh, p=2, nu=1.0, q=None):
+        self.vspace = LagrangeFiniteElementSpace(mesh, p, q=q)
+        self.pspace = LagrangeFiniteElementSpace(mesh, p-1, q=q)
+        self.mesh = self.vspace.mesh
+        self.pde = pde
+        self.nu = nu
+        self.uh = self.vspace.function(dim=2)
+        self.ph = self.pspace.function()
+
+    def get_left_matrix(self):
+        """
+        Returns
+        -------
+        A : (2*vgdof, 2*vgdof), the two components of the velocity are
+            numbered one after the other
+        B : (pgdof, 2*vgdof)
+        """
+        vspace = self.vspace
+        pspace = self.pspace
+        vgdof = vspace.number_of_global_dofs()
+        pgdof = pspace.number_of_global_dofs()
+
+        S = vspace.stiff_matrix()
+        A = self.nu*block_diag((S, S), format='csr')
+
+        bcs, ws = vspace.integrator.get_quadrature_points_and_weights()
+        phi = pspace.basis(bcs)[:, 0, :] # (NQ, pldof)
+        gphi = vspace.grad_basis(bcs) # (NQ, NC, vldof, 2)
+        val = np.einsum('q, qi, qcjk, c->cikj', ws, phi, gphi,
+                vspace.cellmeasure, optimize=True) # (NC, pldof, 2, vldof)
+
+        vcell2dof = vspace.cell_to_dof()
+        pcell2dof = pspace.cell_to_dof()
+        J = np.stack((vcell2dof, vcell2dof + vgdof), axis=1) # (NC, 2, vldof)
+        I = np.broadcast_to(pcell2dof[:, :, None, None], shape=val.shape)
+        J = np.broadcast_to(J[:, None, :, :], shape=val.shape)
+        B = csr_matrix((-val.reshape(-1), (I.flat, J.flat)), shape=(pgdof, 2*vgdof))
+        return A, B
+
+    def get_right_vector(self):
+        F = self.vspace.source_vector(self.pde.source, dim=2)
+        G = np.zeros(self.pspace.number_of_global_dofs(), dtype=self.mesh.ftype)
+        return F.T.reshape(-1), G
+
+    def apply_boundary_condition(self, A, B, F, G):
+        """
+        Eliminate the Dirichlet dofs of the velocity, and make G orthogonal
+        to the constant pressure, which is the kernel of B^T.
+        """
+        vgdof = self.vspace.number_of_global_dofs()
+        uh = self.vspace.function(dim=2)
+        isBdDof = self.vspace.set_dirichlet_bc(uh, self.pde.dirichlet)
+        isBdDof = np.r_[isBdDof, isBdDof]
+        ub = uh.T.reshape(-1)
+
+        F = F - A@ub
+        G = G - B@ub
+        F[isBdDof] = ub[isBdDof]
+        G -= np.mean(G)
+
+        T = spdiags(1.0*isBdDof, 0, 2*vgdof, 2*vgdof)
+        D = spdiags(1.0 - isBdDof, 0, 2*vgdof, 2*vgdof)
+        A = (D@A@D + T).tocsr()
+        B = (B@D).tocsr()
+        return A, B, F, G
+
+    def pressure_mass_matrix(self):
+        """
+        The pressure mass matrix scaled by 1/nu, which is spectrally
+        equivalent to the Schur complement B A^{-1} B^T.
+        """
+        return self.pspace.mass_matrix()/self.nu
+
+    def set_solution(self, u, p):
+        vgdof = self.vspace.number_of_global_dofs()
+        self.uh[:] = u.reshape(2, vgdof).T
+        # the pressure with zero mean
+        M = self.pspace.mass_matrix()
+        self.ph[:] = p - np.sum(M@p)/np.sum(M)
+
+    @profiler.timed()
+    def solve(self):
+        """
+        Solve the saddle point system by the direct solver, the first
+        pressure dof is fixed to remove the kernel.
+        """
+        with profiler.region('assembly'):
+            A, B = self.get_left_matrix()
+            F, G = self.get_right_vector()
+            A, B, F, G = self.apply_boundary_condition(A, B, F, G)
+            K = bmat([[A, B.T], [B, None]], format='lil')
+            n = A.shape[0]
+            K[n, :] = 0
+            K[:, n] = 0
+            K[n, n] = 1
+            b = np.r_[F, G]
+            b[n] = 0
+            profiler.count('dofs', K.shape[0])
+
+        with profiler.region('solve'):
+            x = spsolve(K.tocsr(), b)
+        self.set_solution(x[:n], x[n:])
+
+    @profiler.timed()
+    def block_solve(self, ptype='lower', schur='mass', tol=1e-8, maxit=None,
+            asolver='amg', ssolver='jacobi'):
+        """
+        Solve the saddle point system by the preconditioned Krylov method
+        with the block preconditioner, see `SaddlePointPreconditioner`.
+
+        Returns
+        -------
+        info : dict, the exit code and the number of iterations
+        """
+        with profiler.region('assembly'):
+            A, B = self.get_left_matrix()
+            F, G = self.get_right_vector()
+            A, B, F, G = self.apply_boundary_condition(A, B, F, G)
+            profiler.count('dofs', A.shape[0] + B.shape[0])
+            profiler.count('nnz', A.nnz + 2*B.nnz)
+            Mp = self.pressure_mass_matrix() if schur == 'mass' else None
+
+        with profiler.region('solve'):
+            u, p, info = saddle_point_solve(A, B, F, G, ptype=ptype,
+                    schur=schur, asolver=asolver, ssolver=ssolver, Mp=Mp,
+                    tol=tol, maxit=maxit)
+            profiler.count('iterations', info['iterations'])
+        self.set_solution(u, p)
+        return info
+
+    def velocity_L2_error(self):
+        return self.vspace.integralalg.L2_error(self.pde.velocity, self.uh)
+
+    def pressure_L2_error(self):
+        return self.pspace.integralalg.L2_error(self.pde.pressure, self.ph)
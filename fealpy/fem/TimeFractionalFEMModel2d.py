@@ -1,87 +1,295 @@
 import numpy as np
 
-from ..functionspace.lagrange_fem_space import LagrangeFiniteElementSpace
-from ..boundarycondition import DirichletBC
+from ..functionspace import LagrangeFiniteElementSpace
+from ..decorator import barycentric
 from scipy.sparse.linalg import spsolve
-from scipy.special import gamma, beta
+from scipy.special import gamma
+from scipy.linalg import hankel
+from ..common.profiler import profiler
 
 class TimeFractionalFEMModel2d():
+    """
+    The finite element method for the time fractional Fisher equation
+
+        D_t^alpha u - \\Delta u + u + u^2 = f,
+
+    where D_t^alpha is the Caputo derivative of order 0 < alpha < 1, which is
+    discretized by the L1 scheme on the uniform time mesh.
+
+    Notes
+    -----
+    The L1 scheme at t_n is
+
+        D_t^alpha u(t_n) = c0 (u^n - u^{n-1}) + h^n, c0 = 1/(Gamma(2-alpha) dt^alpha),
+
+    where the history part h^n depends on all the increments
+    du^k = u^k - u^{k-1}, k = 1, ..., n-1. The direct evaluation (`solve`)
+    needs O(NT^2) work and O(NT) vectors. `fast_solve` approximates the kernel
+    t^{-alpha} on [dt, t1] by a sum of exponentials
+
+        t^{-alpha} = sum_i w_i exp(-s_i t),
+
+    so the history part is kept in O(log NT) vectors, every one of which is
+    updated by a two-term recurrence at every time step.
+    """
 
     def __init__(self, pde, mesh, p=1, q=3):
         self.space = LagrangeFiniteElementSpace(mesh, p, q=q)
         self.mesh = self.space.mesh
         self.pde = pde
 
+    @profiler.timed()
     def solve(self, t0, t1, NT):
         """
+        Solve the equation by the direct L1 scheme.
+
         Parameters
         ----------
         t0 : the start time
         t1 : the stop time
         NT : the number of segments on [t0, t1]
+
+        Returns
+        -------
+        uh : the solution at t1
         """
-        A = self.space.stiff_matrix()
-        M = self.space.mass_matrix()
+        alpha = self.pde.alpha
         timeline = self.pde.time_mesh(t0, t1, NT)
-        dt = timeline.get_current_time_step_length()
+        dt = timeline.current_time_step_length()
+        c0 = 1/(gamma(2 - alpha)*dt**alpha)
+
+        # a_j = (j+1)^{1-alpha} - j^{1-alpha}
+        a = np.arange(NT + 1, dtype=np.float)**(1 - alpha)
+        a = a[1:] - a[:-1]
 
-    def fast_solve(self, t0, t1, NT):
+        gdof = self.space.number_of_global_dofs()
+        du = np.zeros((NT, gdof), dtype=np.float) # all the increments
+        uh = self.space.interpolation(self.pde.init_value)
+        timeline.reset()
+        while not timeline.stop():
+            n = timeline.current_time_level_index() + 1
+            # h^n = c0 sum_{k=1}^{n-1} a_{n-k} du^k
+            with profiler.region('history'):
+                h = c0*(a[n-1:0:-1]@du[:n-1])
+            u0 = uh.copy()
+            uh = self.time_step(uh, h, c0, timeline.next_time_level())
+            du[n-1] = uh - u0
+            timeline.advance()
+        self.uh = uh
+        self.t1 = t1
+        return uh
+
+    @profiler.timed()
+    def fast_solve(self, t0, t1, NT, eps=1e-10):
         """
+        Solve the equation by the L1 scheme with the sum-of-exponentials
+        approximation of the history part.
+
         Parameters
         ----------
         t0 : the start time
         t1 : the stop time
         NT : the number of time segments on [t0, t1]
+        eps : the relative error of the sum-of-exponentials approximation
+
+        Returns
+        -------
+        uh : the solution at t1
         """
-        NL = NT + 1 # the number of time levels
+        alpha = self.pde.alpha
         timeline = self.pde.time_mesh(t0, t1, NT)
-        dt = timeline.get_current_time_step_length()
+        dt = timeline.current_time_step_length()
+        c0 = 1/(gamma(2 - alpha)*dt**alpha)
+
+        s, w = self.sum_of_exp_approximation(alpha, dt, t1 - t0, eps=eps)
+        self.nexp = len(s)
+        # H_i^n = e^{-s_i dt} H_i^{n-1} + c_i du^{n-1}
+        e = np.exp(-s*dt)
+        c = -e*np.expm1(-s*dt)/(s*dt)
+        w = w/gamma(1 - alpha)
+
+        gdof = self.space.number_of_global_dofs()
+        H = np.zeros((len(s), gdof), dtype=np.float)
+        uh = self.space.interpolation(self.pde.init_value)
+        du = np.zeros(gdof, dtype=np.float)
+        timeline.reset()
+        profiler.count('exponentials', len(s))
+        while not timeline.stop():
+            with profiler.region('history'):
+                H *= e[:, None]
+                H += c[:, None]*du
+            u0 = uh.copy()
+            uh = self.time_step(uh, w@H, c0, timeline.next_time_level())
+            du = uh - u0
+            timeline.advance()
+        self.uh = uh
+        self.t1 = t1
+        return uh
 
+    @profiler.timed()
+    def time_step(self, u0, h, c0, t):
+        """
+        Solve c0 M(u - u0) + M h + A u + M u + N(u) = F at the time t by the
+        Newton method, where N(u) is the load vector of u^2.
+
+        Parameters
+        ----------
+        u0 : the solution at the last time level
+        h : the history part of the Caputo derivative
+        c0 : the coefficient of the local part
+        t : the current time
+        """
+        pde = self.pde
         space = self.space
-        gdof = space.number_of_global_dofs()
+        if not hasattr(self, 'A'):
+            self.A = space.stiff_matrix()
+            self.M = space.mass_matrix()
+            self.isBdDof = space.boundary_dof()
+        A = self.A
+        M = self.M
+        isFreeDof = ~self.isBdDof
+
+        L = (c0 + 1)*M + A
+        F = space.source_vector(lambda p: pde.source(p, t))
+        F += M@(c0*u0 - h)
+
+        uh = space.function(array=u0.copy())
+        space.set_dirichlet_bc(uh, lambda p: pde.dirichlet(p, t))
 
-        A = self.space.stiff_matrix()
-        M = self.space.mass_matrix()
+        @barycentric
+        def square(bcs):
+            return uh(bcs)**2
 
-        self.uI = self.space.function(dim=NL)
-        self.uI[:, 0] = self.space.interpolation(self.pde.init_value)
+        @barycentric
+        def jacobian(bcs):
+            return 2*uh(bcs)
 
+        r0 = np.linalg.norm(F[isFreeDof])
+        for i in range(20):
+            R = F - L@uh - space.source_vector(square)
+            if np.linalg.norm(R[isFreeDof]) <= 1e-12*r0:
+                break
+            J = L + space.mass_matrix(cfun=jacobian, barycenter=True)
+            uh[isFreeDof] += spsolve(J[isFreeDof, :][:, isFreeDof], R[isFreeDof])
+            profiler.count('newton')
+        return uh
 
     def sum_of_exp_approximation(self, b, dt, t1, eps=1e-10):
         """
+        The sum-of-exponentials approximation of t^{-b} on [dt, t1].
+
         Parameters
         ----------
-        b:
+        b : the power of the kernel, b > 0
         dt : the time step length
-        t1 : the stop time level
-        reps :
+        t1 : the length of the time interval
+        eps : the relative error
+
+        Returns
+        -------
+        s : (NE, ), the positive exponents
+        w : (NE, ), the positive weights, t^{-b} = sum_i w_i exp(-s_i t)
+
+        Notes
+        -----
+        On [d, 1] with d = dt/t1, the integral
+
+            t^{-b} = 1/Gamma(b) \\int exp(-t e^x + b x) dx
+
+        is discretized by the trapezoidal rule with the step h. The nodes
+        with x < 0 are merged by the Prony method and the ones with x >= 0 by
+        the balanced truncation (square root method), and the number of
+        exponentials is O(log(1/eps)(log log(1/eps) + log(t1/dt))). See
+
+            S. Jiang, J. Zhang, Q. Zhang, Z. Zhang, Fast evaluation of the
+            Caputo fractional derivative and its applications to fractional
+            diffusion equations, Commun. Comput. Phys. 21 (2017), 650-678.
         """
         pi = np.pi
         d = dt/t1
         h = 2*pi/(np.log(3) + b*np.log(1/np.cos(1)) + np.log(1/eps))
-        tlower = np.log(eps*gamma(1 + b))
-        tupper = np.log(1/d) + np.log(np.log(1/eps)) + np.log(b) + 1/2
+        tlower = np.log(eps*gamma(1 + b))/b
+        tupper = np.log(1/d) + np.log(np.log(1/eps)) + np.log(max(b, 1)) + 1/2
 
-        M = np.floor(tlower/h) - 30;
+        M = np.floor(tlower/h)
         N = np.ceil(tupper/h)
         n1 = np.arange(M, 0)
 
         xs1 = -np.exp(h*n1)
         ws1 = h/gamma(b)*np.exp(b*h*n1)
-        xs1new, ws1new = prony(xs1, ws1)
+        xs1new, ws1new = self.prony(xs1, ws1, eps)
 
         n2 = np.arange(0, N+1)
         xs2 = -np.exp(h*n2)
         ws2 = h/gamma(b)*np.exp(b*h*n2)
+        xs2new, ws2new = self.square_root(xs2, ws2, eps, d, b)
 
-        wn2, pn2, bound = squareroot(xs2, ws2, eps)
-        pass
+        s = -np.r_[xs1new, xs2new]/t1
+        w = np.r_[ws1new, ws2new]/t1**b
+        return s, w
 
-    def prony(self, xs, ws):
-        pass
+    def prony(self, xs, ws, eps):
+        """
+        Merge the slowly decaying exponentials sum_j ws_j exp(xs_j t),
+        -1 <= xs_j < 0, into the fewest ones with the absolute error eps on
+        [0, 1].
 
-    def square_root(xs, ws, eps):
-        pass
+        Notes
+        -----
+        The new exponents are the roots of the Prony polynomial of the
+        moments m_k = sum_j ws_j xs_j^k, and the new weights match the
+        moments m_0, ..., m_{2p-1}.
+        """
+        NS = len(xs)
+        t = np.linspace(0, 1, 201)
+        f = np.exp(np.outer(t, xs))@ws
+        m = ws@(xs[:, None]**np.arange(2*NS))
+        for p in range(1, NS):
+            H = hankel(m[:p], m[p-1:2*p-1])
+            q = np.linalg.solve(H, -m[p:2*p])
+            z = np.roots(np.r_[1, q[::-1]])
+            if np.any(z.imag != 0) or np.any(z.real >= 0):
+                continue
+            z = z.real
+            V = z**np.arange(2*p)[:, None]
+            w = np.linalg.lstsq(V, m[:2*p], rcond=None)[0]
+            if np.max(np.abs(np.exp(np.outer(t, z))@w - f)) < eps:
+                return z, w
+        return xs, ws
+
+    def square_root(self, xs, ws, eps, d, b):
+        """
+        Reduce the fast decaying exponentials sum_j ws_j exp(xs_j t), xs_j < 0,
+        by the balanced truncation with the relative error eps of t^{-b} on
+        [d, 1].
+
+        Notes
+        -----
+        The sum is the impulse response of the diagonal system
+        (A, B, B^T) with A = diag(xs), B = sqrt(ws), whose two Gramians are
+        the same P_ij = B_i B_j/(-(xs_i + xs_j)). The system is balanced by
+        the eigenvectors V of P, and the truncated system V_k^T A V_k is
+        diagonalized again to get the new exponents and weights.
+        """
+        B = np.sqrt(ws)
+        P = np.outer(B, B)/(-(xs[:, None] + xs[None, :]))
+        sigma, V = np.linalg.eigh(P)
+        V = V[:, ::-1] # decreasing Hankel singular values
+
+        t = np.geomspace(d, 1, 501)
+        f = np.exp(np.outer(t, xs))@ws
+        for k in range(1, len(xs)+1):
+            A = V[:, :k].T@(xs[:, None]*V[:, :k])
+            z, W = np.linalg.eigh(A)
+            w = (W.T@(V[:, :k].T@B))**2
+            if np.max(np.abs(np.exp(np.outer(t, z))@w - f)*t**b) < eps:
+                break
+        return z, w
 
     def error(self):
-        pass
+        """
+        The L2 error of the solution at the stop time.
+        """
+        t1 = self.t1
+        u = lambda p: self.pde.solution(p, t1)
+        return self.space.integralalg.L2_error(u, self.uh)
@@ -10,3 +10,4 @@ This module provide many fem model
 from .PoissonFEMModel import PoissonFEMModel
 from .EllipticEignvalueFEMModel import EllipticEignvalueFEMModel
 from .SurfacePoissonFEMModel import SurfacePoissonFEMModel
+from .StokesFEMModel2d import StokesFEMModel2d
@@ -3,6 +3,7 @@ from numpy.linalg import inv
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
 
 from .Function import Function
+from ..common import ranges
 from ..quadrature import GaussLobattoQuadrature
 from ..quadrature import GaussLegendreQuadrature
 from ..quadrature import PolygonMeshIntegralAlg
@@ -74,6 +75,18 @@ class CVEMDof2d():
             cell2dof[idx] = NN + NE*(p-1) + np.arange(NC*idof).reshape(NC, idof)
             return cell2dof, cell2dofLocation
 
+    def is_in_cell_local_dof(self):
+        """
+        The flags of the cell interior (moment) dofs in `cell2dof`.
+        """
+        p = self.p
+        NV = self.mesh.number_of_vertices_of_cells()
+        ldof = self.number_of_local_dofs()
+        isInCellDof = np.zeros(self.cell2dofLocation[-1], dtype=np.bool)
+        if p > 1:
+            isInCellDof[ranges(ldof) >= np.repeat(NV*p, ldof)] = True
+        return isInCellDof
+
     def number_of_global_dofs(self):
         mesh = self.mesh
         NE = mesh.number_of_edges()
@@ -241,6 +254,25 @@ class ConformingVirtualElementSpace2d():
         return SS
 
     def stiff_matrix(self, cfun=None):
+        cell2dof, cell2dofLocation = self.cell_to_dof()
+        cd = np.hsplit(cell2dof, cell2dofLocation[1:-1])
+        K = self.cell_stiff_matrix(cfun=cfun)
+
+        f2 = lambda x: np.repeat(x, x.shape[0])
+        f3 = lambda x: np.tile(x, x.shape[0])
+        f4 = lambda x: x.flatten()
+
+        I = np.concatenate(list(map(f2, cd)))
+        J = np.concatenate(list(map(f3, cd)))
+        val = np.concatenate(list(map(f4, K)))
+        gdof = self.number_of_global_dofs()
+        A = csr_matrix((val, (I, J)), shape=(gdof, gdof), dtype=np.float)
+        return A
+
+    def cell_stiff_matrix(self, cfun=None):
+        """
+        The list of the stiffness matrices of all cells.
+        """
         area = self.smspace.cellmeasure
 
         def f(x):
@@ -289,17 +321,7 @@ class ConformingVirtualElementSpace2d():
                 k = cfun(cellbarycenter)
                 f1 = lambda x: (x[1].T@x[2]@x[1] + (np.eye(x[1].shape[1]) - x[0]@x[1]).T@(np.eye(x[1].shape[1]) - x[0]@x[1]))*x[3]
                 K = list(map(f1, zip(DD, PI1, tG, k)))
-
-        f2 = lambda x: np.repeat(x, x.shape[0])
-        f3 = lambda x: np.tile(x, x.shape[0])
-        f4 = lambda x: x.flatten()
-
-        I = np.concatenate(list(map(f2, cd)))
-        J = np.concatenate(list(map(f3, cd)))
-        val = np.concatenate(list(map(f4, K)))
-        gdof = self.number_of_global_dofs()
-        A = csr_matrix((val, (I, J)), shape=(gdof, gdof), dtype=np.float)
-        return A
+        return K
 
     def mass_matrix(self, cfun=None):
         area = self.smspace.cellmeasure
@@ -364,14 +386,20 @@ class ConformingVirtualElementSpace2d():
         M = csr_matrix((val, (I, J)), shape=(gdof, gdof), dtype=np.float)
         return M
 
-    def source_vector(self, f):
+    def cell_source_vector(self, f):
+        """
+        The list of the load vectors of all cells.
+        """
         PI0 = self.PI0
         phi = self.smspace.basis
         def u(x, index):
             return np.einsum('ij, ijm->ijm', f(x), phi(x, index=index))
         bb = self.integralalg.integral(u, celltype=True)
         g = lambda x: x[0].T@x[1]
-        bb = np.concatenate(list(map(g, zip(PI0, bb))))
+        return list(map(g, zip(PI0, bb)))
+
+    def source_vector(self, f):
+        bb = np.concatenate(self.cell_source_vector(f))
         gdof = self.number_of_global_dofs()
         b = np.bincount(self.dof.cell2dof, weights=bb, minlength=gdof)
         return b
@@ -14,6 +14,8 @@ from .femdof import CPLFEMDof1d, CPLFEMDof2d, CPLFEMDof3d
 from .femdof import DPLFEMDof1d, DPLFEMDof2d, DPLFEMDof3d
 
 from ..quadrature import FEMeshIntegralAlg
+from ..common.profiler import profiler
+from ..common.precision import work_type
 
 
 class LagrangeFiniteElementSpace():
@@ -57,6 +59,8 @@ class LagrangeFiniteElementSpace():
         self.spacetype = spacetype
         self.itype = mesh.itype
         self.ftype = mesh.ftype
+        # the float type of the basis tabulations and the element matrices
+        self.wtype = work_type()
 
         q = q if q is not None else p+3 
         self.integralalg = FEMeshIntegralAlg(
@@ -315,7 +319,7 @@ class LagrangeFiniteElementSpace():
         P = 1.0/np.multiply.accumulate(c)
         t = np.arange(0, p)
         shape = bc.shape[:-1]+(p+1, TD+1)
-        A = np.ones(shape, dtype=self.ftype)
+        A = np.ones(shape, dtype=self.wtype)
         A[..., 1:, :] = p*bc[..., np.newaxis, :] - t.reshape(-1, 1)
         np.cumprod(A, axis=-2, out=A)
         A[..., 1:, :] *= P.reshape(-1, 1)
@@ -356,13 +360,13 @@ class LagrangeFiniteElementSpace():
 
         t = np.arange(0, p)
         shape = bc.shape[:-1]+(p+1, TD+1)
-        A = np.ones(shape, dtype=self.ftype)
+        A = np.ones(shape, dtype=self.wtype)
         A[..., 1:, :] = p*bc[..., np.newaxis, :] - t.reshape(-1, 1)
 
         FF = np.einsum('...jk, m->...kjm', A[..., 1:, :], np.ones(p))
         FF[..., range(p), range(p)] = p
         np.cumprod(FF, axis=-2, out=FF)
-        F = np.zeros(shape, dtype=self.ftype)
+        F = np.zeros(shape, dtype=self.wtype)
         F[..., 1:, :] = np.sum(np.tril(FF), axis=-1).swapaxes(-1, -2)
         F[..., 1:, :] *= P.reshape(-1, 1)
 
@@ -373,14 +377,15 @@ class LagrangeFiniteElementSpace():
         M = F[..., multiIndex, range(TD+1)]
         ldof = self.number_of_local_dofs()
         shape = bc.shape[:-1]+(ldof, TD+1)
-        R = np.zeros(shape, dtype=self.ftype)
+        R = np.zeros(shape, dtype=self.wtype)
         for i in range(TD+1):
             idx = list(range(TD+1))
             idx.remove(i)
             R[..., i] = M[..., i]*np.prod(Q[..., idx], axis=-1)
 
         Dlambda = self.mesh.grad_lambda()
-        gphi = np.einsum('...ij, kjm->...kim', R, Dlambda[index, :, :])
+        Dlambda = Dlambda[index, :, :].astype(self.wtype, copy=False)
+        gphi = np.einsum('...ij, kjm->...kim', R, Dlambda)
         return gphi #(..., NC, ldof, GD)
 
     @barycentric
@@ -580,7 +585,27 @@ class LagrangeFiniteElementSpace():
         elif format == 'list':
             return C
 
+    @profiler.timed()
     def stiff_matrix(self, cfun=None):
+        A = self.cell_stiff_matrix(cfun=cfun)
+        cell2dof = self.cell_to_dof()
+        # the index views keep the integer type of cell2dof
+        I = np.broadcast_to(cell2dof[:, :, None], shape=A.shape)
+        J = I.swapaxes(-1, -2)
+        gdof = self.number_of_global_dofs()
+
+        # Construct the stiffness matrix, the element matrices are summed in
+        # the float type of the space
+        A = csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof),
+                dtype=self.ftype)
+        profiler.count('dofs', gdof)
+        profiler.count('nnz', A.nnz)
+        return A
+
+    def cell_stiff_matrix(self, cfun=None):
+        """
+        The stiffness matrices of all cells with shape (NC, ldof, ldof).
+        """
         p = self.p
         GD = self.geo_dimension()
 
@@ -591,8 +616,7 @@ class LagrangeFiniteElementSpace():
         gphi = self.grad_basis(bcs)
 
         if cfun is not None:
-            ps = self.mesh.bc_to_point(bcs)
-            d = cfun(ps)
+            d = self.integralalg.cache.evaluate(cfun, bcs)
 
             if isinstance(d, (int, float)):
                 dgphi = d*gphi
@@ -619,19 +643,14 @@ class LagrangeFiniteElementSpace():
         # Compute the element sitffness matrix
         # ws:(NQ,)
         # dgphi: (NQ, NC, ldof, GD)
+        wtype = self.wtype
         A = np.einsum('i, ijkm, ijpm, j->jkp',
-                ws, dgphi, gphi, self.cellmeasure,
+                ws.astype(wtype, copy=False), dgphi.astype(wtype, copy=False), gphi,
+                self.cellmeasure.astype(wtype, copy=False),
                 optimize=True)
-        cell2dof = self.cell_to_dof()
-        ldof = self.number_of_local_dofs()
-        I = np.einsum('k, ij->ijk', np.ones(ldof), cell2dof)
-        J = I.swapaxes(-1, -2)
-        gdof = self.number_of_global_dofs()
-
-        # Construct the stiffness matrix
-        A = csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof))
         return A
 
+    @profiler.timed()
     def mass_matrix(self, cfun=None, barycenter=False):
         p = self.p
         mesh = self.mesh
@@ -652,8 +671,7 @@ class LagrangeFiniteElementSpace():
             if barycenter is True:
                 d = cfun(bcs) # (NQ, NC)
             else:
-                ps = self.mesh.bc_to_point(bcs) # (NQ, NC, GD)
-                d = cfun(ps) # (NQ, NC)
+                d = self.integralalg.cache.evaluate(cfun, bcs) # (NQ, NC)
 
             if isinstance(d, (int, float)):
                 dphi = d*phi
@@ -670,26 +688,43 @@ class LagrangeFiniteElementSpace():
                         )
         else:
             dphi = phi
+        wtype = self.wtype
         M = np.einsum(
                 'm, mij, mik, i->ijk',
-                ws, dphi, phi, self.cellmeasure,
+                ws.astype(wtype, copy=False), dphi.astype(wtype, copy=False), phi,
+                self.cellmeasure.astype(wtype, copy=False),
                 optimize=True)
 
         cell2dof = self.cell_to_dof()
-        ldof = self.number_of_local_dofs()
-        I = np.einsum('ij, k->ijk',  cell2dof, np.ones(ldof))
+        I = np.broadcast_to(cell2dof[:, :, None], shape=M.shape)
         J = I.swapaxes(-1, -2)
 
         gdof = self.number_of_global_dofs()
-        M = csr_matrix((M.flat, (I.flat, J.flat)), shape=(gdof, gdof))
+        M = csr_matrix((M.flat, (I.flat, J.flat)), shape=(gdof, gdof),
+                dtype=self.ftype)
+        profiler.count('dofs', gdof)
+        profiler.count('nnz', M.nnz)
         return M
 
+    def cell_source_vector(self, f):
+        """
+        The load vectors of all cells with shape (NC, ldof).
+        """
+        bcs, ws = self.integrator.get_quadrature_points_and_weights()
+        fval = self.integralalg.cache.evaluate(f, bcs)
+        phi = self.basis(bcs)
+        if type(fval) in {float, int}:
+            bb = fval*np.einsum('m, mik, i->ik', ws, phi, self.cellmeasure)
+        else:
+            bb = np.einsum('m, mi, mik, i->ik', ws, fval, phi, self.cellmeasure)
+        return bb
+
+    @profiler.timed()
     def source_vector(self, f, dim=None):
         p = self.p
         cellmeasure = self.cellmeasure
         bcs, ws = self.integrator.get_quadrature_points_and_weights()
-        pp = self.mesh.bc_to_point(bcs)
-        fval = f(pp)
+        fval = self.integralalg.cache.evaluate(f, bcs)
 
         gdof = self.number_of_global_dofs()
         shape = gdof if dim is None else (gdof, dim)
@@ -309,40 +309,7 @@ class NonConformingVirtualElementSpace2d():
         return np.zeros(shape, dtype=np.float)
 
     def matrix_H(self):
-        p = self.p
-        mesh = self.mesh
-        node = mesh.entity('node')
-
-        edge = mesh.entity('edge')
-        edge2cell = mesh.ds.edge_to_cell()
-        isInEdge = (edge2cell[:, 0] != edge2cell[:, 1])
-
-        NC = mesh.number_of_cells()
-
-        qf = GaussLegendreQuadrature(p + 1)
-        bcs, ws = qf.get_quadrature_points_and_weights()
-
-        ps = np.einsum('ij, kjm->ikm', bcs, node[edge])
-        phi0 = self.smspace.basis(ps, index=edge2cell[:, 0])
-        phi1 = self.smspace.basis(ps[:, isInEdge, :], index=edge2cell[isInEdge, 1])
-        H0 = np.einsum('i, ijk, ijm->jkm', ws, phi0, phi0)
-        H1 = np.einsum('i, ijk, ijm->jkm', ws, phi1, phi1)
-
-        nm = mesh.edge_normal()
-        b = node[edge[:, 0]] - self.smspace.cellbarycenter[edge2cell[:, 0]]
-        H0 = np.einsum('ij, ij, ikm->ikm', b, nm, H0)
-        b = node[edge[isInEdge, 0]] - self.smspace.cellbarycenter[edge2cell[isInEdge, 1]]
-        H1 = np.einsum('ij, ij, ikm->ikm', b, -nm[isInEdge], H1)
-
-        ldof = self.smspace.number_of_local_dofs()
-        H = np.zeros((NC, ldof, ldof), dtype=np.float)
-        np.add.at(H, edge2cell[:, 0], H0)
-        np.add.at(H, edge2cell[isInEdge, 1], H1)
-
-        multiIndex = self.smspace.dof.multiIndex
-        q = np.sum(multiIndex, axis=1)
-        H /= q + q.reshape(-1, 1) + 2
-        return H
+        return self.smspace.matrix_H()
 
     def matrix_D(self, H):
         p = self.p
@@ -419,6 +419,62 @@ class RaviartThomasFiniteElementSpace2d:
                 cell2dof1=cell2dof1, gdof1=gdof1)
         return D 
 
+    def cell_stiff_matrix(self, c=None, q=None):
+        """
+        The flux mass matrices of all cells with shape (NC, ldof, ldof).
+
+        Parameters
+        ----------
+        c : a number or a function of the points with the values of shape
+            (NQ, NC), e.g. the inverse of the permeability
+        """
+        mesh = self.mesh
+        qf = self.integralalg.cellintegrator if q is None else mesh.integrator(q, 'cell')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        measure = self.integralalg.cellmeasure
+        phi = self.basis(bcs)
+        if c is None:
+            A = np.einsum('i, ijkd, ijmd, j->jkm', ws, phi, phi, measure,
+                    optimize=True)
+        elif isinstance(c, (int, float)):
+            A = c*np.einsum('i, ijkd, ijmd, j->jkm', ws, phi, phi, measure,
+                    optimize=True)
+        else:
+            ps = mesh.bc_to_point(bcs, etype='cell')
+            A = np.einsum('i, ij, ijkd, ijmd, j->jkm', ws, c(ps), phi, phi,
+                    measure, optimize=True)
+        return A
+
+    def cell_div_matrix(self, q=None):
+        """
+        The divergence matrices of all cells with shape (NC, ldof, pldof),
+        where pldof is the number of the local dofs of `self.smspace`.
+        """
+        mesh = self.mesh
+        qf = self.integralalg.cellintegrator if q is None else mesh.integrator(q, 'cell')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        measure = self.integralalg.cellmeasure
+        ps = mesh.bc_to_point(bcs, etype='cell')
+        dphi = self.div_basis(bcs)
+        phi = self.smspace.basis(ps)
+        B = np.einsum('i, ijk, ijm, j->jkm', ws, dphi, phi, measure,
+                optimize=True)
+        return B
+
+    def cell_source_vector(self, f, q=None):
+        """
+        The cell vectors of `source_vector` with shape (NC, pldof).
+        """
+        mesh = self.mesh
+        qf = self.integralalg.cellintegrator if q is None else mesh.integrator(q, 'cell')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        measure = self.integralalg.cellmeasure
+        ps = mesh.bc_to_point(bcs, etype='cell')
+        phi = self.smspace.basis(ps)
+        b = -np.einsum('i, ij, ijm, j->jm', ws, f(ps), phi, measure,
+                optimize=True)
+        return b
+
     def source_vector(self, f, dim=None):
         cell2dof = self.smspace.cell_to_dof()
         gdof = self.smspace.number_of_global_dofs()
@@ -465,11 +465,25 @@ class ScaledMonomialSpace2d():
         return LM, RM 
 
     def stiff_matrix(self, p=None):
+        """
+        Notes
+        -----
+        grad m_a = (a_0 m_{a-e_0}, a_1 m_{a-e_1})/h, so the cell stiffness
+        matrices are the combinations of the monomial integrals of degree
+        2p - 2.
+        """
         p = self.p if p is None else p
-        def f(x, index):
-            gphi = self.grad_basis(x, index=index, p=p)
-            return np.einsum('ijkm, ijpm->ijkp', gphi, gphi)
-        A = self.integralalg.integral(f, celltype=True, q=p+3)
+        M = self.monomial_integral(p=max(2*p-2, 0))
+        multiIndex = self.dof.multi_index_matrix(p=p)
+        alpha = multiIndex[:, None, :] + multiIndex
+        A = 0.0
+        for i in range(2):
+            c = multiIndex[:, None, i]*multiIndex[:, i]
+            beta = alpha.copy()
+            beta[..., i] -= 2
+            idx = np.where(c > 0, self.monomial_index(beta), 0)
+            A = A + c*M[:, idx]
+        A = A/self.cellsize.reshape(-1, 1, 1)**2
         cell2dof = self.cell_to_dof(p=p)
         ldof = self.number_of_local_dofs(p=p, doftype='cell')
         I = np.einsum('k, ij->ijk', np.ones(ldof), cell2dof)
@@ -522,41 +536,46 @@ class ScaledMonomialSpace2d():
         b = np.bincount(cell2dof.flat, weights=bb.flat, minlength=gdof)
         return b
 
-    def matrix_H(self, p=None):
-        p = self.p if p is None else p
-        mesh = self.mesh
-        node = mesh.entity('node')
-
-        edge = mesh.entity('edge')
-        edge2cell = mesh.ds.edge_to_cell()
-
-        isInEdge = (edge2cell[:, 0] != edge2cell[:, 1])
-
-        NC = mesh.number_of_cells()
+    def monomial_index(self, alpha):
+        """
+        The indices of the multi-indices `alpha` in the order of
+        `multi_index_matrix`.
+        """
+        n = np.sum(alpha, axis=-1)
+        return n*(n + 1)//2 + alpha[..., 1]
 
-        qf = GaussLegendreQuadrature(p + 1)
-        bcs, ws = qf.quadpts, qf.weights
-        ps = np.einsum('ij, kjm->ikm', bcs, node[edge])
-        phi0 = self.basis(ps, index=edge2cell[:, 0], p=p)
-        phi1 = self.basis(ps[:, isInEdge, :], index=edge2cell[isInEdge, 1], p=p)
-        H0 = np.einsum('i, ijk, ijm->jkm', ws, phi0, phi0)
-        H1 = np.einsum('i, ijk, ijm->jkm', ws, phi1, phi1)
-
-        nm = mesh.edge_normal()
-        b = node[edge[:, 0]] - self.cellbarycenter[edge2cell[:, 0]]
-        H0 = np.einsum('ij, ij, ikm->ikm', b, nm, H0)
-        b = node[edge[isInEdge, 0]] - self.cellbarycenter[edge2cell[isInEdge, 1]]
-        H1 = np.einsum('ij, ij, ikm->ikm', b, -nm[isInEdge], H1)
+    def monomial_integral(self, p=None):
+        """
+        The exact integrals of all scaled monomials of degree <= p on every
+        cell, shape (NC, ldof).
 
-        ldof = self.number_of_local_dofs(p=p, doftype='cell')
-        H = np.zeros((NC, ldof, ldof), dtype=np.float)
-        np.add.at(H, edge2cell[:, 0], H0)
-        np.add.at(H, edge2cell[isInEdge, 1], H1)
+        Notes
+        -----
+        The monomial m_a is homogeneous of degree |a| in x - x_K, so the
+        integrals only need the edge integrals, see
+        `PolygonMeshIntegralAlg.polynomial_integral`.
+        """
+        p = self.p if p is None else p
+        alg = self.integralalg
+        if not isinstance(alg, PolygonMeshIntegralAlg):
+            alg = PolygonMeshIntegralAlg(self.mesh, p+1,
+                    cellmeasure=self.cellmeasure,
+                    cellbarycenter=self.cellbarycenter)
+        def u(x, index):
+            return self.basis(x, index=index, p=p)
+        q = np.sum(self.dof.multi_index_matrix(p=p), axis=-1)
+        return alg.polynomial_integral(u, q)
 
+    def matrix_H(self, p=None):
+        """
+        The cell mass matrices H[c, i, j] = (m_i, m_j)_K, which are read from
+        the monomial integrals of degree 2p.
+        """
+        p = self.p if p is None else p
+        M = self.monomial_integral(p=2*p)
         multiIndex = self.dof.multi_index_matrix(p=p)
-        q = np.sum(multiIndex, axis=1)
-        H /= q + q.reshape(-1, 1) + 2
-        return H
+        alpha = multiIndex[:, None, :] + multiIndex
+        return M[:, self.monomial_index(alpha)]
 
     def projection(self, F):
         """
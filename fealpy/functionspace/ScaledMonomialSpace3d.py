@@ -15,6 +15,23 @@ class SMDof3d():
         self.p = p # 默认的空间次数
         self.cell2dof = self.cell_to_dof() # 默认的自由度数组
 
+    def multi_index_matrix(self, p=None):
+        """
+        The exponents of the cell basis in the order of
+        `ScaledMonomialSpace3d.basis`.
+
+        Notes
+        -----
+
+        0<-->(0, 0, 0), 1<-->(1, 0, 0), 2<-->(0, 1, 0), 3<-->(0, 0, 1),
+        4<-->(2, 0, 0), 5<-->(1, 1, 0), 6<-->(1, 0, 1), 7<-->(0, 2, 0), ...
+
+        """
+        p = self.p if p is None else p
+        multiIndex = [(a, n-a-c, c) for n in range(p+1) for a in range(n, -1, -1)
+                for c in range(n-a+1)]
+        return np.array(multiIndex, dtype=np.int)
+
     def cell_to_dof(self, p=None):
         mesh = self.mesh
         NC = mesh.number_of_cells()
@@ -420,11 +437,27 @@ class ScaledMonomialSpace3d():
     def mass_matrix(self, p=None):
         return self.cell_mass_matrix(p=p)
 
+    def monomial_index(self, alpha):
+        """
+        The indices of the exponents `alpha` in the order of
+        `SMDof3d.multi_index_matrix`.
+        """
+        n = np.sum(alpha, axis=-1)
+        m = n - alpha[..., 0]
+        return n*(n + 1)*(n + 2)//6 + m*(m + 1)//2 + alpha[..., 2]
+
     def cell_mass_matrix(self, p=None):
         """
+        The cell mass matrices M[c, i, j] = (m_i, m_j)_K.
         """
-        M = self.integralalg.construct_matrix(self.basis)
-        return M 
+        p = self.p if p is None else p
+        if not isinstance(self.integralalg, PolyhedronMeshIntegralAlg):
+            return self.integralalg.construct_matrix(self.basis)
+        M = self.integralalg.monomial_integral(
+                self.dof.multi_index_matrix(p=2*p), h=self.cellsize)
+        multiIndex = self.dof.multi_index_matrix(p=p)
+        alpha = multiIndex[:, None, :] + multiIndex
+        return M[:, self.monomial_index(alpha)]
 
     def face_mass_matrix(self, p=None):
         p = self.p if p is None else p
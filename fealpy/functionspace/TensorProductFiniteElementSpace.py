@@ -1,23 +1,649 @@
 import numpy as np
+from numpy.polynomial import legendre
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import LinearOperator
+
+from .Function import Function
 
 
 """
 This is a space on general convex quad and hex mesh
 """
 
+
+def gauss_lobatto_points(p):
+    """
+    The p + 1 Gauss-Lobatto points on [0, 1].
+    """
+    if p == 0:
+        return np.array([0.5], dtype=np.float)
+    x = legendre.Legendre.basis(p).deriv().roots()
+    x = np.r_[-1.0, np.sort(x.real), 1.0]
+    x[p//2] = 0.0 if p%2 == 0 else x[p//2]
+    return (x + 1)/2
+
+
+def gauss_legendre_points_and_weights(q):
+    """
+    The q Gauss-Legendre points and weights on [0, 1].
+    """
+    x, w = legendre.leggauss(q)
+    return (x + 1)/2, w/2
+
+
+def lagrange_basis_1d(nodes, x):
+    """
+    The values and derivatives of the 1d Lagrange basis on `nodes` at the
+    points `x`.
+
+    Returns
+    -------
+    phi : (len(x), len(nodes))
+    gphi : (len(x), len(nodes))
+    """
+    n = len(nodes)
+    # barycentric weights
+    d = nodes[:, None] - nodes[None, :]
+    d[np.arange(n), np.arange(n)] = 1
+    w = 1/np.prod(d, axis=1)
+
+    phi = np.zeros((len(x), n), dtype=np.float)
+    gphi = np.zeros((len(x), n), dtype=np.float)
+    for i in range(n):
+        t = np.ones(len(x), dtype=np.float)
+        s = np.zeros(len(x), dtype=np.float)
+        for j in range(n):
+            if j == i:
+                continue
+            r = x - nodes[j]
+            s = s*r + t
+            t = t*r
+        phi[:, i] = w[i]*t
+        gphi[:, i] = w[i]*s
+    return phi, gphi
+
+
+def tensor_apply(U, A):
+    """
+    Apply the 1d matrix A[i] along the axis i + 1 of U, i.e. the Kronecker
+    product of A[i] applied to every cell array in U.
+
+    Parameters
+    ----------
+    U : (NC, n_0, n_1, ...)
+    A : list of (m_i, n_i) matrices
+
+    Returns
+    -------
+    V : (NC, m_0, m_1, ...)
+
+    Notes
+    -----
+    This is the sum factorization, which costs O(p^{d+1}) per cell instead of
+    O(p^{2d}) of the product with the full local matrix.
+    """
+    for i, M in enumerate(A):
+        U = np.moveaxis(np.tensordot(U, M, axes=([i + 1], [1])), -1, i + 1)
+    return U
+
+
+class TPFEMDof():
+    """
+    The continuous degrees of freedom of the tensor product Lagrange finite
+    element on quadrangle and hexahedron meshes.
+
+    The local dofs are ordered lexicographically by the multi-index (i, j)
+    or (i, j, k), and the global dofs are ordered by nodes, edges, faces
+    (only in 3d) and cells.
+    """
+    def __init__(self, mesh, p):
+        self.mesh = mesh
+        self.p = p
+        self.TD = mesh.top_dimension()
+        self.multiIndex = self.multi_index_matrix()
+        self.cell2dof = self.cell_to_dof()
+
+    def corner(self):
+        if self.TD == 2:
+            return np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.int)
+        else:
+            return np.array([
+                (0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+                (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)], dtype=np.int)
+
+    def multi_index_matrix(self):
+        p = self.p
+        TD = self.TD
+        idx = np.indices((p + 1, )*TD).reshape(TD, -1).T
+        return idx
+
+    def vertex_weight(self):
+        """
+        The integer weights of every local dof on the cell vertices, which are
+        the Q1 basis values at the dof times p^TD, on the uniform lattice.
+        """
+        p = self.p
+        I = self.multiIndex
+        C = self.corner()
+        W = np.ones((len(I), len(C)), dtype=np.int)
+        for a in range(self.TD):
+            W *= np.where(C[None, :, a] == 1, I[:, None, a], p - I[:, None, a])
+        return W
+
+    def number_of_local_dofs(self, doftype='cell'):
+        p = self.p
+        if doftype in {'cell', self.TD}:
+            return (p + 1)**self.TD
+        elif doftype in {'face', self.TD - 1}:
+            return (p + 1)**(self.TD - 1)
+        elif doftype in {'edge', 1}:
+            return p + 1
+        elif doftype in {'node', 0}:
+            return 1
+
+    def number_of_global_dofs(self):
+        p = self.p
+        mesh = self.mesh
+        NN = mesh.number_of_nodes()
+        NE = mesh.number_of_edges()
+        NC = mesh.number_of_cells()
+        gdof = NN + NE*(p - 1) + NC*(p - 1)**self.TD
+        if self.TD == 3:
+            NF = mesh.number_of_faces()
+            gdof += NF*(p - 1)**2
+        return gdof
+
+    def cell_to_dof(self):
+        p = self.p
+        TD = self.TD
+        mesh = self.mesh
+
+        NN = mesh.number_of_nodes()
+        NE = mesh.number_of_edges()
+        NC = mesh.number_of_cells()
+
+        cell = mesh.entity('cell')
+        edge = mesh.entity('edge')
+        cell2edge = mesh.ds.cell_to_edge()
+        localEdge = mesh.ds.localEdge
+
+        ldof = self.number_of_local_dofs()
+        cell2dof = np.zeros((NC, ldof), dtype=np.int)
+
+        W = self.vertex_weight()
+        isNonZero = W > 0
+        nz = isNonZero.sum(axis=1)
+        s = p**(TD - 1)
+
+        if TD == 3:
+            NF = mesh.number_of_faces()
+            face = mesh.entity('face')
+            cell2face = mesh.ds.cell_to_face()
+            localFace = mesh.ds.localFace
+
+        base = NN + NE*(p - 1)
+        if TD == 3:
+            base += NF*(p - 1)**2
+
+        for i in range(ldof):
+            v, = np.nonzero(isNonZero[i])
+            if nz[i] == 1: # on a vertex
+                cell2dof[:, i] = cell[:, v[0]]
+            elif nz[i] == 2: # on an edge
+                l, = np.nonzero(np.all(np.sort(localEdge, axis=1) == v, axis=1))
+                l = l[0]
+                e = cell2edge[:, l]
+                # the weight at the first vertex of the global edge
+                flag = cell[:, localEdge[l, 0]] == edge[e, 0]
+                w = np.where(flag, W[i, localEdge[l, 0]], W[i, localEdge[l, 1]])//s
+                cell2dof[:, i] = NN + e*(p - 1) + (p - w) - 1
+            elif (nz[i] == 4) and (TD == 3): # on a face
+                l, = np.nonzero(np.all(np.sort(localFace, axis=1) == v, axis=1))
+                l = l[0]
+                f = cell2face[:, l]
+                # the weights at the global face vertices
+                lf = cell[:, localFace[l]]
+                w = np.zeros((NC, 4), dtype=np.int)
+                for k in range(4):
+                    j = np.argmax(lf == face[f, k:k+1], axis=1)
+                    w[:, k] = W[i, localFace[l, j]]//p
+                a = (w[:, 1] + w[:, 2])//p
+                b = (w[:, 2] + w[:, 3])//p
+                cell2dof[:, i] = NN + NE*(p - 1) + f*(p - 1)**2 + (a - 1)*(p - 1) + b - 1
+            else: # in the cell
+                a = 0
+                for k in range(TD):
+                    a = a*(p - 1) + self.multiIndex[i, k] - 1
+                cell2dof[:, i] = base + np.arange(NC)*(p - 1)**TD + a
+        return cell2dof
+
+    def is_on_local_face_dof(self):
+        """
+        Returns
+        -------
+        isFaceDof : (ldof, NFC), isFaceDof[i, j] is True if the i-th local dof
+            is on the j-th local face (or edge in 2d) of the cell.
+        """
+        p = self.p
+        I = self.multiIndex
+        if self.TD == 2:
+            # localEdge: (0, 1), (1, 2), (2, 3), (3, 0)
+            return np.c_[I[:, 1] == 0, I[:, 0] == p, I[:, 1] == p, I[:, 0] == 0]
+        else:
+            # localFace: bottom, top, left, right, front, back
+            return np.c_[I[:, 2] == 0, I[:, 2] == p, I[:, 0] == 0, I[:, 0] == p,
+                    I[:, 1] == 0, I[:, 1] == p]
+
+    def boundary_dof(self, threshold=None):
+        mesh = self.mesh
+        if self.TD == 2:
+            index = mesh.ds.boundary_edge_index()
+            face2cell = mesh.ds.edge_to_cell()
+            etype = 'edge'
+        else:
+            index = mesh.ds.boundary_face_index()
+            face2cell = mesh.ds.face_to_cell()
+            etype = 'face'
+
+        if callable(threshold):
+            bc = mesh.entity_barycenter(etype, index=index)
+            flag = threshold(bc)
+            index = index[flag]
+
+        gdof = self.number_of_global_dofs()
+        isBdDof = np.zeros(gdof, dtype=np.bool)
+        isFaceDof = self.is_on_local_face_dof()
+        for i in range(isFaceDof.shape[1]):
+            c = face2cell[index[face2cell[index, 2] == i], 0]
+            isBdDof[self.cell2dof[c][:, isFaceDof[:, i]]] = True
+        return isBdDof
+
+
 class TensorProductFiniteElementSpace:
     def __init__(self, mesh, p, spacetype='C', q=None):
+        """
+        The tensor product Lagrange finite element space with Gauss-Lobatto
+        nodal basis on `QuadrangleMesh` and `HexahedronMesh`, the geometry of
+        every cell is given by the bilinear (trilinear) map.
+
+        Parameters
+        ----------
+        mesh : QuadrangleMesh or HexahedronMesh
+        p : the degree of the 1d basis
+        q : the number of 1d Gauss-Legendre points, default p + 2
+
+        Notes
+        -----
+        The mass, stiffness and convection operators are applied matrix-free
+        by sum factorization, see `tensor_apply`, whose cost is O(p^{d+1})
+        per cell, and their diagonals are also computed by sum factorization
+        for Jacobi or Chebyshev smoothing.
+        """
         self.p = p
         self.mesh = mesh
 
         self.GD = mesh.node.shape[1]
+        self.TD = mesh.top_dimension()
 
         self.spacetype = spacetype
         self.itype = mesh.itype
         self.ftype = mesh.ftype
 
-        q = q if q is not None else p+3 
-        self.integralalg = FEMeshIntegralAlg(
-                self.mesh, q,
-                cellmeasure=self.cellmeasure)
-        self.integrator = self.integralalg.integrator
+        self.q = q if q is not None else p + 2
+        self.dof = TPFEMDof(mesh, p)
+
+        self.nodes = gauss_lobatto_points(p)
+        self.quadpts, self.weights = gauss_legendre_points_and_weights(self.q)
+        self.B, self.D = lagrange_basis_1d(self.nodes, self.quadpts)
+
+        self.init_geometry()
+
+    def __str__(self):
+        return "Tensor product Lagrange finite element space!"
+
+    def init_geometry(self):
+        """
+        Compute the physical quadrature points, the jacobian determinant and
+        the geometric factors of the stiffness matrix at all tensor
+        quadrature points.
+        """
+        TD = self.TD
+        q = self.q
+        mesh = self.mesh
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        NC = mesh.number_of_cells()
+        C = self.dof.corner()
+
+        xi = self.quadpts
+        n1 = [1 - xi, xi]
+        dn1 = [-np.ones(q), np.ones(q)]
+        V = len(C)
+        N = np.zeros((V, ) + (q, )*TD, dtype=self.ftype)
+        dN = np.zeros((TD, V) + (q, )*TD, dtype=self.ftype)
+        for v in range(V):
+            N[v] = self.outer([n1[c] for c in C[v]])
+            for a in range(TD):
+                dN[a, v] = self.outer(
+                        [dn1[c] if b == a else n1[c] for b, c in enumerate(C[v])])
+        N = N.reshape(V, -1)
+        dN = dN.reshape(TD, V, -1)
+
+        # (NC, NQ, GD) and (NC, NQ, GD, TD)
+        self.points = np.einsum('vq, cvg->cqg', N, node[cell])
+        J = np.einsum('avq, cvg->cqga', dN, node[cell])
+        detJ = np.linalg.det(J)
+        invJ = np.linalg.inv(J) # (NC, NQ, TD, GD)
+
+        w = self.outer([self.weights]*TD).reshape(-1)
+        self.detJ = detJ
+        self.invJ = invJ
+        self.wdetJ = w*detJ # (NC, NQ)
+        self.G = np.einsum('cq, cqag, cqbg->cqab', self.wdetJ, invJ, invJ)
+
+    @staticmethod
+    def outer(v):
+        r = v[0]
+        for a in v[1:]:
+            r = np.multiply.outer(r, a)
+        return r
+
+    def number_of_global_dofs(self):
+        return self.dof.number_of_global_dofs()
+
+    def number_of_local_dofs(self, doftype='cell'):
+        return self.dof.number_of_local_dofs(doftype=doftype)
+
+    def cell_to_dof(self):
+        return self.dof.cell2dof
+
+    def boundary_dof(self, threshold=None):
+        return self.dof.boundary_dof(threshold=threshold)
+
+    def geo_dimension(self):
+        return self.GD
+
+    def top_dimension(self):
+        return self.TD
+
+    def interpolation_points(self):
+        TD = self.TD
+        mesh = self.mesh
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        C = self.dof.corner()
+        xi = self.nodes
+        n1 = [1 - xi, xi]
+        N = np.array([self.outer([n1[c] for c in C[v]]).reshape(-1)
+            for v in range(len(C))])
+        ps = np.einsum('vi, cvg->cig', N, node[cell])
+        gdof = self.number_of_global_dofs()
+        ipoints = np.zeros((gdof, self.GD), dtype=self.ftype)
+        ipoints[self.dof.cell2dof] = ps
+        return ipoints
+
+    def interpolation(self, u, dim=None):
+        ipoint = self.interpolation_points()
+        uI = u(ipoint)
+        return self.function(dim=dim, array=uI)
+
+    def function(self, dim=None, array=None):
+        f = Function(self, dim=dim, array=array)
+        return f
+
+    def array(self, dim=None):
+        gdof = self.number_of_global_dofs()
+        if dim in {None, 1}:
+            shape = gdof
+        elif type(dim) is int:
+            shape = (gdof, dim)
+        elif type(dim) is tuple:
+            shape = (gdof, ) + dim
+        return np.zeros(shape, dtype=self.ftype)
+
+    def basis(self, xi):
+        """
+        The values of the basis at the tensor product points.
+
+        Parameters
+        ----------
+        xi : tuple of TD 1d arrays of the reference coordinates in [0, 1]
+
+        Returns
+        -------
+        phi : (NQ, ldof)
+        """
+        phi = [lagrange_basis_1d(self.nodes, x)[0] for x in xi]
+        return self.kron(phi)
+
+    def grad_basis(self, xi):
+        """
+        The gradients of the basis with respect to the reference coordinates.
+
+        Returns
+        -------
+        gphi : (NQ, ldof, TD)
+        """
+        val = [lagrange_basis_1d(self.nodes, x) for x in xi]
+        TD = self.TD
+        gphi = [self.kron([val[b][1] if b == a else val[b][0] for b in range(TD)])
+                for a in range(TD)]
+        return np.stack(gphi, axis=-1)
+
+    def kron(self, A):
+        r = A[0]
+        for a in A[1:]:
+            r = np.einsum('qi, rj->qrij', r, a).reshape(
+                    r.shape[0]*a.shape[0], r.shape[1]*a.shape[1])
+        return r
+
+    def value(self, uh, xi):
+        """
+        The values of `uh` at the tensor product points of every cell.
+
+        Returns
+        -------
+        val : (NC, NQ)
+        """
+        p = self.p
+        TD = self.TD
+        phi = [lagrange_basis_1d(self.nodes, x)[0] for x in xi]
+        U = uh[self.dof.cell2dof].reshape((-1, ) + (p + 1, )*TD)
+        return tensor_apply(U, phi).reshape(U.shape[0], -1)
+
+    def to_cell(self, u):
+        """
+        Gather the global vector `u` to the cell arrays with shape (NC, p+1,
+        ...).
+        """
+        p = self.p
+        return u[self.dof.cell2dof].reshape((-1, ) + (p + 1, )*self.TD)
+
+    def to_global(self, V):
+        """
+        Scatter and sum the cell arrays to a global vector.
+        """
+        gdof = self.number_of_global_dofs()
+        cell2dof = self.dof.cell2dof
+        return np.bincount(cell2dof.flat, weights=V.reshape(-1), minlength=gdof)
+
+    def reshape_quad(self, val):
+        return val.reshape((-1, ) + (self.q, )*self.TD)
+
+    def grad_ref(self, U):
+        """
+        The reference gradients of the cell arrays U at the quadrature
+        points.
+        """
+        B = self.B
+        D = self.D
+        TD = self.TD
+        return [tensor_apply(U, [D if b == a else B for b in range(TD)])
+                for a in range(TD)]
+
+    def grad_ref_transpose(self, F):
+        B = self.B.T
+        D = self.D.T
+        TD = self.TD
+        V = 0
+        for a in range(TD):
+            V = V + tensor_apply(F[a], [D if b == a else B for b in range(TD)])
+        return V
+
+    def mass_apply(self, u, c=None):
+        """
+        Compute M@u without assembling M.
+
+        Parameters
+        ----------
+        c : None, a scalar or (NC, NQ) array of the coefficient at the
+            quadrature points
+        """
+        TD = self.TD
+        w = self.wdetJ if c is None else c*self.wdetJ
+        U = self.to_cell(u)
+        Uq = tensor_apply(U, [self.B]*TD)
+        V = tensor_apply(Uq*self.reshape_quad(w), [self.B.T]*TD)
+        return self.to_global(V)
+
+    def stiff_apply(self, u, c=None):
+        """
+        Compute A@u without assembling A.
+
+        Parameters
+        ----------
+        c : None, a scalar or (NC, NQ) array of the coefficient at the
+            quadrature points
+        """
+        TD = self.TD
+        G = self.G if c is None else c[..., None, None]*self.G
+        U = self.to_cell(u)
+        gU = self.grad_ref(U)
+        F = []
+        for a in range(TD):
+            f = 0
+            for b in range(TD):
+                f = f + self.reshape_quad(G[..., a, b])*gU[b]
+            F.append(f)
+        V = self.grad_ref_transpose(F)
+        return self.to_global(V)
+
+    def convection_coefficient(self, b):
+        """
+        Parameters
+        ----------
+        b : callable, the velocity b(x) with x of shape (..., GD), or an array
+            of shape (NC, NQ, GD) at the quadrature points
+
+        Returns
+        -------
+        c : (NC, NQ, TD), the coefficient of the reference gradient
+        """
+        if callable(b):
+            b = b(self.points)
+        return np.einsum('cq, cqg, cqag->cqa', self.wdetJ, b, self.invJ)
+
+    def convection_apply(self, u, b):
+        """
+        Compute C@u without assembling C, where C_ij = (b\\cdot\\nabla\\phi_j, \\phi_i).
+        """
+        TD = self.TD
+        c = self.convection_coefficient(b) if callable(b) else b
+        U = self.to_cell(u)
+        gU = self.grad_ref(U)
+        Vq = 0
+        for a in range(TD):
+            Vq = Vq + self.reshape_quad(c[..., a])*gU[a]
+        V = tensor_apply(Vq, [self.B.T]*TD)
+        return self.to_global(V)
+
+    def mass_diagonal(self, c=None):
+        TD = self.TD
+        w = self.wdetJ if c is None else c*self.wdetJ
+        V = tensor_apply(self.reshape_quad(w), [(self.B**2).T]*TD)
+        return self.to_global(V)
+
+    def stiff_diagonal(self, c=None):
+        TD = self.TD
+        B = self.B
+        D = self.D
+        G = self.G if c is None else c[..., None, None]*self.G
+        V = 0
+        for a in range(TD):
+            for b in range(TD):
+                A = []
+                for e in range(TD):
+                    Ma = D if e == a else B
+                    Mb = D if e == b else B
+                    A.append((Ma*Mb).T)
+                V = V + tensor_apply(self.reshape_quad(G[..., a, b]), A)
+        return self.to_global(V)
+
+    def convection_diagonal(self, b):
+        TD = self.TD
+        B = self.B
+        D = self.D
+        c = self.convection_coefficient(b) if callable(b) else b
+        V = 0
+        for a in range(TD):
+            A = [((D if e == a else B)*B).T for e in range(TD)]
+            V = V + tensor_apply(self.reshape_quad(c[..., a]), A)
+        return self.to_global(V)
+
+    def mass_operator(self, c=None):
+        gdof = self.number_of_global_dofs()
+        return LinearOperator((gdof, gdof), matvec=lambda u: self.mass_apply(u, c),
+                dtype=self.ftype)
+
+    def stiff_operator(self, c=None):
+        gdof = self.number_of_global_dofs()
+        return LinearOperator((gdof, gdof), matvec=lambda u: self.stiff_apply(u, c),
+                dtype=self.ftype)
+
+    def convection_operator(self, b):
+        gdof = self.number_of_global_dofs()
+        c = self.convection_coefficient(b) if callable(b) else b
+        return LinearOperator((gdof, gdof),
+                matvec=lambda u: self.convection_apply(u, c), dtype=self.ftype)
+
+    def source_vector(self, f):
+        TD = self.TD
+        fval = f(self.points)
+        V = tensor_apply(self.reshape_quad(fval*self.wdetJ), [self.B.T]*TD)
+        return self.to_global(V)
+
+    def stiff_matrix(self):
+        """
+        The assembled stiffness matrix, only for small problems and checking,
+        the local matrices cost O(p^{2d}) per cell.
+        """
+        xi = (self.quadpts, )*self.TD
+        gphi = self.grad_basis(xi)
+        NC, NQ = self.wdetJ.shape
+        T = np.einsum('cqab, qia->ciqb', self.G, gphi).reshape(NC, -1, NQ*self.TD)
+        A = T@gphi.swapaxes(0, 1).reshape(-1, NQ*self.TD).T
+        return self.assemble(A)
+
+    def mass_matrix(self):
+        xi = (self.quadpts, )*self.TD
+        phi = self.basis(xi)
+        M = (self.wdetJ[:, None, :]*phi.T)@phi
+        return self.assemble(M)
+
+    def assemble(self, A):
+        gdof = self.number_of_global_dofs()
+        cell2dof = self.dof.cell2dof
+        I = np.broadcast_to(cell2dof[:, :, None], A.shape)
+        J = np.broadcast_to(cell2dof[:, None, :], A.shape)
+        return csr_matrix((A.flat, (I.flat, J.flat)), shape=(gdof, gdof))
+
+    def set_dirichlet_bc(self, uh, gD, threshold=None):
+        ipoints = self.interpolation_points()
+        isDDof = self.boundary_dof(threshold=threshold)
+        uh[isDDof] = gD(ipoints[isDDof])
+        return isDDof
+
+    def L2_error(self, u, uh):
+        xi = (self.quadpts, )*self.TD
+        e = u(self.points) - self.value(uh, xi)
+        return np.sqrt(np.sum(e**2*self.wdetJ))
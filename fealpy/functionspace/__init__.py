@@ -6,6 +6,7 @@ from .NonConformingVirtualElementSpace2d import NCVEMDof2d, NonConformingVirtual
 from .ScaledMonomialSpace2d import ScaledMonomialSpace2d
 from .ScaledMonomialSpace3d import ScaledMonomialSpace3d
 from .QuadBilinearFiniteElementSpace import QuadBilinearFiniteElementSpace
+from .TensorProductFiniteElementSpace import TPFEMDof, TensorProductFiniteElementSpace
 from .WeakGalerkinSpace2d import WeakGalerkinSpace2d
 
 from .DivFreeNonConformingVirtualElementSpace2d import DivFreeNonConformingVirtualElementSpace2d
@@ -1,6 +1,9 @@
 import numpy as np
 import operator as op
 from functools import reduce
+from scipy.sparse import csr_matrix
+
+from ..common.precision import index_type
 
 def multi_index_matrix1d(p):
     ldof = p+1
@@ -33,6 +36,63 @@ def multi_index_matrix3d(p):
     multiIndex[:, 0] = p - np.sum(multiIndex[:, 1:], axis=1)
     return multiIndex
 
+def dof_ordering(cell2dof, gdof, method='rcm', ipoints=None):
+    """
+    The ordering of the global dofs for locality.
+
+    Parameters
+    ----------
+    cell2dof : (NC, ldof)
+    gdof : the number of global dofs
+    method : 'rcm', 'hilbert' or 'morton'
+    ipoints : (gdof, GD), the interpolation points, needed by the space
+        filling curves
+
+    Returns
+    -------
+    idx : (gdof, ), the index array from the new numbering to the old one
+    """
+    from ..mesh.mesh_ordering import rcm_ordering, space_filling_curve_ordering
+    if method == 'rcm':
+        NC, ldof = cell2dof.shape
+        I = np.repeat(np.arange(NC), ldof)
+        val = np.ones(NC*ldof, dtype=np.bool)
+        C = csr_matrix((val, (I, cell2dof.flat)), shape=(NC, gdof))
+        return rcm_ordering(C.T@C)
+    else:
+        return space_filling_curve_ordering(ipoints, curve=method)
+
+def dof_permutation(cell2dof0, cell2dof1, cellidx=None):
+    """
+    The dof permutation between two numberings of the dofs of the same space
+    on the same mesh, e.g. before and after `mesh.reorder`.
+
+    Parameters
+    ----------
+    cell2dof0 : (NC, ldof), the old cell to dof array
+    cell2dof1 : (NC, ldof), the new cell to dof array
+    cellidx : (NC, ), the index array from the new cell numbering to the old
+        one, None if the cells are not renumbered
+
+    Returns
+    -------
+    idx : the index array from the new dof numbering to the old one, a
+        function `uh` on the old dofs is renumbered by `uh[:] = uh[idx]`
+
+    Examples
+    --------
+    >> cell2dof = space.cell_to_dof()
+    >> idx = mesh.reorder(method='rcm')
+    >> space = LagrangeFiniteElementSpace(mesh, p=p)
+    >> uh = space.function(array=uh[dof_permutation(cell2dof, space.cell_to_dof(), idx['cell'])])
+    """
+    if cellidx is not None:
+        cell2dof0 = cell2dof0[cellidx]
+    gdof = np.max(cell2dof1) + 1
+    idx = np.zeros(gdof, dtype=cell2dof0.dtype)
+    idx[cell2dof1] = cell2dof0
+    return idx
+
 
 class CPLFEMDof1d():
     def __init__(self, mesh, p):
@@ -41,6 +101,13 @@ class CPLFEMDof1d():
         self.multiIndex = multi_index_matrix1d(p)
         self.cell2dof = self.cell_to_dof()
 
+    @property
+    def itype(self):
+        """
+        The type of the dof index arrays, see `fealpy.common.precision`.
+        """
+        return index_type(self.number_of_global_dofs())
+
     def boundary_dof(self, threshold=None):
         if type(threshold) is np.ndarray:
             index = threshold
@@ -67,7 +134,7 @@ class CPLFEMDof1d():
             NN = mesh.number_of_nodes()
             NC = mesh.number_of_cells()
             ldof = self.number_of_local_dofs()
-            cell2dof = np.zeros((NC, ldof), dtype=np.int)
+            cell2dof = np.zeros((NC, ldof), dtype=self.itype)
             cell2dof[:, [0, -1]] = cell
             cell2dof[:, 1:-1] = NN + np.arange(NC*(p-1)).reshape(NC, p-1)
             return cell2dof
@@ -121,8 +188,51 @@ class CPLFEMDof2d():
         self.mesh = mesh
         self.p = p
         self.multiIndex = multi_index_matrix2d(p)
+        self.dofidx = None
         self.cell2dof = self.cell_to_dof()
 
+    @property
+    def itype(self):
+        """
+        The type of the dof index arrays, see `fealpy.common.precision`.
+        """
+        return index_type(self.number_of_global_dofs())
+
+    def reorder(self, method='rcm'):
+        """
+        Renumber the global dofs for a small bandwidth of the matrices.
+
+        Parameters
+        ----------
+        method : 'rcm', 'hilbert' or 'morton'
+
+        Returns
+        -------
+        idx : (gdof, ), the index array from the new numbering to the old one
+
+        Notes
+        -----
+        After reordering, the dofs of nodes, edges, faces and cells are
+        mixed, so `cell_to_dof`, `edge_to_dof`, `face_to_dof` and
+        `interpolation_points` return the renumbered arrays.
+        """
+        if self.dofidx is not None:
+            # go back to the natural numbering
+            self.dofidx = None
+            self.cell2dof = self.cell_to_dof()
+        gdof = self.number_of_global_dofs()
+        ipoints = self.interpolation_points() if method != 'rcm' else None
+        idx = dof_ordering(self.cell2dof, gdof, method=method, ipoints=ipoints)
+        iidx = np.zeros(gdof, dtype=self.itype)
+        iidx[idx] = np.arange(gdof)
+
+        self.edge2dof = iidx[self.edge_to_dof()]
+        self.face2dof = iidx[self.face_to_dof()]
+        self.ipoints = self.interpolation_points()[idx]
+        self.cell2dof = iidx[self.cell2dof]
+        self.dofidx = idx
+        return idx
+
     def is_on_node_local_dof(self):
         p = self.p
         isNodeDof = np.sum(self.multiIndex == p, axis=-1) > 0
@@ -131,6 +241,9 @@ class CPLFEMDof2d():
     def is_on_edge_local_dof(self):
         return self.multiIndex == 0
 
+    def is_in_cell_local_dof(self):
+        return np.all(self.multiIndex > 0, axis=-1)
+
     def boundary_dof(self, threshold=None):
 
         if type(threshold) is np.ndarray:
@@ -152,6 +265,9 @@ class CPLFEMDof2d():
         return self.edge_to_dof()
 
     def edge_to_dof(self):
+        if self.dofidx is not None:
+            return self.edge2dof
+
         p = self.p
         mesh = self.mesh
 
@@ -159,13 +275,16 @@ class CPLFEMDof2d():
         NN = mesh.number_of_nodes()
 
         edge = mesh.ds.edge
-        edge2dof = np.zeros((NE, p+1), dtype=np.int)
+        edge2dof = np.zeros((NE, p+1), dtype=self.itype)
         edge2dof[:, [0, -1]] = edge
         if p > 1:
             edge2dof[:, 1:-1] = NN + np.arange(NE*(p-1)).reshape(NE, p-1)
         return edge2dof
 
     def cell_to_dof(self):
+        if self.dofidx is not None:
+            return self.cell2dof
+
         p = self.p
         mesh = self.mesh
         cell = mesh.ds.cell
@@ -180,7 +299,7 @@ class CPLFEMDof2d():
             cell2dof = cell
 
         if p > 1:
-            cell2dof = np.zeros((NC, ldof), dtype=np.int)
+            cell2dof = np.zeros((NC, ldof), dtype=self.itype)
 
             isEdgeDof = self.is_on_edge_local_dof()
             edge2dof = self.edge_to_dof()
@@ -210,6 +329,9 @@ class CPLFEMDof2d():
         return cell2dof
 
     def interpolation_points(self):
+        if self.dofidx is not None:
+            return self.ipoints
+
         p = self.p
         mesh = self.mesh
         cell = mesh.entity('cell')
@@ -268,8 +390,51 @@ class CPLFEMDof3d():
         self.p = p
         self.multiIndex = multi_index_matrix3d(p)
         self.multiIndex2d = multi_index_matrix2d(p)
+        self.dofidx = None
         self.cell2dof = self.cell_to_dof()
 
+    @property
+    def itype(self):
+        """
+        The type of the dof index arrays, see `fealpy.common.precision`.
+        """
+        return index_type(self.number_of_global_dofs())
+
+    def reorder(self, method='rcm'):
+        """
+        Renumber the global dofs for a small bandwidth of the matrices.
+
+        Parameters
+        ----------
+        method : 'rcm', 'hilbert' or 'morton'
+
+        Returns
+        -------
+        idx : (gdof, ), the index array from the new numbering to the old one
+
+        Notes
+        -----
+        After reordering, the dofs of nodes, edges, faces and cells are
+        mixed, so `cell_to_dof`, `edge_to_dof`, `face_to_dof` and
+        `interpolation_points` return the renumbered arrays.
+        """
+        if self.dofidx is not None:
+            # go back to the natural numbering
+            self.dofidx = None
+            self.cell2dof = self.cell_to_dof()
+        gdof = self.number_of_global_dofs()
+        ipoints = self.interpolation_points() if method != 'rcm' else None
+        idx = dof_ordering(self.cell2dof, gdof, method=method, ipoints=ipoints)
+        iidx = np.zeros(gdof, dtype=self.itype)
+        iidx[idx] = np.arange(gdof)
+
+        self.edge2dof = iidx[self.edge_to_dof()]
+        self.face2dof = iidx[self.face_to_dof()]
+        self.ipoints = self.interpolation_points()[idx]
+        self.cell2dof = iidx[self.cell2dof]
+        self.dofidx = idx
+        return idx
+
     def is_on_node_local_dof(self):
         p = self.p
         isNodeDof = np.sum(self.multiIndex == p, axis=-1) == 1
@@ -290,7 +455,13 @@ class CPLFEMDof3d():
         isFaceDof = (self.multiIndex == 0)
         return isFaceDof
 
+    def is_in_cell_local_dof(self):
+        return np.all(self.multiIndex > 0, axis=-1)
+
     def edge_to_dof(self):
+        if self.dofidx is not None:
+            return self.edge2dof
+
         p = self.p
         mesh = self.mesh
 
@@ -299,13 +470,16 @@ class CPLFEMDof3d():
 
         base = N
         edge = mesh.ds.edge
-        edge2dof = np.zeros((NE, p+1), dtype=np.int)
+        edge2dof = np.zeros((NE, p+1), dtype=self.itype)
         edge2dof[:, [0, -1]] = edge
         if p > 1:
             edge2dof[:,1:-1] = base + np.arange(NE*(p-1)).reshape(NE, p-1)
         return edge2dof
 
     def face_to_dof(self):
+        if self.dofidx is not None:
+            return self.face2dof
+
         p = self.p
         fdof = (p+1)*(p+2)//2
 
@@ -325,7 +499,7 @@ class CPLFEMDof3d():
 
         edge2dof = self.edge_to_dof()
 
-        face2dof = np.zeros((NF, fdof), dtype=np.int)
+        face2dof = np.zeros((NF, fdof), dtype=self.itype)
         faceIdx = self.multiIndex2d
         isEdgeDof = (faceIdx == 0)
 
@@ -362,6 +536,9 @@ class CPLFEMDof3d():
         return isBdDof
 
     def cell_to_dof(self):
+        if self.dofidx is not None:
+            return self.cell2dof
+
         p = self.p
         fdof = (p+1)*(p+2)//2
         ldof = self.number_of_local_dofs()
@@ -380,7 +557,7 @@ class CPLFEMDof3d():
 
         cell2face = mesh.ds.cell_to_face()
 
-        cell2dof = np.zeros((NC, ldof), dtype=np.int)
+        cell2dof = np.zeros((NC, ldof), dtype=self.itype)
 
         face2dof = self.face_to_dof()
         isFaceDof = self.is_on_face_local_dof()
@@ -545,6 +722,9 @@ class CPLFEMDof3d():
             return 1
 
     def interpolation_points(self):
+        if self.dofidx is not None:
+            return self.ipoints
+
         p = self.p
         mesh = self.mesh
         cell = mesh.ds.cell
@@ -600,9 +780,16 @@ class DPLFEMDof():
         mesh = self.mesh
         NC = mesh.number_of_cells()
         ldof = self.number_of_local_dofs()
-        cell2dof = np.arange(NC*ldof).reshape(NC, ldof)
+        cell2dof = np.arange(NC*ldof, dtype=self.itype).reshape(NC, ldof)
         return cell2dof
 
+    @property
+    def itype(self):
+        """
+        The type of the dof index arrays, see `fealpy.common.precision`.
+        """
+        return index_type(self.number_of_global_dofs())
+
     def number_of_global_dofs(self):
         NC = self.mesh.number_of_cells()
         ldof = self.number_of_local_dofs()
@@ -1,7 +1,10 @@
 import numpy as np
 from scipy.spatial import KDTree
 
-from scipy.spatial import Voronoi
+from scipy.spatial import Voronoi, Delaunay
+
+from .TriangleMesh import TriangleMesh
+from ..quadrature.QuadraturePointCache import mesh_modified
 
 class CVTPMesher:
     def __init__(self, domain):
@@ -151,60 +154,238 @@ class CVTPMesher:
             self.inode[index] = newNode
 
     def voronoi(self):
-        bnode = self.bnode
-        cnode = self.cnode
-        inode = self.inode
-       
-        NB = len(bnode) 
-        NC = len(cnode)
-        NN = NB + NC
-        for index, point in inode.items(): # inode is a dict
-            NN += len(point)
-        self.NN = NN
-        points = np.zeros((NN, 2), dtype=bnode.dtype)
-        points[:NB] = bnode
-        points[NB:NB+NC] = cnode
-        start = NB + NC
-        for index, point in inode.items():
-            N = len(point)
-            points[start:start+N] = point
-            start += N
+        points, start = self.init_points()
+        self.NN = len(points)
 
         # construct voronoi diagram
         vor = Voronoi(points)
-        start = NB+NC
-
         return vor, start
 
     def Lloyd(self, vor, start):
-
-        vertices = vor.vertices
-        NN = self.NN
+        """
+        One Lloyd iteration. The generators with index bigger than `start` are
+        moved to the centroids of their Voronoi regions, which are computed in
+        one batched pass over the ridges of `vor`.
+        """
         rp = vor.ridge_points
         rv = np.array(vor.ridge_vertices)
-        isKeeped = (rp[:, 0] >= start) | (rp[:, 1] >= start) 
+        isKeeped = ((rp[:, 0] >= start) | (rp[:, 1] >= start)) & np.all(rv >= 0, axis=1)
 
         rp = rp[isKeeped]
         rv = rv[isKeeped]
+        center, *_ = self.voronoi_centroid(vor.points, vor.vertices, rp, rv)
 
-        npoints = np.zeros((NN, 2), dtype=self.bnode.dtype)
-        valence = np.zeros(NN, dtype=np.int)
-
-        center = (vertices[rv[:, 0]] + vertices[rv[:, 1]])/2
-        np.add.at(npoints, (rp[:, 0], np.s_[:]), center)
-        np.add.at(npoints, (rp[:, 1], np.s_[:]), center)
-        np.add.at(valence, rp[:, 0], 1)
-        np.add.at(valence, rp[:, 1], 1)
-        npoints[start:] /= valence[start:, None]
-        
-        vor.points[start:, :] = npoints[start:, :]
+        vor.points[start:, :] = center[start:, :]
         vor = Voronoi(vor.points)
         return vor
-        
 
+    def voronoi_centroid(self, points, vertices, rp, rv, signed=False):
+        """
+        Compute the centroids and the CVT energy of all Voronoi regions.
 
+        Parameters
+        ----------
+        points : (NN, 2), the generators
+        vertices : (NV, 2), the Voronoi vertices
+        rp : (NR, 2), the two generators of each ridge
+        rv : (NR, 2), the two Voronoi vertices of each ridge
+        signed : if True, every ridge goes from the right to the left of the
+            directed edge (rp[:, 0], rp[:, 1]) and the signed areas of the
+            triangles are used, so a ridge may go out of the region, see
+            `cvt`
 
-        
+        Returns
+        -------
+        center : (NN, 2), the centroids of the regions, the generators whose
+            regions have no ridges in `rp` are kept
+        energy : (NN, ), the CVT energy \int_{V_i} |x - p_i|^2 dx of each
+            region
+        area : (NN, ), the areas of the regions
 
+        Notes
+        -----
+        Every ridge (v0, v1) of the generator p is a side of the triangle (p,
+        v0, v1), and the Voronoi region of p is the union of these triangles,
+        so the integrals over all regions are just sums over the triangles.
+        """
+        NN = len(points)
+        v0 = vertices[rv[:, 0]]
+        v1 = vertices[rv[:, 1]]
+        center = np.zeros((NN, 2), dtype=points.dtype)
+        area = np.zeros(NN, dtype=points.dtype)
+        energy = np.zeros(NN, dtype=points.dtype)
+        for i in range(2):
+            p = points[rp[:, i]]
+            a = v0 - p
+            b = v1 - p
+            s = np.cross(a, b)/2
+            if signed:
+                s = s if i == 0 else -s
+            else:
+                s = np.abs(s)
+            c = (p + v0 + v1)/3
+            e = s*(np.sum(a**2, axis=-1) + np.sum(b**2, axis=-1) + np.sum(a*b, axis=-1))/6
+            area += np.bincount(rp[:, i], weights=s, minlength=NN)
+            energy += np.bincount(rp[:, i], weights=e, minlength=NN)
+            center[:, 0] += np.bincount(rp[:, i], weights=s*c[:, 0], minlength=NN)
+            center[:, 1] += np.bincount(rp[:, i], weights=s*c[:, 1], minlength=NN)
+        isEmpty = (area == 0)
+        area[isEmpty] = 1
+        center /= area[:, None]
+        center[isEmpty] = points[isEmpty]
+        return center, energy, area
 
-        
+    def init_points(self):
+        """
+        Collect all the generators, the first `start` ones, which are on the
+        boundary and the corners, are fixed in the CVT iteration.
+        """
+        bnode = self.bnode
+        cnode = self.cnode
+        points = [bnode]
+        if len(cnode) > 0:
+            points.append(cnode)
+        start = len(bnode) + len(cnode)
+        for index, point in self.inode.items():
+            points.append(point)
+        return np.concatenate(points, axis=0), start
+
+    def delaunay_mesh(self, points):
+        """
+        Construct the Delaunay triangulation of `points` as a `TriangleMesh`
+        with counterclockwise cells.
+        """
+        cell = Delaunay(points).simplices
+        v1 = points[cell[:, 1]] - points[cell[:, 0]]
+        v2 = points[cell[:, 2]] - points[cell[:, 0]]
+        isCW = np.cross(v1, v2) < 0
+        cell[isCW, 1:] = cell[isCW, 2:0:-1]
+        return TriangleMesh(points, cell)
+
+    def circumcenter(self, points, simplices):
+        p0 = points[simplices[:, 0]]
+        v1 = points[simplices[:, 1]] - p0
+        v2 = points[simplices[:, 2]] - p0
+        d = 2*np.cross(v1, v2)
+        l1 = np.sum(v1**2, axis=-1)
+        l2 = np.sum(v2**2, axis=-1)
+        x = (v2[:, 1]*l1 - v1[:, 1]*l2)/d
+        y = (v1[:, 0]*l2 - v2[:, 0]*l1)/d
+        return p0 + np.c_[x, y]
+
+    def cvt(self, maxit=100, tol=1e-8, method='lloyd', m=5, disp=False):
+        """
+        Centroidal Voronoi tessellation iteration.
+
+        Parameters
+        ----------
+        maxit : the maximal number of iterations
+        tol : the tolerance of the relative change of the CVT energy in a
+            Lloyd step
+        method : 'lloyd' or 'anderson'. 'anderson' uses the Anderson
+            acceleration with depth `m` on the Lloyd map x -> centroid(x), a
+            step which decreases the energy less than the move of the
+            generators to the centroids is replaced by a Lloyd step and the
+            history is restarted.
+        disp : print the energy of every iteration
+
+        Returns
+        -------
+        vor : the Voronoi diagram of the final generators
+
+        Notes
+        -----
+        The Delaunay triangulation is kept between iterations and updated by
+        local edge flips after the generators moved, it is rebuilt only when
+        some triangles are inverted. The Voronoi vertices are the
+        circumcenters of its triangles, and the Voronoi ridges are dual to
+        its edges, where the ridges of the boundary edges end at the
+        midpoints of the edges. So the Voronoi regions are cut by the convex
+        hull of the fixed generators, and the energy is the CVT energy of
+        all the generators on this fixed domain, which is not increased by
+        the Lloyd steps. The statistics are saved in `self.stat`.
+        """
+        points, start = self.init_points()
+        mesh = self.delaunay_mesh(points)
+
+        self.stat = {'energy': [], 'number_of_rebuilds': 0,
+                'number_of_flips': 0, 'iterations': 0}
+
+        def lloyd_map(x):
+            """
+            Return the centroids of the interior regions, the energy, and
+            whether the convex hull is still given by the fixed generators
+            """
+            nonlocal mesh
+            points[start:] = x.reshape(-1, 2)
+            mesh_modified(mesh)
+            if np.any(mesh.entity_measure('cell') <= 0):
+                mesh = self.delaunay_mesh(points)
+                self.stat['number_of_rebuilds'] += 1
+            else:
+                self.stat['number_of_flips'] += len(mesh.edge_flip())
+            cell = mesh.entity('cell')
+            edge = mesh.entity('edge')
+            edge2cell = mesh.ds.edge_to_cell()
+            isBdEdge = (edge2cell[:, 0] == edge2cell[:, 1])
+            isValid = np.all(edge[isBdEdge] < start)
+
+            # the ridge goes from the right cell to the left cell of the edge
+            bedge = edge[isBdEdge]
+            vertices = np.r_['0', self.circumcenter(points, cell),
+                    (points[bedge[:, 0]] + points[bedge[:, 1]])/2]
+            rv = edge2cell[:, [1, 0]]
+            rv[isBdEdge, 0] = len(cell) + np.arange(len(bedge))
+            center, energy, area = self.voronoi_centroid(
+                    points, vertices, edge, rv, signed=True)
+
+            # the energy is decreased at least by this when the generators
+            # are moved to the centroids
+            dx = np.sum((points[start:] - center[start:])**2, axis=-1)
+            de = np.sum(area[start:]*dx)
+            return center[start:].reshape(-1), np.sum(energy), de, isValid
+
+        x = points[start:].reshape(-1).copy()
+        gx, e, de, _ = lloyd_map(x)
+        self.stat['energy'].append(e)
+        X = [] # the history of x
+        F = [] # the history of the residual g(x) - x
+        for i in range(maxit):
+            f = gx - x
+            xnew = gx
+            isLloyd = True
+            if method == 'anderson':
+                X.append(x)
+                F.append(f)
+                if len(X) > m + 1:
+                    X.pop(0)
+                    F.pop(0)
+                if len(X) > 1:
+                    dX = np.array([X[j+1] - X[j] for j in range(len(X)-1)]).T
+                    dF = np.array([F[j+1] - F[j] for j in range(len(F)-1)]).T
+                    gamma = np.linalg.lstsq(dF, f, rcond=None)[0]
+                    xnew = x + f - (dX + dF)@gamma
+                    isLloyd = False
+
+            gnew, enew, denew, isValid = lloyd_map(xnew)
+            if (not isLloyd) and ((enew > e - de) or not isValid):
+                # fall back to the Lloyd step and restart the history
+                xnew = gx
+                gnew, enew, denew, _ = lloyd_map(xnew)
+                isLloyd = True
+                X = []
+                F = []
+
+            diff = abs(e - enew)/enew
+            x, gx, e, de = xnew, gnew, enew, denew
+            self.stat['energy'].append(e)
+            self.stat['iterations'] += 1
+            if disp:
+                print("Step %d with energy: %12.11g, diff: %12.11g"%(i, e, diff))
+            # an Anderson step may decrease the energy only a little, so the
+            # stopping criterion is checked on the Lloyd steps
+            if isLloyd and (diff < tol):
+                break
+
+        points[start:] = x.reshape(-1, 2)
+        return Voronoi(points)
@@ -162,7 +162,8 @@ class HalfEdgeMesh2d(Mesh2d):
         NE = self.number_of_edges()
 
         NC = self.number_of_all_cells() # 实际单元个数
-        self.halfedgedata['level'] = DynamicArray((2*NE, ), val=0,dtype=np.int_)
+        NHE = len(self.ds.halfedge) # 半边存储的长度, 包括空闲的位置
+        self.halfedgedata['level'] = DynamicArray((NHE, ), val=0,dtype=np.int_)
         self.celldata['level'] = DynamicArray((NC, ), val=0, dtype=np.int_) 
         self.nodedata['level'] = DynamicArray((NN, ), val=0, dtype=np.int_)
 
@@ -263,7 +264,7 @@ class HalfEdgeMesh2d(Mesh2d):
         node = self.entity('node')
 
         halfedge = self.ds.halfedge # DynamicArray
-        hflag = self.ds.subdomain[halfedge[:, 1]] > 0
+        hflag = self.ds.inner_halfedge_flag()
         cstart = self.ds.cellstart
 
         e0 = halfedge[halfedge[hflag, 3], 0]
@@ -294,8 +295,9 @@ class HalfEdgeMesh2d(Mesh2d):
         halfedge = self.entity('halfedge') # DynamicArray
         if return_all:
             NC = self.number_of_all_cells()
-            e0 = halfedge[halfedge[:, 3], 0]
-            e1 = halfedge[:, 0]
+            hflag = self.ds.valid_halfedge_flag()
+            e0 = halfedge[halfedge[hflag, 3], 0]
+            e1 = halfedge[hflag, 0]
             w = np.array([[0, -1], [1, 0]], dtype=np.int)
             v= (node[e1] - node[e0])@w
             val = np.sum(v*node[e0], axis=1)
@@ -303,14 +305,14 @@ class HalfEdgeMesh2d(Mesh2d):
 
             a = np.zeros(NC, dtype=self.ftype)
             c = np.zeros((NC, GD), dtype=self.ftype)
-            np.add.at(a, halfedge[:, 1], val)
-            np.add.at(c, (halfedge[:, 1], np.s_[:]), ec)
+            np.add.at(a, halfedge[hflag, 1], val)
+            np.add.at(c, (halfedge[hflag, 1], np.s_[:]), ec)
             a /=2
             c /=3*a.reshape(-1, 1)
             return c
         else:
             NC = self.number_of_cells()
-            hflag = self.ds.subdomain[halfedge[:, 1]] > 0
+            hflag = self.ds.inner_halfedge_flag()
             cstart = self.ds.cellstart
             e0 = halfedge[halfedge[hflag, 3], 0]
             e1 = halfedge[hflag, 0]
@@ -361,8 +363,9 @@ class HalfEdgeMesh2d(Mesh2d):
             # 前一半边的层标记小于等于所属单元的层标记 
             pre = halfedge[:, 3]
             flag1 = (hlevel[pre] - clevel[halfedge[:, 1]]) <= 0
-            # 标记加密的半边
+            # 标记加密的半边, 空闲的半边不加密
             isMarkedHEdge = isMarkedCell[halfedge[:, 1]] & flag0 & flag1
+            isMarkedHEdge &= self.ds.valid_halfedge_flag()
             # 标记加密的半边的相对半边也需要标记 
             flag = ~isMarkedHEdge & isMarkedHEdge[halfedge[:, 4]]
             isMarkedHEdge[flag] = True
@@ -374,55 +377,98 @@ class HalfEdgeMesh2d(Mesh2d):
             pass
         return isMarkedHEdge
 
+    def new_halfedge(self, n):
+        """
+        Allocate `n` new halfedges, the free halfedge slots are reused first.
+
+        Returns
+        -------
+        idx : (n, ), the indices of the new halfedges
+        """
+        idx = self.ds.allocate_halfedge(n)
+        hlevel = self.halfedgedata['level']
+        hlevel.increase_size(len(self.ds.halfedge) - len(hlevel))
+        hlevel[idx] = 0
+        return idx
+
+    def compact(self, threshold=0.0):
+        """
+        Remove the free halfedge slots and renumber the halfedges.
+
+        Parameters
+        ----------
+        threshold : float, the storage is compacted only if the fraction of
+            the free slots is bigger than `threshold`
+
+        Notes
+        -----
+        The coarsening puts the removed halfedges on the free list of
+        `self.ds`, and the refinement reuses them first, so the halfedges are
+        not renumbered in every adaptive step. The numbering of the nodes,
+        the edges and the cells is not changed by the compaction.
+        """
+        ds = self.ds
+        NHE = len(ds.halfedge)
+        nf = ds.number_of_free_halfedges()
+        if (nf == 0) or (nf <= threshold*NHE):
+            return
+
+        isFreeHEdge = ~ds.valid_halfedge_flag()
+        hidxmap = np.zeros(NHE, dtype=self.itype)
+        hidxmap[~isFreeHEdge] = range(NHE - nf)
+
+        halfedge = ds.halfedge
+        halfedge.adjust_size(isFreeHEdge)
+        halfedge[:, 2:5] = hidxmap[halfedge[:, 2:5]]
+        self.halfedgedata['level'].adjust_size(isFreeHEdge)
+        ds.hcell[:] = hidxmap[ds.hcell[:]]
+        ds.hedge[:] = hidxmap[ds.hedge[:]]
+        ds.hfree = np.zeros(0, dtype=self.itype)
+        ds.clear_cache()
+
     def refine_halfedge(self, isMarkedHEdge):
 
         NN = self.number_of_nodes()
-        NE = self.number_of_edges()
 
-        clevel = self.celldata['level']
         hlevel = self.halfedgedata['level']
 
         halfedge = self.entity('halfedge')
         node = self.entity('node')
         hedge = self.ds.hedge
-        hcell = self.ds.hcell
-        subdomain = self.ds.subdomain
 
         isMainHEdge = self.ds.main_halfedge_flag()
 
+        hidx, = np.nonzero(isMarkedHEdge) # 标记加密的半边
+        flag1 = isMainHEdge[hidx] # 标记加密边中的主半边
+        idx = halfedge[hidx[flag1], 4]
 
-        # 即是主半边, 也是标记加密的半边
-        flag0 = isMarkedHEdge & isMainHEdge
-        idx = halfedge[flag0, 4]
-
-        NE1 = flag0.sum()
+        NE1 = flag1.sum()
         newNode = node.increase_size(NE1)
-        newNode[:] = (node[halfedge[flag0, 0]] + node[halfedge[idx, 0]])/2
+        newNode[:] = (node[halfedge[hidx[flag1], 0]] + node[halfedge[idx, 0]])/2
 
-        #细分边
-        newHalfedge = halfedge.increase_size(2*NE1)
-        newHlevel = hlevel.increase_size(2*NE1)
+        #细分边, 每个标记的半边前面插入一个新的半边
+        nidx = self.new_halfedge(2*NE1)
         newHedge = hedge.increase_size(NE1)
+        newHedge[:] = nidx[flag1]
 
-        flag1 = isMainHEdge[isMarkedHEdge] # 标记加密边中的主半边
-        newHedge[:] = np.arange(NE*2, NE*2+NE1*2)[flag1]
-        newHalfedge[flag1, 0] = range(NN, NN+NE1) # 新的节点编号
+        halfedge[nidx[flag1], 0] = range(NN, NN+NE1) # 新的节点编号
         idx0 = np.argsort(idx) # 当前边的对偶边的从小到大进行排序
-        newHalfedge[~flag1, 0] = newHalfedge[flag1, 0][idx0] # 按照排序
-        newHlevel[flag1] = np.maximum(hlevel[:NE*2][flag0],
-                hlevel[halfedge[:NE*2][flag0, 3]]) + 1
-        newHlevel[~flag1] = np.maximum(hlevel[idx], hlevel[halfedge[idx, 3]])[idx0]+1
-
-        isMarkedHEdge = np.r_[isMarkedHEdge, np.zeros(NE1*2, dtype = np.bool_)]
-        newHalfedge[:, 1] = halfedge[isMarkedHEdge, 1]
-        newHalfedge[:, 3] = halfedge[isMarkedHEdge, 3] # 前一个 
-        newHalfedge[:, 4] = halfedge[isMarkedHEdge, 4] # 对偶边
-        halfedge[isMarkedHEdge, 3] = range(2*NE, 2*NE + 2*NE1)
-        idx = halfedge[isMarkedHEdge, 4] # 原始对偶边
-
-        halfedge[isMarkedHEdge, 4] = halfedge[idx, 3]  # 原始对偶边的前一条边是新的对偶边
-        halfedge[halfedge[:, 3], 2] = range(2*NE+2*NE1)
-        self.ds.NE = NE + NE1
+        halfedge[nidx[~flag1], 0] = halfedge[nidx[flag1], 0][idx0] # 按照排序
+        hlevel[nidx[flag1]] = np.maximum(hlevel[hidx[flag1]],
+                hlevel[halfedge[hidx[flag1], 3]]) + 1
+        hlevel[nidx[~flag1]] = np.maximum(hlevel[idx], hlevel[halfedge[idx, 3]])[idx0]+1
+
+        halfedge[nidx, 1] = halfedge[hidx, 1]
+        halfedge[nidx, 2] = hidx # 下一个
+        halfedge[nidx, 3] = halfedge[hidx, 3] # 前一个 
+        halfedge[nidx, 4] = halfedge[hidx, 4] # 对偶边
+        halfedge[hidx, 3] = nidx
+        idx = halfedge[hidx, 4] # 原始对偶边
+
+        halfedge[hidx, 4] = halfedge[idx, 3]  # 原始对偶边的前一条边是新的对偶边
+        halfedge[halfedge[nidx, 3], 2] = nidx
+        self.ds.NE += NE1
+        self.ds.clear_cache()
         return NE1
 
     def refine_poly(self, isMarkedCell=None, options={'disp': True}):
@@ -440,16 +486,15 @@ class HalfEdgeMesh2d(Mesh2d):
         #assert len(isMarkedCell) == NC
 
         nN = self.number_of_nodes()
-        nE = self.number_of_edges()
 
         bc = self.cell_barycenter(return_all=True) # 返回所有单元的重心, 包括外
+                                                   # 部无界区域和区域中的洞区域
 
         if isMarkedCell is None:
             isMarkedCell = np.ones(nC, dtype=np.bool_)
-            isMarkedHEdge = np.ones(nE*2,dtype=np.bool_)
+            isMarkedHEdge = self.ds.valid_halfedge_flag().copy()
         else:
             isMarkedHEdge = self.mark_halfedge(isMarkedCell)
-                                           # 部无界区域和区域中的洞区域
 
         # 标记边, 加密半边
         nE1 = self.refine_halfedge(isMarkedHEdge)
@@ -459,17 +504,13 @@ class HalfEdgeMesh2d(Mesh2d):
         hlevel = self.halfedgedata['level']
 
         halfedge = self.entity('halfedge')
-        node = self.entity('node')
         hedge = self.ds.hedge
         hcell = self.ds.hcell
         subdomain = self.ds.subdomain
 
-        isMainHEdge = self.ds.main_halfedge_flag()
-
-
         # 细分单元
         flag = (hlevel[:] - clevel[halfedge[:, 1]]) == 1
-        N = halfedge.size
+        flag &= self.ds.valid_halfedge_flag()
         NV = np.zeros(nC, dtype=self.itype)
         np.add.at(NV, halfedge[:, 1], flag)
         NHE = sum(NV[isMarkedCell])
@@ -480,16 +521,13 @@ class HalfEdgeMesh2d(Mesh2d):
         flag0 = flag & isMarkedCell[halfedge[:, 1]]
         idx0, = np.nonzero(flag0)
         nex0 = halfedge[flag0, 2]
-        pre0 = halfedge[flag0, 3]
 
         subdomain.adjust_size(isMarkedCell, subdomain[halfedge[flag0, 1]])
 
         # 修改单元的编号
         cellidx = halfedge[idx0, 1] #需要加密的单元编号
 
-        #nC = self.number_of_all_cells()
         cellstart = self.ds.cellstart
-        NV1 = self.number_of_vertices_of_cells()
         if ('HB' in options) and (options['HB'] is not None):
              isNonMarkedCell = ~isMarkedCell
              flag0 = isNonMarkedCell[cellstart:]
@@ -522,55 +560,70 @@ class HalfEdgeMesh2d(Mesh2d):
             flag0 = ~flag[pre]
             halfedge[idx1, 1] = halfedge[idx0, 1]
 
-        nex1 = halfedge[idx1, 2] # 当前半边的下一个半边
         pre1 = halfedge[idx1, 3] # 当前半边的上一个半边
 
         cell2newNode = np.full(nC, nN+nE1, dtype=self.itype)
         cell2newNode[isMarkedCell] += range(isMarkedCell.sum())
 
-        halfedge[idx0, 2] = range(N, N+NHE) # idx0 的下一个半边的编号
-        halfedge[idx1, 3] = range(N+NHE, N+2*NHE) # idx1 的上一个半边的编号
+        # 新的半边, 前 NHE 个是 idx0 的下一个半边, 后 NHE 个是 idx1 的上一个半边
+        nidx = self.new_halfedge(2*NHE)
+        nidx0 = nidx[:NHE]
+        nidx1 = nidx[NHE:]
+        halfedge[idx0, 2] = nidx0 # idx0 的下一个半边的编号
+        halfedge[idx1, 3] = nidx1 # idx1 的上一个半边的编号
 
-        newHalfedge = halfedge.increase_size(2*NHE)
-        newHlevel = hlevel.increase_size(2*NHE)
         newHedge = hedge.increase_size(NHE)
-        newHedge[:] = np.arange(nE*2+nE1*2, nE*2+nE1*2+NHE)
-
-        newHalfedge[:NHE, 0] = cell2newNode[cellidx]
-        newHalfedge[:NHE, 1] = halfedge[idx0, 1]
-        newHalfedge[:NHE, 2] = halfedge[idx1, 3]
-        newHalfedge[:NHE, 3] = idx0
-        newHalfedge[:NHE, 4] = halfedge[nex0, 3]
-        newHlevel[:NHE] = clevel[cellidx]
-
-        newHalfedge[NHE:, 0] = halfedge[pre1, 0]
-        newHalfedge[NHE:, 1] = halfedge[idx1, 1]
-        newHalfedge[NHE:, 2] = idx1
-        newHalfedge[NHE:, 3] = halfedge[idx0, 2]
-        newHalfedge[NHE:, 4] = halfedge[pre1, 2]
-        newHlevel[NHE:] = clevel[cellidx]
-
-        tmp = clevel[cellidx]
+        newHedge[:] = nidx0
+
+        halfedge[nidx0, 0] = cell2newNode[cellidx]
+        halfedge[nidx0, 1] = halfedge[idx0, 1]
+        halfedge[nidx0, 2] = halfedge[idx1, 3]
+        halfedge[nidx0, 3] = idx0
+        halfedge[nidx0, 4] = halfedge[nex0, 3]
+        hlevel[nidx0] = clevel[cellidx]
+
+        halfedge[nidx1, 0] = halfedge[pre1, 0]
+        halfedge[nidx1, 1] = halfedge[idx1, 1]
+        halfedge[nidx1, 2] = idx1
+        halfedge[nidx1, 3] = halfedge[idx0, 2]
+        halfedge[nidx1, 4] = halfedge[pre1, 2]
+        hlevel[nidx1] = clevel[cellidx]
+
         clevel.adjust_size(isMarkedCell, clevel[cellidx])
 
+        hidx, = np.nonzero(self.ds.valid_halfedge_flag())
         flag = np.zeros(nC+NHE, dtype=np.bool)
-        flag[halfedge[:, 1]] = True
+        flag[halfedge[hidx, 1]] = True
 
         idxmap = np.zeros(nC+NHE, dtype=self.itype)
         nc = flag.sum()
         idxmap[flag] = range(nc)
-        halfedge[:, 1] = idxmap[halfedge[:, 1]]
+        halfedge[hidx, 1] = idxmap[halfedge[hidx, 1]]
 
         self.node.extend(bc[isMarkedCell])
         self.ds.NN = self.node.size
         self.ds.NC = (subdomain[:]>0).sum()
         self.ds.NE += NHE
+        self.ds.clear_cache()
 
     def coarsen_poly(self, isMarkedCell, options={'disp': True}):
+        """
+
+        Parameters
+        ----------
+        isMarkedCell : np.ndarray, bool,
+            len(isMarkedCell) == len(self.ds.subdomain)
+        options : options['compact'] is the threshold of `self.compact`
+
+        Notes
+        -----
+        The removed halfedges are put on the free list and the other
+        halfedges keep their indices, the storage is compacted only when the
+        fraction of the free slots is bigger than `options['compact']`.
+        """
 
         NC = self.number_of_all_cells()
         NN = self.number_of_nodes()
-        NE = self.number_of_edges()
         hcell = self.ds.hcell
         hedge = self.ds.hedge
         hlevel = self.halfedgedata['level']
@@ -579,17 +632,19 @@ class HalfEdgeMesh2d(Mesh2d):
         halfedge = self.ds.halfedge
         subdomain = self.ds.subdomain
         isMainHEdge = self.ds.main_halfedge_flag()
+        isValidHEdge = self.ds.valid_halfedge_flag()
+        hidx, = np.nonzero(isValidHEdge)
 
         # 可以移除的网格节点
         # 在理论上, 可以移除点周围的单元所属子区是相同的, TODO: make sure about it
 
         isRNode = np.ones(NN, dtype=np.bool)
-        flag = (hlevel == clevel[halfedge[:, 1]])
-        np.logical_and.at(isRNode, halfedge[:, 0], flag)
-        flag = (hlevel == hlevel[halfedge[:, 4]])
-        np.logical_and.at(isRNode, halfedge[:, 0], flag)
-        flag = isMarkedCell[halfedge[:, 1]]
-        np.logical_and.at(isRNode, halfedge[:, 0], flag)
+        flag = (hlevel[hidx] == clevel[halfedge[hidx, 1]])
+        np.logical_and.at(isRNode, halfedge[hidx, 0], flag)
+        flag = (hlevel[hidx] == hlevel[halfedge[hidx, 4]])
+        np.logical_and.at(isRNode, halfedge[hidx, 0], flag)
+        flag = isMarkedCell[halfedge[hidx, 1]]
+        np.logical_and.at(isRNode, halfedge[hidx, 0], flag)
 
         nn = isRNode.sum()
 
@@ -598,14 +653,12 @@ class HalfEdgeMesh2d(Mesh2d):
             # 重新标记要移除的单元
             isMarkedCell = np.zeros(NC+nn, dtype=np.bool)
             isMarkedHEdge = isRNode[halfedge[:, 0]] | isRNode[halfedge[halfedge[:, 4], 0]]
+            isMarkedHEdge &= isValidHEdge
             isMarkedCell[halfedge[isMarkedHEdge, 1]] = True
 
-            # 没有被标记的单元个数
-            nc = sum(~isMarkedCell[:NC])
-
             # 更新粗化后单元的所属子区域的信息
             nsd = np.zeros(NN, dtype=self.itype)
-            nsd[halfedge[:, 0]] = subdomain[halfedge[:, 1]]
+            nsd[halfedge[hidx, 0]] = subdomain[halfedge[hidx, 1]]
 
             subdomain.adjust_size(isMarkedCell[:NC], nsd[isRNode])
 
@@ -616,17 +669,15 @@ class HalfEdgeMesh2d(Mesh2d):
             nidxmap = np.arange(NN)
             nidxmap[isRNode] = range(NC, NC+nn)
             cidxmap = np.arange(NC)
-            isRHEdge = isRNode[halfedge[:, 0]]
+            isRHEdge = isValidHEdge & isRNode[halfedge[:, 0]]
 
             HB0[halfedge[isRHEdge, 1], 1] =  nidxmap[halfedge[isRHEdge, 0]]
             cidxmap[halfedge[isRHEdge, 1]] = nidxmap[halfedge[isRHEdge, 0]]
-            halfedge[:, 1] = cidxmap[halfedge[:, 1]]
-
-
+            halfedge[hidx, 1] = cidxmap[halfedge[hidx, 1]]
 
             # 更新粗化后单元的层数
             nlevel = np.zeros(NN, dtype=self.itype)
-            nlevel[halfedge[:, 0]] = hlevel
+            nlevel[halfedge[hidx, 0]] = hlevel[hidx]
             level = nlevel[isRNode] - 1
             level[level < 0] = 0
 
@@ -634,19 +685,18 @@ class HalfEdgeMesh2d(Mesh2d):
 
             # 重设下一个半边 halfedge[:, 2] 和前一个半边 halfedge[:, 3]
             nex = halfedge[:, 2] # 当前半边的下一个半边编号
-            flag = isRNode[halfedge[nex, 0]] # 如果下一个半边的指向的节点是要移除的节点
+            flag = isValidHEdge & isRNode[halfedge[nex, 0]] # 如果下一个半边的指向的节点是要移除的节点
             # 当前半边的下一个半边修改为:下一个半边的对偶半边的下一个半边
             halfedge[flag, 2] = halfedge[halfedge[nex[flag], 4], 2]
             # 下一个半边的前一个半边是当前半边
             halfedge[halfedge[flag, 2], 3], = np.nonzero(flag)
 
-            nidxmap = np.zeros(NN, dtype=self.itype)
             # 标记进一步要移除的半边
-            idx = np.arange(2*NE)
-            flag = ~isMarkedHEdge
+            idx = np.arange(len(halfedge))
+            flag = isValidHEdge & ~isMarkedHEdge
             flag = flag & (halfedge[halfedge[halfedge[halfedge[:, 2], 4], 2], 4] == idx)
-            flag = flag & (hlevel > hlevel[halfedge[:, 2]])
-            flag = flag & (hlevel > hlevel[halfedge[:, 3]])
+            flag = flag & (hlevel[:] > hlevel[halfedge[:, 2]])
+            flag = flag & (hlevel[:] > hlevel[halfedge[:, 3]])
 
             nex = halfedge[flag, 2]
             pre = halfedge[flag, 3]
@@ -658,49 +708,53 @@ class HalfEdgeMesh2d(Mesh2d):
 
             isMarkedHEdge[flag] = True
             isRNode[halfedge[flag, 0]] = True
-            NN -= nn + flag.sum()//2
 
-            #起始边半边
-            halfedgeNewCell = halfedge[:, 1]>=NC
-            hdxmap = np.arange(NE*2) - np.cumsum(isMarkedHEdge)
-            hcell[:] = hdxmap[hcell]
+            # 对单元重新编号
+            kidx, = np.nonzero(isValidHEdge & ~isMarkedHEdge) # 保留的半边
+            isKeepedCell = np.zeros(NC+nn, dtype=np.bool)
+            isKeepedCell[halfedge[kidx, 1]] = True
+            cidxmap = np.zeros(NC+nn, dtype=self.itype)
+            nc = isKeepedCell.sum()
+            cidxmap[isKeepedCell] = range(nc)
+            halfedge[kidx, 1] = cidxmap[halfedge[kidx, 1]]
+
+            # 单元的起始半边, 新单元和起始半边被移除的单元需要重新设置
             newHcell = hcell.adjust_size(isMarkedCell[:NC], int(nn))
-            newHcell[halfedge[halfedgeNewCell, 1]-NC] = hdxmap[np.arange(NE*2)[halfedgeNewCell]]
-
-
-            #重新编号主半边
-            NRH = isMarkedHEdge.sum()
-            hedge.decrease_size(NRH//2)
-            hedge[:], = np.where(isMainHEdge[~isMarkedHEdge])
-
+            newHcell[:] = kidx[0]
+            flag = isMarkedHEdge[hcell[:]] | (halfedge[hcell[:], 1] != np.arange(nc))
+            flag = flag[halfedge[kidx, 1]]
+            hcell[halfedge[kidx[flag], 1]] = kidx[flag]
+
+            # 重新设置主半边, 合并的边 (nex, dua) 中只保留一个主半边
+            isMainHEdge &= ~isMarkedHEdge
+            isMainHEdge[nex] = False
+            isMainHEdge[dua] = False
+            m = np.minimum(nex, dua)
+            flag = subdomain[halfedge[m, 1]] < 1
+            m[flag] = np.maximum(nex, dua)[flag]
+            isMainHEdge[m] = True
+            NE = isMainHEdge.sum()
+            hedge.decrease_size(hedge.size - NE)
+            hedge[:], = np.nonzero(isMainHEdge)
 
             # 对节点重新编号
+            NN = (~isRNode).sum()
+            nidxmap = np.zeros(len(isRNode), dtype=self.itype)
             nidxmap[~isRNode] = range(NN)
-            halfedge[:, 0] = nidxmap[halfedge[:, 0]]
-
-            # 对半边重新编号
-            ne = sum(~isMarkedHEdge)
-            eidxmap = np.arange(2*NE)
-            eidxmap[~isMarkedHEdge] = range(ne)
-            halfedge[:, 2:5] = eidxmap[halfedge[:, 2:5]]
+            halfedge[kidx, 0] = nidxmap[halfedge[kidx, 0]]
 
-            # 对单元重新编号
-            isKeepedCell = np.zeros(NC+nn+1, dtype=np.bool)
-            isKeepedCell[halfedge[:, 1]] = True
-            cidxmap = np.zeros(NC+nn+1, dtype=self.itype)
-            NC = sum(isKeepedCell)
-            cidxmap[isKeepedCell] = range(NC)
-            halfedge[:, 1] = cidxmap[halfedge[:, 1]]
-            halfedge.adjust_size(isMarkedHEdge)
-
-            # 更新层信息
-            hlevel.adjust_size(isMarkedHEdge)
+            # 移除的半边放入空闲列表
+            idx, = np.nonzero(isMarkedHEdge)
+            hlevel[idx] = 0
+            self.ds.free_halfedge(idx)
 
             # 更新节点
             self.node.adjust_size(isRNode)
-            self.ds.NC = NC-nn
-            self.ds.NE = halfedge.shape[0]//2
+            self.ds.NC = (subdomain[:]>0).sum()
+            self.ds.NE = NE
             self.ds.NN = self.node.size
+            self.ds.clear_cache()
+            self.compact(threshold=options.get('compact', 0.25))
 
             ###TODO
             if ('HB' in options) and (options['HB'] is not None):
@@ -726,7 +780,8 @@ class HalfEdgeMesh2d(Mesh2d):
             data=None,
             HB=True,
             imatrix=False,
-            disp=True
+            disp=True,
+            compact=0.25
             ):
 
         options = {
@@ -739,7 +794,8 @@ class HalfEdgeMesh2d(Mesh2d):
                 'data': data,
                 'HB': HB,
                 'imatrix': imatrix,
-                'disp': disp
+                'disp': disp,
+                'compact': compact
             }
         return options
 
@@ -810,7 +866,7 @@ class HalfEdgeMesh2d(Mesh2d):
     def uniform_refine(self, n=1):
         for i in range(n):
             nC = self.number_of_all_cells()
-            isMarkedCell = np.ones(nC, dtype=np.bool_)
+            isMarkedCell = self.ds.subdomain[:] > 0
             self.refine_poly(isMarkedCell)
 
     def mark_helper(self, idx):
@@ -889,6 +945,8 @@ class HalfEdgeMesh2dDataStructure():
         self.hedge[flag] = halfedge[self.hedge[flag], 4]
 
         self.NV = NV
+        self.hfree = np.zeros(0, dtype=self.itype) # the free halfedge slots
+        self.clear_cache()
 
     def number_of_all_cells(self):
         return len(self.subdomain)
@@ -896,8 +954,9 @@ class HalfEdgeMesh2dDataStructure():
     def number_of_vertices_of_all_cells(self):
         NC = self.number_of_all_cells() 
         halfedge = self.halfedge
+        flag = self.valid_halfedge_flag()
         NV = np.zeros(NC, dtype=self.itype)
-        np.add.at(NV, halfedge[:, 1], 1)
+        np.add.at(NV, halfedge[flag, 1], 1)
         return NV
 
     def number_of_vertices_of_cells(self):
@@ -906,9 +965,8 @@ class HalfEdgeMesh2dDataStructure():
         else:
             NC = self.NC 
             halfedge = self.halfedge
-            subdomain = self.subdomain
             NV = np.zeros(NC, dtype=self.itype)
-            flag =  subdomain[halfedge[:, 1]] > 0
+            flag = self.inner_halfedge_flag()
             np.add.at(NV, halfedge[flag, 1]-self.cellstart, 1)
             return NV
 
@@ -921,59 +979,189 @@ class HalfEdgeMesh2dDataStructure():
     def number_of_faces_of_cells(self):
         return self.number_of_vertices_of_cells()
 
+    def number_of_free_halfedges(self):
+        return len(self.hfree)
+
+    def allocate_halfedge(self, n):
+        """
+        Allocate `n` halfedge slots, the free slots are reused first.
+
+        Returns
+        -------
+        idx : (n, ), the indices of the slots
+        """
+        nf = min(n, len(self.hfree))
+        N = len(self.halfedge)
+        idx = np.zeros(n, dtype=self.itype)
+        idx[:nf] = self.hfree[:nf]
+        idx[nf:] = range(N, N + n - nf)
+        self.hfree = self.hfree[nf:]
+        self.halfedge.increase_size(n - nf)
+        self.clear_cache()
+        return idx
+
+    def free_halfedge(self, idx):
+        """
+        Put the halfedges `idx` on the free list.
+
+        Notes
+        -----
+        A free slot is a loop of itself on the node 0 and the cell 0, which
+        is skipped by all the topology relations.
+        """
+        halfedge = self.halfedge
+        halfedge[idx, 0:2] = 0
+        halfedge[idx, 2:5] = idx[:, None]
+        self.hfree = np.sort(np.r_[self.hfree, idx])
+        self.clear_cache()
+
+    def valid_halfedge_flag(self):
+        """
+        The flag of the halfedge slots in use, which is cached.
+        """
+        cache = self._cached_tables()
+        if 'valid' not in cache:
+            flag = np.ones(len(self.halfedge), dtype=np.bool_)
+            flag[self.hfree] = False
+            flag.flags.writeable = False
+            cache['valid'] = flag
+        return cache['valid']
+
+    def inner_halfedge_flag(self):
+        """
+        The flag of the halfedges of the cells in the domain.
+        """
+        halfedge = self.halfedge
+        return self.valid_halfedge_flag() & (self.subdomain[halfedge[:, 1]] > 0)
+
+    def clear_cache(self):
+        """
+        Clear the cached traversal tables, which has to be called after the
+        halfedges are changed in place, e.g. by the refinement.
+        """
+        self._cache = {}
+
+    def halfedge_to_edge(self):
+        """
+        The index of the edge of every halfedge, which is cached.
+        """
+        cache = self._cached_tables()
+        if 'halfedge2edge' not in cache:
+            NE = self.NE
+            halfedge = self.halfedge
+            hedge = self.hedge[:]
+            J = np.zeros(len(halfedge), dtype=self.itype)
+            J[hedge] = np.arange(NE)
+            J[halfedge[hedge, 4]] = np.arange(NE)
+            cache['halfedge2edge'] = J
+        return cache['halfedge2edge']
+
+    def cell_halfedge_ordering(self):
+        """
+        The halfedges of the cells in the domain sorted by the cells, and in
+        every cell along the `next` loop starting from `hcell`. It is
+        computed once after every topology change.
+
+        Returns
+        -------
+        hedges : (NHE, ), the halfedges of the i-th cell are
+            hedges[location[i]:location[i+1]]
+        location : (NC+1, )
+        lidx : (NHE, ), the local index of every halfedge slot in its cell, the
+            halfedge `hcell[c]` has the local index 0
+
+        Notes
+        -----
+        The local index is computed by the pointer jumping along the `prev`
+        loops, so the number of the passes is O(log(max NV)) and not O(max
+        NV) as walking the loops.
+        """
+        cache = self._cached_tables()
+        if 'cellhedge' not in cache:
+            NC = self.NC
+            halfedge = self.halfedge
+            cstart = self.cellstart
+            NHE = len(halfedge)
+
+            # the distance to the first halfedge of the cell, the free slots
+            # are the first ones of themselves
+            isFirst = self.hcell[halfedge[:, 1]] == np.arange(NHE)
+            isFirst |= ~self.valid_halfedge_flag()
+            lidx = (~isFirst).astype(self.itype)
+            ptr = np.where(isFirst, np.arange(NHE), halfedge[:, 3])
+            isNotOK = ~isFirst[ptr]
+            maxit = int(np.log2(NHE + 1)) + 2
+            while np.any(isNotOK):
+                if maxit == 0:
+                    raise ValueError("The cell loops do not contain their `hcell`!")
+                lidx[isNotOK] += lidx[ptr[isNotOK]]
+                ptr[isNotOK] = ptr[ptr[isNotOK]]
+                isNotOK[isNotOK] = ~isFirst[ptr[isNotOK]]
+                maxit -= 1
+
+            idx, = np.nonzero(self.inner_halfedge_flag())
+            cidx = halfedge[idx, 1] - cstart
+            NV = np.bincount(cidx, minlength=NC)
+            location = np.zeros(NC+1, dtype=self.itype)
+            location[1:] = np.cumsum(NV)
+            hedges = np.zeros(len(idx), dtype=self.itype)
+            hedges[location[cidx] + lidx[idx]] = idx
+            for a in (hedges, location, lidx):
+                a.flags.writeable = False
+            cache['cellhedge'] = (hedges, location, lidx)
+        return cache['cellhedge']
+
+    def _cached_tables(self):
+        # the refinement changes the number of the halfedges, which is a
+        # guard for a missing `clear_cache`
+        if self._cache.get('NHE') != len(self.halfedge):
+            self._cache = {'NHE': len(self.halfedge)}
+        return self._cache
+
+    def _cell_halfedges(self):
+        """
+        The ordered halfedges of the cells, (NC, NV) for the triangle and
+        quadrangle meshes.
+        """
+        hedges, location, _ = self.cell_halfedge_ordering()
+        if self.NV is None:
+            return hedges, location
+        elif self.NV in {3, 4}:
+            return hedges.reshape(-1, self.NV)
+        else:
+            raise ValueError('The property NV should be None, 3 or 4! But the NV is {}'.format(self.NV))
+
     def cell_to_node(self, return_sparse=False):
+        """
+        Notes
+        -----
+        The i-th edge of a cell is the halfedge with the local index i, and
+        it starts from the i-th node for the polygon and quadrangle meshes.
+        The i-th node of a triangle is opposite to the i-th edge.
+        """
         NN = self.NN
         NC = self.NC
         halfedge = self.halfedge
         subdomain = self.subdomain
         cstart = self.cellstart
-        hflag = subdomain[halfedge[:, 1]] > 0
 
         if return_sparse:
+            hflag = self.inner_halfedge_flag()
             val = np.ones(hflag.sum(), dtype=np.bool)
             I = halfedge[hflag, 1] - cstart
             J = halfedge[hflag, 0]
             cell2node = csr_matrix((val, (I, J)), shape=(NC, NN), dtype=np.bool)
             return cell2node
         elif self.NV is None: # polygon mesh
-            NV = self.number_of_vertices_of_cells()
-            cellLocation = np.zeros(NC+1, dtype=self.itype)
-            cellLocation[1:] = np.cumsum(NV)
-            cell2node = np.zeros(cellLocation[-1], dtype=self.itype)
-            current = self.hcell[cstart:]
-            idx = cellLocation[:-1].copy()
-            cell2node[idx] = halfedge[halfedge[current, 3], 0]
-            NV0 = np.ones(NC, dtype=self.itype)
-            isNotOK = NV0 < NV
-            while np.any(isNotOK):
-               idx[isNotOK] += 1
-               NV0[isNotOK] += 1
-               cell2node[idx[isNotOK]] = halfedge[current[isNotOK], 0]
-               current[isNotOK] = halfedge[current[isNotOK], 2]
-               isNotOK = (NV0 < NV)
+            hedges, cellLocation = self._cell_halfedges()
+            cell2node = halfedge[halfedge[hedges, 3], 0]
             return cell2node, cellLocation
         elif self.NV == 3: # tri mesh
-            cell2node = np.zeros(NC, 3)
-            current = halfedge[self.hcell[cstart:], 2]
-            cell2node[:, 0] = halfedge[current, 0]
-            current = halfedge[current, 2]
-            cell2node[:, 1] = halfedge[current, 0]
-            current = halfedge[current, 2]
-            cell2node[:, 2] = halfedge[current, 0]
-            return cell2node
-        elif self.NV == 4: # quad mesh
-            cell2node = np.zeros(NC, 3)
-            current = halfedge[self.hcell[cstart:], 3]
-            cell2node[:, 0] = halfedge[current, 0]
-            current = halfedge[current, 2]
-            cell2node[:, 1] = halfedge[current, 0]
-            current = halfedge[current, 2]
-            cell2node[:, 2] = halfedge[current, 0]
-            current = halfedge[current, 2]
-            cell2node[:, 3] = halfedge[current, 0]
-            return cell2node
-        else:
-            raise ValueError('The property NV should be None, 3 or 4! But the NV is {}'.format(self.NV))
+            hedges = self._cell_halfedges()
+            return halfedge[hedges[:, [1, 2, 0]], 0]
+        else: # quad mesh
+            hedges = self._cell_halfedges()
+            return halfedge[halfedge[hedges, 3], 0]
 
     def cell_to_edge(self, return_sparse=False):
         NE = self.NE
@@ -981,56 +1169,19 @@ class HalfEdgeMesh2dDataStructure():
 
         halfedge = self.halfedge
         cstart = self.cellstart
-        hflag = subdomain[halfedge[:, 1]] > 0
-        hedge = self.hedge
-
-        J = np.zeros(2*NE, dtype=self.itype)
-        J[hedge] = range(NE)
-        J[halfedge[hedge, 4]] = range(NE)
+        J = self.halfedge_to_edge()
         if return_sparse:
-            val = np.ones(2*NE, dtype=np.bool)
+            hflag = self.inner_halfedge_flag()
+            val = np.ones(hflag.sum(), dtype=np.bool)
             I = halfedge[hflag, 1] - cstart
-            cell2edge = csr_matrix((val[hflag], (I,
-                J[hflag])), shape=(NC, NE), dtype=np.bool)
-            return cell2edge
-        elif NV is None:
-            NV = self.number_of_vertices_of_cells()
-            cellLocation = np.zeros(NC+1, dtype=self.itype)
-            cellLocation[1:] = np.cumsum(NV)
-
-            cell2edge = np.zeros(cellLocation[-1], dtype=self.itype)
-            current = self.hcell[cstart:]
-            idx = cellLocation[:-1]
-            cell2edge[idx] = J[current]
-            NV0 = np.ones(NC, dtype=self.itype)
-            isNotOK = NV0 < self.NV
-            while isNotOK.sum() > 0:
-                current[isNotOK] = halfedge[current[isNotOK], 2]
-                idx[isNotOK] += 1
-                NV0[isNotOK] += 1
-                cell2edge[idx[isNotOK]] = J[current[isNotOK]]
-                isNotOK = (NV0 < self.NV)
-            return cell2edge, cellLocation
-        elif self.NV == 3: # tri mesh
-            cell2edge = np.zeros(NC, 3)
-            current = self.hcell[cstart:]
-            cell2edge[:, 2] = J[current]
-            cell2edge[:, 0] = J[halfedge[current, 2]]
-            cell2edge[:, 1] = J[halfedge[current, 3]]
-            return cell2edge
-        elif self.NV == 4: # quad mesh
-            cell2edge = np.zeros(NC, 4)
-            current = self.hcell[cstart:]
-            cell2edge[:, 3] = J[current]
-            current = halfedge[current, 2]
-            cell2edge[:, 0] = J[current] 
-            current = halfedge[current, 2]
-            cell2edge[:, 1] = J[current]
-            current = halfedge[current, 2]
-            cell2edge[:, 2] = J[current]
+            cell2edge = csr_matrix((val, (I, J[hflag])), shape=(NC, NE),
+                    dtype=np.bool)
             return cell2edge
+        elif self.NV is None:
+            hedges, cellLocation = self._cell_halfedges()
+            return J[hedges], cellLocation
         else:
-            raise ValueError('The property NV should be None, 3 or 4! But the NV is {}'.format(self.NV))
+            return J[self._cell_halfedges()]
 
     def cell_to_face(self, return_sparse=True):
         return self.cell_to_edge(return_sparse=return_sparse)
@@ -1039,63 +1190,30 @@ class HalfEdgeMesh2dDataStructure():
         NC = self.NC
         halfedge = self.halfedge
         cstart = self.cellstart
-        hflag = subdomain[halfedge[:, 1]] > 0
-        hedge = self.hedge
 
         if return_sparse:
+            hflag = self.inner_halfedge_flag()
             flag = hflag & hflag[halfedge[:, 4]]
             val = np.ones(flag.sum(), dtype=np.bool_)
-            I = halfedge[flag, 1]
-            J = halfedge[halfedge[flag, 4], 1]
-            cell2cell = coo_matrix((val, (I, J)), shape=(NC, NC), dtype=np.bool)
-            cell2cell+= coo_matrix((val, (J, I)), shape=(NC, NC), dtype=np.bool)
-            return cell2cell.tocsr()
-        elif self.NV is None:
-            NV = self.number_of_vertices_of_cells()
-            cellLocation = np.zeros(NC+1, dtype=self.itype)
-            cellLocation[1:] = np.cumsum(NV)
-            cell2cell = np.zeros(cellLocation[-1], dtype=self.itype)
-            current = self.hcell[cstart:]
-            idx = cellLocation[:-1]
-            cell2cell[idx] = halfedge[halfedge[current, 4], 1]-cstart
-            NV0 = np.ones(NC, dtype=self.itype)
-            isNotOK = NV0 < NV
-            while isNotOK.sum() > 0:
-                current[isNotOK] = halfedge[current[isNotOK], 2]
-                idx[isNotOK] += 1
-                NV0[isNotOK] += 1
-                cell2cell[idx[isNotOK]] = halfedge[halfedge[current[isNotOK], 4], 1]-cstart
-                isNotOK = (NV0 < NV)
-            idx = np.repeat(range(NC), NV)
-            flag = (cell2cell < 0)
-            cell2cell[flag] = idx[flag]
-            return cell2cell, cellLocation
-        elif self.NV == 3: # tri mesh
-            cell2cell = np.zeros((NC, 3), dtype=self.itype)
-            current = self.hcell[cstart:]
-            cell2cell[:, 0] = halfedge[halfedge[current, 4], 1] - cstart
-            cell2cell[:, 1] = halfedge[halfedge[halfedge[current, 2], 4], 1] - cstart
-            cell2cell[:, 2] = halfedge[halfedge[halfedge[current, 3], 4], 1] - cstart
-            idx = np.repeat(range(NC), 3).reshape(NC, 3)
-            flag = (cell2cell < 0)
-            cell2cell[flag] = idx[flag]
-            return cell2cella
-        elif self.NV == 4: # quad mesh
-            cell2cell = np.zeros(NC, 4)
-            current = self.hcell[cstart:]
-            cell2cell[:, 3] = halfedge[halfedge[current, 4], 1] - cstart 
-            current = halfedge[current, 2]
-            cell2cell[:, 0] = halfedge[halfedge[current, 4], 1] - cstart
-            current = halfedge[current, 2]
-            cell2cell[:, 1] = halfedge[halfedge[current, 4], 1] - cstart
-            current = halfedge[current, 2]
-            cell2cell[:, 2] = halfedge[halfedge[current, 4], 1] - cstart
-            idx = np.repeat(range(NC), 4).reshape(NC, 4)
+            I = halfedge[flag, 1] - cstart
+            J = halfedge[halfedge[flag, 4], 1] - cstart
+            cell2cell = csr_matrix((val, (I, J)), shape=(NC, NC), dtype=np.bool)
+            return cell2cell
+        else:
+            # the neighbor is the cell itself on the boundary
+            hedges = self._cell_halfedges()
+            if self.NV is None:
+                hedges, cellLocation = hedges
+                NV = np.diff(cellLocation)
+                idx = np.repeat(np.arange(NC), NV)
+            else:
+                idx = np.broadcast_to(np.arange(NC)[:, None], hedges.shape)
+            cell2cell = halfedge[halfedge[hedges, 4], 1] - cstart
             flag = (cell2cell < 0)
             cell2cell[flag] = idx[flag]
+            if self.NV is None:
+                return cell2cell, cellLocation
             return cell2cell
-        else:
-            raise ValueError('The property NV should be None, 3 or 4! But the NV is {}'.format(self.NV))
 
     def edge_to_node(self, return_sparse=False):
         NN = self.NN
@@ -1122,80 +1240,17 @@ class HalfEdgeMesh2dDataStructure():
 
     def edge_to_cell(self):
         NE = self.NE
-        NC = self.NC
 
         halfedge = self.halfedge
         cstart = self.cellstart
-        subdomain = self.subdomain
-        hflag = subdomain[halfedge[:, 1]] > 0
-        hedge = self.hedge
-
-        J = np.zeros(2*NE, dtype=self.itype)
-        J[hedge] = range(NE)
-        J[halfedge[hedge, 4]] = range(NE)
+        hedge = self.hedge[:]
+        _, _, lidx = self.cell_halfedge_ordering()
 
-        edge2cell = np.full((NE, 4), -1, dtype=self.itype)
-        edge2cell[J[hedge], 0] = halfedge[hedge, 1] - cstart
-        edge2cell[J[halfedge[hedge, 4]], 1] = halfedge[halfedge[hedge, 4], 1] - cstart
-
-        isMainHEdge = np.zeros(2*NE, dtype=np.bool_)
-        isMainHEdge[hedge] = True
-
-        if self.NV is None:
-            current = self.hcell[cstart:]
-            end = current.copy()
-            lidx = np.zeros_like(current)
-            isNotOK = np.ones_like(current, dtype=np.bool_)
-            while np.any(isNotOK):
-                idx = J[current[isNotOK]]
-                flag = isMainHEdge[current[isNotOK]]
-                edge2cell[idx[flag], 2] = lidx[isNotOK][flag]
-                edge2cell[idx[~flag], 3] = lidx[isNotOK][~flag]
-                current[isNotOK] = halfedge[current[isNotOK], 2]
-                lidx[isNotOK] += 1
-                isNotOK = (current != end)
-        elif self.NV == 3:
-            current = self.hcell[cstart:]
-            idx = J[current]
-            flag = isMainHEdge[current] 
-            edge2cell[idx[flag], 2] = 0
-            edge2cell[idx[~flag], 3] = 0
-
-            idx = J[halfedge[current, 2]]
-            flag = isMainHEdge[halfedge[current, 2]] 
-            edge2cell[idx[flag], 2] = 1
-            edge2cell[idx[~flag], 3] = 1
-
-            idx = J[halfedge[current, 3]]
-            flag = isMainHEdge[halfedge[current, 3]] 
-            edge2cell[idx[flag], 2] = 2
-            edge2cell[idx[~flag], 3] = 2
-        elif self.NV == 4:
-            current = self.hcell[cstart]
-            idx = J[current]
-            flag = isMainHEdge[current] 
-            edge2cell[idx[flag], 2] = 0
-            edge2cell[idx[~flag], 3] = 0
-
-            current = halfedge[current, 2]
-            idx = J[current]
-            flag = isMainHEdge[current] 
-            edge2cell[idx[flag], 2] = 1
-            edge2cell[idx[~flag], 3] = 1
-
-            current = halfedge[current, 2]
-            idx = J[current]
-            flag = isMainHEdge[current] 
-            edge2cell[idx[flag], 2] = 2
-            edge2cell[idx[~flag], 3] = 2
-
-            current = halfedge[current, 2]
-            idx = J[current]
-            flag = isMainHEdge[current] 
-            edge2cell[idx[flag], 2] = 3
-            edge2cell[idx[~flag], 3] = 3
-        else:
-            raise ValueError('The property NV should be None, 3 or 4! But the NV is {}'.format(self.NV))
+        edge2cell = np.zeros((NE, 4), dtype=self.itype)
+        edge2cell[:, 0] = halfedge[hedge, 1] - cstart
+        edge2cell[:, 1] = halfedge[halfedge[hedge, 4], 1] - cstart
+        edge2cell[:, 2] = lidx[hedge]
+        edge2cell[:, 3] = lidx[halfedge[hedge, 4]]
 
         flag = edge2cell[:, 1] < 0 
         edge2cell[flag, 1] = edge2cell[flag, 0]
@@ -1206,8 +1261,9 @@ class HalfEdgeMesh2dDataStructure():
         NN = self.NN
         NE = self.NE
         halfedge = self.halfedge
-        I = halfedge[:, 0] 
-        J = halfedge[halfedge[:, 4], 0] 
+        flag = self.valid_halfedge_flag()
+        I = halfedge[flag, 0] 
+        J = halfedge[halfedge[flag, 4], 0] 
         val = np.ones(2*NE, dtype=np.bool)
         node2node = csr_matrix((val, (I, J)), shape=(NN, NN), dtype=np.bool_)
         return node2node
@@ -1219,9 +1275,8 @@ class HalfEdgeMesh2dDataStructure():
         NN = self.NN
         NC = self.NC
         halfedge =  self.halfedge
-        subdomain = self.subdomain
         cstart = self.cellstart
-        hflag = subdomain[halfedge[:, 1]] > 0
+        hflag = self.inner_halfedge_flag()
 
         val = np.ones(hflag.sum(), dtype=np.bool_)
         I = halfedge[hflag, 0]
@@ -1232,8 +1287,7 @@ class HalfEdgeMesh2dDataStructure():
     def boundary_node_flag(self):
         NN = self.NN
         halfedge =  self.halfedge # DynamicArray
-        subdomain = self.subdomain # DynamicArray
-        hflag = subdomain[halfedge[:, 1]] > 0
+        hflag = self.inner_halfedge_flag()
         isBdHEdge = hflag & (~hflag[halfedge[:, 4]])
         isBdNode = np.zeros(NN, dtype=np.bool)
         isBdNode[halfedge[isBdHEdge, 0]] = True 
@@ -1242,13 +1296,12 @@ class HalfEdgeMesh2dDataStructure():
     def boundary_edge_flag(self):
         NE = self.NE
         halfedge =  self.halfedge
-        subdomain = self.subdomain
-        hflag = subdomain[halfedge[:, 1]] > 0
+        hflag = self.inner_halfedge_flag()
         isBdHEdge = hflag & (~hflag[halfedge[:, 4]])
-        J = np.zeros(2*NE, dtype=self.itype)
-        J[hedge] = range(NE)
-        J[halfedge[hedge, 4]] = range(NE)
-        return J[isBdHEdge] 
+        J = self.halfedge_to_edge()
+        isBdEdge = np.zeros(NE, dtype=np.bool)
+        isBdEdge[J[isBdHEdge]] = True
+        return isBdEdge
 
     def boundary_edge(self):
         edge = self.edge_to_node()
@@ -1269,8 +1322,7 @@ class HalfEdgeMesh2dDataStructure():
         NC = self.NC
         cstart = self.cellstart
         halfedge =  self.halfedge # DynamicArray
-        subdomain = self.subdomain # DynamicArray
-        hflag = subdomain[halfedge[:, 1]] > 0
+        hflag = self.inner_halfedge_flag()
         isBdHEdge = hflag & (~hflag[halfedge[:, 4]])
 
         isBdCell = np.zeros(NC, dtype=np.bool)
@@ -1294,6 +1346,6 @@ class HalfEdgeMesh2dDataStructure():
         return idx
 
     def main_halfedge_flag(self):
-        isMainHEdge = np.zeros(2*self.NE, dtype=np.bool)
+        isMainHEdge = np.zeros(len(self.halfedge), dtype=np.bool)
         isMainHEdge[self.hedge] = True
         return isMainHEdge
@@ -44,7 +44,7 @@ class HexahedronMesh(Mesh3d):
 
         self.meshtype = 'hex'
 
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
     def volume(self):
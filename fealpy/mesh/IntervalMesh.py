@@ -4,6 +4,7 @@ from scipy.sparse import csr_matrix
 from types import ModuleType
 
 from ..quadrature import GaussLegendreQuadrature
+from ..common.precision import index_array
 
 class IntervalMesh():
     def __init__(self, node, cell):
@@ -26,7 +27,7 @@ class IntervalMesh():
         self.edgedata = self.celldata # Notice celldata, edgedata, facedta are  
         self.facedata = self.celldata # same thing.
 
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
 
@@ -215,13 +216,15 @@ class IntervalMeshDataStructure():
     def __init__(self, NN, cell):
         self.NN = NN
         self.NC = len(cell)
-        self.cell = cell
+        self.cell = index_array(cell, max(NN, cell.size))
+        self.itype = self.cell.dtype
         self.construct()
 
     def reinit(self, NN, cell):
         self.NN = NN
         self.NC = cell.shape[0]
-        self.cell = cell
+        self.cell = index_array(cell, max(NN, cell.size))
+        self.itype = self.cell.dtype
         self.construct()
 
     def construct(self):
@@ -230,9 +233,9 @@ class IntervalMeshDataStructure():
         cell = self.cell
 
         _, i0, j = np.unique(cell.reshape(-1), return_index=True, return_inverse=True)
-        self.node2cell = np.zeros((NN, 4), dtype=np.int)
+        self.node2cell = np.zeros((NN, 4), dtype=self.itype)
 
-        i1 = np.zeros(NN, dtype=np.int) 
+        i1 = np.zeros(NN, dtype=self.itype)
         i1[j] = np.arange(2*NC)
 
         self.node2cell[:, 0] = i0//2 
@@ -246,7 +249,7 @@ class IntervalMeshDataStructure():
     def cell_to_cell(self):
         NC = self.NC
         node2cell = self.node2cell
-        cell2cell = np.zeros((NC, 2), dtype=np.int)
+        cell2cell = np.zeros((NC, 2), dtype=self.itype)
         cell2cell[node2cell[:, 0], node2cell[:, 2]] = node2cell[:, 1]
         cell2cell[node2cell[:, 1], node2cell[:, 3]] = node2cell[:, 0]
         return cell2cell
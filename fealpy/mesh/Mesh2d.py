@@ -1,8 +1,11 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
 from .mesh_tools import unique_row, find_node, find_entity, show_mesh_2d
+from .mesh_ordering import reorder_mesh
 from ..common import ranges
 from types import ModuleType
+from ..common.profiler import profiler
+from ..common.precision import index_array
 
 class Mesh2d(object):
     """ The base class of TriangleMesh and QuadrangleMesh
@@ -217,6 +220,27 @@ class Mesh2d(object):
                 color=color, markersize=markersize,
                 fontsize=fontsize, fontcolor=fontcolor, multiindex=multiindex)
 
+    def reorder(self, method='rcm'):
+        """
+        Renumber the nodes and cells for the locality of memory access and
+        a small bandwidth of the matrices.
+
+        Parameters
+        ----------
+        method : 'rcm' (reverse Cuthill-McKee), 'hilbert' or 'morton'
+
+        Returns
+        -------
+        idx : dict, 'node', 'edge', 'cell' (and 'face' in 3d) -> the index
+            array from the new numbering to the old one, e.g. a piecewise
+            linear function `uh` is renumbered by `uh[:] = uh[idx['node']]`
+
+        See Also
+        --------
+        fealpy.mesh.mesh_ordering.reorder_mesh
+        """
+        return reorder_mesh(self, method=method)
+
     def print(self):
         print("node:\n", self.node)
         print("cell:\n", self.ds.cell)
@@ -233,14 +257,16 @@ class Mesh2dDataStructure():
     def __init__(self, NN, cell):
         self.NN = NN
         self.NC = cell.shape[0]
-        self.cell = cell
-        self.itype = cell.dtype
+        # the indices of the nodes and the local edges of all cells
+        self.cell = index_array(cell, max(NN, cell.size))
+        self.itype = self.cell.dtype
         self.construct()
 
     def reinit(self, NN, cell):
         self.NN = NN
         self.NC = cell.shape[0]
-        self.cell = cell
+        self.cell = index_array(cell, max(NN, cell.size))
+        self.itype = self.cell.dtype
         self.construct()
 
     def clear(self):
@@ -271,6 +297,7 @@ class Mesh2dDataStructure():
     def local_edge(self):
         return self.localEdge
 
+    @profiler.timed()
     def construct(self):
         """ Construct edge and edge2cell from cell
         """
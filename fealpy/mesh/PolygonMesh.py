@@ -4,6 +4,7 @@ from ..common import ranges
 from .mesh_tools import unique_row, find_entity, show_mesh_2d
 from ..quadrature import TriangleQuadrature
 from .Mesh2d import Mesh2d
+from ..common.precision import index_array
 
 class PolygonMesh(Mesh2d):
 
@@ -22,7 +23,7 @@ class PolygonMesh(Mesh2d):
 
         self.ds = PolygonMeshDataStructure(node.shape[0], cell, cellLocation)
         self.meshtype = 'polygon'
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
     def integrator(self, k):
@@ -42,7 +43,7 @@ class PolygonMesh(Mesh2d):
         cell = self.ds.cell
         cellLocation = self.ds.cellLocation
         NV = self.ds.number_of_vertices_of_cells()
-        cells = np.zeros(len(cell) + NC, dtype=np.int)
+        cells = np.zeros(len(cell) + NC, dtype=cell.dtype)
         isIdx = np.ones(len(cell) + NC, dtype=np.bool)
         isIdx[0] = False
         isIdx[np.add.accumulate(NV+1)[:-1]] = False
@@ -252,19 +253,16 @@ class PolygonMesh(Mesh2d):
 
 class PolygonMeshDataStructure():
     def __init__(self, NN, cell, cellLocation):
-        self.NN = NN
-        self.NC = cellLocation.shape[0] - 1
-
-        self.cell = cell
-        self.cellLocation = cellLocation
-        self.construct()
+        self.reinit(NN, cell, cellLocation)
 
     def reinit(self, NN, cell, cellLocation):
         self.NN = NN
         self.NC = cellLocation.shape[0] - 1
 
-        self.cell = cell
-        self.cellLocation = cellLocation
+        n = max(NN, len(cell) + 1)
+        self.cell = index_array(cell, n)
+        self.cellLocation = index_array(cellLocation, n)
+        self.itype = self.cell.dtype
         self.construct()
 
     def clear(self):
@@ -291,7 +289,7 @@ class PolygonMeshDataStructure():
         NC = self.NC
         NV = self.number_of_nodes_of_cells()
 
-        totalEdge = np.zeros((cell.shape[0], 2), dtype=np.int)
+        totalEdge = np.zeros((cell.shape[0], 2), dtype=self.itype)
         totalEdge[:, 0] = cell
         totalEdge[:-1, 1] = cell[1:]
         totalEdge[cellLocation[1:] - 1, 1] = cell[cellLocation[:-1]]
@@ -311,9 +309,9 @@ class PolygonMeshDataStructure():
                 axis=0)
         NE = i0.shape[0]
         self.NE = NE
-        self.edge2cell = np.zeros((NE, 4), dtype=np.int)
+        self.edge2cell = np.zeros((NE, 4), dtype=self.itype)
 
-        i1 = np.zeros(NE, dtype=np.int)
+        i1 = np.zeros(NE, dtype=self.itype)
         i1[j] = np.arange(len(cell))
 
         self.edge = totalEdge[i0]
@@ -2,14 +2,104 @@ import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye, tril, triu
 from scipy.sparse import triu, tril, find, hstack
 from .mesh_tools import unique_row
+from ..quadrature import TetrahedronQuadrature, TriangleQuadrature
+from ..quadrature import GaussLegendreQuadrature
 
 
 class PolyhedronMesh():
     def __init__(self, node, face, faceLocation, face2cell, NC=None, dtype=np.float):
+        """
+        Parameters
+        ----------
+        node : (N, 3)
+        face : the nodes of all faces one after another
+        faceLocation : (NF+1, ), the nodes of the i-th face are
+            face[faceLocation[i]:faceLocation[i+1]]
+        face2cell : (NF, 4), the normal of the i-th face (by the right hand
+            rule) points out of the cell face2cell[i, 0]
+
+        Notes
+        -----
+        The faces are assumed to be planar polygons.
+        """
         self.node = node
         self.ds = PolyhedronMeshDataStructure(node.shape[0], face, faceLocation, face2cell, NC=NC)
         self.meshtype = 'polyhedron'
         self.dtype= dtype 
+        self.itype = face.dtype
+        self.ftype = node.dtype
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        """
+        Get the polyhedron mesh of a tetrahedron or hexahedron mesh.
+        """
+        node = mesh.entity('node')
+        face = mesh.entity('face')
+        NF, NV = face.shape
+        faceLocation = np.arange(0, NV*(NF+1), NV)
+        face2cell = mesh.ds.face_to_cell()
+        NC = mesh.number_of_cells()
+        return cls(node, face.reshape(-1), faceLocation, face2cell, NC=NC)
+
+    def integrator(self, k, etype='cell'):
+        """
+        The quadrature rules on the simplices of the sub-decomposition, see
+        `PolyhedronMeshIntegralAlg`.
+        """
+        if etype in {'cell', 3}:
+            return TetrahedronQuadrature(k)
+        elif etype in {'face', 2}:
+            return TriangleQuadrature(k)
+        elif etype in {'edge', 1}:
+            return GaussLegendreQuadrature(k)
+        else:
+            raise ValueError("`etype` is wrong!")
+
+    def entity(self, etype='face'):
+        if etype in {'face', 2}:
+            return self.ds.face, self.ds.faceLocation
+        elif etype in {'edge', 1}:
+            return self.ds.edge
+        elif etype in {'node', 0}:
+            return self.node
+        else:
+            raise ValueError("`etype` is wrong!")
+
+    def entity_measure(self, etype='cell', index=np.s_[:]):
+        if etype in {'cell', 3}:
+            return self.volume()[index]
+        elif etype in {'face', 2}:
+            return self.face_area()[index]
+        elif etype in {'edge', 1}:
+            return self.edge_length()[index]
+        elif etype in {'node', 0}:
+            return np.zeros(1, dtype=self.ftype)
+        else:
+            raise ValueError("`etype` is wrong!")
+
+    def entity_barycenter(self, etype='cell', index=np.s_[:]):
+        """
+        The barycenters of the vertices of the entities.
+        """
+        node = self.node
+        if etype in {'cell', 3}:
+            cell2node = self.ds.cell_to_node().astype(self.ftype)
+            NV = cell2node.sum(axis=1)
+            bc = np.asarray(cell2node@node/NV)
+        elif etype in {'face', 2}:
+            face = self.ds.face
+            faceLocation = self.ds.faceLocation
+            NV = self.ds.number_of_vertices_of_faces()
+            bc = np.add.reduceat(node[face], faceLocation[:-1], axis=0)/NV.reshape(-1, 1)
+        elif etype in {'edge', 1}:
+            edge = self.ds.edge
+            bc = np.sum(node[edge], axis=1)/2
+        elif etype in {'node', 0}:
+            bc = node
+        else:
+            raise ValueError("`etype` is wrong!")
+        return bc[index]
 
     def to_vtk(self):
         NF = self.number_of_faces()
@@ -18,7 +108,7 @@ class PolyhedronMesh():
         faceLocation = self.ds.faceLocation
         NV = self.ds.number_of_vertices_of_faces()
 
-        faces = np.zeros(len(face) + NF, dtype=np.int)
+        faces = np.zeros(len(face) + NF, dtype=face.dtype)
         isIdx = np.ones(len(face) + NF, dtype=np.bool)
         isIdx[0] = False
         isIdx[np.add.accumulate(NV+1)[:-1]] = False
@@ -84,17 +174,59 @@ class PolyhedronMesh():
         x = np.arccos(np.sum(a*b, axis=1)/np.sqrt(la*lb))
         return np.degrees(x)
 
-    def volume(self):
-        pass
+    def face_normal(self, index=np.s_[:]):
+        """
+        The normals of the faces with the length of the face areas.
+        """
+        node = self.node
+        face = self.ds.face
+        faceLocation = self.ds.faceLocation
+        nex = self.ds.face_next()
+        bc = self.entity_barycenter('face')
+        NV = self.ds.number_of_vertices_of_faces()
+        v = node[face] - np.repeat(bc, NV, axis=0)
+        nv = np.cross(v, v[nex])/2
+        return np.add.reduceat(nv, faceLocation[:-1], axis=0)[index]
 
-    def face_area(self):
-        pass
+    def face_unit_normal(self, index=np.s_[:]):
+        nv = self.face_normal(index=index)
+        length = np.sqrt(np.sum(nv**2, axis=-1))
+        return nv/length.reshape(-1, 1)
 
-    def face_unit_normal(self):
-        pass
+    def face_area(self, index=np.s_[:]):
+        nv = self.face_normal(index=index)
+        return np.sqrt(np.sum(nv**2, axis=-1))
 
-    def edge_unit_tagent(self):
-        pass
+    def volume(self, index=np.s_[:]):
+        """
+        The volumes of the cells by the divergence theorem
+
+            |K| = 1/3 \\sum_F (x_F - x_K).n_F |F|
+        """
+        NC = self.number_of_cells()
+        face2cell = self.ds.face2cell
+        isInFace = (face2cell[:, 0] != face2cell[:, 1])
+        nv = self.face_normal()
+        fc = self.entity_barycenter('face')
+        cc = self.entity_barycenter('cell')
+        val = np.sum((fc - cc[face2cell[:, 0]])*nv, axis=-1)
+        vol = np.bincount(face2cell[:, 0], weights=val, minlength=NC)
+        val = np.sum((fc[isInFace] - cc[face2cell[isInFace, 1]])*nv[isInFace], axis=-1)
+        vol -= np.bincount(face2cell[isInFace, 1], weights=val, minlength=NC)
+        return vol[index]/3
+
+    def edge_length(self, index=np.s_[:]):
+        node = self.node
+        edge = self.ds.edge
+        v = node[edge[index, 1]] - node[edge[index, 0]]
+        return np.sqrt(np.sum(v**2, axis=-1))
+
+    def edge_unit_tagent(self, index=np.s_[:]):
+        node = self.node
+        edge = self.ds.edge
+        v = node[edge[index, 1]] - node[edge[index, 0]]
+        length = np.sqrt(np.sum(v**2, axis=-1))
+        return v/length.reshape(-1, 1)
 
 class PolyhedronMeshDataStructure():
     def __init__(self, N, face, faceLocation, face2cell, NC=None):
@@ -136,6 +268,15 @@ class PolyhedronMeshDataStructure():
         faceLocation = self.faceLocation 
         return faceLocation[1:] - faceLocation[0:-1] 
 
+    def face_next(self):
+        """
+        The index of the next vertex of every face vertex in `face`.
+        """
+        faceLocation = self.faceLocation
+        nex = np.arange(1, len(self.face) + 1)
+        nex[faceLocation[1:] - 1] = faceLocation[:-1]
+        return nex
+
     def total_edge(self):
         face = self.face
         faceLocation = self.faceLocation
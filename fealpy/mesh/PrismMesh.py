@@ -35,7 +35,7 @@ class PrismMesh(Mesh3d):
         self.meshtype = 'prism'
 
         self.ftype = node.dtype
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
 
     def number_of_tri_faces(self):
         face = self.ds.face
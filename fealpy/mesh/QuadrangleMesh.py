@@ -28,7 +28,7 @@ class QuadrangleMesh(Mesh2d):
 
         self.meshtype = 'quad'
 
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
         self.celldata = {}
@@ -4,6 +4,7 @@ from .QuadrangleMesh import QuadrangleMesh
 from .PolygonMesh import PolygonMesh
 from ..common import ranges
 from .adaptive_tools import mark
+from ..common.profiler import profiler
 
 
 class Quadtree(QuadrangleMesh):
@@ -70,6 +71,7 @@ class Quadtree(QuadrangleMesh):
             }
         return options
 
+    @profiler.timed()
     def uniform_refine(self, n=1):
         for i in range(n):
             self.refine_1()
@@ -443,6 +445,7 @@ class Quadtree(QuadrangleMesh):
         isMarkedCell[leafCellIdx[isMarked]] = True
         return isMarkedCell
 
+    @profiler.timed()
     def refine(self, isMarkedCell=None, data=None):
         if isMarkedCell is None:
             idx = self.leaf_cell_index()
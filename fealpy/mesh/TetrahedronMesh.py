@@ -44,7 +44,7 @@ class TetrahedronMesh(Mesh3d):
 
         self.meshtype = 'tet'
 
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
         self.celldata = {}
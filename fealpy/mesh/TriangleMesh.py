@@ -1,8 +1,11 @@
+import warnings
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, bmat, eye
 from .Mesh2d import Mesh2d, Mesh2dDataStructure
 from ..quadrature import TriangleQuadrature
 from ..quadrature import GaussLegendreQuadrature
+from ..quadrature.QuadraturePointCache import mesh_modified
+from ..common.profiler import profiler
 
 class TriangleMeshDataStructure(Mesh2dDataStructure):
     localEdge = np.array([(1, 2), (2, 0), (0, 1)])
@@ -26,7 +29,7 @@ class TriangleMesh(Mesh2d):
         elif node.shape[1] == 3:
             self.meshtype = 'stri'
 
-        self.itype = cell.dtype
+        self.itype = self.ds.itype
         self.ftype = node.dtype
 
         self.celldata = {}
@@ -54,19 +57,18 @@ class TriangleMesh(Mesh2d):
         把网格转化为 VTK 的格式
         """
         node = self.entity('node')
+        GD = self.geo_dimension()
         if GD == 2:
-            node = np.concatenate((node, np.zeros((node.shape[0], 1), dtype=mesh.ftype)), axis=1)
+            node = np.concatenate((node, np.zeros((node.shape[0], 1), dtype=self.ftype)), axis=1)
 
         mcell = self.entity('cell')
-        NV = np.repeat(NV, NC)
+        NC = mcell.shape[0]
 
-        cell = np.zeros(len(mcell.reshape(-1)) + NC, dtype=np.int_)
-        isIdx = np.ones(len(mcell.reshape(-1)) + NC, dtype=np.bool_)
-        isIdx[0] = False
-        isIdx[np.add.accumulate(NV+1)[:-1]] = False
-        cell[~isIdx] = NV
-        cell[isIdx] = mcell.flat
-        return node, cell
+        # [3, i, j, k, 3, ...], the same index type as the mesh
+        cell = np.zeros((NC, 4), dtype=mcell.dtype)
+        cell[:, 0] = 3
+        cell[:, 1:] = mcell
+        return node, cell.reshape(-1)
 
     def integrator(self, k, etype='cell'):
         if etype in {'cell', 2}:
@@ -248,6 +250,132 @@ class TriangleMesh(Mesh2d):
                 NN = self.number_of_nodes()
                 self.ds.reinit(NN, cell)
 
+    def edge_flip(self, isCheckEdge=None, threshold=None, maxit=100):
+        """
+        Flip the non-Delaunay interior edges in place.
+
+        Parameters
+        ----------
+        isCheckEdge : (NE, ) bool, only these edges are checked, default all
+        threshold : callable, `threshold(bc)` returns a bool array which is
+            True if the cell with barycenter `bc` is allowed to be created
+        maxit : the maximal number of flipping rounds, a warning is given if
+            there are still non-Delaunay edges after them
+
+        Returns
+        -------
+        The indices of the flipped edges, an edge may appear more than once.
+
+        Notes
+        -----
+        Every round flips a set of edges which do not share cells, and the
+        arrays `cell`, `edge` and `edge2cell` are updated locally, so the
+        number and the indices of the edges and cells are kept and no global
+        reconstruction of the topology is needed.
+        """
+        ds = self.ds
+        node = self.node
+        cell = ds.cell
+        edge = ds.edge
+        edge2cell = ds.edge2cell
+        NC = self.number_of_cells()
+        NE = self.number_of_edges()
+
+        if isCheckEdge is not None:
+            isCheckEdge = isCheckEdge.copy()
+
+        flipped = []
+        for k in range(maxit):
+            c0 = edge2cell[:, 0]
+            c1 = edge2cell[:, 1]
+            i0 = edge2cell[:, 2]
+            i1 = edge2cell[:, 3]
+            a = cell[c0, i0]
+            d = cell[c1, i1]
+            isInEdge = (c0 != c1)
+            if isCheckEdge is not None:
+                isInEdge &= isCheckEdge
+            idx, = np.nonzero(isInEdge)
+
+            # the edge (b, c) is non-Delaunay if cot(a) + cot(d) < 0
+            v0 = node[edge[idx, 0]] - node[a[idx]]
+            v1 = node[edge[idx, 1]] - node[a[idx]]
+            w0 = node[edge[idx, 1]] - node[d[idx]]
+            w1 = node[edge[idx, 0]] - node[d[idx]]
+            cota = np.sum(v0*v1, axis=1)/np.abs(np.cross(v0, v1))
+            cotd = np.sum(w0*w1, axis=1)/np.abs(np.cross(w0, w1))
+            flag = (cota + cotd < -1e-10)
+            if not np.any(flag):
+                break
+            idx = idx[flag]
+            val = np.full(NE, -np.inf)
+            val[idx] = -(cota + cotd)[flag]
+
+            # every cell selects its most non-Delaunay edge, and an edge is
+            # flipped only if it is selected by both of its cells
+            cell2edge = ds.cell_to_edge()
+            best = cell2edge[np.arange(NC), np.argmax(val[cell2edge], axis=1)]
+            flag = (best[c0[idx]] == idx) & (best[c1[idx]] == idx)
+            idx = idx[flag]
+
+            if threshold is not None:
+                pa = node[a[idx]]
+                pd = node[d[idx]]
+                flag = threshold((pa + pd + node[edge[idx, 0]])/3)
+                flag &= threshold((pa + pd + node[edge[idx, 1]])/3)
+                idx = idx[flag]
+            if len(idx) == 0:
+                break
+
+            c0 = c0[idx]
+            c1 = c1[idx]
+            i0 = i0[idx]
+            i1 = i1[idx]
+
+            # the cells (a, b, c) and (d, c, b) share the edge (b, c)
+            a = cell[c0, i0]
+            b = cell[c0, (i0 + 1)%3]
+            c = cell[c0, (i0 + 2)%3]
+            d = cell[c1, i1]
+
+            # the old and new (cell, local index) of the outer edges
+            update = [
+                (cell2edge[c1, (i1 + 1)%3], c1, (i1 + 1)%3, c0, 0), # (b, d)
+                (cell2edge[c0, (i0 + 2)%3], c0, (i0 + 2)%3, c0, 2), # (a, b)
+                (cell2edge[c1, (i1 + 2)%3], c1, (i1 + 2)%3, c1, 0), # (d, c)
+                (cell2edge[c0, (i0 + 1)%3], c0, (i0 + 1)%3, c1, 1)] # (c, a)
+            e2c = edge2cell.copy()
+            for e, oc, ol, nc, nl in update:
+                for i in range(2):
+                    flag = (e2c[e, i] == oc) & (e2c[e, i + 2] == ol)
+                    edge2cell[e[flag], i] = nc[flag]
+                    edge2cell[e[flag], i + 2] = nl
+                if isCheckEdge is not None:
+                    isCheckEdge[e] = True
+
+            cell[c0, 0] = a
+            cell[c0, 1] = b
+            cell[c0, 2] = d
+            cell[c1, 0] = a
+            cell[c1, 1] = d
+            cell[c1, 2] = c
+
+            edge[idx, 0] = d
+            edge[idx, 1] = a
+            edge2cell[idx, 2] = 1
+            edge2cell[idx, 3] = 2
+            flipped.append(idx)
+        else:
+            warnings.warn("there are still non-Delaunay edges after {} "
+                    "rounds of flipping!".format(maxit))
+
+        if len(flipped) > 0:
+            mesh_modified(self)
+            return np.concatenate(flipped)
+        else:
+            return np.zeros(0, dtype=self.itype)
+
+    @profiler.timed()
     def uniform_refine(self, n=1, surface=None, returnim=False):
         if returnim:
             nodeIMatrix = []
@@ -287,6 +415,7 @@ class TriangleMesh(Mesh2d):
         for i in range(n):
             self.bisect()
 
+    @profiler.timed()
     def bisect(self, isMarkedCell=None, returnim=False, refine=None):
 
         NN = self.number_of_nodes()
@@ -33,6 +33,7 @@ from .QuadtreeForest import QuadtreeMesh, QuadtreeForest
 from .simple_mesh_generator import *
 
 from .distmesh import DistMesh2d
+from .meshopt import MeshOptimizer
 from .mesh_tools import *
 
 from .meshio import load_mat_mesh
@@ -3,6 +3,8 @@ import numpy as np
 from scipy.spatial import Delaunay, delaunay_plot_2d
 from .TriangleMesh import TriangleMesh
 from .TetrahedronMesh import TetrahedronMesh
+from ..quadrature.QuadraturePointCache import mesh_modified
+from timeit import default_timer as timer
 
 class DistMesh2d():
     def __init__(self,
@@ -10,10 +12,32 @@ class DistMesh2d():
             h,
             dptol = 0.001,
             ttol = 0.1,
-            Fscale = 1.2):
+            Fscale = 1.2,
+            incremental = False):
+        """
+        Parameters
+        ----------
+        incremental : bool
+            If it is True, the topology is kept and only updated by local edge
+            flips when the nodes move more than `ttol`, the edge forces are
+            only computed on the edges with moving nodes, and a global
+            Delaunay triangulation is done only when some cells are inverted.
+            The nodes moved less than `ftol*dptol` are frozen. The forces of
+            all the nodes are updated every `nfull` iterations and before
+            stopping, so the stopping criterion is the one of the
+            non-incremental mode.
+
+        Notes
+        -----
+        The statistics of every iteration are appended to `self.stat`.
+        """
 
         self.domain = domain
         self.params = (h, dptol, ttol, Fscale)
+        self.incremental = incremental
+        self.nfull = 10
+        self.ftol = 0.1
+        self.stat = []
 
         eps = np.finfo(float).eps
         self.geps = 0.001*h
@@ -36,6 +60,12 @@ class DistMesh2d():
             except StopIteration:
                 break
 
+        if self.incremental:
+            # remove the cells out of the domain left by the local flips
+            t = self.delaunay(self.mesh.node)
+            self.mesh = TriangleMesh(self.mesh.node, t)
+            self.reset_active_set()
+
     def set_init_mesh(self): 
 
         fd, fh, bbox, pfix, args = self.domain.params
@@ -59,6 +89,18 @@ class DistMesh2d():
 
         t = self.delaunay(p)
         self.mesh = TriangleMesh(p, t)
+        self.reset_active_set()
+
+    def reset_active_set(self):
+        """
+        Mark all nodes active and clear the cached edge lengths and edge
+        sizes, which is needed after the topology is rebuilt.
+        """
+        NN = self.mesh.number_of_nodes()
+        NE = self.mesh.number_of_edges()
+        self.isActiveNode = np.ones(NN, dtype=np.bool)
+        self.L2 = np.zeros(NE, dtype=np.float)
+        self.hedge = np.zeros(NE, dtype=np.float)
 
     def step_length(self):
         return self.dt
@@ -67,7 +109,15 @@ class DistMesh2d():
         fd, fh, bbox, pfix, args = self.domain.params
         h, dptol, ttol, Fscale = self.params
 
+        start = timer()
+        if self.incremental and (self.count%self.nfull == 0):
+            # the forces of the frozen nodes change with the scaling of the
+            # edge lengths, so all of them are updated regularly
+            self.isActiveNode[:] = True
+        nactive = self.isActiveNode.sum()
+        isFull = (not self.incremental) or (nactive == len(self.isActiveNode))
         dxdt = self.dx_dt(self.time_elapsed)
+        p0 = self.mesh.node
         self.mesh.node = self.mesh.node + dt*dxdt
 
         p = self.mesh.node
@@ -79,16 +129,67 @@ class DistMesh2d():
         dgrady = (fd(p[idx, :]+depsy, *args) - d[idx])/self.deps
         p[idx, 0] = p[idx, 0] - d[idx]*dgradx
         p[idx, 1] = p[idx, 1] - d[idx]*dgrady
+        mesh_modified(self.mesh)
         self.maxmove = np.max(np.sqrt(np.sum(dt*dxdt[d < -self.geps,:]**2, axis=1))/h)
         self.time_elapsed += dt
 
-        if self.maxmove > ttol:
-            t = self.delaunay(self.mesh.node)
-            self.mesh = TriangleMesh(self.mesh.node, t)
+        # the nodes moved much less than the stopping tolerance are frozen
+        self.isActiveNode = np.sqrt(np.sum((p - p0)**2, axis=1)) > self.ftol*dptol*h
 
+        nflip = 0
+        retriangulation = False
+        if self.maxmove > ttol:
+            if self.incremental and np.all(self.mesh.entity_measure('cell') > 0):
+                nflip = self.edge_flip()
+            else:
+                t = self.delaunay(self.mesh.node)
+                self.mesh = TriangleMesh(self.mesh.node, t)
+                self.reset_active_set()
+                retriangulation = True
+
+        self.count += 1
+        self.stat.append({
+            'iteration': self.count,
+            'maxmove': self.maxmove,
+            'number_of_active_nodes': nactive,
+            'number_of_flips': nflip,
+            'retriangulation': retriangulation,
+            'time': timer() - start})
 
         if self.maxmove < dptol:
-            raise StopIteration
+            if isFull:
+                raise StopIteration
+            # stop only if the forces of all the nodes are small
+            self.isActiveNode[:] = True
+
+    def edge_flip(self, maxit=100):
+        """
+        Flip the non-Delaunay interior edges around the active nodes in place,
+        see `TriangleMesh.edge_flip`.
+
+        Returns
+        -------
+        The total number of flipped edges.
+        """
+        fd, *_, args = self.domain.params
+        mesh = self.mesh
+        edge = mesh.entity('edge')
+        cell = mesh.entity('cell')
+        edge2cell = mesh.ds.edge_to_cell()
+
+        isActiveNode = self.isActiveNode
+        isCheckEdge = np.any(isActiveNode[edge], axis=1)
+        isCheckEdge |= isActiveNode[cell[edge2cell[:, 0], edge2cell[:, 2]]]
+        isCheckEdge |= isActiveNode[cell[edge2cell[:, 1], edge2cell[:, 3]]]
+
+        # the new cells should be in the domain as in `self.delaunay`
+        threshold = lambda bc: fd(bc, *args) < -self.geps
+        idx = mesh.edge_flip(isCheckEdge=isCheckEdge, threshold=threshold,
+                maxit=maxit)
+        isActiveNode[edge[idx]] = True
+        isActiveNode[cell[edge2cell[idx, 0]]] = True
+        isActiveNode[cell[edge2cell[idx, 1]]] = True
+        return len(idx)
 
     def dx_dt(self, t):
 
@@ -98,10 +199,22 @@ class DistMesh2d():
         p = self.mesh.node
         N = p.shape[0]
         edge = self.mesh.ds.edge
+        if self.incremental:
+            # the active nodes and their neighbors get the full sums of the
+            # forces of all their edges, and the other nodes are not moved
+            isMovingNode = self.isActiveNode.copy()
+            isActiveEdge = np.any(self.isActiveNode[edge], axis=1)
+            isMovingNode[edge[isActiveEdge]] = True
+            idx, = np.nonzero(np.any(isMovingNode[edge], axis=1))
+            edge = edge[idx]
+        else:
+            idx = np.s_[:]
         vec = p[edge[:, 0], :] - p[edge[:, 1], :]
         L = np.sqrt(np.sum(vec**2, axis=1))
         hedge = fh(p[edge[:, 1],:]+vec/2, *args) 
-        L0 = np.sqrt(np.sum(L**2)/np.sum(hedge**2))*Fscale*hedge
+        self.L2[idx] = L**2
+        self.hedge[idx] = hedge
+        L0 = np.sqrt(np.sum(self.L2)/np.sum(self.hedge**2))*Fscale*hedge
         F = L0 - L
         F[L0-L<0] = 0
         FV = (F/L).reshape((-1,1))*vec
@@ -111,6 +224,8 @@ class DistMesh2d():
         dxdt[:, 1] += np.bincount(edge[:,0], weights=FV[:,1], minlength=N)
         dxdt[:, 0] -= np.bincount(edge[:,1], weights=FV[:,0], minlength=N)
         dxdt[:, 1] -= np.bincount(edge[:,1], weights=FV[:,1], minlength=N)
+        if self.incremental:
+            dxdt[~isMovingNode] = 0
 
         if pfix is not None:
             dxdt[0:pfix.shape[0],:] = 0
@@ -129,10 +244,31 @@ class DistMesh3d:
             h,
             dptol = 0.001,
             ttol = 0.1,
-            Fscale = 1.1):
+            Fscale = 1.1,
+            incremental = False):
+        """
+        Parameters
+        ----------
+        incremental : bool
+            If it is True, the edge forces are only computed on the edges
+            with moving nodes and their neighbors, where the nodes moved less
+            than `ftol*dptol` are frozen. The forces of all the nodes are
+            updated every `nfull` iterations and before stopping. The
+            topology is still rebuilt by a global Delaunay triangulation when
+            the nodes move more than `ttol`.
+
+        Notes
+        -----
+        The statistics of every iteration are appended to `self.stat`.
+        """
 
         self.domain = domain
         self.params = (h, dptol, ttol, Fscale)
+        self.incremental = incremental
+        self.nfull = 10
+        self.ftol = 0.1
+        self.stat = []
+        self.count = 0
 
         eps = np.finfo(float).eps
         self.geps = 0.1*h
@@ -184,6 +320,14 @@ class DistMesh3d:
 
         t = self.delaunay(p)
         self.mesh = TetrahedronMesh(p, t)
+        self.reset_active_set()
+
+    def reset_active_set(self):
+        NN = self.mesh.number_of_nodes()
+        NE = self.mesh.number_of_edges()
+        self.isActiveNode = np.ones(NN, dtype=np.bool)
+        self.L3 = np.zeros(NE, dtype=np.float)
+        self.hedge = np.zeros(NE, dtype=np.float)
 
     def step_length(self):
         return self.dt
@@ -192,7 +336,15 @@ class DistMesh3d:
         fd, fh, bbox, pfix, args = self.domain.params
         h, dptol, ttol, Fscale = self.params
 
+        start = timer()
+        if self.incremental and (self.count%self.nfull == 0):
+            # the forces of the frozen nodes change with the scaling of the
+            # edge lengths, so all of them are updated regularly
+            self.isActiveNode[:] = True
+        nactive = self.isActiveNode.sum()
+        isFull = (not self.incremental) or (nactive == len(self.isActiveNode))
         dxdt = self.dx_dt(self.time_elapsed)
+        p0 = self.mesh.node
         self.mesh.node = self.mesh.node + dt*dxdt
 
         p = self.mesh.node
@@ -207,14 +359,32 @@ class DistMesh3d:
         p[idx, 0] = p[idx, 0] - d[idx]*dgradx
         p[idx, 1] = p[idx, 1] - d[idx]*dgrady
         p[idx, 2] = p[idx, 2] - d[idx]*dgradz
+        mesh_modified(self.mesh)
         self.maxmove = np.max(np.sqrt(np.sum(dt*dxdt[d < -self.geps,:]**2, axis=1)))
         self.time_elapsed += dt
+
+        self.isActiveNode = np.sqrt(np.sum((p - p0)**2, axis=1)) > self.ftol*dptol*h
+
+        retriangulation = False
         if self.maxmove > ttol*h:
             t = self.delaunay(self.mesh.node)
             self.mesh = TetrahedronMesh(self.mesh.node, t)
+            self.reset_active_set()
+            retriangulation = True
+
+        self.count += 1
+        self.stat.append({
+            'iteration': self.count,
+            'maxmove': self.maxmove/h,
+            'number_of_active_nodes': nactive,
+            'retriangulation': retriangulation,
+            'time': timer() - start})
 
         if self.maxmove < dptol*h:
-            raise StopIteration
+            if isFull:
+                raise StopIteration
+            # stop only if the forces of all the nodes are small
+            self.isActiveNode[:] = True
 
     def dx_dt(self, t):
 
@@ -224,10 +394,22 @@ class DistMesh3d:
         p = self.mesh.node
         N = p.shape[0]
         edge = self.mesh.ds.edge
+        if self.incremental:
+            # the active nodes and their neighbors get the full sums of the
+            # forces of all their edges, and the other nodes are not moved
+            isMovingNode = self.isActiveNode.copy()
+            isActiveEdge = np.any(self.isActiveNode[edge], axis=1)
+            isMovingNode[edge[isActiveEdge]] = True
+            idx, = np.nonzero(np.any(isMovingNode[edge], axis=1))
+            edge = edge[idx]
+        else:
+            idx = np.s_[:]
         vec = p[edge[:, 0], :] - p[edge[:, 1], :]
         L = np.sqrt(np.sum(vec**2, axis=1))
         hedge = fh(p[edge[:, 1],:]+vec/2, *args) 
-        L0 = Fscale*hedge*(np.sum(L**3)/np.sum(hedge**3))**(1/3)
+        self.L3[idx] = L**3
+        self.hedge[idx] = hedge
+        L0 = Fscale*hedge*(np.sum(self.L3)/np.sum(self.hedge**3))**(1/3)
         F = L0 - L
         F[L0-L<0] = 0
         FV = (F/L).reshape((-1,1))*vec
@@ -236,6 +418,8 @@ class DistMesh3d:
         for i in range(3):
             dxdt[:, i] += np.bincount(edge[:, 0], weights=FV[:, i], minlength=N)
             dxdt[:, i] -= np.bincount(edge[:, 1], weights=FV[:, i], minlength=N)
+        if self.incremental:
+            dxdt[~isMovingNode] = 0
 
         if pfix is not None:
             dxdt[0:pfix.shape[0],:] = 0
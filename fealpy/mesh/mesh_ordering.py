@@ -0,0 +1,279 @@
+"""
+Mesh Ordering
+=============
+
+Renumber the nodes, cells and degrees of freedom for locality.
+
+The numbering coming from the mesh generators and the refinement algorithms,
+which append the new entities at the end, has poor locality. Gathers like
+`node[cell]` then jump around in memory, and the sparse matrices have a large
+bandwidth. Here we provide the reverse Cuthill-McKee ordering of a sparse
+graph and the Morton (Z-order) and Hilbert space filling curve orderings of
+a point set.
+
+All orderings are returned as an index array `idx` from the new numbering
+to the old one, i.e. `a[idx]` is the renumbered array `a`.
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+
+def rcm_ordering(A):
+    """
+    The reverse Cuthill-McKee ordering of the symmetric sparse graph `A`.
+    """
+    A = csr_matrix(A)
+    return reverse_cuthill_mckee(A, symmetric_mode=True).astype(np.int)
+
+
+def quantize(points, m):
+    """
+    Map the points into the integer grid {0, 1, ..., 2^m - 1}^GD.
+    """
+    pmin = np.min(points, axis=0)
+    pmax = np.max(points, axis=0)
+    h = np.max(pmax - pmin)
+    if h == 0:
+        h = 1.0
+    X = np.floor((points - pmin)/h*(2**m - 1)).astype(np.uint64)
+    return X
+
+
+def interleave(X, m):
+    """
+    Interleave the m bits of the columns of X, the first column gives the
+    most significant bit.
+    """
+    GD = X.shape[1]
+    key = np.zeros(X.shape[0], dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(m - 1, -1, -1):
+        for i in range(GD):
+            key = (key << one) | ((X[:, i] >> np.uint64(b)) & one)
+    return key
+
+
+def morton_key(points, m=None):
+    """
+    The Morton (Z-order) keys of the points.
+
+    Parameters
+    ----------
+    points : (NP, GD)
+    m : the number of bits of each coordinate, default 63//GD
+    """
+    GD = points.shape[1]
+    m = 63//GD if m is None else m
+    X = quantize(points, m)
+    return interleave(X, m)
+
+
+def hilbert_key(points, m=None):
+    """
+    The Hilbert keys of the points.
+
+    Parameters
+    ----------
+    points : (NP, GD)
+    m : the number of bits of each coordinate, default 63//GD
+
+    Notes
+    -----
+    The coordinates are transformed to the transposed Hilbert index by the
+    algorithm of J. Skilling, "Programming the Hilbert curve", AIP Conference
+    Proceedings 707, 2004, and then interleaved as the Morton key.
+    """
+    GD = points.shape[1]
+    m = 63//GD if m is None else m
+    X = quantize(points, m)
+
+    M = np.uint64(1) << np.uint64(m - 1)
+    # inverse undo
+    Q = M
+    while Q > 1:
+        P = Q - np.uint64(1)
+        for i in range(GD):
+            flag = (X[:, i] & Q) > 0
+            X[flag, 0] ^= P
+            t = (X[~flag, 0] ^ X[~flag, i]) & P
+            X[~flag, 0] ^= t
+            X[~flag, i] ^= t
+        Q >>= np.uint64(1)
+
+    # gray encode
+    for i in range(1, GD):
+        X[:, i] ^= X[:, i-1]
+    t = np.zeros(X.shape[0], dtype=np.uint64)
+    Q = M
+    while Q > 1:
+        flag = (X[:, GD-1] & Q) > 0
+        t[flag] ^= Q - np.uint64(1)
+        Q >>= np.uint64(1)
+    X ^= t[:, None]
+    return interleave(X, m)
+
+
+def space_filling_curve_ordering(points, curve='hilbert'):
+    """
+    Sort the points along a space filling curve.
+
+    Parameters
+    ----------
+    points : (NP, GD)
+    curve : 'hilbert' or 'morton'
+    """
+    if curve == 'hilbert':
+        key = hilbert_key(points)
+    elif curve == 'morton':
+        key = morton_key(points)
+    else:
+        raise ValueError("I don't know the space filling curve {}!".format(curve))
+    return np.argsort(key, kind='stable')
+
+
+def bandwidth(A):
+    """
+    The bandwidth of the sparse matrix `A`.
+    """
+    A = A.tocoo()
+    if A.nnz == 0:
+        return 0
+    return np.max(np.abs(A.row - A.col))
+
+
+def node_graph(NN, edge):
+    """
+    The node adjacency graph of the edges.
+    """
+    NE = len(edge)
+    val = np.ones(2*NE, dtype=np.bool)
+    A = csr_matrix((val, (edge.flat, edge[:, [1, 0]].flat)), shape=(NN, NN))
+    return A
+
+
+def match_entity(old, new):
+    """
+    Find `idx` with `old[idx]` equal to `new` up to the order of the nodes of
+    every entity.
+    """
+    old = np.sort(old, axis=1)
+    new = np.sort(new, axis=1)
+    i = np.lexsort(old.T[::-1])
+    j = np.lexsort(new.T[::-1])
+    idx = np.zeros(len(new), dtype=np.int)
+    idx[j] = i
+    return idx
+
+
+def reorder_mesh(mesh, method='rcm'):
+    """
+    Renumber the nodes and cells of a mesh with `mesh.ds.reinit`.
+
+    Parameters
+    ----------
+    mesh : a mesh of `Mesh2d` or `Mesh3d` type, e.g. `TriangleMesh`,
+        `QuadrangleMesh`, `PolygonMesh`, `TetrahedronMesh`, `HexahedronMesh`
+        or the tree meshes based on them
+    method : 'rcm', 'hilbert' or 'morton'
+
+    Returns
+    -------
+    idx : dict, 'node', 'edge', 'face' (3d) and 'cell' -> the index array from
+        the new numbering to the old one
+
+    Notes
+    -----
+    With 'rcm' the nodes are ordered by the reverse Cuthill-McKee ordering of
+    the node graph and the cells are sorted by their smallest new node
+    number. With a space filling curve, the nodes and the cell barycenters
+    are sorted along the curve. The edges and faces are renumbered by
+    `mesh.ds.reinit`, which sorts them by their nodes, so they follow the
+    new node numbering.
+
+    The local vertex order of every cell is kept, so a discrete function on
+    the old mesh can be mapped to the new one cell by cell, see
+    `fealpy.functionspace.femdof.dof_permutation`. The arrays in `nodedata`,
+    `edgedata`, `facedata` and `celldata`, and the `parent` and `child`
+    arrays of the tree meshes are renumbered too.
+    """
+    TD = mesh.top_dimension()
+    NN = mesh.number_of_nodes()
+    NC = mesh.number_of_cells()
+    node = mesh.entity('node')
+    edge = mesh.entity('edge')
+    if TD == 3:
+        face = mesh.entity('face')
+
+    isPolygon = mesh.meshtype == 'polygon'
+    if isPolygon:
+        cell = mesh.ds.cell
+        cellLocation = mesh.ds.cellLocation
+        NV = mesh.ds.number_of_vertices_of_cells()
+        cellIdx = np.repeat(np.arange(NC), NV)
+    else:
+        cell = mesh.entity('cell')
+
+    if method == 'rcm':
+        nidx = rcm_ordering(node_graph(NN, edge))
+        inidx = np.zeros(NN, dtype=np.int)
+        inidx[nidx] = np.arange(NN)
+        if isPolygon:
+            cmin = np.full(NC, NN, dtype=np.int)
+            cmax = np.zeros(NC, dtype=np.int)
+            np.minimum.at(cmin, cellIdx, inidx[cell])
+            np.maximum.at(cmax, cellIdx, inidx[cell])
+        else:
+            cmin = np.min(inidx[cell], axis=1)
+            cmax = np.max(inidx[cell], axis=1)
+        cidx = np.lexsort((cmax, cmin))
+    elif method in {'hilbert', 'morton'}:
+        nidx = space_filling_curve_ordering(node, curve=method)
+        inidx = np.zeros(NN, dtype=np.int)
+        inidx[nidx] = np.arange(NN)
+        bc = mesh.entity_barycenter('cell')
+        cidx = space_filling_curve_ordering(bc, curve=method)
+    else:
+        raise ValueError("I don't know the ordering method {}!".format(method))
+
+    mesh.node = node[nidx]
+    if isPolygon:
+        NV = NV[cidx]
+        location = np.zeros(NC + 1, dtype=cellLocation.dtype)
+        location[1:] = np.cumsum(NV)
+        i = np.repeat(cellLocation[cidx] - location[:-1], NV) + np.arange(location[-1])
+        mesh.ds.reinit(NN, inidx[cell[i]].astype(cell.dtype), location)
+    else:
+        mesh.ds.reinit(NN, inidx[cell[cidx]].astype(cell.dtype))
+
+    idx = {'node': nidx, 'cell': cidx}
+    idx['edge'] = match_entity(inidx[edge], mesh.entity('edge'))
+    if TD == 3:
+        idx['face'] = match_entity(inidx[face], mesh.entity('face'))
+
+    done = set()
+    for name, etype in [('nodedata', 'node'), ('edgedata', 'edge'),
+            ('facedata', 'face'), ('celldata', 'cell')]:
+        data = getattr(mesh, name, None)
+        if data is None or id(data) in done:
+            continue
+        done.add(id(data))
+        if etype == 'face' and TD == 2:
+            etype = 'edge'
+        for key, val in data.items():
+            if isinstance(val, np.ndarray) and len(val) == len(idx[etype]):
+                data[key] = val[idx[etype]]
+
+    if hasattr(mesh, 'parent') and hasattr(mesh, 'child'):
+        icidx = np.zeros(NC, dtype=np.int)
+        icidx[cidx] = np.arange(NC)
+        parent = mesh.parent[cidx]
+        flag = parent[:, 0] >= 0
+        parent[flag, 0] = icidx[parent[flag, 0]]
+        child = mesh.child[cidx]
+        flag = child >= 0
+        child[flag] = icidx[child[flag]]
+        mesh.parent = parent
+        mesh.child = child
+
+    return idx
@@ -205,7 +205,13 @@ def show_halfedge_mesh(axes, mesh,
 
     NE = p0.shape[0]
     isMainHEdge = mesh.ds.main_halfedge_flag()
+    if hasattr(mesh.ds, 'valid_halfedge_flag'): # skip the free halfedges
+        isValidHEdge = mesh.ds.valid_halfedge_flag()
+    else:
+        isValidHEdge = np.ones(NE, dtype=np.bool)
     for i in range(NE):
+        if not isValidHEdge[i]:
+            continue
         if isMainHEdge[i]:
             axes.arrow(
                 p0[i, 0], p0[i, 1], v[i, 0], v[i, 1], 
@@ -219,6 +225,8 @@ def show_halfedge_mesh(axes, mesh,
 
     if showindex:
         for i in range(NE):
+            if not isValidHEdge[i]:
+                continue
             if  isMainHEdge[i]:
                 axes.text(
                         ec[i, 0], ec[i, 1],
@@ -1,36 +1,362 @@
 import numpy as np
 from scipy.sparse import triu, tril
 
+from .meshquality import TriRadiusRatio, TetRadiusRatio
+from .coloring import coloring as randomcoloring
+from ..common.profiler import profiler
+from ..quadrature.QuadraturePointCache import mesh_modified
 
-def tri_odt_opt(mesh):
-    pass
+
+def tri_odt_opt(mesh, maxit=10, **kwargs):
+    """
+    The ODT smoothing of the triangle mesh, see `MeshOptimizer`.
+    """
+    opt = MeshOptimizer(mesh, method='odt', **kwargs)
+    opt.run(maxit=maxit)
+    return opt
+
+
+class MeshOptimizer():
+    """
+    The node smoothing of the `TriangleMesh` and the `TetrahedronMesh`.
+
+    Every step moves a node to the weighted average of the local positions
+    given by the cells around it
+
+        x_i = sum_T m_{T, i} / sum_T w_{T, i}
+
+    method :
+        'odt' : the optimal Delaunay triangulation, w = |T|, m = |T| c_T with
+            the circumcenter c_T of T
+        'cpt' : the centroidal patch triangulation, w = |T|, m = |T| b_T with
+            the barycenter b_T of T
+        'radius_ratio' : the gradient step of the radius ratio, w and the
+            gradient g of the radius ratio of T come from `TriRadiusRatio` or
+            `TetRadiusRatio`, m = w x_i - g
+
+    and the density rho(x) of the ODT and the CPT is given by the weight
+    |T| rho(b_T).
+
+    The local quantities of all the cells are computed at the same time and
+    summed by `np.add.reduceat`. With coloring=True the nodes are colored
+    by `coloring.coloring` such that the nodes of the same color do not share
+    a cell, and the colors are updated one by one, i.e. the Gauss-Seidel
+    iteration, which usually needs fewer sweeps than the Jacobi one with
+    coloring=False, where all the nodes are moved together.
+
+    The step of a node is not longer than the shortest edge around it, and
+    it is halved if it inverts a cell around it or makes a cell worse than
+    the worst one around the moved vertices of the cell before, until it is
+    shorter than `amin` times the first one, then the node is not moved. So
+    the cells are not inverted, and the worst quality of the mesh does not
+    decrease.
+
+    The boundary nodes are fixed. If the boundary is given, they are moved
+    as the interior nodes and then projected onto the boundary, in this case
+    the corners of the domain should be given in `fixed`.
+
+    Examples
+    --------
+    >> opt = MeshOptimizer(mesh, method='odt')
+    >> opt.run(maxit=20, tol=1e-4)
+    >> print(opt.stats[-1])
+    """
+
+    def __init__(self, mesh, method='odt', fixed=None, boundary=None,
+            density=None, coloring=True):
+        """
+        Parameters
+        ----------
+        mesh : `TriangleMesh` or `TetrahedronMesh`, whose nodes are moved in
+            place
+        method : 'odt', 'cpt' or 'radius_ratio'
+        fixed : (NN, ) bool, the nodes which are not moved besides the
+            boundary nodes
+        boundary : the boundary of the domain with the method `project(p)`,
+            e.g. `CircleCurve`, or the signed distance function
+        density : the density function of the ODT and the CPT
+        coloring : the Gauss-Seidel iteration on the colors of the nodes, or
+            the Jacobi iteration
+        """
+        if method not in {'odt', 'cpt', 'radius_ratio'}:
+            raise ValueError("the method {} is not supported!".format(method))
+
+        self.mesh = mesh
+        self.method = method
+        self.boundary = boundary
+        self.density = density
+
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        NN = mesh.number_of_nodes()
+        self.TD = cell.shape[1] - 1
+        if self.TD == 2:
+            self.radius_ratio = TriRadiusRatio()
+        elif self.TD == 3:
+            self.radius_ratio = TetRadiusRatio()
+        else:
+            raise ValueError("only the triangle and the tetrahedron meshes "
+                    "are supported!")
+
+        self.isBdNode = mesh.ds.boundary_node_flag()
+        isFixedNode = np.zeros(NN, dtype=np.bool_)
+        if fixed is not None:
+            isFixedNode |= fixed
+        if boundary is None:
+            isFixedNode |= self.isBdNode
+        self.isFreeNode = ~isFixedNode
+
+        # the orientations of the cells
+        self.sign = np.sign(self.cell_measure(node, cell))
+
+        if coloring:
+            # the nodes of the same color do not share an edge
+            self.color = randomcoloring(mesh, method='random1')
+            flag = self.isFreeNode[cell]
+            groups = [np.nonzero(flag & (self.color[cell] == c))
+                    for c in range(1, self.color.max() + 1)]
+        else:
+            self.color = None
+            groups = [np.nonzero(self.isFreeNode[cell])]
+
+        # sort the local vertices of every group by the nodes
+        self.groups = []
+        for cidx, lidx in groups:
+            idx = np.argsort(cell[cidx, lidx], kind='stable')
+            self.groups.append((cidx[idx], lidx[idx]))
+
+        edge = mesh.entity('edge')
+        self.h = np.mean(np.sqrt(np.sum(
+            (node[edge[:, 1]] - node[edge[:, 0]])**2, axis=-1)))
+        # the smallest step length before the node is not moved
+        self.amin = 2.0**-6
+        self.stats = []
+
+    def cell_measure(self, node, cell):
+        """
+        The signed measures of the cells.
+        """
+        v = [node[cell[:, i]] - node[cell[:, 0]] for i in range(1, self.TD+1)]
+        if self.TD == 2:
+            return np.cross(v[0], v[1])/2.0
+        else:
+            return np.sum(v[2]*np.cross(v[0], v[1]), axis=-1)/6.0
+
+    def circumcenter(self, node, cell):
+        v = [node[cell[:, i]] - node[cell[:, 0]] for i in range(1, self.TD+1)]
+        l = [np.sum(vi**2, axis=-1, keepdims=True) for vi in v]
+        if self.TD == 2:
+            d = 2*np.cross(v[0], v[1])
+            c = l[0]*v[1][:, ::-1] - l[1]*v[0][:, ::-1]
+            c[:, 1] *= -1
+            c /= d.reshape(-1, 1)
+        else:
+            d = l[0]*np.cross(v[1], v[2]) + l[1]*np.cross(v[2], v[0]) \
+                    + l[2]*np.cross(v[0], v[1])
+            c = d/(2*np.sum(v[0]*np.cross(v[1], v[2]), axis=-1, keepdims=True))
+        return node[cell[:, 0]] + c
+
+    def local_position(self, node, cell, lidx):
+        """
+        The local weights and the weighted positions of the vertices lidx of
+        the cells.
+
+        Returns
+        -------
+        m : (NC, GD)
+        w : (NC, )
+        """
+        if self.method == 'radius_ratio':
+            g, w = self.radius_ratio.cell_direction(node, cell)
+            idx = np.arange(cell.shape[0])
+            w = w[idx, lidx]
+            m = w.reshape(-1, 1)*node[cell[idx, lidx]] - g[idx, lidx]
+            return m, w
+
+        w = np.abs(self.cell_measure(node, cell))
+        bc = np.mean(node[cell], axis=1)
+        if self.density is not None:
+            w = w*self.density(bc)
+        if self.method == 'odt':
+            m = w.reshape(-1, 1)*self.circumcenter(node, cell)
+        else:
+            m = w.reshape(-1, 1)*bc
+        return m, w
+
+    def project(self, p):
+        """
+        Project the points p onto the boundary.
+        """
+        boundary = self.boundary
+        if hasattr(boundary, 'project'):
+            boundary.project(p)
+            return p
+
+        deps = np.sqrt(np.finfo(float).eps)*self.h
+        for k in range(2):
+            d = boundary(p)
+            grad = np.zeros_like(p)
+            for i in range(p.shape[1]):
+                q = p.copy()
+                q[:, i] += deps
+                grad[:, i] = (boundary(q) - d)/deps
+            p -= (d/np.sum(grad**2, axis=-1)).reshape(-1, 1)*grad
+        return p
+
+    def group_step(self, node, cidx, lidx):
+        """
+        Move the nodes on the vertices lidx of the cells cidx, which are
+        sorted by the nodes.
+
+        The step of a node is cut to the shortest edge around it, and halved
+        until the cells around it are not inverted and not worse than the
+        worst one around their moved vertices before, otherwise the node is
+        not moved.
+
+        Returns
+        -------
+        move : the max distance of the moved nodes
+        """
+        if len(cidx) == 0:
+            return 0.0
+        cell = self.mesh.entity('cell')[cidx]
+        sign = self.sign[cidx]
+        idx = cell[np.arange(len(cidx)), lidx]
+        start = np.r_[0, np.nonzero(np.diff(idx))[0] + 1]
+        nidx = idx[start]
+
+        m, w = self.local_position(node, cell, lidx)
+        p = np.add.reduceat(m, start, axis=0)/np.add.reduceat(w, start).reshape(-1, 1)
+
+        # the step is not longer than the shortest edge around the node
+        row = np.arange(len(cidx))
+        l = np.sqrt(np.sum((node[cell] - node[idx, None])**2, axis=-1))
+        l[row, lidx] = np.inf
+        h = np.minimum.reduceat(np.min(l, axis=-1), start)
+        d = np.sqrt(np.sum((p - node[nidx])**2, axis=-1))
+        flag = d > h
+        p[flag] = node[nidx[flag]] + (h[flag]/d[flag]).reshape(-1, 1)*(
+                p[flag] - node[nidx[flag]])
+
+        isBdNode = self.isBdNode[nidx]
+        if (self.boundary is not None) and np.any(isBdNode):
+            p[isBdNode] = self.project(p[isBdNode])
+
+        rnode = np.repeat(np.arange(len(start)), np.diff(np.r_[start, len(idx)]))
+        qmax = np.maximum.reduceat(self.radius_ratio.quality(node, cell), start)[rnode]
+        # a cell shared by several moved nodes in the Jacobi iteration is
+        # compared with the worst patch of them
+        qc = np.zeros(self.sign.shape[0], dtype=node.dtype)
+        np.maximum.at(qc, cidx, qmax)
+        qmax = qc[cidx]
+
+        old = node[nidx]
+        alpha = np.ones(len(nidx), dtype=node.dtype)
+        isBad = np.ones(len(nidx), dtype=np.bool_)
+        isBadCell = np.zeros(self.sign.shape[0], dtype=np.bool_)
+        while True:
+            x = old[isBad] + alpha[isBad, None]*(p[isBad] - old[isBad])
+            flag = isBdNode[isBad] & (alpha[isBad] > 0) & (alpha[isBad] < 1)
+            if (self.boundary is not None) and np.any(flag):
+                x[flag] = self.project(x[flag])
+            node[nidx[isBad]] = x
+
+            # check the cells around the moved nodes
+            isBadCell[:] = False
+            isBadCell[cidx[isBad[rnode]]] = True
+            row, = np.nonzero(isBadCell[cidx])
+            c = cell[row]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                flag = (sign[row]*self.cell_measure(node, c) <= 0) | ~(
+                        self.radius_ratio.quality(node, c) <= qmax[row])
+
+            # all the moved vertices of the bad cells
+            isBadCell[:] = False
+            isBadCell[cidx[row[flag]]] = True
+            isBad = np.logical_or.reduceat(isBadCell[cidx], start) & (alpha > 0)
+            if not np.any(isBad):
+                break
+            alpha[isBad] /= 2
+            alpha[alpha < self.amin] = 0
+
+        return np.max(np.sqrt(np.sum((node[nidx] - old)**2, axis=-1)))
+
+    def step(self):
+        """
+        One sweep over the free nodes.
+
+        Returns
+        -------
+        move : the max distance of the moved nodes
+        """
+        node = self.mesh.entity('node')
+        move = 0.0
+        for cidx, lidx in self.groups:
+            move = max(move, self.group_step(node, cidx, lidx))
+        return move
+
+    def quality(self):
+        """
+        The inverse radius ratios of the cells, which are in (0, 1], and 1
+        for the equilateral cells.
+        """
+        node = self.mesh.entity('node')
+        cell = self.mesh.entity('cell')
+        return 1/self.radius_ratio.quality(node, cell)
+
+    def statistics(self, move=0.0):
+        q = self.quality()
+        return {'min': q.min(), 'mean': q.mean(), 'max': q.max(), 'move': move}
+
+    @profiler.timed('mesh_optimize')
+    def run(self, maxit=10, tol=1e-4, disp=False):
+        """
+        Smooth the mesh until the nodes move less than tol times the mean
+        edge length.
+
+        Returns
+        -------
+        stats : the list of the min, mean and max quality and the max moving
+            distance on every iteration, the first one is the initial mesh
+        """
+        if len(self.stats) == 0:
+            self.stats.append(self.statistics())
+        for i in range(maxit):
+            move = self.step()
+            mesh_modified(self.mesh)
+            self.stats.append(self.statistics(move))
+            profiler.count('mesh_optimize_iterations')
+            if disp:
+                print(len(self.stats) - 1, self.stats[-1])
+            if move < tol*self.h:
+                break
+        return self.stats
 
 
 class OptAlg():
     def __init__(self, mesh, quality):
         self.mesh = mesh
-        self.quality = quality 
+        self.quality = quality
 
     def run(self, maxit=10):
         i = 0
         mesh = self.mesh
         quality = self.quality
-        isFreeNode = ~(mesh.ds.boundary_point_flag())
-        qmax = np.max(quality.quality(mesh.point, mesh.ds.cell))
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        isFreeNode = ~(mesh.ds.boundary_node_flag())
+        qmax = np.max(quality.quality(node, cell))
         while i < maxit:
             try:
                 i += 1
                 alpha = 1
-                F, gradF = quality.objective_function(mesh.point, mesh.ds.cell)
-                newPoint = mesh.point.copy()
-                newPoint[isFreeNode] = mesh.point[isFreeNode] - alpha*gradF[isFreeNode] 
-                while ~quality.is_valid(newPoint, mesh.ds.cell) or np.max(quality.quality(newPoint, mesh.ds.cell)) > qmax: 
+                F, gradF = quality.objective_function(node, cell)
+                newNode = node.copy()
+                newNode[isFreeNode] = node[isFreeNode] - alpha*gradF[isFreeNode]
+                while ~quality.is_valid(newNode, cell) or np.max(quality.quality(newNode, cell)) > qmax:
                     alpha /= 2
-                    newPoint[isFreeNode] = mesh.point[isFreeNode] - alpha*gradF[isFreeNode] 
-                print(alpha)
-                mesh.point = newPoint
+                    newNode[isFreeNode] = node[isFreeNode] - alpha*gradF[isFreeNode]
+                node[:] = newNode
+                mesh_modified(mesh)
             except StopIteration:
                 break
-
-
-
@@ -45,9 +45,17 @@ class TriRadiusRatio():
         quality = p*q/(16*area**2)
         return quality
 
-    def objective_function(self, point, cell):
-
-        N = point.shape[0]
+    def cell_direction(self, point, cell):
+        """
+        The local gradient directions of the radius ratio on the vertices of
+        every cell.
+
+        Returns
+        -------
+        g : (NC, 3, 2), the gradient of the cell quality on the vertices
+        w : (NC, 3), the local weights, the new position of the node i is
+            x_i - sum g/sum w over the cells around it
+        """
         NC = cell.shape[0]
 
         localEdge = np.array([(1, 2), (2, 0), (0, 1)])
@@ -62,24 +70,32 @@ class TriRadiusRatio():
         quality = p*q/(16*area**2)
 
         c = 1/l**2 + 1/(p.reshape(-1, 1)*l)
-        b = np.zeros((NC, 6), dtype=np.float)
+        g = np.zeros((NC, 3, 2), dtype=np.float64)
+        w = np.zeros((NC, 3), dtype=np.float64)
         ne = [1, 2, 0]
         pr = [2, 0, 1]
         W = np.array([[0, 1], [-1, 0]])
-        weight = np.zeros(N, dtype=np.float)
         for i in range(3):
             ci = c[:, ne[i]] + c[:, pr[i]]
-            np.add.at(weight, cell[:, i], quality*ci)
-            b[:, [2*i, 2*i+1]] = ci.reshape(-1, 1)*point[cell[:, i]]
-            b[:, [2*i, 2*i+1]] -= c[:, pr[i]].reshape(-1, 1)*point[cell[:, ne[i]]] 
-            b[:, [2*i, 2*i+1]] -= c[:, ne[i]].reshape(-1, 1)*point[cell[:, pr[i]]]
-            b[:, [2*i, 2*i+1]] -= (point[cell[:, pr[i]]] - point[cell[:, ne[i]]])@W/area.reshape(-1, 1)
+            w[:, i] = quality*ci
+            g[:, i] = ci.reshape(-1, 1)*point[cell[:, i]]
+            g[:, i] -= c[:, pr[i]].reshape(-1, 1)*point[cell[:, ne[i]]] 
+            g[:, i] -= c[:, ne[i]].reshape(-1, 1)*point[cell[:, pr[i]]]
+            g[:, i] -= (point[cell[:, pr[i]]] - point[cell[:, ne[i]]])@W/area.reshape(-1, 1)
 
-        b *= quality.reshape(-1, 1) 
+        g *= quality.reshape(-1, 1, 1)
+        return g, w
+
+    def objective_function(self, point, cell):
 
-        gradF = np.zeros((N, 2), dtype=np.float)
-        np.add.at(gradF[:, 0], cell.flatten(), b[:, [0, 2, 4]].flatten())
-        np.add.at(gradF[:, 1], cell.flatten(), b[:, [1, 3, 5]].flatten())
+        N = point.shape[0]
+        quality = self.quality(point, cell)
+        g, w = self.cell_direction(point, cell)
+
+        weight = np.zeros(N, dtype=np.float64)
+        np.add.at(weight, cell.flatten(), w.flatten())
+        gradF = np.zeros((N, 2), dtype=np.float64)
+        np.add.at(gradF, cell.flatten(), g.reshape(-1, 2))
         F = np.sum(quality)
         return F, gradF/weight.reshape(-1, 1)
 
@@ -94,9 +110,122 @@ class TriRadiusRatio():
         return show_mesh_quality(axes, q)
 
 class TetRadiusRatio:
+    index = np.array([
+       (0, 1, 2, 3), (0, 2, 3, 1), (0, 3, 1, 2),
+       (1, 2, 0, 3), (1, 0, 3, 2), (1, 3, 2, 0),
+       (2, 0, 1, 3), (2, 1, 3, 0), (2, 3, 0, 1),
+       (3, 0, 2, 1), (3, 2, 1, 0), (3, 1, 0, 2)])
 
     def __call__(self, point, cell):
         return self.quality(point, cell)
 
     def quality(self, point, cell):
+        """
+        The radius ratio R/(3r) of the cells, which is 1 for the equilateral
+        tetrahedron.
+        """
+        a, b, c = [point[cell[:, i]] - point[cell[:, 0]] for i in range(1, 4)]
+        bc = np.cross(b, c)
+        ca = np.cross(c, a)
+        ab = np.cross(a, b)
+        vol = np.einsum('ij, ij->i', a, bc)/6.0
+
+        # the areas of the faces times 2
+        s = np.sqrt(np.einsum('ij, ij->i', bc, bc))
+        s += np.sqrt(np.einsum('ij, ij->i', ca, ca))
+        s += np.sqrt(np.einsum('ij, ij->i', ab, ab))
+        n = bc + ca + ab
+        s += np.sqrt(np.einsum('ij, ij->i', n, n))
+
+        # 12*vol times the vector from the vertex 0 to the circumcenter
+        d = np.einsum('ij, ij->i', a, a)[:, None]*bc
+        d += np.einsum('ij, ij->i', b, b)[:, None]*ca
+        d += np.einsum('ij, ij->i', c, c)[:, None]*ab
+        R = np.sqrt(np.einsum('ij, ij->i', d, d))/vol/12.0
+        r = 6.0*vol/s
+        return R/r/3.0
+
+    def direction(self, point, cell, i):
+        """
+        The direction from the vertex i to the circumcenter times 12 times the
+        volume.
+        """
+        index = self.index
+        v10 = point[cell[:, index[3*i, 0]]] - point[cell[:, index[3*i, 1]]]
+        v20 = point[cell[:, index[3*i, 0]]] - point[cell[:, index[3*i, 2]]]
+        v30 = point[cell[:, index[3*i, 0]]] - point[cell[:, index[3*i, 3]]]
+        l1 = np.sum(v10**2, axis=1, keepdims=True)
+        l2 = np.sum(v20**2, axis=1, keepdims=True)
+        l3 = np.sum(v30**2, axis=1, keepdims=True)
+        return l1*np.cross(v20, v30) + l2*np.cross(v30, v10) + l3*np.cross(v10, v20)
+
+    def cell_direction(self, point, cell):
+        """
+        The local gradient directions of the radius ratio on the vertices of
+        every cell, see `TetrahedronMesh.grad_quality`.
+
+        Returns
+        -------
+        g : (NC, 4, 3), the gradient of the cell quality on the vertices
+        w : (NC, 4), the local weights, the new position of the node i is
+            x_i - sum g/sum w over the cells around it
+        """
+        NC = cell.shape[0]
+        p = point[cell] # (NC, 4, 3)
+        localFace = np.array([(1, 2, 3),  (0, 3, 2), (0, 1, 3), (0, 2, 1)])
+        s = np.zeros((NC, 4), dtype=np.float64)
+        for i, (j, k, m) in enumerate(localFace):
+            nv = np.cross(p[:, k] - p[:, j], p[:, m] - p[:, j])
+            s[:, i] = np.sqrt(np.einsum('ij, ij->i', nv, nv))/2
+        ss = np.sum(s, axis=1)
+        d = [self.direction(point, cell, i) for i in range(4)]
+        dd = np.einsum('ij, ij->i', d[0], d[0])
+
+        vol = np.einsum('ij, ij->i', p[:, 3] - p[:, 0],
+                np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]))/6.0
+        R = np.sqrt(dd)/vol/12.0
+        r = 3.0*vol/ss
+        q = R/r/3.0
+
+        index = self.index
+        g = np.zeros((NC, 4, 3), dtype=np.float64)
+        w = np.zeros((NC, 4), dtype=np.float64)
+        for idx in range(12):
+            i, j, k, m = index[idx]
+            vji = p[:, i] - p[:, j]
+            vki = p[:, i] - p[:, k]
+            vmi = p[:, i] - p[:, m]
+            vjm = p[:, j] - p[:, m]
+            vjk = p[:, j] - p[:, k]
+            w0 = 2.0*np.einsum('ij, ij->i', np.cross(vki, vmi), d[i])/dd
+            w1 = 0.25*(np.einsum('ij, ij->i', vmi, vjm)/s[:, k]
+                    + np.einsum('ij, ij->i', vki, vjk)/s[:, m])/ss
+            g[:, i, :] += (w0 + w1)[:, None]*vji
+            w[:, i] += (w0 + w1)
+
+            w2 = (np.einsum('ij, ij->i', vmi, vmi) - np.einsum('ij, ij->i', vki, vki))/dd
+            g[:, i, :] += w2[:, None]*np.cross(d[i], vji)
+            g[:, i, :] += np.cross(p[:, k] + p[:, j] - 2*p[:, m], vji)/vol[:, None]/9.0
+
+        g *= q.reshape(-1, 1, 1)
+        w *= q.reshape(-1, 1)
+        return g, w
 
+    def objective_function(self, point, cell):
+        N = point.shape[0]
+        quality = self.quality(point, cell)
+        g, w = self.cell_direction(point, cell)
+        weight = np.zeros(N, dtype=np.float64)
+        np.add.at(weight, cell.flatten(), w.flatten())
+        gradF = np.zeros((N, 3), dtype=np.float64)
+        np.add.at(gradF, cell.flatten(), g.reshape(-1, 3))
+        F = np.sum(quality)
+        return F, gradF/weight.reshape(-1, 1)
+
+    def is_valid(self, point, cell):
+        v = [point[cell[:, i]] - point[cell[:, 0]] for i in range(1, 4)]
+        vol = np.sum(v[2]*np.cross(v[0], v[1]), axis=1)/6.0
+        return np.all(vol > 0)
+
+    def show_quality(self, axes, q):
+        return show_mesh_quality(axes, q)
@@ -6,8 +6,8 @@ from ..mesh.QuadrangleMesh import QuadrangleMesh
 from ..mesh.Tritree import Tritree
 from ..mesh.StructureQuadMesh import StructureQuadMesh
 
-from ..timeintegratoralg.timeline_new import UniformTimeLine
-from ..timeintegratoralg.timeline_new import ChebyshevTimeLine
+from ..timeintegratoralg.timeline import UniformTimeLine
+from ..timeintegratoralg.timeline import ChebyshevTimeLine
 
 class SinSinExpData:
     def __init__(self):
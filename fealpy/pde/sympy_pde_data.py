@@ -0,0 +1,211 @@
+"""
+Sympy PDE Data
+==============
+
+Build the manufactured solution data of a PDE from a sympy expression.
+
+The solution, the gradient, the Hessian and the source are derived
+symbolically, and every one of them is compiled into a vectorised NumPy
+function of the points `p` with shape (..., GD). The common subexpressions
+are eliminated by `sympy.cse`, so e.g. `cos(pi*x)` is evaluated only once in
+the source. The generated python modules are cached on disk by the hash of
+the expressions, so the symbolic work is only done once.
+
+Examples
+--------
+>> import sympy as sp
+>> x, y = sp.symbols('x, y')
+>> pde = SympyPDEData(sp.sin(sp.pi*x)*sp.exp(x*y), [x, y])
+>> f = pde.source(p) # -\\Delta u
+"""
+import os
+import hashlib
+import importlib.util
+
+import numpy as np
+import sympy as sp
+from sympy.printing.numpy import NumPyPrinter
+
+from ..decorator import cartesian, cacheable
+
+# bump it if the generated code changes
+CODE_VERSION = 1
+
+
+def cache_directory():
+    """
+    The directory of the generated modules, `$FEALPY_CACHE_DIR/sympy` or
+    `~/.cache/fealpy/sympy`.
+    """
+    root = os.environ.get('FEALPY_CACHE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'fealpy'))
+    return os.path.join(root, 'sympy')
+
+
+def generate_code(expr, var, name='f'):
+    """
+    Generate the python source of the vectorised function `name(p)`.
+
+    Parameters
+    ----------
+    expr : sympy expression or array of expressions, e.g. a `Matrix`
+    var : the list of the coordinate symbols, the i-th one is `p[..., i]`
+    name : the function name
+
+    Notes
+    -----
+    The result has the shape `p.shape[:-1] + expr.shape`, and the constant
+    entries are broadcast.
+    """
+    expr = sp.Array(expr) if not isinstance(expr, sp.Expr) else expr
+    shape = () if isinstance(expr, sp.Expr) else expr.shape
+    flat = [expr] if isinstance(expr, sp.Expr) else list(sp.flatten(expr))
+
+    printer = NumPyPrinter({'fully_qualified_modules': True,
+        'allow_unknown_functions': False})
+    symbols = sp.numbered_symbols('_t')
+    temps, flat = sp.cse(flat, symbols=symbols, optimizations='basic')
+
+    lines = ['def {}(p):'.format(name)]
+    for i, v in enumerate(var):
+        lines.append('    {} = p[..., {}]'.format(printer.doprint(v), i))
+    for t, e in temps:
+        lines.append('    {} = {}'.format(printer.doprint(t), printer.doprint(e)))
+    lines.append('    val = numpy.zeros(p.shape[:-1] + {}, dtype=numpy.float64)'.format(shape))
+    for idx, e in zip(np.ndindex(*shape), flat):
+        index = ''.join(', {}'.format(i) for i in idx)
+        lines.append('    val[...{}] = {}'.format(index, printer.doprint(e)))
+    lines.append('    return val')
+    return '\n'.join(lines) + '\n'
+
+
+def compile_expressions(exprs, var, cache=True):
+    """
+    Compile the sympy expressions into vectorised NumPy functions.
+
+    Parameters
+    ----------
+    exprs : dict, name -> sympy expression or array of expressions
+    var : the list of the coordinate symbols
+    cache : bool, whether to cache the generated module on disk
+
+    Returns
+    -------
+    functions : dict, name -> function of the points with `coordtype`
+        'cartesian', which is marked `cacheable`
+    """
+    names = sorted(exprs.keys())
+    key = sp.srepr((tuple(var), tuple((n, exprs[n]) for n in names)))
+    key = '{}:{}'.format(CODE_VERSION, key)
+    h = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    fname = None
+    if cache:
+        path = cache_directory()
+        fname = os.path.join(path, 'pde_{}.py'.format(h))
+
+    if fname is None or not os.path.exists(fname):
+        code = ['import numpy', '']
+        for n in names:
+            code.append(generate_code(exprs[n], var, name=n))
+        code = '\n'.join(code)
+        if fname is None:
+            scope = {}
+            exec(compile(code, '<sympy {}>'.format(h), 'exec'), scope)
+            return {n: cacheable(cartesian(scope[n])) for n in names}
+        os.makedirs(path, exist_ok=True)
+        # write and rename, so the parallel runs never see a partial file
+        tmp = '{}.{}.tmp'.format(fname, os.getpid())
+        with open(tmp, 'w') as f:
+            f.write(code)
+        os.replace(tmp, fname)
+
+    spec = importlib.util.spec_from_file_location('pde_{}'.format(h), fname)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {n: cacheable(cartesian(getattr(module, n))) for n in names}
+
+
+def laplace_operator(u, var):
+    """
+    -\\Delta u, componentwise for a vector solution
+    """
+    if isinstance(u, list):
+        return [laplace_operator(ui, var) for ui in u]
+    return -sum(sp.diff(u, v, 2) for v in var)
+
+
+class SympyPDEData:
+    def __init__(self, u, var, operator=laplace_operator, domain=None,
+            cache=True):
+        """
+        The PDE data of the manufactured solution `u`.
+
+        Parameters
+        ----------
+        u : sympy expression of the scalar solution or the list of the
+            components of a vector solution
+        var : the list of the coordinate symbols, e.g. `sp.symbols('x, y')`
+        operator : the function `(u, var) -> L(u)`, and the source is
+            `f = L(u)`, the default is `-\\Delta u`
+        domain : the domain returned by `self.domain()`
+        cache : bool, whether to cache the generated code on disk
+
+        Notes
+        -----
+        The following methods are compiled functions of the points
+
+            solution : u
+            gradient : grad u, shape (..., GD) or (..., m, GD) for a vector
+                solution with m components
+            hessian : shape (..., GD, GD) or (..., m, GD, GD)
+            flux : -grad u
+            source : L(u)
+            dirichlet : u
+
+        Examples
+        --------
+        The linear elasticity with Lame constants lam and mu
+
+        >> def elasticity(u, x):
+        >>     u = sp.Matrix(u)
+        >>     gu = u.jacobian(x)
+        >>     sigma = mu*(gu + gu.T) + lam*gu.trace()*sp.eye(len(x))
+        >>     return [-sum(sp.diff(sigma[i, j], x[j]) for j in range(len(x)))
+        >>         for i in range(len(x))]
+        >> pde = SympyPDEData([u0, u1], [x, y], operator=elasticity)
+        """
+        self.var = var = list(var)
+        self.u = u
+        self._domain = domain
+
+        if isinstance(u, (list, tuple, sp.MatrixBase, sp.NDimArray)):
+            u = sp.Array(list(u))
+            grad = sp.derive_by_array(u, var).transpose() # (m, GD)
+            hess = sp.derive_by_array(grad, var) # (GD, m, GD)
+            hess = sp.permutedims(hess, (1, 2, 0))
+            f = sp.Array(list(operator(list(u), var)))
+        else:
+            grad = sp.derive_by_array(u, var)
+            hess = sp.derive_by_array(grad, var)
+            f = operator(u, var)
+        exprs = {'solution': u, 'gradient': grad, 'hessian': hess,
+                'flux': -grad, 'source': f}
+        self.expressions = exprs
+        functions = compile_expressions(exprs, var, cache=cache)
+        for name, fun in functions.items():
+            setattr(self, name, fun)
+        self.dirichlet = self.solution
+
+    def domain(self):
+        return self._domain
+
+    @cartesian
+    def neumann(self, p, n):
+        """
+        grad u.n with the unit normal `n`
+        """
+        grad = self.gradient(p)
+        if grad.ndim > n.ndim: # vector solution
+            n = n[..., None, :]
+        return np.sum(grad*n, axis=-1)
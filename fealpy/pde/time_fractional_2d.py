@@ -24,17 +24,17 @@ class FisherData2d:
             (1, 0),
             (1, 1),
             (0, 1)], dtype=np.float)
-        if meshtype is 'tri':
+        if meshtype == 'tri':
             cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int)
             mesh = TriangleMesh(node, cell)
             mesh.uniform_refine(n)
             return mesh
-        elif meshtype is 'quadtree':
+        elif meshtype == 'quadtree':
             cell = np.array([(0, 1, 2, 3)], dtype=np.int)
             mesh = Quadtree(node, cell)
             mesh.uniform_refine(n)
             return mesh
-        elif meshtype is 'tritree':
+        elif meshtype == 'tritree':
             cell = np.array([(1, 2, 0), (3, 0, 2)], dtype=np.int)
             mesh = Tritree(node, cell)
             mesh.uniform_refine(n)
@@ -61,13 +61,13 @@ class FisherData2d:
         nu = self.nu
         alpha = self.alpha
 
-        x = p[:, 0]
-        y = p[:, 1]
+        x = p[..., 0]
+        y = p[..., 1]
 
         u = t**nu*sin(2*pi*x)*sin(2*pi*y)
         return u
 
-    def gradient(self, p):
+    def gradient(self, p, t):
         """ The gradient of the solution
         """
         pi = np.pi
@@ -75,25 +75,12 @@ class FisherData2d:
         cos = np.cos
 
         nu = self.nu
-        alpha = self.alpha
 
         x = p[..., 0]
         y = p[..., 1]
-        theta = np.arctan2(y, x)
-        theta = (theta >= 0)*theta + (theta < 0)*(theta+2*pi)
-        r = x**2 + y**2
-        shape = p.shape[:-1] + (2, 2)
-        m = np.zeros(shape, dtype=p.dtype)
-        m[..., 0, 0] = cos(theta)
-        m[..., 0, 1] = r*sin(theta)
-        m[..., 1, 0] = sin(theta)
-        m[..., 1, 1] = r*cos(theta)
-        m = np.linalg.inv(m)
         val = np.zeros(p.shape, dtype=p.dtype)
-        z_r = (2/3*r**(-1/3) - 5/2*r**(3/2))*sin(2/3*theta)
-        z_t = 2/3*(r**(2/3) - r**2.5)*cos(2/3*theta)
-        val[..., 0] = m[..., 0, 0]*z_r + m[..., 0, 1]*z_t
-        val[..., 1] = m[..., 1, 0]*z_r + m[..., 1, 1]*z_t
+        val[..., 0] = 2*pi*t**nu*cos(2*pi*x)*sin(2*pi*y)
+        val[..., 1] = 2*pi*t**nu*sin(2*pi*x)*cos(2*pi*y)
         return val
 
     def source(self, p, t):
@@ -104,6 +91,12 @@ class FisherData2d:
         pi = np.pi
         sin = np.sin
         cos = np.cos
+
+        nu = self.nu
+        alpha = self.alpha
+
+        x = p[..., 0]
+        y = p[..., 1]
         c = (8*pi**2 + 1)*t**nu + nu*t**(nu-alpha)/gamma(1-alpha)*beta(nu, 1 - alpha)
         val = sin(2*pi*x)*sin(2*pi*y)
         val = c*val + (t**nu*val)**2
@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.sparse import csr_matrix
 
+from .QuadraturePointCache import quadrature_cache
+
 def broadcast(c, phi):
     """
     Notes
@@ -36,6 +38,8 @@ class FEMeshIntegralAlg():
             self.facebarycenter = self.edgebarycenter
             self.faceintegrator = self.edgeintegrator
 
+        self.cache = quadrature_cache(mesh)
+
     def construct_matrix(self, basis0, 
             basis1=None,  c=None, 
             cell2dof0=None, gdof0=None, 
@@ -58,7 +62,7 @@ class FEMeshIntegralAlg():
         qf = self.integrator if q is None else mesh.integrator(q, 'cell')
         bcs, ws = qf.get_quadrature_points_and_weights()
 
-        ps = mesh.bc_to_point(bcs)
+        ps = self.cache.points(bcs)
         if basis0.coordtype == 'barycentric':
             phi0 = basis0(bcs) # (NQ, NC, ldof, ...)
         elif basis0.coordtype == 'cartesian':
@@ -80,10 +84,7 @@ class FEMeshIntegralAlg():
                 M = np.einsum('i, ijk..., ijm..., j->jkm', c*ws, phi0, phi1,
                         self.cellmeasure, optimize=True)
             elif callable(c):
-                if c.coordtype == 'barycentric':
-                    c = c(bcs)
-                elif c.coordtype == 'cartesian':
-                    c = c(ps)
+                c = self.cache.evaluate(c, bcs)
 
                 if isinstance(c, (int, float)):
                     M = np.einsum('i, ijk..., ijm..., j->jkm', c*ws, phi0, phi1,
@@ -127,7 +128,7 @@ class FEMeshIntegralAlg():
         mesh = self.mesh
         qf = self.integrator if q is None else mesh.integrator(q, 'cell')
         bcs, ws = qf.get_quadrature_points_and_weights()
-        ps = mesh.bc_to_point(bcs, etype='cell')
+        ps = self.cache.points(bcs)
 
         if basis.coordtype == 'barycentric':
             phi = basis(bcs)
@@ -135,10 +136,7 @@ class FEMeshIntegralAlg():
             phi = basis(ps)
 
         if callable(f):
-            if f.coordtype == 'barycentric':
-                val = f(bcs)
-            elif f.coordtype == 'cartesian':
-                val = f(ps)
+            val = self.cache.evaluate(f, bcs)
         else:
             #TODO: f 可以是多种形式的, 函数, 数组 
             val = f
@@ -162,7 +160,7 @@ class FEMeshIntegralAlg():
         mesh = self.mesh
         qf = self.integrator if q is None else mesh.integrator(q, 'cell')
         bcs, ws = qf.get_quadrature_points_and_weights()
-        ps = mesh.bc_to_point(bcs, etype='cell')
+        ps = self.cache.points(bcs)
 
         if basis.coordtype == 'barycentric':
             phi = basis(bcs)
@@ -170,10 +168,7 @@ class FEMeshIntegralAlg():
             phi = basis(ps)
 
         if callable(f):
-            if f.coordtype == 'barycentric':
-                val = f(bcs)
-            elif f.coordtype == 'cartesian':
-                val = f(ps)
+            val = self.cache.evaluate(f, bcs)
 
             if len(val.shape) == 1: # (GD, )
                 val = val[None, None, :]
@@ -198,7 +193,7 @@ class FEMeshIntegralAlg():
         mesh = self.mesh
         qf = self.integrator if q is None else mesh.integrator(q, 'cell')
         bcs, ws = qf.get_quadrature_points_and_weights()
-        ps = mesh.bc_to_point(bcs, etype='cell')
+        ps = self.cache.points(bcs)
 
         if basis.coordtype == 'barycentric':
             phi = basis(bcs)
@@ -206,10 +201,7 @@ class FEMeshIntegralAlg():
             phi = basis(ps)
 
         if callable(f):
-            if f.coordtype == 'barycentric':
-                val = f(bcs)
-            elif f.coordtype == 'cartesian':
-                val = f(ps)
+            val = self.cache.evaluate(f, bcs)
             bb = np.einsum('i, ij, ijk, j->jk',
                     ws, val, phi, self.cellmeasure)
         elif isinstance(f, (int, float)):
@@ -233,7 +225,7 @@ class FEMeshIntegralAlg():
         if barycenter:
             val = u(bcs)
         else:
-            ps = mesh.bc_to_point(bcs, etype='edge')
+            ps = self.cache.points(bcs, etype='edge')
             val = u(ps)
 
         if edgetype is True:
@@ -251,7 +243,7 @@ class FEMeshIntegralAlg():
         if barycenter:
             val = u(bcs)
         else:
-            ps = mesh.bc_to_point(bcs, etype='face')
+            ps = self.cache.points(bcs, etype='face')
             val = u(ps)
 
         dim = len(ws.shape)
@@ -272,7 +264,7 @@ class FEMeshIntegralAlg():
         if barycenter:
             val = u(bcs)
         else:
-            ps = mesh.bc_to_point(bcs, etype='cell')
+            ps = self.cache.points(bcs)
             val = u(ps)
         dim = len(ws.shape)
         s0 = 'abcde'
@@ -292,7 +284,7 @@ class FEMeshIntegralAlg():
         if barycenter:
             val = u(bcs)
         else:
-            ps = self.mesh.bc_to_point(bcs) # (NQ, NC, 2)
+            ps = self.cache.points(bcs) # (NQ, NC, 2)
             val = u(ps)
         dim = len(ws.shape)
         s0 = 'abcde'
@@ -324,8 +316,7 @@ class FEMeshIntegralAlg():
 
     def L1_error(self, u, uh, celltype=False):
         def f(x):
-            xx = self.mesh.bc_to_point(x)
-            return np.abs(u(xx) - uh(x))
+            return np.abs(self.cache.evaluate(u, x) - uh(x))
         e = self.integral(f, celltype=celltype)
         if celltype is False:
             return e.sum()
@@ -335,8 +326,7 @@ class FEMeshIntegralAlg():
 
     def L2_error(self, u, uh, celltype=False):
         def f(bc):
-            xx = self.mesh.bc_to_point(bc)
-            return (u(xx) - uh(bc))**2
+            return (self.cache.evaluate(u, bc) - uh(bc))**2
         e = self.integral(f, celltype=celltype)
         if celltype is False:
             return np.sqrt(e.sum())
@@ -356,8 +346,7 @@ class FEMeshIntegralAlg():
 
     def Lp_error(self, u, uh, p, celltype=False):
         def f(x):
-            xx = self.mesh.bc_to_point(x)
-            return np.abs(u(xx) - uh(x))**p
+            return np.abs(self.cache.evaluate(u, x) - uh(x))**p
         e = self.integral(f, celltype=celltype)
         if celltype is False:
             return e.sum()**(1/p)
@@ -1,11 +1,18 @@
 import numpy as np
 from .Quadrature import Quadrature
+from .QuadratureFactory import gauss_legendre_rule
 
 # http://keisan.casio.com/exec/system/1280624821
 
 
 class GaussLegendreQuadrature(Quadrature):
     def __init__(self, k):
+        if k < 1:
+            raise ValueError("The index should be >= 1!")
+        if k > 20: # the rule by the Golub-Welsch algorithm
+            self.quadpts, self.weights = gauss_legendre_rule(k)
+            return
+
         if k == 1:
             A = np.array([[0, 2]], dtype=np.float)
         if k == 2:
@@ -1,11 +1,18 @@
 import numpy as np
 from .Quadrature import Quadrature
+from .QuadratureFactory import gauss_lobatto_rule
 
 # http://keisan.casio.com/exec/system/1280801905
 
 
 class GaussLobattoQuadrature(Quadrature):
     def __init__(self, k):
+        if k < 2:
+            raise ValueError("The index should be >= 2!")
+        if k > 11: # the rule by the Golub-Welsch algorithm
+            self.quadpts, self.weights = gauss_lobatto_rule(k)
+            return
+
         if k == 2:
             A = np.array([[-1, 1], [1, 1]], dtype=np.float)
         if k == 3:
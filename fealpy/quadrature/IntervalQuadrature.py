@@ -1,10 +1,17 @@
 import numpy as np
 from .Quadrature import Quadrature
+from .QuadratureFactory import gauss_legendre_rule
 
 
 class IntervalQuadrature(Quadrature):
 
     def __init__(self, index):
+        if index < 1:
+            raise ValueError("The index should be >= 1!")
+        if index > 10: # the rule by the Golub-Welsch algorithm
+            self.quadpts, self.weights = gauss_legendre_rule(index)
+            return
+
         if index == 1:
             A = np.array([[0, 2]], dtype=np.float)
         if index == 2:
@@ -1,6 +1,8 @@
 import numpy as np
+from scipy.sparse import csr_matrix
 from .GaussLobattoQuadrature import GaussLobattoQuadrature
 from .GaussLegendreQuadrature import GaussLegendreQuadrature
+from .QuadratureFactory import quadrature_for_degree
 
 class PolygonMeshIntegralAlg():
     def __init__(self, mesh, q, cellmeasure=None, cellbarycenter=None):
@@ -21,6 +23,10 @@ class PolygonMeshIntegralAlg():
         self.facebarycenter = self.edgebarycenter
         self.faceintegrator = self.edgeintegrator
 
+        self.sides = None # see `cell_sides`
+        self.triangles = {} # q -> the sub-triangle quadrature table
+        self.state = None # the copies of the nodes and `edge2cell`
+
     def triangle_measure(self, tri):
         v1 = tri[1] - tri[0]
         v2 = tri[2] - tri[0]
@@ -55,42 +61,159 @@ class PolygonMeshIntegralAlg():
     def cell_integral(self, u, celltype=False, q=None):
         return self.integral(u, celltype=celltype, q=q)
 
-    def integral(self, u, celltype=False, q=None):
+    def check(self):
+        """
+        Clear the side tables if the nodes or the topology of the mesh have
+        been changed, e.g. by the refinement or the node smoothing, and then
+        the cell and the edge geometry are computed again.
+        """
         mesh = self.mesh
-        node = mesh.node
-        bc = self.cellbarycenter
-
-        edge = mesh.entity('edge')
+        node = mesh.entity('node')
         edge2cell = mesh.ds.edge_to_cell()
+        state = self.state
+        if (state is not None) and np.array_equal(state[0], node[:]) and \
+                np.array_equal(state[1], edge2cell):
+            return
+        if state is not None:
+            self.cellbarycenter = mesh.entity_barycenter('cell')
+            self.cellmeasure = mesh.entity_measure('cell')
+            self.edgemeasure = mesh.entity_measure('edge')
+            self.edgebarycenter = mesh.entity_barycenter('edge')
+            self.facemeasure = self.edgemeasure
+            self.facebarycenter = self.edgebarycenter
+        self.sides = None
+        self.triangles = {}
+        self.state = (np.array(node[:]), np.array(edge2cell))
+
+    def cell_sides(self):
+        """
+        The sides of the cells, i.e. the (cell, edge) pairs of the cell
+        boundaries.
+
+        Returns
+        -------
+        cellidx : (NS, ), the cell of every side
+        edgeidx : (NS, ), the edge of every side
+        sign : (NS, ), 1 if the edge is counterclockwise in the cell, else -1
+        S : (NC, NS), the sparse matrix which sums the sides into the cells
+
+        Notes
+        -----
+        The first NE sides are the edges with their left cells
+        `edge2cell[:, 0]`, the others are the interior edges with their right
+        cells.
+        """
+        self.check()
+        if self.sides is None:
+            mesh = self.mesh
+            NC = mesh.number_of_cells()
+            edge2cell = mesh.ds.edge_to_cell()
+            NE = len(edge2cell)
+            isInEdge = (edge2cell[:, 0] != edge2cell[:, 1])
+            cellidx = np.r_[edge2cell[:, 0], edge2cell[isInEdge, 1]]
+            edgeidx = np.r_[np.arange(NE), np.nonzero(isInEdge)[0]]
+            sign = np.ones(len(cellidx), dtype=np.float)
+            sign[NE:] = -1
+            NS = len(cellidx)
+            S = csr_matrix((np.ones(NS, dtype=np.float), (cellidx, np.arange(NS))),
+                    shape=(NC, NS))
+            self.sides = (cellidx, edgeidx, sign, S)
+        return self.sides
+
+    def triangle_quadrature(self, q=None):
+        """
+        The quadrature table on the sub-triangles, every sub-triangle is
+        spanned by a cell side and the cell barycenter.
+
+        Returns
+        -------
+        ps : (NQ, NS, 2), the quadrature points
+        ws : (NQ, ), the weights
+        area : (NS, ), the areas of the sub-triangles
+        cellidx : (NS, ), the cell of every sub-triangle
+
+        Notes
+        -----
+        The table is computed once for every `q` until the mesh is changed.
+        """
+        self.check()
+        if q not in self.triangles:
+            mesh = self.mesh
+            node = mesh.entity('node')
+            edge = mesh.entity('edge')
+            bc = self.cellbarycenter
+            cellidx, edgeidx, sign, _ = self.cell_sides()
+
+            qf = self.cellintegrator if q is None else self.mesh.integrator(q)
+            bcs, ws = qf.quadpts, qf.weights
+
+            # the nodes of the sides in the counterclockwise order
+            e = edge[edgeidx]
+            e[sign < 0] = e[sign < 0, ::-1]
+            tri = [bc[cellidx], node[e[:, 0]], node[e[:, 1]]]
+            area = self.triangle_measure(tri)
+            ps = np.einsum('ij, jkm->ikm', bcs, tri)
+            self.triangles[q] = (ps, ws, area, cellidx)
+        return self.triangles[q]
 
+    def integral(self, u, celltype=False, q=None):
+        """
+        Integrate `u(x, index)` on the sub-triangles of the cells.
+        """
+        NC = self.mesh.number_of_cells()
+        ps, ws, area, cellidx = self.triangle_quadrature(q)
+        S = self.cell_sides()[-1]
+
+        val = u(ps, cellidx)
+        ee = np.einsum('i, ij..., j->j...', ws, val, area)
+        e = S@ee.reshape(len(area), -1)
+        e = e.reshape((NC, ) + ee.shape[1:])
+
+        if celltype is True:
+            return e
+        else:
+            return e.sum(axis=0)
+
+    def polynomial_integral(self, u, degree, celltype=True):
+        """
+        Integrate the homogeneous polynomials exactly by the edge integrals.
+
+        Parameters
+        ----------
+        u : function `u(x, index)` with shape (..., NS, K), the k-th component
+            is a homogeneous polynomial of degree `degree[k]` in
+            `x - cellbarycenter[index]`
+        degree : int or (K, ), the degrees of the components
+
+        Notes
+        -----
+        For a homogeneous function f of degree n in x - x_K, Euler's identity
+        x.grad f = n f and the divergence theorem give
+
+            \\int_K f dx = 1/(n + 2) \\int_{\\partial K} f (x - x_K).n ds,
+
+        and (x - x_K).n is constant on every edge. So only the Gauss-Legendre
+        rule on the edges which is exact for the degree n is needed.
+        """
+        mesh = self.mesh
         NC = mesh.number_of_cells()
+        node = mesh.entity('node')
+        edge = mesh.entity('edge')
+        cellidx, edgeidx, sign, S = self.cell_sides()
 
-        qf = self.cellintegrator if q is None else self.mesh.integrator(q)
+        degree = np.asarray(degree)
+        qf = quadrature_for_degree('interval', int(np.max(degree)))
         bcs, ws = qf.quadpts, qf.weights
+        ps = np.einsum('ij, kjm->ikm', bcs, node[edge[edgeidx]])
+        val = u(ps, cellidx)
 
-        tri = [bc[edge2cell[:, 0]], node[edge[:, 0]], node[edge[:, 1]]]
-        a = self.triangle_measure(tri)
-        pp = np.einsum('ij, jkm->ikm', bcs, tri)
-        val = u(pp, edge2cell[:, 0])
-
-        shape = (NC, ) + val.shape[2:]
-        e = np.zeros(shape, dtype=np.float)
-
-        ee = np.einsum('i, ij..., j->j...', ws, val, a)
-        np.add.at(e, edge2cell[:, 0], ee)
-
-        isInEdge = (edge2cell[:, 0] != edge2cell[:, 1])
-        if np.sum(isInEdge) > 0:
-            tri = [
-                    bc[edge2cell[isInEdge, 1]],
-                    node[edge[isInEdge, 1]],
-                    node[edge[isInEdge, 0]]
-                    ]
-            a = self.triangle_measure(tri)
-            pp = np.einsum('ij, jkm->ikm', bcs, tri)
-            val = u(pp, edge2cell[isInEdge, 1])
-            ee = np.einsum('i, ij..., j->j...', ws, val, a)
-            np.add.at(e, edge2cell[isInEdge, 1], ee)
+        nm = mesh.edge_normal()
+        b = node[edge[edgeidx, 0]] - self.cellbarycenter[cellidx]
+        b = sign*np.sum(b*nm[edgeidx], axis=-1)
+        ee = np.einsum('i, ij...->j...', ws, val)
+        ee = np.einsum('j, j...->j...', b, ee)
+        e = S@ee.reshape(len(b), -1)
+        e = e.reshape((NC, ) + ee.shape[1:])/(degree + 2)
 
         if celltype is True:
             return e
@@ -1,18 +1,357 @@
 import numpy as np
+from scipy.sparse import csr_matrix
 from .GaussLobattoQuadrature import GaussLobattoQuadrature
 from .GaussLegendreQuadrature import GaussLegendreQuadrature
+from .QuadratureFactory import quadrature_for_degree
 
 class PolyhedronMeshIntegralAlg():
     def __init__(self, mesh, q, cellmeasure=None, cellbarycenter=None):
+        """
+        The integration on the cells of a polyhedron mesh.
+
+        Parameters
+        ----------
+        mesh : PolyhedronMesh, or any 3d mesh with `ds.face` and
+            `ds.face_to_cell()`, e.g. TetrahedronMesh and HexahedronMesh
+        q : the index of the quadrature rules
+
+        Notes
+        -----
+        Every cell is decomposed into the tetrahedrons
+
+            [x_K, x_F, x_i, x_{i+1}],
+
+        where x_K, x_F are the barycenters of the cell K and its face F, and
+        (x_i, x_{i+1}) runs over the edges of F. The volumes are signed, so
+        the cells need not be star-shaped with respect to x_K. The
+        quadrature tables of the tetrahedrons are computed once for every
+        `q`, see `tetrahedron_quadrature`.
+
+        The integrals of the scaled monomials are computed exactly by the
+        edge integrals only, see `monomial_integral`. All the faces have to
+        be planar.
+        """
         self.mesh = mesh
+        self.integrator = mesh.integrator(q, 'cell')
+        self.cellintegrator = self.integrator
         self.cellmeasure = cellmeasure if cellmeasure is not None \
                 else mesh.entity_measure('cell')
         self.cellbarycenter = cellbarycenter if cellbarycenter is not None \
                 else mesh.entity_barycenter('cell')
-        self.cellintegrator = pmesh.integrator(q)
 
         self.facemeasure = mesh.entity_measure('face')
         self.facebarycenter = mesh.entity_barycenter('face')
+        self.faceintegrator = mesh.integrator(q, 'face')
 
         self.edgemeasure = mesh.entity_measure('edge')
         self.edgebarycenter = mesh.entity_barycenter('edge')
+        self.edgeintegrator = GaussLegendreQuadrature(q)
+
+        self.sides = None # see `cell_sides`
+        self.tetrahedrons = {} # q -> the sub-tetrahedron quadrature table
+        self.triangles = {} # q -> the face triangle quadrature table
+
+    def faces(self):
+        """
+        The faces as one array with the locations, and the index of the next
+        vertex of every face vertex.
+        """
+        face = self.mesh.ds.face
+        if hasattr(self.mesh.ds, 'faceLocation'):
+            faceLocation = self.mesh.ds.faceLocation
+        else:
+            NF, NV = face.shape
+            face = face.reshape(-1)
+            faceLocation = np.arange(0, NV*(NF+1), NV)
+        nex = np.arange(1, len(face) + 1)
+        nex[faceLocation[1:] - 1] = faceLocation[:-1]
+        return face, faceLocation, nex
+
+    def cell_sides(self):
+        """
+        The sides of the cells, i.e. the (cell, face) pairs of the cell
+        boundaries, and the triangles of the sides.
+
+        Returns
+        -------
+        cellidx : (NS, ), the cell of every side
+        faceidx : (NS, ), the face of every side
+        sign : (NS, ), 1 if the face normal points out of the cell, else -1
+        S : (NC, NS), the sparse matrix which sums the sides into the cells
+        sideidx : (NT, ), the side of every triangle
+        tri : (NT, 2), the nodes of the face edge of every triangle, the
+            third vertex is the face barycenter
+        T : (NS, NT), the sparse matrix which sums the triangles into the
+            sides
+
+        Notes
+        -----
+        The first NF sides are the faces with the cells `face2cell[:, 0]`,
+        the others are the interior faces with the cells `face2cell[:, 1]`.
+        The triangles keep the orientation of the faces on both sides.
+        """
+        if self.sides is None:
+            mesh = self.mesh
+            NC = mesh.number_of_cells()
+            face, faceLocation, nex = self.faces()
+            face2cell = mesh.ds.face_to_cell()
+            NF = len(face2cell)
+            isInFace = (face2cell[:, 0] != face2cell[:, 1])
+            cellidx = np.r_[face2cell[:, 0], face2cell[isInFace, 1]]
+            faceidx = np.r_[np.arange(NF), np.nonzero(isInFace)[0]]
+            sign = np.ones(len(cellidx), dtype=mesh.ftype)
+            sign[NF:] = -1
+            NS = len(cellidx)
+            S = csr_matrix((np.ones(NS, dtype=mesh.ftype), (cellidx, np.arange(NS))),
+                    shape=(NC, NS))
+
+            # the side of every face vertex
+            NV = faceLocation[1:] - faceLocation[:-1]
+            side2vertex = np.zeros(NS + 1, dtype=mesh.itype)
+            side2vertex[1:] = np.cumsum(NV[faceidx])
+            sideidx = np.repeat(np.arange(NS), NV[faceidx])
+            k = np.arange(len(sideidx)) - side2vertex[sideidx] \
+                    + faceLocation[faceidx[sideidx]]
+            tri = np.c_[face[k], face[nex[k]]]
+            NT = len(sideidx)
+            T = csr_matrix((np.ones(NT, dtype=mesh.ftype), (sideidx, np.arange(NT))),
+                    shape=(NS, NT))
+            self.sides = (cellidx, faceidx, sign, S, sideidx, tri, T)
+        return self.sides
+
+    def face_normal(self):
+        """
+        The normals of the faces with the length of the face areas, which
+        are the sums of the normals of the face triangles.
+        """
+        node = self.mesh.entity('node')
+        face, faceLocation, nex = self.faces()
+        NV = faceLocation[1:] - faceLocation[:-1]
+        v = node[face] - np.repeat(self.facebarycenter, NV, axis=0)
+        nv = np.cross(v, v[nex])/2
+        return np.add.reduceat(nv, faceLocation[:-1], axis=0)
+
+    def tetrahedron_quadrature(self, q=None):
+        """
+        The quadrature table on the sub-tetrahedrons of the cells.
+
+        Returns
+        -------
+        ps : (NQ, NT, 3), the quadrature points
+        ws : (NQ, ), the weights
+        vol : (NT, ), the signed volumes of the sub-tetrahedrons
+        cellidx : (NT, ), the cell of every sub-tetrahedron
+        """
+        if q not in self.tetrahedrons:
+            mesh = self.mesh
+            node = mesh.entity('node')
+            cellidx, faceidx, sign, S, sideidx, tri, T = self.cell_sides()
+
+            qf = self.cellintegrator if q is None else mesh.integrator(q, 'cell')
+            bcs, ws = qf.quadpts, qf.weights
+
+            tet = [self.cellbarycenter[cellidx[sideidx]],
+                    self.facebarycenter[faceidx[sideidx]],
+                    node[tri[:, 0]], node[tri[:, 1]]]
+            v1 = tet[1] - tet[0]
+            v2 = tet[2] - tet[0]
+            v3 = tet[3] - tet[0]
+            vol = sign[sideidx]*np.sum(v1*np.cross(v2, v3), axis=-1)/6
+            ps = np.einsum('ij, jkm->ikm', bcs, tet)
+            self.tetrahedrons[q] = (ps, ws, vol, cellidx[sideidx])
+        return self.tetrahedrons[q]
+
+    def triangle_quadrature(self, q=None):
+        """
+        The quadrature table on the triangles of the faces.
+
+        Returns
+        -------
+        ps : (NQ, NT, 3), the quadrature points
+        ws : (NQ, ), the weights
+        area : (NT, ), the signed areas of the triangles
+        faceidx : (NT, ), the face of every triangle
+        """
+        if q not in self.triangles:
+            mesh = self.mesh
+            node = mesh.entity('node')
+            face, faceLocation, nex = self.faces()
+            NF = len(faceLocation) - 1
+            NV = faceLocation[1:] - faceLocation[:-1]
+            faceidx = np.repeat(np.arange(NF), NV)
+
+            qf = self.faceintegrator if q is None else mesh.integrator(q, 'face')
+            bcs, ws = qf.quadpts, qf.weights
+
+            tri = [self.facebarycenter[faceidx], node[face], node[face[nex]]]
+            n = self.face_normal()
+            n /= np.sqrt(np.sum(n**2, axis=-1)).reshape(-1, 1)
+            area = np.sum(np.cross(tri[1] - tri[0], tri[2] - tri[0])*n[faceidx],
+                    axis=-1)/2
+            ps = np.einsum('ij, jkm->ikm', bcs, tri)
+            self.triangles[q] = (ps, ws, area, faceidx)
+        return self.triangles[q]
+
+    def edge_integral(self, u, edgetype=False, q=None, index=np.s_[:]):
+        mesh = self.mesh
+        node = mesh.entity('node')
+        edge = mesh.entity('edge')
+
+        qf = self.edgeintegrator if q is None else GaussLegendreQuadrature(q)
+        bcs, ws = qf.quadpts, qf.weights
+
+        ps = np.einsum('ij, kjm->ikm', bcs, node[edge[index]])
+        val = u(ps)
+        if edgetype is True:
+            e = np.einsum('i, ij..., j->j...', ws, val, self.edgemeasure[index])
+        else:
+            e = np.einsum('i, ij..., j->...', ws, val, self.edgemeasure[index])
+        return e
+
+    def face_integral(self, u, facetype=False, q=None):
+        """
+        Integrate `u(x, index)` on the triangles of the faces.
+        """
+        ps, ws, area, faceidx = self.triangle_quadrature(q)
+
+        val = u(ps, faceidx)
+        ee = np.einsum('i, ij..., j->j...', ws, val, area)
+        faceLocation = self.faces()[1]
+        e = np.add.reduceat(ee, faceLocation[:-1], axis=0)
+
+        if facetype is True:
+            return e
+        else:
+            return e.sum(axis=0)
+
+    def cell_integral(self, u, celltype=False, q=None):
+        return self.integral(u, celltype=celltype, q=q)
+
+    def integral(self, u, celltype=False, q=None):
+        """
+        Integrate `u(x, index)` on the sub-tetrahedrons of the cells.
+        """
+        NC = self.mesh.number_of_cells()
+        ps, ws, vol, cellidx = self.tetrahedron_quadrature(q)
+        _, _, _, S, _, _, T = self.cell_sides()
+
+        val = u(ps, cellidx)
+        ee = np.einsum('i, ij..., j->j...', ws, val, vol)
+        e = S@(T@ee.reshape(len(vol), -1))
+        e = e.reshape((NC, ) + ee.shape[1:])
+
+        if celltype is True:
+            return e
+        else:
+            return e.sum(axis=0)
+
+    def monomial_integral(self, multiIndex, h=None):
+        """
+        The exact integrals of the scaled monomials
+
+            m_a(x) = ((x - x_K)/h_K)^a
+
+        on all cells by the edge integrals.
+
+        Parameters
+        ----------
+        multiIndex : (K, 3), the exponents a, which contain a - e_i for every
+            a and every i with a_i > 0
+        h : (NC, ), the scales of the cells, the default is 1
+
+        Returns
+        -------
+        M : (NC, K)
+
+        Notes
+        -----
+        Let f be homogeneous of degree n in z = x - x_K. On every face F with
+        the outward unit normal n_F, Euler's identity z.grad f = n f and the
+        divergence theorem give
+
+            \\int_K f dx = 1/(n + 3) \\sum_F b_F \\int_F f dS,
+
+        where b_F = z.n_F is constant on F. On F the in-plane divergence of
+        (z - z_F) f with the projection z_F = b_F n_F of x_K gives
+
+            \\int_F f dS = 1/(n + 2) [\\sum_E d_E \\int_E f ds
+                + \\int_F z_F.grad f dS],
+
+        where d_E = z.m_E with the in-plane outward unit normal m_E of the
+        edge E. The last term is the integral of monomials of degree n - 1,
+        so the face integrals are computed by increasing degree, and only the
+        edge integrals are evaluated by the Gauss-Legendre rule.
+        """
+        mesh = self.mesh
+        NC = mesh.number_of_cells()
+        node = mesh.entity('node')
+        cellidx, faceidx, sign, S, sideidx, tri, T = self.cell_sides()
+        h = np.ones(NC, dtype=mesh.ftype) if h is None else h
+
+        multiIndex = np.asarray(multiIndex)
+        degree = np.sum(multiIndex, axis=-1)
+        p = int(np.max(degree))
+
+        # the index of a - e_i in `multiIndex`
+        K = len(multiIndex)
+        key = {tuple(a): i for i, a in enumerate(multiIndex)}
+        lower = np.zeros((K, 3), dtype=mesh.itype)
+        for i, a in enumerate(multiIndex):
+            for j in range(3):
+                if a[j] > 0:
+                    b = a.copy()
+                    b[j] -= 1
+                    lower[i, j] = key[tuple(b)]
+
+        n = self.face_normal()
+        n /= np.sqrt(np.sum(n**2, axis=-1)).reshape(-1, 1)
+        xK = self.cellbarycenter[cellidx]
+        b = sign*np.sum((self.facebarycenter[faceidx] - xK)*n[faceidx], axis=-1)
+        zF = (b*sign/h[cellidx]).reshape(-1, 1)*n[faceidx] # scaled by h_K
+
+        # the edge integrals of every triangle
+        v0 = node[tri[:, 0]]
+        v1 = node[tri[:, 1]]
+        t = v1 - v0
+        l = np.sqrt(np.sum(t**2, axis=-1))
+        m = np.cross(t, n[faceidx[sideidx]])/l.reshape(-1, 1)
+        d = np.sum((v0 - xK[sideidx])*m, axis=-1)
+
+        qf = quadrature_for_degree('interval', p)
+        bcs, ws = qf.quadpts, qf.weights
+        ps = np.einsum('ij, jkm->ikm', bcs, [v0, v1])
+        z = (ps - xK[sideidx])/h[cellidx[sideidx]].reshape(-1, 1)
+        z = z[..., None, :]**np.arange(p+1).reshape(-1, 1) # (NQ, NT, p+1, 3)
+        phi = z[..., multiIndex[:, 0], 0]*z[..., multiIndex[:, 1], 1]
+        phi *= z[..., multiIndex[:, 2], 2]
+        E = np.einsum('i, ijk, j->jk', ws, phi, l*d)
+        E = T@E # (NS, K)
+
+        I = np.zeros_like(E)
+        for k in range(p+1):
+            idx, = np.nonzero(degree == k)
+            val = E[:, idx]
+            for j in range(3):
+                val += zF[:, [j]]*multiIndex[idx, j]*I[:, lower[idx, j]]
+            I[:, idx] = val/(k + 2)
+
+        return (S@(b.reshape(-1, 1)*I))/(degree + 3)
+
+    def fun_integral(self, f, celltype=False, q=None):
+        def u(x, index):
+            return f(x)
+        return self.integral(u, celltype=celltype, q=q)
+
+    def L2_error(self, u, uh, celltype=False, q=None):
+        def f(x, index):
+            return (u(x) - uh(x, index))**2
+        e = self.integral(f, celltype=celltype, q=q)
+        if isinstance(e, np.ndarray):
+            n = len(e.shape) - 1
+            if n > 0:
+                for i in range(n):
+                    e = e.sum(axis=-1)
+        if celltype is False:
+            e = e.sum()
+
+        return np.sqrt(e)
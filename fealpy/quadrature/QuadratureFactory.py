@@ -0,0 +1,274 @@
+"""
+Quadrature Factory
+==================
+
+Generate the quadrature rules of any order and memoise them.
+
+The tabulated rules (`GaussLegendreQuadrature`, `TriangleQuadrature`,
+`TetrahedronQuadrature`, ...) stop at fixed orders. Beyond the tables
+
+* the Gauss-Legendre, Gauss-Lobatto and Gauss-Jacobi rules on the interval
+  are computed by the Golub-Welsch algorithm, i.e. from the eigenvalues and
+  the eigenvectors of the Jacobi matrix of the three-term recurrence;
+* the rules on the simplices are the collapsed coordinate (Duffy/Stroud
+  conical product) rules, which are tensor products of Gauss-Jacobi rules
+  mapped onto the simplex.
+
+All points are given in barycentric coordinates and the weights sum to 1, as
+in the tabulated rules.
+
+Examples
+--------
+>> qf = quadrature('triangle', 12) # the same as TriangleQuadrature(12)
+>> qf = quadrature_for_degree('tetrahedron', 7) # the rule with the fewest
+>> # points that integrates the polynomials of degree 7 exactly
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import gammaln
+
+from .Quadrature import Quadrature
+
+
+def _readonly(*arrays):
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=None)
+def gauss_jacobi_rule(n, alpha=0.0, beta=0.0):
+    """
+    The n-point Gauss-Jacobi rule on [-1, 1] with the weight
+    (1 - x)^alpha (1 + x)^beta by the Golub-Welsch algorithm.
+
+    Returns
+    -------
+    x : (n, ), the points in increasing order
+    w : (n, ), the weights
+    """
+    a = alpha
+    b = beta
+    k = np.arange(n, dtype=np.float)
+    s = 2*k + a + b
+    # the diagonal of the Jacobi matrix
+    d = np.zeros(n, dtype=np.float)
+    flag = s*(s + 2) != 0
+    d[flag] = (b**2 - a**2)/(s[flag]*(s[flag] + 2))
+    if a + b == 0: # s = 0 at k = 0
+        d[0] = (b - a)/(a + b + 2)
+    # the off-diagonal of the Jacobi matrix
+    k = k[1:]
+    s = s[1:]
+    e = 2/s*np.sqrt(k*(k + a)*(k + b)*(k + a + b)/((s - 1)*(s + 1)))
+
+    J = np.diag(d) + np.diag(e, 1) + np.diag(e, -1)
+    x, V = np.linalg.eigh(J)
+    mu0 = np.exp((a + b + 1)*np.log(2) + gammaln(a + 1) + gammaln(b + 1)
+            - gammaln(a + b + 2))
+    w = mu0*V[0]**2
+    return _readonly(x, w)
+
+
+@lru_cache(maxsize=None)
+def gauss_legendre_rule(n):
+    """
+    The n-point Gauss-Legendre rule on [0, 1] in the barycentric
+    coordinates, the degree of precision is 2n - 1.
+
+    Returns
+    -------
+    bcs : (n, 2), the barycentric coordinates of the points
+    ws : (n, ), the weights
+    """
+    x, w = gauss_jacobi_rule(n)
+    bcs = np.zeros((n, 2), dtype=np.float)
+    bcs[:, 0] = (1 + x[::-1])/2
+    bcs[:, 1] = 1 - bcs[:, 0]
+    return _readonly(bcs, w[::-1]/2)
+
+
+@lru_cache(maxsize=None)
+def gauss_lobatto_rule(n):
+    """
+    The n-point Gauss-Lobatto rule on [0, 1] in the barycentric
+    coordinates, n >= 2, the degree of precision is 2n - 3.
+
+    Notes
+    -----
+    The interior points are the Gauss-Jacobi points with alpha = beta = 1,
+    and the weights are 2/(n(n - 1)P_{n-1}(x)^2) with the Legendre
+    polynomial P_{n-1}.
+    """
+    if n < 2:
+        raise ValueError("The Gauss-Lobatto rule needs at least 2 points!")
+    x = np.zeros(n, dtype=np.float)
+    x[0] = -1
+    x[-1] = 1
+    if n > 2:
+        x[1:-1] = gauss_jacobi_rule(n - 2, 1.0, 1.0)[0]
+    # the Legendre polynomial P_{n-1}(x) by the three-term recurrence
+    p0 = np.ones(n, dtype=np.float)
+    p1 = x.copy()
+    for k in range(1, n - 1):
+        p0, p1 = p1, ((2*k + 1)*x*p1 - k*p0)/(k + 1)
+    w = 2/(n*(n - 1)*p1**2)
+    bcs = np.zeros((n, 2), dtype=np.float)
+    bcs[:, 1] = (x + 1)/2
+    bcs[:, 0] = 1 - bcs[:, 1]
+    return _readonly(bcs, w/2)
+
+
+@lru_cache(maxsize=None)
+def stroud_rule(TD, n):
+    """
+    The collapsed coordinate (Stroud conical product) rule on the
+    TD-simplex with n points in every direction, the degree of precision is
+    2n - 1.
+
+    Returns
+    -------
+    bcs : (n**TD, TD+1), the barycentric coordinates of the points
+    ws : (n**TD, ), the weights, which sum to 1
+
+    Notes
+    -----
+    The simplex is the image of the unit cube by the Duffy map
+
+        lambda_1 = t_1
+        lambda_2 = (1 - t_1) t_2
+        lambda_3 = (1 - t_1)(1 - t_2) t_3
+
+    whose Jacobian (1 - t_1)^{TD-1} (1 - t_2)^{TD-2} ... is absorbed into
+    the Gauss-Jacobi weights of every direction.
+    """
+    t = []
+    w = []
+    for i in range(TD):
+        x, ws = gauss_jacobi_rule(n, float(TD - 1 - i), 0.0)
+        t.append((1 + x)/2)
+        w.append(ws)
+
+    T = np.meshgrid(*t, indexing='ij')
+    W = np.meshgrid(*w, indexing='ij')
+    NQ = n**TD
+    bcs = np.zeros((NQ, TD+1), dtype=np.float)
+    r = np.ones(NQ, dtype=np.float)
+    ws = np.ones(NQ, dtype=np.float)
+    for i in range(TD):
+        ti = T[i].reshape(-1)
+        bcs[:, i+1] = r*ti
+        r = r*(1 - ti)
+        ws *= W[i].reshape(-1)
+    bcs[:, 0] = r
+    ws /= np.sum(ws)
+    return _readonly(bcs, ws)
+
+
+# index -> (the degree of precision, the number of points) of the tables,
+# the degrees are the measured ones, i.e. the monomials of the next degree
+# are not integrated exactly in the relative error (the absolute error of
+# the high degree monomials is small anyway, since their integrals are)
+TABLES = {
+    'interval': {k: (2*k - 1, k) for k in range(1, 21)},
+    'lobatto': {k: (2*k - 3, k) for k in range(2, 12)},
+    'triangle': {1: (1, 1), 2: (2, 3), 3: (4, 6), 4: (5, 10), 5: (7, 15),
+        6: (8, 21), 7: (10, 28), 8: (12, 36), 9: (14, 45), 10: (15, 55),
+        11: (17, 66)},
+    'tetrahedron': {1: (1, 1), 2: (2, 4), 3: (3, 10), 4: (5, 20),
+        5: (6, 35), 6: (8, 56), 7: (9, 84)},
+    }
+
+
+def degree_of_precision(etype, index):
+    """
+    The degree of precision of `quadrature(etype, index)`.
+    """
+    if etype in TABLES and index in TABLES[etype]:
+        return TABLES[etype][index][0]
+    elif etype in {'interval', 'quadrangle', 'hexahedron', 'triangle',
+            'tetrahedron'}:
+        return 2*index - 1
+    elif etype == 'lobatto':
+        return 2*index - 3
+    else:
+        raise ValueError("I don't know the element type {}!".format(etype))
+
+
+@lru_cache(maxsize=None)
+def quadrature(etype, index):
+    """
+    The memoised quadrature object of `etype` with `index`, the index has the
+    same meaning as in the quadrature classes.
+
+    Parameters
+    ----------
+    etype : 'interval', 'lobatto', 'triangle', 'tetrahedron', 'quadrangle',
+        'hexahedron' or 'prism'
+    index : int
+    """
+    from .GaussLegendreQuadrature import GaussLegendreQuadrature
+    from .GaussLobattoQuadrature import GaussLobattoQuadrature
+    from .TriangleQuadrature import TriangleQuadrature
+    from .TetrahedronQuadrature import TetrahedronQuadrature
+    from .QuadrangleQuadrature import QuadrangleQuadrature
+    from .HexahedronQuadrature import HexahedronQuadrature
+    from .PrismQuadrature import PrismQuadrature
+    Q = {'interval': GaussLegendreQuadrature,
+         'lobatto': GaussLobattoQuadrature,
+         'triangle': TriangleQuadrature,
+         'tetrahedron': TetrahedronQuadrature,
+         'quadrangle': QuadrangleQuadrature,
+         'hexahedron': HexahedronQuadrature,
+         'prism': PrismQuadrature}
+    if etype not in Q:
+        raise ValueError("I don't know the element type {}!".format(etype))
+    return Q[etype](index)
+
+
+class StroudQuadrature(Quadrature):
+    def __init__(self, TD, n):
+        self.quadpts, self.weights = stroud_rule(TD, n)
+
+
+def quadrature_for_degree(etype, degree):
+    """
+    The memoised rule with the fewest points which integrates the
+    polynomials of `degree` exactly.
+
+    Parameters
+    ----------
+    etype : 'interval', 'lobatto', 'triangle', 'tetrahedron', 'quadrangle',
+        'hexahedron' or 'prism'
+    degree : int, the polynomial degree
+    """
+    n = max((degree + 2)//2, 1) # the Gauss rule with 2n - 1 >= degree
+    if etype in {'interval', 'quadrangle', 'hexahedron'}:
+        return quadrature(etype, n)
+    elif etype == 'lobatto':
+        return quadrature(etype, max((degree + 4)//2, 2))
+    elif etype in {'triangle', 'tetrahedron'}:
+        TD = 2 if etype == 'triangle' else 3
+        index, num = None, n**TD
+        for k, (d, m) in TABLES[etype].items():
+            if d >= degree and m <= num:
+                index, num = k, m
+        if index is None:
+            return stroud_quadrature(TD, n)
+        return quadrature(etype, index)
+    elif etype == 'prism':
+        # the index is shared by the triangle and the interval rules
+        index = max(n, 12)
+        for k, (d, m) in TABLES['triangle'].items():
+            if d >= degree:
+                index = max(n, k)
+                break
+        return quadrature(etype, index)
+    else:
+        raise ValueError("I don't know the element type {}!".format(etype))
+
+
+@lru_cache(maxsize=None)
+def stroud_quadrature(TD, n):
+    return StroudQuadrature(TD, n)
@@ -0,0 +1,206 @@
+"""
+Quadrature Point Cache
+======================
+
+Cache the physical quadrature points of a mesh and the values of the
+coefficient functions at them.
+
+The assembly routines and the error computations evaluate
+`mesh.bc_to_point(bcs)` and the user functions at all quadrature points
+again and again, e.g. in the error studies and the Picard iterations. Here
+every mesh gets one `QuadraturePointCache` (see `quadrature_cache`), which
+keeps
+
+* the physical points of every quadrature rule and entity type;
+* the values of the functions marked by the `cacheable` decorator.
+
+The entries are keyed on the callable, the quadrature points and the mesh
+version, and the least recently used ones are evicted when the total size
+exceeds the byte budget.
+
+A function is only cached if it is a pure function of the points, so it has
+to be marked by `fealpy.decorator.cacheable`. Never mark a function which
+depends on a changing state, e.g. a closure of a finite element function in
+a nonlinear iteration.
+
+The cache is cleared when `mesh.node` or `mesh.ds.cell` is replaced, e.g. by
+`uniform_refine`, or when the version of the mesh is increased by
+`mesh_modified(mesh)`. The routines which change the mesh in place, e.g. the
+node smoothing and the edge flipping, have to call `mesh_modified`. As a
+safeguard the cache also compares the shapes and a few sampled entries of
+the arrays, which costs O(1) per lookup but can not find every change.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+
+def mesh_modified(mesh):
+    """
+    Increase the modification counter of the mesh, which invalidates the
+    cached data of the mesh.
+    """
+    mesh.version = getattr(mesh, 'version', 0) + 1
+
+
+def _points_key(bcs):
+    if isinstance(bcs, tuple): # tensor product rules
+        return tuple(_points_key(bc) for bc in bcs)
+    bcs = np.asarray(bcs)
+    return (bcs.shape, bcs.dtype.str, bcs.tobytes())
+
+
+def _function_key(f):
+    # the bound methods are created on every attribute access, so the key is
+    # the underlying function and the bound object
+    obj = getattr(f, '__self__', None)
+    try:
+        hash(obj)
+    except TypeError:
+        obj = id(obj)
+    return (getattr(f, '__func__', f), obj)
+
+
+def _fingerprint(a, nsample=16):
+    """
+    The shape and `nsample` evenly spaced rows of the array `a`.
+    """
+    if a is None:
+        return None
+    a = np.asarray(a)
+    if a.ndim == 0 or len(a) == 0:
+        return (a.shape, a.tobytes())
+    idx = np.linspace(0, len(a) - 1, min(nsample, len(a))).astype(np.int_)
+    return (a.shape, a[idx].tobytes())
+
+
+def _readonly(val):
+    if isinstance(val, np.ndarray):
+        val.flags.writeable = False
+    return val
+
+
+class QuadraturePointCache():
+    def __init__(self, mesh, maxbytes=2**28):
+        """
+        Parameters
+        ----------
+        mesh : the mesh object
+        maxbytes : the byte budget of the cached arrays, default 256M
+        """
+        self.mesh = mesh
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.data = OrderedDict()
+        self.state = None
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+
+    def _mesh_state(self):
+        mesh = self.mesh
+        ds = getattr(mesh, 'ds', None)
+        return (getattr(mesh, 'version', 0), getattr(mesh, 'node', None),
+                getattr(ds, 'cell', None))
+
+    def check(self):
+        """
+        Clear the cache if the mesh has been modified, i.e. the version of
+        the mesh is changed, the node and the cell arrays are replaced, or
+        their shapes or sampled entries differ from the ones taken when the
+        cache was filled.
+        """
+        state = self._mesh_state()
+        if (self.state is None) or (state[0] != self.state[0]) or \
+                any(a is not b for a, b in zip(state[1:], self.state[1:])):
+            fingerprint = None
+        else:
+            fingerprint = tuple(_fingerprint(a) for a in state[1:])
+            if fingerprint == self.fingerprint:
+                return
+        self.clear()
+        self.state = state
+        if fingerprint is None:
+            fingerprint = tuple(_fingerprint(a) for a in state[1:])
+        self.fingerprint = fingerprint
+
+    def clear(self):
+        self.data.clear()
+        self.nbytes = 0
+
+    def _get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def _put(self, key, val):
+        n = val.nbytes if isinstance(val, np.ndarray) else 0
+        if n > self.maxbytes:
+            return val
+        self.data[key] = _readonly(val)
+        self.nbytes += n
+        while self.nbytes > self.maxbytes:
+            _, v = self.data.popitem(last=False)
+            self.nbytes -= v.nbytes if isinstance(v, np.ndarray) else 0
+        return val
+
+    def points(self, bcs, etype='cell'):
+        """
+        The physical points of the barycentric coordinates `bcs` on all
+        entities of `etype`.
+        """
+        self.check()
+        key = ('points', etype, _points_key(bcs))
+        val = self._get(key)
+        if val is None:
+            if etype in {'cell', None}:
+                val = self.mesh.bc_to_point(bcs)
+            else:
+                val = self.mesh.bc_to_point(bcs, etype=etype)
+            val = self._put(key, val)
+        return val
+
+    def evaluate(self, f, bcs, etype='cell'):
+        """
+        The values of `f` at the quadrature points `bcs`.
+
+        Parameters
+        ----------
+        f : a function with `coordtype` 'barycentric' or 'cartesian' (the
+            default if `f` has no `coordtype`)
+        bcs : the barycentric coordinates of the quadrature points
+        etype : the entity type
+        """
+        coordtype = getattr(f, 'coordtype', 'cartesian')
+        if not getattr(f, 'cacheable', False):
+            if coordtype == 'barycentric':
+                return f(bcs)
+            return f(self.points(bcs, etype=etype))
+
+        self.check()
+        key = ('value', etype, _function_key(f), _points_key(bcs))
+        val = self._get(key)
+        if val is None:
+            if coordtype == 'barycentric':
+                val = f(bcs)
+            else:
+                val = f(self.points(bcs, etype=etype))
+            val = self._put(key, val)
+        return val
+
+
+def quadrature_cache(mesh, maxbytes=None):
+    """
+    The quadrature point cache of `mesh`, which is created on the first
+    call.
+    """
+    cache = mesh.__dict__.get('_quadrature_cache')
+    if cache is None:
+        cache = QuadraturePointCache(mesh)
+        mesh.__dict__['_quadrature_cache'] = cache
+    if maxbytes is not None:
+        cache.maxbytes = maxbytes
+    return cache
@@ -1,10 +1,17 @@
 import numpy as np
 from .Quadrature import Quadrature
+from .QuadratureFactory import stroud_rule
 
 
 class TetrahedronQuadrature(Quadrature):
 
     def __init__(self, index):
+        if index < 1:
+            raise ValueError("The index should be >= 1!")
+        if index > 7: # the collapsed coordinate rule with index points in every direction
+            self.quadpts, self.weights = stroud_rule(3, index)
+            return
+
         if index == 1:    # Order 1, nQuad 1
             A = np.array([
                 [0.2500000000000000,	0.2500000000000000,	0.2500000000000000,	0.2500000000000000,	1.0000000000000000]],
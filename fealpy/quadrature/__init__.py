@@ -6,6 +6,7 @@ from .TetrahedronQuadrature import TetrahedronQuadrature
 from .QuadrangleQuadrature import QuadrangleQuadrature
 from .HexahedronQuadrature import HexahedronQuadrature
 from .PrismQuadrature import PrismQuadrature
+from .QuadratureFactory import quadrature, quadrature_for_degree
 from .FEMeshIntegralAlg import FEMeshIntegralAlg
 from .PolygonMeshIntegralAlg import PolygonMeshIntegralAlg
 from .PolyhedronMeshIntegralAlg import PolyhedronMeshIntegralAlg
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class AffineOperator():
+    """
+    The affine decomposition of a parametric operator
+
+        A(mu) = sum_q theta_q(mu) A_q,
+
+    where the terms A_q, e.g. the sparse matrices or the load vectors of a
+    finite element space, do not depend on the parameter mu, and the
+    coefficients theta_q(mu) are cheap to evaluate.
+
+    Examples
+    --------
+    The diffusion coefficient which is mu_q on the subdomain q
+
+    >> A = AffineOperator(lambda mu: mu,
+    >>         [space.stiff_matrix(cfun=chi) for chi in indicators])
+    >> F = AffineOperator(lambda mu: [1.0], [space.source_vector(f)])
+
+    and the linear elasticity with mu = (mu, lam)
+
+    >> A = AffineOperator(lambda mu: mu, [
+    >>     space.linear_elasticity_matrix(1, 0),
+    >>     space.linear_elasticity_matrix(0, 1)])
+    """
+
+    def __init__(self, theta, terms):
+        """
+        Parameters
+        ----------
+        theta : callable, mu -> (Q, ) array_like, the coefficients
+        terms : the list of the Q parameter independent terms
+        """
+        self.theta = theta
+        self.terms = list(terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def coefficients(self, mu):
+        """
+        The coefficients theta_q(mu) with shape (Q, ).
+        """
+        theta = np.asarray(self.theta(mu), dtype=np.float64).reshape(-1)
+        if len(theta) != len(self.terms):
+            raise ValueError("theta(mu) has {} coefficients, but there are {}"
+                    " terms!".format(len(theta), len(self.terms)))
+        return theta
+
+    def __call__(self, mu):
+        """
+        Assemble the operator A(mu).
+        """
+        theta = self.coefficients(mu)
+        A = theta[0]*self.terms[0]
+        for t, Aq in zip(theta[1:], self.terms[1:]):
+            A = A + t*Aq
+        return A
+
+    def project(self, V, W=None):
+        """
+        The reduced terms W^T A_q V, or W^T A_q for the vector terms.
+
+        Parameters
+        ----------
+        V : (gdof, N), the trial basis
+        W : (gdof, M), the test basis, the default is V
+
+        Returns
+        -------
+        terms : (Q, M, N) for the matrix terms or (Q, M) for the vector terms
+        """
+        W = V if W is None else W
+        if len(self.terms[0].shape) == 1:
+            return np.array([W.T@Aq for Aq in self.terms])
+        else:
+            return np.array([W.T@(Aq@V) for Aq in self.terms])
@@ -0,0 +1,337 @@
+import numpy as np
+from scipy.sparse.linalg import spsolve, splu
+
+from .AffineOperator import AffineOperator
+from .pod import pod, orthonormalize
+from ..common.profiler import profiler
+
+
+class ReducedBasisModel():
+    """
+    The reduced basis model of the parametric coercive problem
+
+        A(mu) u = F(mu), u = gD on the Dirichlet dofs,
+
+    where A(mu) = sum_q theta_q(mu) A_q and F(mu) = sum_q phi_q(mu) F_q are
+    affine operators, e.g. the matrices and the vectors assembled by a
+    `LagrangeFiniteElementSpace`.
+
+    Notes
+    -----
+    Offline, the truth (finite element) solutions at the selected parameters
+    are compressed into the basis V by the greedy algorithm or by the POD, and
+    all parameter independent quantities are cached: the reduced matrices
+    V^T A_q V, the reduced vectors V^T F_q and the small factor R of the
+    Riesz representers of the residual (see below). Online, the reduced
+    problem
+
+        (sum_q theta_q(mu) V^T A_q V) c = sum_q phi_q(mu) V^T F_q
+
+    and the error bound only need O(Q^2 N^2) operations, independent of the
+    number of the dofs.
+
+    The Dirichlet data are lifted, u = u0 + ug, so the right hand side gets
+    the affine terms -theta_q(mu) A_q ug. The energy inner product is
+    X = A(mu_ref) on the free dofs, and the error bound is
+
+        ||u(mu) - u_N(mu)||_X <= ||r(mu)||_{X'}/alpha(mu),
+
+    with the min-theta lower bound alpha(mu) = min_q theta_q(mu)/theta_q(mu_ref)
+    of the coercivity constant, which is valid if all A_q are symmetric
+    positive semi-definite and all theta_q are positive. Otherwise a lower
+    bound `coercivity(mu)` should be given.
+
+    The dual norm of the residual is the X norm of its Riesz representer,
+    which is a combination of the representers X^{-1} F_p and X^{-1} A_q v_n.
+    These are orthonormalized offline, Z = Q R, so online the norm is
+    ||R w(mu)||_2 with the coefficients w(mu). Unlike the expanded quadratic
+    form w^T Z^T X Z w, this does not lose half of the digits by the
+    cancellation, so the bound stays reliable down to the round-off error.
+
+    Examples
+    --------
+    >> A = AffineOperator(lambda mu: mu, [space.stiff_matrix(cfun=c) for c in chi])
+    >> F = AffineOperator(lambda mu: [1.0], [space.source_vector(f)])
+    >> model = ReducedBasisModel.from_space(space, A, F, gD=pde.dirichlet)
+    >> model.greedy(train, tol=1e-6)
+    >> c = model.solve(mu)                # online
+    >> delta = model.error_bound(mu, c)
+    >> uh = space.function(array=model.reconstruct(c))
+    """
+
+    def __init__(self, A, F, isBdDof=None, gD=None, mu_ref=None,
+            coercivity=None):
+        """
+        Parameters
+        ----------
+        A : AffineOperator of the (gdof, gdof) sparse matrices
+        F : AffineOperator of the (gdof, ) vectors
+        isBdDof : (gdof, ) bool, the Dirichlet dofs, the default is none
+        gD : (gdof, ), the values on the Dirichlet dofs, the default is zero
+        mu_ref : the parameter of the inner product X = A(mu_ref), the default
+            uses theta_q = 1
+        coercivity : callable, mu -> the lower bound of the coercivity
+            constant of A(mu) in the X norm
+        """
+        gdof = A.terms[0].shape[0]
+        if isBdDof is None:
+            isBdDof = np.zeros(gdof, dtype=np.bool_)
+        self.isBdDof = isBdDof
+        self.free, = np.nonzero(~isBdDof)
+        self.ug = np.zeros(gdof, dtype=np.float64)
+        if gD is not None:
+            self.ug[isBdDof] = gD[isBdDof]
+
+        free = self.free
+        self.A = AffineOperator(A.coefficients,
+                [Aq[free, :][:, free].tocsr() for Aq in A.terms])
+        # the lifting of the Dirichlet data
+        terms = [Fq[free] for Fq in F.terms]
+        if np.any(self.ug != 0):
+            terms += [-(Aq@self.ug)[free] for Aq in A.terms]
+            theta = lambda mu: np.r_[F.coefficients(mu), A.coefficients(mu)]
+        else:
+            theta = F.coefficients
+        self.F = AffineOperator(theta, terms)
+
+        self.theta_ref = np.ones(len(A)) if mu_ref is None else \
+                A.coefficients(mu_ref)
+        if coercivity is not None:
+            self.coercivity = coercivity
+
+        self.X = sum(t*Aq for t, Aq in zip(self.theta_ref, self.A.terms)).tocsc()
+        self.Xsolver = splu(self.X)
+        self.reset()
+
+    @classmethod
+    def from_space(cls, space, A, F, gD=None, threshold=None, mu_ref=None,
+            coercivity=None):
+        """
+        The model of a scalar `LagrangeFiniteElementSpace` with the Dirichlet
+        condition gD(p) on the boundary dofs given by `threshold`.
+        """
+        gdof = space.number_of_global_dofs()
+        if gD is None:
+            isBdDof = space.boundary_dof(threshold=threshold)
+            ug = None
+        else:
+            ug = np.zeros(gdof, dtype=space.ftype)
+            isBdDof = space.set_dirichlet_bc(ug, gD, threshold=threshold)
+        return cls(A, F, isBdDof=isBdDof, gD=ug, mu_ref=mu_ref,
+                coercivity=coercivity)
+
+    def reset(self):
+        """
+        Clear the reduced basis.
+        """
+        NF = len(self.free)
+        self.V = np.zeros((NF, 0), dtype=np.float64)
+        # the terms of the residual, F_p and A_q v_n, and the X-orthonormal
+        # basis of their Riesz representers
+        self.RT = np.array(self.F.terms).T
+        self.Q = np.zeros((NF, 0), dtype=np.float64)
+        self._add_residual_terms(self.RT)
+        self.mus = []
+        self.errors = []
+        self._update()
+
+    @property
+    def N(self):
+        return self.V.shape[1]
+
+    def coercivity(self, mu):
+        """
+        The min-theta lower bound of the coercivity constant.
+        """
+        return np.min(self.A.coefficients(mu)/self.theta_ref)
+
+    def truth_solve(self, mu):
+        """
+        Solve the full problem on the free dofs.
+        """
+        with profiler.region('truth_solve'):
+            u = spsolve(self.A(mu), self.F(mu))
+            profiler.count('dofs', len(u))
+        return u
+
+    def add_basis(self, u):
+        """
+        Add the snapshot u, which is on the free dofs, to the basis.
+
+        Returns
+        -------
+        flag : bool, False if u is in the span of the basis
+        """
+        v = orthonormalize(self.V, u, self.X)
+        if v is None:
+            return False
+        self.V = np.c_[self.V, v]
+        # the columns of the basis function n are A_0 v_n, ..., A_{Q-1} v_n
+        AV = np.array([Aq@v for Aq in self.A.terms]).T
+        self.RT = np.c_[self.RT, AV]
+        self._add_residual_terms(AV)
+        self._update()
+        return True
+
+    def _add_residual_terms(self, T):
+        for z in self.Xsolver.solve(T).T:
+            q = orthonormalize(self.Q, z, self.X, tol=1e-13)
+            if q is not None:
+                self.Q = np.c_[self.Q, q]
+
+    def _update(self):
+        """
+        Compute the cached reduced quantities of the current basis.
+        """
+        V = self.V
+        QF = len(self.F)
+        self.AN = np.array([V.T@(Aq@V) for Aq in self.A.terms]) # (QA, N, N)
+        self.FN = self.RT[:, :QF].T@V # (QF, N)
+        # Z = Q R with R = Q^T X Z = Q^T T, the terms T are X Z
+        R = self.Q.T@self.RT
+        self.RF = R[:, :QF]
+        self.RA = R[:, QF:]
+
+    def solve(self, mu):
+        """
+        Solve the reduced problem.
+
+        Returns
+        -------
+        c : (N, ), the coefficients of the reduced solution
+        """
+        ta = self.A.coefficients(mu)
+        tf = self.F.coefficients(mu)
+        A = np.tensordot(ta, self.AN, axes=1)
+        b = tf@self.FN
+        return np.linalg.solve(A, b)
+
+    def residual_norm(self, mu, c):
+        """
+        The dual norm ||r(mu)||_{X'} of the residual of the reduced solution.
+        """
+        ta = self.A.coefficients(mu)
+        tf = self.F.coefficients(mu)
+        r = self.RF@tf - self.RA@np.outer(c, ta).reshape(-1)
+        return np.sqrt(r@r)
+
+    def error_bound(self, mu, c=None):
+        """
+        The upper bound of the error ||u(mu) - u_N(mu)||_X, which is inf if
+        the coercivity lower bound is not positive.
+        """
+        if c is None:
+            c = self.solve(mu)
+        alpha = self.coercivity(mu)
+        if alpha <= 0:
+            return np.inf
+        return self.residual_norm(mu, c)/alpha
+
+    def reconstruct(self, c):
+        """
+        The full solution with the Dirichlet data from the coefficients c.
+        """
+        u = self.ug.copy()
+        u[self.free] += self.V@c
+        return u
+
+    def energy_norm(self, u):
+        """
+        The X norm of the full vector u on the free dofs.
+        """
+        u = u[self.free]
+        return np.sqrt(u@(self.X@u))
+
+    @profiler.timed()
+    def greedy(self, train, tol=1e-6, maxN=50, relative=True):
+        """
+        Build the basis by the weak greedy algorithm.
+
+        Parameters
+        ----------
+        train : (NT, ...) the training parameters
+        tol : the tolerance of the error bound on the training set
+        maxN : the maximal number of the basis functions
+        relative : whether the bound is relative to ||u_N(mu)||_X
+
+        Returns
+        -------
+        errors : the maximal error bounds on the training set before every
+            basis function is added
+        """
+        mu = train[0]
+        while self.N < maxN:
+            if not self.add_basis(self.truth_solve(mu)):
+                break
+            self.mus.append(mu)
+            delta = np.zeros(len(train), dtype=np.float64)
+            for i, m in enumerate(train):
+                c = self.solve(m)
+                delta[i] = self.error_bound(m, c)
+                if relative:
+                    delta[i] /= max(np.linalg.norm(c), np.finfo(np.float64).tiny)
+            i = np.argmax(delta)
+            self.errors.append(delta[i])
+            profiler.count('basis')
+            if delta[i] < tol:
+                break
+            mu = train[i]
+        return self.errors
+
+    @profiler.timed()
+    def pod(self, train, tol=1e-6, N=None):
+        """
+        Build the basis by the POD of the truth solutions on the training
+        set.
+
+        Returns
+        -------
+        sigma : the singular values of the snapshots in the X norm
+        """
+        S = np.array([self.truth_solve(mu) for mu in train]).T
+        V, sigma = pod(S, X=self.X, tol=tol, N=N)
+        self.reset()
+        for v in V.T:
+            self.add_basis(v)
+        self.mus = list(train)
+        return sigma
+
+    def save(self, fname):
+        """
+        Save the reduced quantities of the online stage into a npz file.
+        """
+        np.savez(fname, V=self.V, AN=self.AN, FN=self.FN, RF=self.RF,
+                RA=self.RA, theta_ref=self.theta_ref, ug=self.ug,
+                free=self.free)
+
+    @classmethod
+    def load(cls, fname, A, F, coercivity=None):
+        """
+        Load the online model saved by `save`.
+
+        Parameters
+        ----------
+        fname : the npz file
+        A, F : the AffineOperator objects of the offline model, or the
+            coefficient functions theta(mu) and phi(mu) of them. The
+            coefficients of F include the ones of the Dirichlet lifting if
+            the boundary data are not zero.
+
+        Notes
+        -----
+        The online model only supports `solve`, `error_bound` and
+        `reconstruct`, since the full matrices are not stored.
+        """
+        model = cls.__new__(cls)
+        with np.load(fname) as data:
+            for key in data.files:
+                setattr(model, key, data[key])
+        atheta = A.coefficients if isinstance(A, AffineOperator) else A
+        ftheta = F.coefficients if isinstance(F, AffineOperator) else F
+        if isinstance(F, AffineOperator) and (len(F) != len(model.FN)):
+            ftheta = lambda mu: np.r_[F.coefficients(mu), atheta(mu)]
+        model.A = AffineOperator(atheta, [None]*len(model.AN))
+        model.F = AffineOperator(ftheta, [None]*len(model.FN))
+        if coercivity is not None:
+            model.coercivity = coercivity
+        return model
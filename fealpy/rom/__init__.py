@@ -0,0 +1,13 @@
+"""
+rom
+===
+
+The reduced order models of the parametric problems: the affine
+decomposition of the operators, the POD and the greedy compression of the
+snapshots, and the reduced basis model with the offline/online split and the
+a posteriori error bounds.
+"""
+
+from .AffineOperator import AffineOperator
+from .pod import pod, orthonormalize
+from .ReducedBasisModel import ReducedBasisModel
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+def pod(S, X=None, tol=1e-8, N=None):
+    """
+    The proper orthogonal decomposition of the snapshots by the method of
+    snapshots.
+
+    Parameters
+    ----------
+    S : (gdof, NS), the snapshots
+    X : (gdof, gdof), the sparse matrix of the inner product, the default is
+        the identity
+    tol : the relative error of the compression, the basis holds the modes
+        until the energy sum_{i > N} sigma_i^2 of the dropped ones is less
+        than tol^2 sum_i sigma_i^2
+    N : the maximal number of the modes
+
+    Returns
+    -------
+    V : (gdof, N), the X-orthonormal basis
+    sigma : (NS, ), the singular values of the snapshots in the X norm
+
+    Notes
+    -----
+    The eigenvalues of the correlation matrix C = S^T X S are sigma^2, and the
+    modes are V = S Z/sigma, where Z are the eigenvectors of C. The small
+    modes are not accurate since C squares the condition number, but they are
+    dropped anyway.
+    """
+    XS = S if X is None else X@S
+    C = S.T@XS
+    C = (C + C.T)/2
+    lam, Z = np.linalg.eigh(C)
+    lam = lam[::-1]
+    Z = Z[:, ::-1]
+    lam[lam < 0] = 0
+    sigma = np.sqrt(lam)
+
+    # the dropped energy of every N
+    energy = np.cumsum(lam[::-1])[::-1]
+    n = np.sum(energy > tol**2*energy[0]) if energy[0] > 0 else 0
+    n = max(n, 1)
+    if N is not None:
+        n = min(n, N)
+    # the modes of the zero singular values are not defined
+    n = min(n, np.sum(sigma > sigma[0]*np.finfo(S.dtype).eps*len(sigma)))
+
+    V = S@(Z[:, :n]/sigma[:n])
+    return V, sigma
+
+
+def orthonormalize(V, u, X=None, tol=1e-10):
+    """
+    Orthonormalize u against the X-orthonormal columns of V by the
+    Gram-Schmidt method with the reorthogonalization.
+
+    Parameters
+    ----------
+    tol : u is in the span of V if the norm of its orthogonal part is less
+        than tol times the norm of u
+
+    Returns
+    -------
+    v : (gdof, ), the new basis function, or None if u is in the span of V
+    """
+    norm0 = _norm(u, X)
+    for i in range(2):
+        if V.shape[1] > 0:
+            Xu = u if X is None else X@u
+            u = u - V@(V.T@Xu)
+    norm = _norm(u, X)
+    if norm <= tol*norm0 or norm == 0:
+        return None
+    return u/norm
+
+
+def _norm(u, X):
+    return np.sqrt(u@u if X is None else u@(X@u))
@@ -1,4 +1,10 @@
 
 from .solve import solve, active_set_solver
+from .primal_dual_active_set import PrimalDualActiveSetSolver
+from .static_condensation import StaticCondensation
+from .hybridization import RTHybridization
+from .saddle_point_preconditioner import SaddlePointPreconditioner, saddle_point_solve
 from .amg import AMGSolver
+from .gmg import GMGSolver
+from .pmg import PMGSolver
 from .matlab_solver import MatlabSolver
@@ -0,0 +1,530 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import LinearOperator, splu, cg
+import pyamg
+from pyamg.relaxation.relaxation import gauss_seidel, gauss_seidel_indexed
+
+from ..common.profiler import profiler
+
+
+def cell_depth(tree):
+    """
+    The refinement level of every cell of a Tritree or a Quadtree, the root
+    cells are on the level 0.
+    """
+    child = tree.child
+    depth = np.zeros(len(child), dtype=np.int_)
+    idx, = np.nonzero(tree.parent[:, 0] < 0)
+    d = 0
+    while len(idx) > 0:
+        depth[idx] = d
+        idx = idx[child[idx, 0] >= 0]
+        idx = child[idx].reshape(-1)
+        d += 1
+    return depth
+
+
+def node_level(tree, depth=None):
+    """
+    The level of every node, which is the lowest level of the cells around
+    it. The nodes without cells are on the level 0.
+    """
+    if depth is None:
+        depth = cell_depth(tree)
+    cell = tree.entity('cell')
+    nodeLevel = np.zeros(tree.number_of_nodes(), dtype=np.int_)
+    L = depth.max() if len(depth) > 0 else 0
+    for l in range(L, 0, -1):
+        nodeLevel[cell[depth == l]] = l
+    nodeLevel[cell[depth == 0]] = 0
+    return nodeLevel
+
+
+def tree_prolongation(tree):
+    """
+    The nodal prolongation matrices of the refinement hierarchy of a Tritree
+    or a Quadtree.
+
+    The level l mesh consists of the cells on the level l and the leaf cells
+    on the coarser levels, so its nodes are the ones whose level, the lowest
+    level of the cells around it, is not larger than l. A node new on the
+    level l + 1 is the midpoint of an edge or the center of a cell on the
+    level l, and its value is the average of the values on the parent nodes,
+    which is the linear (bilinear) interpolation, also on the hanging nodes.
+
+    Returns
+    -------
+    P : list of the L sparse matrices, P[l] maps the nodal values on the
+        level l to the level l + 1
+    levelNode : list of the L + 1 sorted global node indices of the levels,
+        the last one is all the nodes of the tree
+    """
+    from ..mesh.Tritree import Tritree
+    from ..mesh.Quadtree import Quadtree
+
+    NN = tree.number_of_nodes()
+    cell = tree.entity('cell')
+    child = tree.child
+
+    depth = cell_depth(tree)
+    L = depth.max() if len(depth) > 0 else 0
+    nodeLevel = node_level(tree, depth)
+
+    # the parent nodes of the new nodes of every refined cell
+    idx, = np.nonzero(child[:, 0] >= 0)
+    cp = cell[idx]
+    if isinstance(tree, Tritree):
+        # child 3 is [m0, m1, m2], m_i is the midpoint of the edge opposite
+        # to the vertex i
+        new = cell[child[idx, 3]].reshape(-1)
+        pnode = np.c_[cp[:, [1, 2, 0]].reshape(-1), cp[:, [2, 0, 1]].reshape(-1)]
+        cnew = np.zeros(0, dtype=new.dtype)
+        cpnode = np.zeros((0, 4), dtype=new.dtype)
+    elif isinstance(tree, Quadtree):
+        # child 0 is [cp0, ep0, cc, ep3] and child 2 is [cc, ep1, cp2, ep2],
+        # ep_i is the midpoint of the edge (cp_i, cp_{i+1})
+        c0 = cell[child[idx, 0]]
+        c2 = cell[child[idx, 2]]
+        new = np.c_[c0[:, 1], c2[:, 1], c2[:, 3], c0[:, 3]].reshape(-1)
+        pnode = np.c_[cp.reshape(-1), cp[:, [1, 2, 3, 0]].reshape(-1)]
+        cnew = c0[:, 2]
+        cpnode = cp
+    else:
+        raise ValueError("the geometric multigrid only supports the Tritree"
+                " and the Quadtree, but got {}!".format(type(tree).__name__))
+
+    # every midpoint is shared by the refined cells on the both sides
+    owner = np.zeros(NN, dtype=np.int_)
+    owner[new] = np.arange(len(new))
+    i = owner[new] == np.arange(len(new))
+    new = new[i]
+    pnode = pnode[i]
+    I = np.r_[new, new, np.repeat(cnew, 4)]
+    J = np.r_[pnode[:, 0], pnode[:, 1], cpnode.reshape(-1)]
+    W = np.r_[np.full(2*len(new), 0.5), np.full(4*len(cnew), 0.25)]
+    if not np.all(nodeLevel[J] < nodeLevel[I]):
+        raise ValueError("the midpoints must be created after their parent"
+                " nodes, the tree is not a nested refinement!")
+
+    levelNode = [np.nonzero(nodeLevel <= l)[0] for l in range(L + 1)]
+    P = []
+    g2l = np.zeros(NN, dtype=np.int_)
+    for l in range(L):
+        n0 = levelNode[l]
+        n1 = levelNode[l+1]
+        g2l[n1] = np.arange(len(n1))
+        fine = g2l[n0]
+        g2l[n0] = np.arange(len(n0))
+        flag = nodeLevel[I] == l + 1
+        row = np.r_[fine, g2l[I[flag]]]
+        col = np.r_[np.arange(len(n0)), g2l[J[flag]]]
+        val = np.r_[np.ones(len(n0)), W[flag]]
+        P.append(csr_matrix((val, (row, col)), shape=(len(n1), len(n0)),
+            dtype=tree.ftype))
+    return P, levelNode
+
+
+def tree_level(tree, level, levelNode=None):
+    """
+    The tree truncated at the given level, e.g. for rediscretising the
+    operator on the coarse levels.
+
+    The nodes of the new tree are `tree.node[levelNode[level]]` in this
+    order, which is the order of the dofs of the level in `GMGSolver`.
+    """
+    cell = tree.entity('cell')
+    NN = tree.number_of_nodes()
+    depth = cell_depth(tree)
+    if levelNode is None:
+        nidx, = np.nonzero(node_level(tree, depth) <= level)
+    else:
+        nidx = levelNode[level]
+
+    isKeepCell = depth <= level
+    cmap = -np.ones(len(depth), dtype=tree.itype)
+    cmap[isKeepCell] = np.arange(isKeepCell.sum())
+    nmap = -np.ones(NN, dtype=tree.itype)
+    nmap[nidx] = np.arange(len(nidx))
+
+    t = tree.__class__(tree.node[nidx], nmap[cell[isKeepCell]])
+    parent = tree.parent[isKeepCell]
+    flag = parent[:, 0] >= 0
+    parent[flag, 0] = cmap[parent[flag, 0]]
+    child = tree.child[isKeepCell]
+    child[depth[isKeepCell] == level] = -1
+    flag = child[:, 0] >= 0
+    child[flag] = cmap[child[flag]]
+    t.parent = parent
+    t.child = child
+    return t
+
+
+def merge_levels(P, ratio):
+    """
+    Merge the levels of the hierarchy until the number of the dofs decreases
+    at least by the given ratio on every coarser level.
+
+    Returns
+    -------
+    P : the composite prolongation matrices of the kept levels
+    level : the indices of the kept levels in the original hierarchy
+    """
+    L = len(P)
+    level = [L]
+    Q = []
+    Pc = None
+    for l in range(L-1, -1, -1):
+        Pc = P[l] if Pc is None else (Pc@P[l]).tocsr()
+        if (l == 0) or (P[l].shape[1] <= ratio*Pc.shape[0]):
+            Q.append(Pc)
+            level.append(l)
+            Pc = None
+    return Q[::-1], level[::-1]
+
+
+def _spectral_radius(A, D, maxit=20):
+    """
+    The estimate of the largest eigenvalue of D^{-1}A by the power method on
+    the symmetric D^{-1/2} A D^{-1/2}, which is a little larger than the
+    Rayleigh quotients.
+    """
+    s = 1/np.sqrt(D)
+    x = np.random.RandomState(0).rand(A.shape[0])
+    lam = 0.0
+    for i in range(maxit):
+        x /= np.linalg.norm(x)
+        y = s*(A@(s*x))
+        lam = x@y
+        x = y
+    return 1.1*lam
+
+
+def _add_identity(A, flag):
+    """
+    Put 1 on the diagonal of the empty rows flag of the csr matrix A.
+    """
+    idx, = np.nonzero(flag)
+    pos = A.indptr[idx]
+    indices = np.insert(A.indices, pos, idx)
+    data = np.insert(A.data, pos, 1)
+    indptr = A.indptr + np.r_[0, np.cumsum(flag)]
+    return csr_matrix((data, indices, indptr), shape=A.shape)
+
+
+def _remove_dofs(A, isRowDof, isColDof):
+    """
+    Zero the given rows and columns of the csr matrix A.
+    """
+    A = A.copy()
+    row = np.repeat(isRowDof, np.diff(A.indptr))
+    A.data[row | isColDof[A.indices]] = 0
+    A.eliminate_zeros()
+    return A
+
+
+class GMGSolver():
+    """
+    几何多重网格解法器类。用几何多重网格方法求解
+
+        Ax = b,
+
+    其中层间的延拓算子由网格的加密层次 (Tritree, Quadtree 的 parent/child
+    数组, 或者 `TriangleMesh.uniform_refine(returnim=True)` 返回的插值矩阵)
+    给出, 限制算子是延拓算子的转置.
+
+    Notes
+    -----
+    The coarse operators are the Galerkin ones P^T A P, or the rediscretised
+    ones given by the user. The Dirichlet dofs, i.e. the decoupled identity
+    rows of A given by `isBdDof`, are removed from the prolongations, so the
+    coarse corrections never change them.
+
+    For the adaptive meshes, the local smoothing only relaxes the dofs new on
+    a level and their parents, so the smoothing work of all the levels is
+    O(N). The transfer of the residual and the coarse operators are still
+    on the whole levels, which costs O(N L) for the L levels of a strongly
+    graded mesh. Merging the levels by `ratio` bounds this cost, but a
+    merged level spans several mesh sizes, so the iteration number grows.
+
+    So on the strongly graded meshes the setup is not cheaper than the one
+    of the algebraic multigrid. E.g. for a Tritree with 16809 nodes on 15
+    levels refined towards a corner, the operator complexity is 8.4 and
+    `from_tree` takes about 1.5 times as long as `pyamg.ruge_stuben_solver`.
+    With ratio=0.5 there are 8 levels, the operator complexity is 1.4 and
+    the setup takes about as long as the AMG one, but the number of the CG
+    iterations grows from 11 to 22. The geometric setup is cheaper on the
+    uniformly refined hierarchies, where the levels shrink geometrically.
+
+    The symmetric smoothing (forward Gauss-Seidel before and backward after
+    the coarse correction, Jacobi or Chebyshev) makes the V- and W-cycles
+    symmetric, so `aspreconditioner` can be used in the CG method.
+
+    The Chebyshev smoother is the polynomial of D^{-1}A which is the
+    smallest on [lmax/crange, lmax], where lmax is the estimated largest
+    eigenvalue of D^{-1}A. It only needs the matrix-vector products, and
+    unlike Jacobi it is robust for the high order elements.
+
+    Examples
+    --------
+    >> mesh = Tritree(node, cell)
+    >> mesh.uniform_refine(5)
+    >> cmesh = mesh.to_conformmesh()
+    >> space = LagrangeFiniteElementSpace(cmesh, p=1)
+    >> A, F = bc.apply(space.stiff_matrix(), space.source_vector(f), uh)
+    >> solver = GMGSolver.from_tree(mesh, A, isBdDof=space.boundary_dof())
+    >> x = solver.solve(F, tol=1e-10, accel='cg')
+    """
+
+    def __init__(self, A, P, isBdDof=None, coarse=None, smoother='gs',
+            nu=(1, 1), cycle='V', local=True, omega=2/3, ratio=None,
+            crange=30, csolver='direct'):
+        """
+        Parameters
+        ----------
+        A : (N, N) sparse matrix on the finest level
+        P : list of the L prolongation matrices, P[l] maps the level l to
+            the level l + 1
+        isBdDof : (N, ) bool, the Dirichlet dofs on the finest level
+        coarse : None for the Galerkin coarse operators, or the list of the
+            L matrices on the levels 0, ..., L-1, or a callable level ->
+            matrix of the rediscretised operators
+        smoother : 'gs' (symmetric Gauss-Seidel), 'jacobi' (damped Jacobi
+            with the factor omega) or 'chebyshev'
+        nu : the numbers of the pre- and post-smoothing steps, which are the
+            degrees of the Chebyshev polynomials
+        cycle : 'V', 'W' or 'F'
+        local : whether only to smooth the dofs changed by the refinement
+        ratio : if given, merge the levels until the number of the dofs
+            decreases at least by the ratio, e.g. 0.5, on every coarser
+            level, which bounds the setup work and the operator complexity
+            of the deep adaptive hierarchies
+        crange : the ratio of the interval of the Chebyshev smoother
+        csolver : the solver on the coarsest level, 'direct' (sparse LU) or
+            'amg' (one V-cycle of the Ruge-Stuben AMG)
+        """
+        if smoother not in {'gs', 'jacobi', 'chebyshev'}:
+            raise ValueError("unknown smoother {}!".format(smoother))
+        if cycle not in {'V', 'W', 'F'}:
+            raise ValueError("unknown cycle {}!".format(cycle))
+        if csolver not in {'direct', 'amg'}:
+            raise ValueError("unknown coarse solver {}!".format(csolver))
+        self.smoother = smoother
+        self.nu = nu
+        self.cycle_type = cycle
+        self.omega = omega
+        self.crange = crange
+        self.csolver = csolver
+        self.setup(A, P, isBdDof=isBdDof, coarse=coarse, local=local,
+                ratio=ratio)
+
+    @classmethod
+    def from_tree(cls, tree, A, **kwargs):
+        """
+        The solver of the nodal (P1 or Q1) operator A on all the nodes of a
+        Tritree or a Quadtree, e.g. assembled on `tree.to_conformmesh()` or
+        on `tree.to_pmesh()`.
+        """
+        P, levelNode = tree_prolongation(tree)
+        solver = cls(A, P, **kwargs)
+        solver.levelNode = levelNode
+        return solver
+
+    @profiler.timed('gmg_setup')
+    def setup(self, A, P, isBdDof=None, coarse=None, local=True, ratio=None):
+        if ratio is None:
+            self.level = list(range(len(P) + 1))
+        else:
+            P, self.level = merge_levels(P, ratio)
+        L = len(P)
+        N = A.shape[0]
+        if (L > 0) and (P[-1].shape[0] != N):
+            raise ValueError("the finest prolongation has {} rows, but A has"
+                    " {}!".format(P[-1].shape[0], N))
+        if isBdDof is None:
+            isBdDof = np.zeros(N, dtype=np.bool_)
+
+        # the fine index of the coarse dofs of every level, the coarse dof j
+        # is the fine dof i if P[i, :] = e_j, and the Dirichlet dofs, whose
+        # coarse basis functions are not zero on the fine Dirichlet dofs
+        self.isBdDof = [None]*(L+1)
+        self.isBdDof[L] = isBdDof
+        self.P = [None]*L
+        new = [None]*(L+1)
+        for l in range(L-1, -1, -1):
+            Pl = csr_matrix(P[l])
+            NF, NC = Pl.shape
+            nnz = np.diff(Pl.indptr)
+            isCopy = nnz == 1
+            isCopy[isCopy] = Pl.data[Pl.indptr[:-1][isCopy]] == 1
+            c2f = -np.ones(NC, dtype=np.int_)
+            c2f[Pl.indices[Pl.indptr[:-1][isCopy]]] = np.nonzero(isCopy)[0]
+            bd = self.isBdDof[l+1]
+            isCBdDof = np.zeros(NC, dtype=np.bool_)
+            isCBdDof[Pl.indices[np.repeat(bd, nnz) & (Pl.data != 0)]] = True
+            self.isBdDof[l] = isCBdDof
+            self.P[l] = _remove_dofs(Pl, bd, isCBdDof)
+
+            # the dofs changed by the refinement, the new ones and their
+            # parents
+            isNew = ~isCopy
+            isParent = np.zeros(NC, dtype=np.bool_)
+            isParent[Pl.indices[np.repeat(isNew, nnz)]] = True
+            parent = c2f[isParent]
+            isChanged = isNew
+            isChanged[parent[parent >= 0]] = True
+            new[l+1] = isChanged | bd
+
+        self.R = [Pl.T.tocsr() for Pl in self.P]
+        self.A = [None]*(L+1)
+        self.A[L] = csr_matrix(A)
+        for l in range(L-1, -1, -1):
+            bd = self.isBdDof[l]
+            if coarse is None:
+                # the rows and the columns of the Dirichlet dofs are zero
+                Al = self.R[l]@self.A[l+1]@self.P[l]
+            else:
+                k = self.level[l]
+                Al = coarse[k] if isinstance(coarse, (list, tuple)) else \
+                        coarse(k)
+                Al = _remove_dofs(csr_matrix(Al), bd, bd)
+            # the decoupled Dirichlet rows, which are empty
+            Al = Al.tocsr()
+            Al.eliminate_zeros()
+            self.A[l] = _add_identity(Al, bd)
+
+        self.index = [None]*(L+1)
+        for l in range(1, L+1):
+            if local and not np.all(new[l]):
+                self.index[l] = np.nonzero(new[l])[0].astype(np.int32)
+        self.D = [Al.diagonal() for Al in self.A]
+        if self.smoother == 'chebyshev':
+            self.lmax = [None] + [_spectral_radius(Al, Dl) for Al, Dl in
+                zip(self.A[1:], self.D[1:])]
+        if self.csolver == 'direct':
+            self.csolve = splu(self.A[0].tocsc()).solve
+        else:
+            ml = pyamg.ruge_stuben_solver(self.A[0])
+            self.csolve = ml.aspreconditioner(cycle='V').matvec
+        profiler.count('levels', L+1)
+
+    @property
+    def levels(self):
+        return len(self.A)
+
+    def operator_complexity(self):
+        """
+        The total number of the nonzeros of the operators on all the levels
+        relative to the finest one.
+        """
+        return sum(Al.nnz for Al in self.A)/self.A[-1].nnz
+
+    def smooth(self, l, x, b, sweep='forward'):
+        A = self.A[l]
+        idx = self.index[l]
+        n = self.nu[0] if sweep == 'forward' else self.nu[1]
+        if self.smoother == 'gs':
+            if idx is None:
+                gauss_seidel(A, x, b, iterations=n, sweep=sweep)
+            else:
+                gauss_seidel_indexed(A, x, b, idx, iterations=n, sweep=sweep)
+        elif self.smoother == 'chebyshev':
+            # the Chebyshev iteration preconditioned by the diagonal on the
+            # whole level, see
+            # Algorithm 12.1 of Saad, Iterative methods for sparse linear
+            # systems
+            D = self.D[l]
+            lmax = self.lmax[l]
+            theta = (lmax + lmax/self.crange)/2
+            delta = (lmax - lmax/self.crange)/2
+            sigma = theta/delta
+            rho = 1/sigma
+            r = b - A@x
+            d = r/D/theta
+            for i in range(n):
+                x += d
+                if i == n - 1:
+                    break
+                r -= A@d
+                rho1 = 1/(2*sigma - rho)
+                d = rho1*rho*d + 2*rho1/delta*r/D
+                rho = rho1
+        else:
+            for i in range(n):
+                if idx is None:
+                    x += self.omega*(b - A@x)/self.D[l]
+                else:
+                    r = b[idx] - A[idx]@x
+                    x[idx] += self.omega*r/self.D[l][idx]
+
+    def _cycle(self, l, b, x=None, cycle='V'):
+        if l == 0:
+            return self.csolve(b)
+        x = np.zeros_like(b) if x is None else x
+        self.smooth(l, x, b, sweep='forward')
+        r = self.R[l-1]@(b - self.A[l]@x)
+        if cycle == 'V':
+            e = self._cycle(l-1, r, cycle='V')
+        elif cycle == 'W':
+            e = self._cycle(l-1, r, cycle='W')
+            e = self._cycle(l-1, r, x=e, cycle='W')
+        else:
+            e = self._cycle(l-1, r, cycle='F')
+            e = self._cycle(l-1, r, x=e, cycle='V')
+        x += self.P[l-1]@e
+        self.smooth(l, x, b, sweep='backward')
+        return x
+
+    def cycle(self, b, x=None, cycle=None):
+        """
+        One multigrid cycle on the finest level from the initial guess x.
+        """
+        cycle = self.cycle_type if cycle is None else cycle
+        b = np.asarray(b, dtype=self.A[-1].dtype)
+        x = None if x is None else np.array(x, dtype=b.dtype)
+        profiler.count('cycles')
+        return self._cycle(self.levels - 1, b, x=x, cycle=cycle)
+
+    def aspreconditioner(self, cycle=None):
+        """
+        One cycle with the zero initial guess as a LinearOperator.
+        """
+        N = self.A[-1].shape[0]
+        return LinearOperator((N, N), matvec=lambda r: self.cycle(r,
+            cycle=cycle), dtype=self.A[-1].dtype)
+
+    @profiler.timed('gmg_solve')
+    def solve(self, b, x0=None, tol=1e-8, maxiter=100, accel=None,
+            residuals=None):
+        """
+        Solve Ax = b by the multigrid cycles or by the preconditioned CG
+        method (accel='cg') until the relative residual is less than tol.
+
+        Parameters
+        ----------
+        residuals : list, if given, the residual norms are appended to it
+        """
+        A = self.A[-1]
+        b = np.asarray(b, dtype=A.dtype)
+        x = np.zeros_like(b) if x0 is None else np.array(x0, dtype=b.dtype)
+        if residuals is None:
+            residuals = []
+        normb = np.linalg.norm(b)
+        if normb == 0:
+            normb = 1.0
+        residuals.append(np.linalg.norm(b - A@x))
+        if accel == 'cg':
+            def callback(xk):
+                residuals.append(np.linalg.norm(b - A@xk))
+            x, info = cg(A, b, x0=x, tol=tol, atol=0, maxiter=maxiter,
+                    M=self.aspreconditioner(), callback=callback)
+        elif accel is None:
+            for i in range(maxiter):
+                if residuals[-1] < tol*normb:
+                    break
+                x = self.cycle(b, x=x)
+                residuals.append(np.linalg.norm(b - A@x))
+        else:
+            raise ValueError("unknown accel {}!".format(accel))
+        self.residuals = residuals
+        profiler.count('iterations', len(residuals) - 1)
+        return x
@@ -0,0 +1,280 @@
+import numpy as np
+from scipy.sparse import csr_matrix, spdiags
+from scipy.sparse.linalg import spsolve
+
+from ..functionspace.femdof import multi_index_matrix1d, multi_index_matrix2d
+
+
+class RTHybridization():
+    def __init__(self, space):
+        """
+        The hybridization of the Raviart-Thomas mixed method
+
+            (c u, v) - (p, div v) = -<g_D, v.n>
+            -(div u, q) = -(f, q)
+
+        Parameters
+        ----------
+        space : `RaviartThomasFiniteElementSpace2d` or
+            `RaviartThomasFiniteElementSpace3d`, the pressure is in
+            `space.smspace`
+
+        Notes
+        -----
+        The normal continuity of the flux is removed and imposed weakly by the
+        Lagrange multiplier lambda in P_p(F) on every face (edge in 2d) F,
+        which is the trace of the pressure. On every cell K the local system
+
+            [A_K  -B_K][u_K]   [C_K]           [  0   ]
+            [-B_K^T  0][p_K] + [ 0 ] lambda_K = [-f_K ]
+
+        is solved, where C_K = <phi_i.n_K, mu_j>_{\\partial K}. Then the normal
+        continuity
+
+            sum_K [C_K^T 0][u_K; p_K] = g_N
+
+        gives a symmetric positive definite system of lambda. The local
+        systems of all cells have the same size and are solved as one batch
+        by `np.linalg.solve`, and the flux and the pressure are recovered
+        cell by cell.
+
+        The face multipliers are the Bernstein polynomials in the barycentric
+        coordinates of the face with the node order of the global face.
+
+        Examples
+        --------
+        >> hb = RTHybridization(space)
+        >> uh, ph = hb.solve(pde.source, gD=pde.dirichlet)
+        """
+        self.space = space
+        self.mesh = mesh = space.mesh
+        self.p = p = space.p
+
+        TD = mesh.top_dimension()
+        NC = mesh.number_of_cells()
+        if TD == 2:
+            self.multiIndex = multi_index_matrix1d(p)
+            face = mesh.entity('edge')
+            cell2face = mesh.ds.cell_to_edge()
+            localFace = mesh.ds.localEdge
+        else:
+            self.multiIndex = multi_index_matrix2d(p)
+            face = mesh.entity('face')
+            cell2face = mesh.ds.cell_to_face()
+            localFace = mesh.ds.localFace
+
+        NF = len(face)
+        fdof = len(self.multiIndex)
+        self.face2dof = np.arange(NF*fdof).reshape(NF, fdof)
+        self.cell2dof = self.face2dof[cell2face].reshape(NC, -1)
+        self.cell2face = cell2face
+        self.localFace = localFace
+
+        # perm[:, i, j] is the local index in the i-th local face of the j-th
+        # node of the global face
+        cell = mesh.entity('cell')
+        self.perm = np.zeros((NC, TD+1, TD), dtype=np.int)
+        for i in range(TD+1):
+            lf = cell[:, localFace[i]]
+            gf = face[cell2face[:, i]]
+            for j in range(TD):
+                self.perm[:, i, j] = np.argmax(lf == gf[:, [j]], axis=1)
+
+        self.X = None
+
+    def number_of_global_dofs(self):
+        return self.face2dof.size
+
+    def multiplier_basis(self, bc):
+        """
+        The multiplier basis at the barycentric coordinates `bc` of faces.
+        """
+        return np.prod(bc[..., None, :]**self.multiIndex, axis=-1)
+
+    def face_matrix(self, q=None):
+        """
+        The constraint matrices C_K with shape (NC, ldof, (TD+1)*fdof).
+        """
+        space = self.space
+        mesh = self.mesh
+        TD = mesh.top_dimension()
+        NC = mesh.number_of_cells()
+        qf = space.integralalg.faceintegrator if q is None else mesh.integrator(q, 'face')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        NQ = len(ws)
+
+        if TD == 2:
+            measure = mesh.entity_measure('edge')
+            n = mesh.edge_unit_normal()
+            fc = mesh.entity_barycenter('edge')
+        else:
+            measure = mesh.entity_measure('face')
+            n = mesh.face_unit_normal()
+            fc = mesh.entity_barycenter('face')
+        cc = mesh.entity_barycenter('cell')
+
+        ldof = space.number_of_local_dofs()
+        fdof = len(self.multiIndex)
+        C = np.zeros((NC, ldof, TD+1, fdof), dtype=space.ftype)
+        for i in range(TD+1):
+            index = self.cell2face[:, i]
+            # the outward unit normal of the cells
+            sign = np.sign(np.sum(n[index]*(fc[index] - cc), axis=-1))
+            bc = np.zeros((NQ, TD+1), dtype=space.ftype)
+            bc[:, self.localFace[i]] = bcs
+            phi = space.basis(bc) # (NQ, NC, ldof, GD)
+            mu = self.multiplier_basis(bcs[:, self.perm[:, i]]) # (NQ, NC, fdof)
+            C[:, :, i, :] = np.einsum('q, qckd, cd, qcm, c->ckm', ws, phi,
+                    n[index], mu, sign*measure[index], optimize=True)
+        return C.reshape(NC, ldof, -1)
+
+    def project(self, g, index, q=None):
+        """
+        The L2 projection of `g` onto the multiplier space on the faces
+        `index`.
+        """
+        space = self.space
+        mesh = self.mesh
+        TD = mesh.top_dimension()
+        qf = space.integralalg.faceintegrator if q is None else mesh.integrator(q, 'face')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        etype = 'edge' if TD == 2 else 'face'
+        ps = mesh.bc_to_point(bcs, etype=etype, index=index)
+        mu = self.multiplier_basis(bcs)
+        M = np.einsum('q, qk, qm->km', ws, mu, mu)
+        b = np.einsum('q, qc, qm->cm', ws, g(ps), mu)
+        return np.linalg.solve(M, b.T).T
+
+    def flux_vector(self, g, index, q=None):
+        """
+        The moments <g, mu> on the faces `index`, where `g` is the normal
+        flux on the boundary.
+        """
+        space = self.space
+        mesh = self.mesh
+        TD = mesh.top_dimension()
+        qf = space.integralalg.faceintegrator if q is None else mesh.integrator(q, 'face')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        etype = 'edge' if TD == 2 else 'face'
+        ps = mesh.bc_to_point(bcs, etype=etype, index=index)
+        measure = mesh.entity_measure(etype, index=index)
+        mu = self.multiplier_basis(bcs)
+        return np.einsum('q, qc, qm, c->cm', ws, g(ps), mu, measure)
+
+    def condense(self, f, c=None, gN=None, index=None):
+        """
+        Eliminate the local flux and pressure unknowns.
+
+        Parameters
+        ----------
+        f : the source
+        c : the coefficient of the flux mass matrix, see
+            `space.cell_stiff_matrix`
+        gN : the normal flux on the boundary faces `index`
+
+        Returns
+        -------
+        H : the sparse symmetric matrix of the multipliers
+        b : the right hand side of the multipliers
+        """
+        space = self.space
+        A = space.cell_stiff_matrix(c=c)
+        B = space.cell_div_matrix()
+        F = space.cell_source_vector(f)
+        C = self.face_matrix()
+
+        NC, ldof, pldof = B.shape
+        nf = C.shape[-1]
+        M = np.zeros((NC, ldof+pldof, ldof+pldof), dtype=space.ftype)
+        M[:, :ldof, :ldof] = A
+        M[:, :ldof, ldof:] = -B
+        M[:, ldof:, :ldof] = -B.swapaxes(-1, -2)
+        R = np.zeros((NC, ldof+pldof, nf+1), dtype=space.ftype)
+        R[:, :ldof, :nf] = C
+        R[:, ldof:, -1] = F
+        self.X = np.linalg.solve(M, R)
+
+        H = np.einsum('cki, ckj->cij', C, self.X[:, :ldof, :nf])
+        H = (H + H.swapaxes(-1, -2))/2
+        bb = np.einsum('cki, ck->ci', C, self.X[:, :ldof, -1])
+
+        gdof = self.number_of_global_dofs()
+        I = np.broadcast_to(self.cell2dof[:, :, None], shape=H.shape)
+        J = np.broadcast_to(self.cell2dof[:, None, :], shape=H.shape)
+        H = csr_matrix((H.flat, (I.flat, J.flat)), shape=(gdof, gdof))
+        b = np.zeros(gdof, dtype=space.ftype)
+        np.add.at(b, self.cell2dof, bb)
+        if gN is not None:
+            b[self.face2dof[index]] -= self.flux_vector(gN, index)
+        return H, b
+
+    def recover(self, lam):
+        """
+        Recover the flux and the pressure from the multipliers.
+
+        Returns
+        -------
+        uh : the flux in `space`
+        ph : the pressure in `space.smspace`
+        """
+        if self.X is None:
+            raise ValueError("call `condense` before `recover`!")
+        space = self.space
+        ldof = space.number_of_local_dofs()
+        nf = self.cell2dof.shape[1]
+        x = self.X[..., -1] - np.einsum('cij, cj->ci', self.X[..., :nf],
+                lam[self.cell2dof])
+        uh = space.function()
+        uh[space.cell_to_dof()] = x[:, :ldof]
+        ph = space.smspace.function()
+        ph[space.smspace.cell_to_dof()] = x[:, ldof:]
+        return uh, ph
+
+    def solve(self, f, gD=None, gN=None, threshold=None, c=None, solver=spsolve):
+        """
+        Solve the mixed problem by the hybridization.
+
+        Parameters
+        ----------
+        f : the source
+        gD : the pressure on the boundary, None means zero
+        gN : the normal flux u.n on the boundary faces flaged by `threshold`
+        threshold : the function of the face barycenters, which selects the
+            boundary faces with the flux condition; the pressure is given on
+            the other boundary faces
+        c : the coefficient of the flux mass matrix
+        solver : the solver of the multiplier system, e.g.
+            `lambda A, b: pyamg.solve(A, b)`
+
+        Returns
+        -------
+        uh, ph : the flux and the pressure
+        lam : the multipliers, i.e. the pressure on the faces
+        """
+        mesh = self.mesh
+        TD = mesh.top_dimension()
+        etype = 'edge' if TD == 2 else 'face'
+        index = mesh.ds.boundary_face_index()
+        isNeumann = np.zeros(len(index), dtype=np.bool)
+        if threshold is not None:
+            bc = mesh.entity_barycenter(etype, index=index)
+            isNeumann = threshold(bc)
+        H, b = self.condense(f, c=c, gN=gN, index=index[isNeumann])
+
+        gdof = self.number_of_global_dofs()
+        lam = np.zeros(gdof, dtype=np.float)
+        isDDof = np.zeros(gdof, dtype=np.bool)
+        index = index[~isNeumann]
+        isDDof[self.face2dof[index]] = True
+        if gD is not None:
+            lam[self.face2dof[index]] = self.project(gD, index)
+        b -= H@lam
+        bdIdx = np.zeros(gdof, dtype=np.int)
+        bdIdx[isDDof] = 1
+        Tbd = spdiags(bdIdx, 0, gdof, gdof)
+        T = spdiags(1-bdIdx, 0, gdof, gdof)
+        H = T@H@T + Tbd
+        b[isDDof] = lam[isDDof]
+        lam[:] = solver(H.tocsr(), b)
+        uh, ph = self.recover(lam)
+        return uh, ph, lam
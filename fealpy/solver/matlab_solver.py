@@ -1,5 +1,6 @@
 import numpy as np
-from timeit import default_timer as timer
+
+from ..common.profiler import profiler
 
 class MatlabSolver:
     def __init__(self, matlab):
@@ -11,9 +12,8 @@ class MatlabSolver:
         self.matlab = matlab
 
     def divide(self, A, b):
-        start = timer()
-        x = self.matlab.mldivide(A, b.reshape(-1, 1))
-        end = timer()
+        with profiler.region('MatlabSolver.divide'):
+            x = self.matlab.mldivide(A, b.reshape(-1, 1))
         return x.reshape(-1)
 
     def eigs(self, A, M=None, scale=None, n=1, eig_type='SM'):
@@ -25,17 +25,13 @@ class MatlabSolver:
             return u.reshape(-1), d - scale
 
     def mumps_solver(self, A, b):
-        start = timer()
-        u, rel = self.matlab._call('mumps_solver', [A, b])
-        end = timer()
-        print("The time of mumps direct solver:", end - start)
-        print("The residual is:", rel)
+        with profiler.region('MatlabSolver.mumps_solver'):
+            u, rel = self.matlab._call('mumps_solver', [A, b])
+            profiler.count('residual', rel)
         return u.reshape(-1)
 
     def ifem_amg_solver(self, A, b):
-        start = timer()
-        u = self.matlab._call('amg', [A, b])
-        end = timer()
-        print("The time of ifem amg solver:", end - start)
+        with profiler.region('MatlabSolver.ifem_amg_solver'):
+            u = self.matlab._call('amg', [A, b])
         return u.reshape(-1)
 
@@ -2,7 +2,10 @@
 from numpy import sqrt, inner, finfo, zeros
 from numpy.linalg import norm
 
-from scipy.sparse.linalg.isolve.utils import make_system
+try:
+    from scipy.sparse.linalg.isolve.utils import make_system
+except ImportError: # scipy >= 1.8
+    from scipy.sparse.linalg._isolve.utils import make_system
 
 
 def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
@@ -264,9 +267,8 @@ def minres(A, b, x0=None, shift=0.0, tol=1e-5, maxiter=None,
         if callback is not None:
             callback(x)
 
-        if istop in [1, 2]:
-            pass
-            #break  # TODO check this
+        if istop != 0:
+            break
 
     if show:
         print()
@@ -1,33 +1,34 @@
 import numpy as np
 from scipy.sparse.linalg import cg, inv, dsolve, spsolve
 from scipy.sparse import spdiags
-from timeit import default_timer as timer
+
+from ..common.profiler import profiler
 
 from petsc4py import PETSc
 
+@profiler.timed()
 def linear_solver(dmodel, uh, dirichlet=None):
-    start = timer()
-    A = dmodel.get_left_matrix()
-    b = dmodel.get_right_vector()
-    end = timer()
-    print("Construct linear system time:", end - start)
+    with profiler.region('assembly'):
+        A = dmodel.get_left_matrix()
+        b = dmodel.get_right_vector()
+        profiler.count('dofs', A.shape[0])
+        profiler.count('nnz', A.nnz)
     if dirichlet is not None:
         AD, b = dirichlet.apply(A, b)
 
-    start = timer()
-    PA = PETSc.Mat().createAIJ(
-            size=AD.shape, 
-            csr=(AD.indptr, AD.indices,  AD.data)
-            ) 
-    Pb = PETSc.Vec().createWithArray(b)
-    x = PETSc.Vec().createWithArray(uh)
-    ksp = PETSc.KSP()
-    ksp.create(PETSc.COMM_WORLD)
-    ksp.setOperators(PA)
-    ksp.setFromOptions()
-    ksp.solve(Pb, x)
-    end = timer()
-    print("Solve time:", end-start)
+    with profiler.region('solve'):
+        PA = PETSc.Mat().createAIJ(
+                size=AD.shape, 
+                csr=(AD.indptr, AD.indices,  AD.data)
+                ) 
+        Pb = PETSc.Vec().createWithArray(b)
+        x = PETSc.Vec().createWithArray(uh)
+        ksp = PETSc.KSP()
+        ksp.create(PETSc.COMM_WORLD)
+        ksp.setOperators(PA)
+        ksp.setFromOptions()
+        ksp.solve(Pb, x)
+        profiler.count('iterations', ksp.getIterationNumber())
 
 def minres(A, b, uh):
 
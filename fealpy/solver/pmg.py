@@ -0,0 +1,133 @@
+import weakref
+
+import numpy as np
+from scipy.sparse import csr_matrix, identity, kron
+
+from .gmg import GMGSolver
+
+# the interpolation matrices between the orders of the spaces on every mesh
+_cache = weakref.WeakKeyDictionary()
+
+
+def order_prolongation(space0, space1):
+    """
+    The interpolation matrix from the continuous Lagrange space space0 of
+    order q to the space space1 of order p >= q on the same simplex mesh.
+
+    The value of a space1 dof is the value of the space0 function at its
+    interpolation point, whose barycentric coordinates are the multi-index
+    of the dof divided by p. So the local matrix phi_j(m_i/p) is the same on
+    all the cells, and a dof shared by the cells takes its row from any of
+    them, since the space0 functions are continuous.
+
+    The matrices are cached on the mesh, so the p-multigrid of the later
+    systems on the same mesh does not build them again. A cached matrix is
+    used only if the cells of the mesh are the same as the ones it was built
+    on, so it is rebuilt after the mesh is renumbered, e.g. by `reorder`, or
+    its cells are changed in place, e.g. by `edge_flip`.
+
+    Returns
+    -------
+    P : (gdof1, gdof0) csr matrix
+    """
+    mesh = space1.mesh
+    cell = mesh.entity('cell')
+    key = (space0.p, space1.p)
+    cache = _cache.setdefault(mesh, {})
+    if key in cache:
+        cell0, P = cache[key]
+        if np.array_equal(cell0, cell):
+            return P
+
+    TD = space1.TD
+    p = space1.p
+    bc = space1.multi_index_matrix[TD-1](p)/p
+    phi = space0.basis(bc)[:, 0, :] # (ldof1, ldof0)
+
+    cell2dof0 = space0.cell_to_dof()
+    cell2dof1 = space1.cell_to_dof()
+    gdof0 = space0.number_of_global_dofs()
+    gdof1 = space1.number_of_global_dofs()
+    NC, ldof1 = cell2dof1.shape
+
+    owner = np.zeros(gdof1, dtype=np.int_)
+    owner[cell2dof1.reshape(-1)] = np.arange(NC*ldof1)
+    I = np.broadcast_to(np.arange(gdof1)[:, None], (gdof1, phi.shape[1]))
+    J = cell2dof0[owner//ldof1]
+    V = phi[owner%ldof1]
+    flag = np.abs(V) > 1e-12
+    P = csr_matrix((V[flag], (I[flag], J[flag])), shape=(gdof1, gdof0),
+            dtype=space1.ftype)
+    cache[key] = (cell.copy(), P)
+    return P
+
+
+class PMGSolver(GMGSolver):
+    """
+    The p-multigrid solver and preconditioner of the high order continuous
+    `LagrangeFiniteElementSpace`.
+
+    The orders are coarsened by p -> max(p/2, p-2) -> ... -> 1, i.e. halved
+    for p <= 4 and reduced by 2 for the higher orders, where the smoothing
+    is too weak for the halving. The prolongations are the interpolations
+    between the nested spaces, the coarse operators are the Galerkin ones,
+    which are the operators of the lower order spaces, and the linear system
+    on the p = 1 level is solved by the AMG.
+
+    Notes
+    -----
+    With the Jacobi preconditioner the number of the CG iterations grows
+    quickly with p, since the condition number of D^{-1}A does. The
+    Chebyshev smoother only needs the matrix-vector products and is robust
+    in p, so together with the AMG on the linear level the iteration number
+    is almost independent of both h and p.
+
+    The vector valued systems in the component-major ordering of
+    `linear_elasticity_matrix` use the prolongations on every component.
+
+    Examples
+    --------
+    >> space = LagrangeFiniteElementSpace(mesh, p=4)
+    >> A, F = bc.apply(space.stiff_matrix(), space.source_vector(f), uh)
+    >> solver = PMGSolver(A, space, isBdDof=space.boundary_dof())
+    >> x = solver.solve(F, tol=1e-10, accel='cg')
+    """
+
+    def __init__(self, A, space, isBdDof=None, orders=None,
+            smoother='chebyshev', nu=(3, 3), csolver='amg', **kwargs):
+        """
+        Parameters
+        ----------
+        A : (gdof*dim, gdof*dim) sparse matrix of the space
+        space : `LagrangeFiniteElementSpace` of order p
+        isBdDof : (gdof*dim, ) bool, the Dirichlet dofs
+        orders : the decreasing orders of the levels from p to 1, the
+            default is p, max(p//2, p-2), ..., 1
+        kwargs : the other parameters of `GMGSolver`, e.g. cycle
+        """
+        from ..functionspace import LagrangeFiniteElementSpace
+
+        if orders is None:
+            orders = [space.p]
+            while orders[-1] > 1:
+                orders.append(max(orders[-1]//2, orders[-1] - 2))
+        if (orders[0] != space.p) or np.any(np.diff(orders) >= 0):
+            raise ValueError("the orders {} should decrease from p = {}"
+                    "!".format(orders, space.p))
+        self.orders = orders
+
+        mesh = space.mesh
+        spaces = [LagrangeFiniteElementSpace(mesh, p=q) for q in orders[:0:-1]]
+        spaces.append(space)
+        dim = A.shape[0]//space.number_of_global_dofs()
+        P = []
+        for s0, s1 in zip(spaces[:-1], spaces[1:]):
+            Pl = order_prolongation(s0, s1)
+            if dim > 1:
+                Pl = kron(identity(dim, dtype=Pl.dtype), Pl, format='csr')
+            P.append(Pl)
+        self.spaces = spaces
+
+        super(PMGSolver, self).__init__(A, P, isBdDof=isBdDof,
+                smoother=smoother, nu=nu, csolver=csolver, local=False,
+                **kwargs)
@@ -0,0 +1,158 @@
+import warnings
+
+import numpy as np
+from scipy.sparse.linalg import cg, spsolve, LinearOperator
+from timeit import default_timer as timer
+
+
+class PrimalDualActiveSetSolver():
+    """
+    Primal-dual active set (semismooth Newton) solver for the discrete
+    obstacle problem
+
+        A u - b = lam, u >= g, lam >= 0, lam*(u - g) = 0.
+
+    The active set is
+
+        I = {i: lam_i + c*(g_i - u_i) > 0},
+
+    on which u = g, and the reduced system A[J, J] u_J = b_J - A[J, I] g_I
+    is solved on the inactive set J. The matrix `A` is never copied: the
+    direct solver factorizes only the reduced block, and the iterative
+    solvers apply `A` through index masks with a preconditioner that is set
+    up once on the full matrix and reused for all active sets.
+    """
+    def __init__(self, A, b, c=1.0, solver='direct', maxit=100, tol=1e-12):
+        """
+        Parameter
+        ---------
+        A: the symmetric positive definite matrix in CSR format
+        b: the right hand side
+        c: the positive parameter in the definition of the active set
+        solver: 'direct', 'cg' (Jacobi preconditioned) or 'amg'
+            (AMG preconditioned CG)
+        maxit: the maximal number of active set iterations
+        tol: the relative tolerance of the iterative linear solver
+        """
+        self.A = A.tocsr()
+        self.b = b
+        self.c = c
+        self.solver = solver
+        self.maxit = maxit
+        self.tol = tol
+
+        if solver == 'cg':
+            self.D = self.A.diagonal()
+        elif solver == 'amg':
+            import pyamg
+            ml = pyamg.ruge_stuben_solver(self.A)
+            self.P = ml.aspreconditioner(cycle='V')
+        elif solver != 'direct':
+            raise ValueError("We don't support solver `{}`! ".format(solver))
+
+    def reduced_operator(self, idx):
+        A = self.A
+        N = A.shape[0]
+        n = len(idx)
+
+        def matvec(x):
+            y = np.zeros(N, dtype=A.dtype)
+            y[idx] = x.reshape(-1)
+            return (A@y)[idx]
+
+        return LinearOperator((n, n), matvec=matvec, dtype=A.dtype)
+
+    def reduced_preconditioner(self, idx):
+        N = self.A.shape[0]
+        n = len(idx)
+        if self.solver == 'cg':
+            D = self.D[idx]
+
+            def matvec(r):
+                return r.reshape(-1)/D
+        else:
+            P = self.P
+
+            def matvec(r):
+                y = np.zeros(N, dtype=self.A.dtype)
+                y[idx] = r.reshape(-1)
+                return (P@y)[idx]
+
+        return LinearOperator((n, n), matvec=matvec, dtype=self.A.dtype)
+
+    def reduced_solve(self, idx, r, x0):
+        if self.solver == 'direct':
+            AI = self.A[idx][:, idx]
+            return spsolve(AI.tocsc(), r), 1
+        else:
+            A = self.reduced_operator(idx)
+            M = self.reduced_preconditioner(idx)
+            count = [0]
+
+            def callback(x):
+                count[0] += 1
+            x, info = cg(A, r, x0=x0, tol=self.tol, M=M, callback=callback)
+            if info > 0:
+                self.stat['linear_converged'] = False
+                warnings.warn("cg does not converge in {} iterations!".format(info))
+            return x, count[0]
+
+    def solve(self, u, g, lam=None):
+        """
+        Parameter
+        ---------
+        u: the initial guess, which will be overwritten by the solution
+        g: the obstacle
+        lam: the initial guess of the multiplier
+
+        Return
+        ------
+        u, lam
+        """
+        A = self.A
+        b = self.b
+        c = self.c
+        N = A.shape[0]
+
+        if lam is None:
+            lam = np.zeros(N, dtype=A.dtype)
+
+        self.stat = {
+                'iterations': 0,
+                'converged': False,
+                'number_of_active_dofs': [],
+                'linear_iterations': [],
+                'linear_converged': True,
+                'time': 0.0
+                }
+
+        start = timer()
+        isActive = np.zeros(N, dtype=np.bool_)
+        for k in range(self.maxit):
+            isActive0 = isActive
+            isActive = (lam + c*(g - u) > 0)
+            if (k > 0) & np.all(isActive == isActive0):
+                self.stat['converged'] = True
+                break
+
+            idx, = np.nonzero(~isActive)
+            u[isActive] = g[isActive]
+
+            # the right hand side b_J - A[J, I] g_I
+            y = np.zeros(N, dtype=A.dtype)
+            y[isActive] = g[isActive]
+            r = (b - A@y)[idx]
+
+            u[idx], n = self.reduced_solve(idx, r, u[idx])
+            lam[:] = A@u - b
+            lam[idx] = 0.0
+
+            self.stat['iterations'] += 1
+            self.stat['number_of_active_dofs'].append(int(isActive.sum()))
+            self.stat['linear_iterations'].append(n)
+
+        self.stat['time'] = timer() - start
+        if not self.stat['converged']:
+            warnings.warn("the active set does not converge in {} "
+                    "iterations!".format(self.maxit))
+        return u, lam
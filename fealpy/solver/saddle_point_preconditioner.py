@@ -0,0 +1,186 @@
+import numpy as np
+from scipy.sparse import bmat, spdiags
+from scipy.sparse.linalg import LinearOperator, splu, gmres
+
+from .minres import minres
+
+
+def block_solver(A, method='amg', tol=1e-8):
+    """
+    An approximate solver of A x = r.
+
+    Parameters
+    ----------
+    A : sparse matrix
+    method : 'amg' (one V-cycle of pyamg), 'amg-sa' (one V-cycle of
+        smoothed aggregation, for vector valued problems), 'direct'
+        (sparse LU), 'jacobi' (the diagonal of A) or a callable r -> x
+
+    Returns
+    -------
+    solve : callable, r -> x
+    """
+    if callable(method):
+        return method
+    elif method == 'direct':
+        lu = splu(A.tocsc())
+        return lu.solve
+    elif method == 'jacobi':
+        d = A.diagonal()
+        return lambda r: r/d
+    elif method in {'amg', 'amg-sa'}:
+        import pyamg
+        if method == 'amg':
+            ml = pyamg.ruge_stuben_solver(A.tocsr())
+        else:
+            ml = pyamg.smoothed_aggregation_solver(A.tocsr())
+        P = ml.aspreconditioner(cycle='V')
+        return P.matvec
+    else:
+        raise ValueError("I don't know the block solver {}!".format(method))
+
+
+class SaddlePointPreconditioner():
+    def __init__(self, A, B, C=None, ptype='diagonal', schur='diagonal',
+            asolver='amg', ssolver='amg', Mp=None):
+        """
+        Block preconditioners of the saddle point system
+
+            [A  B^T][u] = [f]
+            [B  -C ][p]   [g]
+
+        Parameters
+        ----------
+        A : (n, n) the velocity (flux, stress) block
+        B : (m, n) the constraint block
+        C : (m, m) the stabilization block, None means zero
+        ptype : 'diagonal', 'lower' or 'upper', the block structure
+        schur : the approximation of the Schur complement S = C + B A^{-1} B^T
+            'diagonal' : C + B diag(A)^{-1} B^T
+            'mass' : the given matrix `Mp`, e.g. the pressure mass matrix
+                (scaled by 1/nu) for Stokes problems
+            'bfbt' : the scaled BFBt approximation
+                S^{-1} = L^{-1} B D^{-1} A D^{-1} B^T L^{-1}
+                with D = diag(A) and L = C + B D^{-1} B^T
+        asolver : the approximate solver of the A block, see `block_solver`
+        ssolver : the approximate solver of the Schur complement
+            approximation, see `block_solver`
+        Mp : (m, m) the pressure mass matrix for `schur='mass'`
+
+        Notes
+        -----
+        The block diagonal preconditioner
+
+            P = [A  0]
+                [0  S]
+
+        is symmetric positive definite and should be used with MINRES. The
+        block triangular ones
+
+            P = [A  0 ]      P = [A  B^T]
+                [B  -S]          [0  -S ]
+
+        are used with GMRES, and the iteration counts are about half of
+        those with the block diagonal one.
+        """
+        self.A = A
+        self.B = B
+        self.BT = B.T.tocsr()
+        self.C = C
+        self.ptype = ptype
+        self.schur = schur
+
+        n = A.shape[0]
+        m = B.shape[0]
+        self.shape = (n + m, n + m)
+
+        self.asolve = block_solver(A, method=asolver)
+
+        if schur == 'diagonal':
+            S = B@spdiags(1/A.diagonal(), 0, n, n)@self.BT
+            if C is not None:
+                S = S + C
+            self.S = S.tocsr()
+            self.ssolve = block_solver(self.S, method=ssolver)
+        elif schur == 'mass':
+            if Mp is None:
+                raise ValueError("the matrix `Mp` is needed for `schur='mass'`!")
+            self.S = Mp.tocsr()
+            self.ssolve = block_solver(self.S, method=ssolver)
+        elif schur == 'bfbt':
+            D = spdiags(1/A.diagonal(), 0, n, n)
+            self.BD = (B@D).tocsr()
+            self.DBT = (D@self.BT).tocsr()
+            L = self.BD@self.BT
+            if C is not None:
+                L = L + C
+            self.S = L.tocsr()
+            lsolve = block_solver(self.S, method=ssolver)
+            self.ssolve = lambda r: lsolve(self.BD@(A@(self.DBT@lsolve(r))))
+        else:
+            raise ValueError("I don't know the Schur complement approximation {}!".format(schur))
+
+    def matvec(self, r):
+        n = self.A.shape[0]
+        r0 = r[:n]
+        r1 = r[n:]
+        if self.ptype == 'diagonal':
+            u0 = self.asolve(r0)
+            u1 = self.ssolve(r1)
+        elif self.ptype == 'lower':
+            u0 = self.asolve(r0)
+            u1 = self.ssolve(self.B@u0 - r1)
+        elif self.ptype == 'upper':
+            u1 = -self.ssolve(r1)
+            u0 = self.asolve(r0 - self.BT@u1)
+        else:
+            raise ValueError("I don't know the preconditioner type {}!".format(self.ptype))
+        return np.r_[u0, u1]
+
+    def linear_operator(self):
+        return LinearOperator(self.shape, matvec=self.matvec, dtype=self.A.dtype)
+
+
+def saddle_point_solve(A, B, f, g, C=None, method=None, tol=1e-8, maxit=None,
+        **kwargs):
+    """
+    Solve the saddle point system by a preconditioned Krylov method.
+
+    Parameters
+    ----------
+    A, B, C : the blocks, see `SaddlePointPreconditioner`
+    f, g : the right hand sides
+    method : 'minres' or 'gmres', the default is 'minres' for the block
+        diagonal preconditioner and 'gmres' for the block triangular ones
+    kwargs : the other parameters of `SaddlePointPreconditioner`
+
+    Returns
+    -------
+    u, p : the solution
+    info : dict, the exit code and the number of iterations
+    """
+    P = SaddlePointPreconditioner(A, B, C=C, **kwargs)
+    M = P.linear_operator()
+    K = bmat([[A, P.BT], [B, None if C is None else -C]], format='csr')
+    F = np.r_[f, g]
+
+    if method is None:
+        method = 'minres' if P.ptype == 'diagonal' else 'gmres'
+
+    info = {'iterations': 0}
+    def callback(x):
+        info['iterations'] += 1
+
+    if method == 'minres':
+        x, info['exitcode'] = minres(K, F, tol=tol, maxiter=maxit, M=M,
+                callback=callback)
+    elif method == 'gmres':
+        restart = 50
+        x, info['exitcode'] = gmres(K, F, tol=tol, restart=restart,
+                maxiter=maxit, M=M, callback=callback,
+                callback_type='pr_norm')
+    else:
+        raise ValueError("I don't know the Krylov method {}!".format(method))
+
+    n = A.shape[0]
+    return x[:n], x[n:], info
@@ -0,0 +1,188 @@
+import numpy as np
+from scipy.sparse import csr_matrix, spdiags
+from scipy.sparse.linalg import spsolve
+
+
+class StaticCondensation():
+    def __init__(self, space):
+        """
+        Eliminate the cell interior dofs of a high order space cell by cell.
+
+        Parameters
+        ----------
+        space : a space with cell interior dofs, e.g.
+            `LagrangeFiniteElementSpace` with p >= 3 (p >= 4 in 3d) or
+            `ConformingVirtualElementSpace2d` with p >= 2. The dof manager
+            `space.dof` should provide `is_in_cell_local_dof`.
+
+        Notes
+        -----
+        The local system of every cell is split into the skeleton (node,
+        edge and face) dofs B and the interior dofs I
+
+            [A_BB A_BI][u_B] = [b_B]
+            [A_IB A_II][u_I]   [b_I]
+
+        The interior dofs are only coupled inside one cell, so
+
+            u_I = A_II^{-1}(b_I - A_IB u_B)
+
+        and the global system is reduced to the Schur complement
+
+            (A_BB - A_BI A_II^{-1} A_IB) u_B = b_B - A_BI A_II^{-1} b_I
+
+        on the skeleton dofs. The cells with the same number of local dofs
+        are grouped and their local systems are solved as one batch by
+        `np.linalg.solve`.
+
+        Examples
+        --------
+        >> sc = StaticCondensation(space)
+        >> A = space.cell_stiff_matrix()
+        >> F = space.cell_source_vector(pde.source)
+        >> uh = space.function()
+        >> isDDof = space.set_dirichlet_bc(uh, pde.dirichlet)
+        >> uh[:] = sc.solve(A, F, uh=uh, isDDof=isDDof)
+        """
+        self.space = space
+        gdof = space.number_of_global_dofs()
+
+        cell2dof = space.cell_to_dof()
+        isInCellDof = space.dof.is_in_cell_local_dof()
+
+        # group the cells with the same number of local dofs
+        self.group = []
+        if isinstance(cell2dof, tuple): # polygonal cells
+            cell2dof, cell2dofLocation = cell2dof
+            ldof = cell2dofLocation[1:] - cell2dofLocation[:-1]
+            for n in np.unique(ldof):
+                index, = np.nonzero(ldof == n)
+                idx = cell2dofLocation[index].reshape(-1, 1) + np.arange(n)
+                self.group.append((index, cell2dof[idx], isInCellDof[idx[0]]))
+        else:
+            NC = len(cell2dof)
+            self.group.append((np.arange(NC), cell2dof, isInCellDof))
+
+        isInDof = np.zeros(gdof, dtype=np.bool)
+        for index, c2d, flag in self.group:
+            isInDof[c2d[:, flag]] = True
+
+        # the skeleton dofs and their numbers in the condensed system
+        self.skeleton, = np.nonzero(~isInDof)
+        self.g2s = -np.ones(gdof, dtype=np.int)
+        self.g2s[self.skeleton] = np.arange(len(self.skeleton))
+
+        self.X = None
+
+    def number_of_skeleton_dofs(self):
+        return len(self.skeleton)
+
+    def condense(self, A, F):
+        """
+        Compute the Schur complement system on the skeleton dofs.
+
+        Parameters
+        ----------
+        A : (NC, ldof, ldof) array or the list of the cell matrices
+        F : (NC, ldof) array or the list of the cell vectors
+
+        Returns
+        -------
+        S : the condensed matrix on the skeleton dofs
+        g : the condensed vector on the skeleton dofs
+
+        Notes
+        -----
+        The factors A_II^{-1} A_IB and A_II^{-1} b_I are kept for `recover`.
+        """
+        NS = self.number_of_skeleton_dofs()
+        I = []
+        J = []
+        val = []
+        g = np.zeros(NS, dtype=np.float)
+        self.X = []
+        for index, c2d, flag in self.group:
+            if isinstance(A, np.ndarray):
+                AA = A[index]
+                FF = F[index]
+            else:
+                AA = np.array([A[i] for i in index])
+                FF = np.array([F[i] for i in index])
+
+            ABB = AA[:, ~flag][:, :, ~flag]
+            FB = FF[:, ~flag]
+            if np.any(flag):
+                ABI = AA[:, ~flag][:, :, flag]
+                AIB = AA[:, flag][:, :, ~flag]
+                AII = AA[:, flag][:, :, flag]
+                FI = FF[:, flag]
+                X = np.linalg.solve(AII, np.concatenate((AIB, FI[..., None]), axis=-1))
+                S = ABB - ABI@X[..., :-1]
+                FB = FB - np.einsum('cij, cj->ci', ABI, X[..., -1])
+            else:
+                X = None
+                S = ABB
+            self.X.append(X)
+
+            s2d = self.g2s[c2d[:, ~flag]]
+            nb = s2d.shape[1]
+            I.append(np.repeat(s2d, nb, axis=1).reshape(-1))
+            J.append(np.tile(s2d, (1, nb)).reshape(-1))
+            val.append(S.reshape(-1))
+            np.add.at(g, s2d, FB)
+
+        S = csr_matrix((np.concatenate(val), (np.concatenate(I), np.concatenate(J))),
+                shape=(NS, NS))
+        return S, g
+
+    def recover(self, uB):
+        """
+        Recover the interior dofs from the skeleton dofs.
+
+        Parameters
+        ----------
+        uB : (NS, ), the solution of the condensed system
+
+        Returns
+        -------
+        u : (gdof, ), the values of all global dofs
+        """
+        if self.X is None:
+            raise ValueError("call `condense` before `recover`!")
+        gdof = self.space.number_of_global_dofs()
+        u = np.zeros(gdof, dtype=np.float)
+        u[self.skeleton] = uB
+        for (index, c2d, flag), X in zip(self.group, self.X):
+            if X is not None:
+                u[c2d[:, flag]] = X[..., -1] - np.einsum('cij, cj->ci', X[..., :-1],
+                        u[c2d[:, ~flag]])
+        return u
+
+    def solve(self, A, F, uh=None, isDDof=None, solver=spsolve):
+        """
+        Solve the global system by the static condensation.
+
+        Parameters
+        ----------
+        A : the cell matrices
+        F : the cell vectors
+        uh : (gdof, ), the Dirichlet values on the dofs flaged by `isDDof`
+        isDDof : (gdof, ), the flags of the Dirichlet dofs, which should be
+            skeleton dofs
+        solver : the solver of the sparse condensed system
+        """
+        S, g = self.condense(A, F)
+        if isDDof is not None:
+            NS = self.number_of_skeleton_dofs()
+            isDDof = isDDof[self.skeleton]
+            x = np.zeros(NS, dtype=np.float)
+            x[isDDof] = uh[self.skeleton][isDDof]
+            g -= S@x
+            bdIdx = np.zeros(NS, dtype=np.int)
+            bdIdx[isDDof] = 1
+            Tbd = spdiags(bdIdx, 0, NS, NS)
+            T = spdiags(1-bdIdx, 0, NS, NS)
+            S = T@S@T + Tbd
+            g[isDDof] = x[isDDof]
+        uB = solver(S.tocsr(), g)
+        return self.recover(uB)
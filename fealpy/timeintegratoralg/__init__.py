@@ -1,3 +1,4 @@
 
 from .timeline import UniformTimeLine
 from .timeline import ChebyshevTimeLine
+from .timeline import AdaptiveTimeLine
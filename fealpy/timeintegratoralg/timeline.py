@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.fftpack import dct, idct
 
+from ..common.profiler import profiler
+
 class UniformTimeLine():
     def __init__(self, T0, T1, NT, options={'output':False}):
         """
@@ -15,7 +17,7 @@ class UniformTimeLine():
         self.NL = NT + 1 # the number of time levels
         self.dt = (self.T1 - self.T0)/NT
         self.current = 0
-        self.options = self.options
+        self.options = options
 
     def uniform_refine(self, n=1):
         for i in range(n):
@@ -59,9 +61,10 @@ class UniformTimeLine():
             dmodel.output(data, str(timeline.current).zfill(10), queue)
 
         while not self.stop():
-            A = dmodel.get_current_left_matrix(data, timeline)
-            b = dmodel.get_current_right_vector(data, timeline)
-            dmodel.solve(data, A, b, timeline)
+            with profiler.region('time_step'):
+                A = dmodel.get_current_left_matrix(data, timeline)
+                b = dmodel.get_current_right_vector(data, timeline)
+                dmodel.solve(data, A, b, timeline)
             timeline.current += 1
             if options['Output']:
                 dmodel.output(data, str(timeline.current).zfill(6), queue)
@@ -200,3 +203,214 @@ class ChebyshevTimeLine():
 
 
 
+
+class AdaptiveTimeLine():
+    def __init__(self, T0, T1, dt0, tol=1e-4, order=1, options=None):
+        """
+        Parameter
+        ---------
+        T0: the initial time
+        T1: the end time
+        dt0: the initial time step length
+        tol: the relative tolerance of the local error
+        order: the order of the time discretization scheme
+
+        Note
+        ----
+        The time levels are not known in advance. A step is accepted or
+        rejected by `advance(error)` with the normalized local error
+        estimate, and the next step length is given by a PI controller
+
+            dt_new = dt*safety*(1/err)^kI*(err_old)^kP
+
+        with kI = 0.7/(p+1), kP = 0.4/(p+1).
+        """
+        self.T0 = T0
+        self.T1 = T1
+        self.dt0 = dt0
+        self.order = order
+
+        self.options = {
+                'atol': tol,
+                'rtol': tol,
+                'dtmin': 1e-12*(T1 - T0),
+                'dtmax': T1 - T0,
+                'safety': 0.9,
+                'facmin': 0.2,
+                'facmax': 5.0,
+                'maxreject': 20,
+                'extrapolation': False,
+                'output': False
+                }
+        if options is not None:
+            self.options.update(options)
+
+        self.reset()
+
+    def reset(self):
+        self.current = 0
+        self.time = [self.T0]
+        self.dt = min(self.dt0, self.T1 - self.T0)
+        self.errold = 1.0
+        self.nreject = 0 # the number of consecutive rejected steps
+        self.stat = {'accept': 0, 'reject': 0, 'error': []}
+
+    def number_of_time_levels(self):
+        return len(self.time)
+
+    def all_time_levels(self):
+        return np.array(self.time, dtype=np.float)
+
+    def current_time_level_index(self):
+        return self.current
+
+    def current_time_level(self):
+        return self.time[self.current]
+
+    def next_time_level(self):
+        return self.time[self.current] + self.dt
+
+    def current_time_step_length(self):
+        return self.dt
+
+    def stop(self):
+        t = self.time[self.current]
+        return t >= self.T1 - 1e-12*(self.T1 - self.T0)
+
+    def error_norm(self, e, u0, u1):
+        """
+        The weighted root mean square norm of the local error e, which is
+        normalized so that `err <= 1` means the step is acceptable.
+        """
+        atol = self.options['atol']
+        rtol = self.options['rtol']
+        s = atol + rtol*np.maximum(np.abs(u0), np.abs(u1))
+        return np.sqrt(np.mean((e/s)**2))
+
+    def step_doubling_error(self, u0, u1, u2):
+        """
+        Estimate the local error by Richardson extrapolation, where `u1` is
+        the solution of one step with `dt` and `u2` is the solution of two
+        steps with `dt/2`.
+        """
+        e = (u2 - u1)/(2**self.order - 1)
+        return self.error_norm(e, u0, u2)
+
+    def advance(self, error=None):
+        """
+        Advance to the next time level.
+
+        Parameter
+        ---------
+        error: the normalized local error estimate of the current step. If
+            it is None, the step is accepted and the step length is kept.
+
+        Return
+        ------
+        True if the step is accepted, otherwise False and the current step
+        length is reduced.
+        """
+        options = self.options
+        if error is None:
+            isAccept = True
+            fac = 1.0
+        else:
+            err = max(error, 1e-10)
+            k = self.order + 1
+            if err <= 1.0:
+                isAccept = True
+                fac = options['safety']*err**(-0.7/k)*self.errold**(0.4/k)
+                fac = min(options['facmax'], max(options['facmin'], fac))
+                if self.nreject > 0: # do not increase right after a rejection
+                    fac = min(fac, 1.0)
+                self.errold = err
+            else:
+                isAccept = False
+                fac = max(options['facmin'], options['safety']*err**(-1/k))
+
+        if isAccept:
+            t = self.time[self.current] + self.dt
+            if t > self.T1 - 1e-12*(self.T1 - self.T0):
+                t = self.T1
+            self.time.append(t)
+            self.current += 1
+            self.nreject = 0
+            self.stat['accept'] += 1
+            if error is not None:
+                self.stat['error'].append(error)
+        else:
+            self.nreject += 1
+            self.stat['reject'] += 1
+            if self.nreject > options['maxreject']:
+                raise RuntimeError(
+                    "the time step is rejected {} times at t = {}".format(
+                        self.nreject, self.time[self.current]))
+
+        dt = min(options['dtmax'], max(options['dtmin'], fac*self.dt))
+        if dt <= options['dtmin'] and not isAccept:
+            raise RuntimeError(
+                    "the time step length is less than dtmin at t = {}".format(
+                        self.time[self.current]))
+        # do not step over the end time
+        self.dt = min(dt, self.T1 - self.time[self.current])
+        return isAccept
+
+    def one_step(self, u0, dmodel, t, dt):
+        """
+        One step from the time t to t + dt.
+        """
+        A = dmodel.get_current_left_matrix(dt)
+        b = dmodel.get_current_right_vector(u0, t, dt)
+        A, b = dmodel.apply_boundary_condition(A, b, t + dt)
+        return dmodel.solve(A, b)
+
+    def time_integration(self, u0, dmodel, queue=None):
+        """
+        Integrate from `T0` to `T1` with adaptive time step.
+
+        Parameter
+        ---------
+        u0: the initial value
+        dmodel: the discrete model. If it has the method
+            `embedded_step(u0, t, dt)` which returns the solution and the
+            local error vector of an embedded pair, it will be used,
+            otherwise the local error is estimated by step doubling with
+            the methods `get_current_left_matrix(dt)`,
+            `get_current_right_vector(u0, t, dt)`,
+            `apply_boundary_condition(A, b, t + dt)` and `solve(A, b)`,
+            where t is the time of u0, e.g. `ParabolicCVEMModel2d`.
+
+        Return
+        ------
+        The solutions at all accepted time levels, which are given by
+        `all_time_levels()`.
+        """
+        options = self.options
+        timeline = self
+        timeline.reset()
+
+        uh = [u0]
+        if options['output']:
+            dmodel.output(u0, str(timeline.current).zfill(10), queue)
+
+        while not timeline.stop():
+            t = timeline.current_time_level()
+            dt = timeline.current_time_step_length()
+            u = uh[-1]
+            if hasattr(dmodel, 'embedded_step'):
+                u1, e = dmodel.embedded_step(u, t, dt)
+                err = timeline.error_norm(e, u, u1)
+            else:
+                u2 = timeline.one_step(u, dmodel, t, dt)
+                u1 = timeline.one_step(u, dmodel, t, 0.5*dt)
+                u1 = timeline.one_step(u1, dmodel, t + 0.5*dt, 0.5*dt)
+                err = timeline.step_doubling_error(u, u2, u1)
+                if options['extrapolation']:
+                    u1 = u1 + (u1 - u2)/(2**timeline.order - 1)
+
+            if timeline.advance(err):
+                uh.append(u1)
+                if options['output']:
+                    dmodel.output(u1, str(timeline.current).zfill(10), queue)
+
+        return uh
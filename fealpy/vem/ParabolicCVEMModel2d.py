@@ -1,24 +1,68 @@
 import numpy as np
 from scipy.sparse import coo_matrix, csc_matrix, csr_matrix, spdiags, eye
+from scipy.sparse.linalg import spsolve
 
 from ..functionspace import ConformingVirtualElementSpace2d
 
 class ParabolicCVEMModel2d():
+    """
+    The backward Euler conforming virtual element method of the heat equation
+
+        u_t - \Delta u = f, u = g on the boundary,
+
+    which is the discrete model of `AdaptiveTimeLine`.
+
+    Examples
+    --------
+    >> dmodel = ParabolicCVEMModel2d(pde, mesh, p=1)
+    >> timeline = AdaptiveTimeLine(0, 1, 1e-3, tol=1e-4, order=1)
+    >> uh = timeline.time_integration(dmodel.init_solution(0.0), dmodel)
+    """
 
     def __init__(self, pde, mesh, p=1, q=3):
         self.space = ConformingVirtualElementSpace2d(mesh, p, q)
         self.mesh = self.space.mesh
         self.pde = pde
 
-    def solve(self, t0, t1, NT):
+        self.A = self.space.stiff_matrix()
+        self.M = self.space.mass_matrix()
+        self.isBdDof = self.space.boundary_dof()
+
+    def init_solution(self, t0=0.0):
+        return self.space.interpolation(lambda x: self.pde.solution(x, t0))
+
+    def get_current_left_matrix(self, dt):
+        return self.M + dt*self.A
+
+    def get_current_right_vector(self, u0, t, dt):
+        """
+        The right hand side of the step from t to t + dt.
+        """
+        f = lambda x: self.pde.source(x, t + dt)
+        return self.M@u0 + dt*self.space.source_vector(f)
+
+    def apply_boundary_condition(self, A, b, t):
+        """
+        The Dirichlet condition at the time t.
+        """
+        isBdDof = self.isBdDof
+        uh = self.space.function()
+        self.space.set_dirichlet_bc(uh, lambda x: self.pde.dirichlet(x, t))
+
+        gdof = self.space.number_of_global_dofs()
+        b = b - A@uh
+        b[isBdDof] = uh[isBdDof]
+        T = spdiags(1.0*isBdDof, 0, gdof, gdof)
+        D = spdiags(1.0 - isBdDof, 0, gdof, gdof)
+        A = D@A@D + T
+        return A.tocsr(), b
+
+    def solve(self, A, b):
+        return spsolve(A, b)
+
+    def error(self, uh, t):
         """
-        Parameters
-        ----------
-        t0 : the start time
-        t1 : the stop time
-        NT : the number of segments on [t0, t1]
+        The max error at the dofs.
         """
-        A = self.space.stiff_matrix()
-        M = self.space.mass_matrix()
-        timeline = self.pde.time_mesh(t0, t1, NT)
-        dt = timeline.get_current_time_step_length()
+        uI = self.init_solution(t)
+        return np.max(np.abs(uh - uI))
@@ -29,8 +29,12 @@ class MeshWriter:
         points = vtk.vtkPoints()
         points.SetData(vnp.numpy_to_vtk(node))
 
+        # vtk keeps the connectivity in vtkIdType, so the int32 cells are
+        # converted here
+        idtype = vnp.get_vtk_to_numpy_typemap()[vtk.VTK_ID_TYPE]
         cells = vtk.vtkCellArray()
-        cells.SetCells(NC, vnp.numpy_to_vtkIdTypeArray(cell))
+        cells.SetCells(NC, vnp.numpy_to_vtkIdTypeArray(
+            cell.astype(idtype, copy=False), deep=True))
 
         self.mesh =vtk.vtkUnstructuredGrid() 
         self.mesh.SetPoints(points)
@@ -1 +1,2 @@
 from .MeshWriter import MeshWriter
+from .checkpoint import save_checkpoint, load_checkpoint
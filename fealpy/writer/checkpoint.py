@@ -0,0 +1,286 @@
+"""
+Checkpoint
+==========
+
+A native binary checkpoint/restart format for meshes and discrete functions.
+
+A checkpoint file is an uncompressed `.npz` file, so it can be read by
+`np.load` everywhere. Every array of the mesh, of its topology data
+structure `mesh.ds` (e.g. `edge`, `edge2cell`, `face2cell`), of the tree
+data (`parent`, `child` of `Quadtree`, `Tritree` and `Octree`) and of the
+given `Function` objects is stored as one member. The class names and the
+scalar attributes are stored as a json string in the member `__meta__`.
+
+Because the members are not compressed, `load_checkpoint` memory-maps them
+directly from the file, and the mesh object is restored from the stored
+arrays without calling the mesh constructor, so no topology is rebuilt.
+
+Examples
+--------
+>> save_checkpoint('run.npz', mesh, functions={'uh': uh}, data={'t': t})
+>> mesh, functions, data = load_checkpoint('run.npz')
+"""
+import json
+import inspect
+import importlib
+import zipfile
+
+import numpy as np
+
+from ..common import DynamicArray
+
+
+def _class_path(cls):
+    return cls.__module__ + ':' + cls.__qualname__
+
+
+def _import_class(path):
+    module, name = path.split(':')
+    cls = importlib.import_module(module)
+    for n in name.split('.'):
+        cls = getattr(cls, n)
+    return cls
+
+
+def _is_scalar(val):
+    return isinstance(val, (bool, int, float, str, np.bool_, np.integer,
+        np.floating)) or val is None
+
+
+def _scalar(val):
+    return val.item() if isinstance(val, np.generic) else val
+
+
+def _dump_object(obj, prefix, arrays, skip=()):
+    """
+    Put the arrays of `obj` into `arrays` and return the meta information
+    of `obj`.
+
+    Raises
+    ------
+    TypeError if an attribute or a dict entry of `obj` can not be saved.
+    """
+    meta = {'class': _class_path(type(obj)), 'scalar': {}, 'dtype': {},
+            'array': [], 'dynamic': [], 'dict': {}, 'alias': {},
+            'dictdynamic': {}, 'dictscalar': {}}
+    dicts = {}
+    for key, val in vars(obj).items():
+        if key in skip:
+            continue
+        name = prefix + key
+        if isinstance(val, np.ndarray):
+            arrays[name] = np.ascontiguousarray(val)
+            meta['array'].append(key)
+        elif isinstance(val, DynamicArray):
+            arrays[name] = np.ascontiguousarray(val.data[:val.size])
+            meta['dynamic'].append(key)
+        elif _is_scalar(val):
+            meta['scalar'][key] = _scalar(val)
+        elif isinstance(val, np.dtype) or (
+                isinstance(val, type) and issubclass(val, np.generic)):
+            meta['dtype'][key] = np.dtype(val).str
+        elif isinstance(val, dict):
+            if id(val) in dicts: # e.g. mesh.facedata is mesh.edgedata
+                meta['alias'][key] = dicts[id(val)]
+                continue
+            dicts[id(val)] = key
+            meta['dict'][key] = []
+            meta['dictdynamic'][key] = []
+            meta['dictscalar'][key] = {}
+            for k, v in val.items():
+                if isinstance(v, np.ndarray):
+                    arrays[name + '/' + k] = np.ascontiguousarray(v)
+                    meta['dict'][key].append(k)
+                elif isinstance(v, DynamicArray):
+                    arrays[name + '/' + k] = np.ascontiguousarray(v.data[:v.size])
+                    meta['dictdynamic'][key].append(k)
+                elif _is_scalar(v):
+                    meta['dictscalar'][key][k] = _scalar(v)
+                else:
+                    raise TypeError("the entry `{}` of `{}.{}` with {} can not "
+                            "be saved!".format(k, type(obj).__name__, key, type(v)))
+        else:
+            raise TypeError("the attribute `{}` of {} with {} can not be "
+                    "saved!".format(key, type(obj).__name__, type(val)))
+    return meta
+
+
+def _load_object(meta, prefix, arrays):
+    """
+    Create an object from the meta information without calling its
+    constructor.
+    """
+    cls = _import_class(meta['class'])
+    obj = cls.__new__(cls)
+    for key, val in meta['scalar'].items():
+        setattr(obj, key, val)
+    for key, val in meta['dtype'].items():
+        setattr(obj, key, np.dtype(val))
+    for key in meta['array']:
+        setattr(obj, key, arrays[prefix + key])
+    for key in meta['dynamic']:
+        val = arrays[prefix + key]
+        setattr(obj, key, DynamicArray(val, dtype=val.dtype))
+    for key, val in meta['dict'].items():
+        d = {k: arrays[prefix + key + '/' + k] for k in val}
+        for k in meta.get('dictdynamic', {}).get(key, []):
+            v = arrays[prefix + key + '/' + k]
+            d[k] = DynamicArray(v, dtype=v.dtype)
+        d.update(meta.get('dictscalar', {}).get(key, {}))
+        setattr(obj, key, d)
+    for key, val in meta['alias'].items():
+        setattr(obj, key, getattr(obj, val))
+    return obj
+
+
+def _space_meta(space):
+    meta = {'class': _class_path(type(space)), 'args': {}}
+    parameters = inspect.signature(type(space).__init__).parameters
+    for key in parameters:
+        if key in {'self', 'mesh'}:
+            continue
+        val = getattr(space, key, None)
+        if isinstance(val, (bool, int, float, str, np.integer, np.floating)):
+            meta['args'][key] = val.item() if isinstance(val, np.generic) else val
+    return meta
+
+
+def save_checkpoint(fname, mesh, functions=None, data=None):
+    """
+    Save the mesh, the discrete functions and other arrays into a checkpoint
+    file.
+
+    Parameters
+    ----------
+    fname : str, the file name, `.npz` will be appended if it is absent
+    mesh : the mesh object
+    functions : dict, name -> `Function`, all functions should be defined on
+        `mesh`
+    data : dict, name -> array or scalar, e.g. current time and time level
+
+    Raises
+    ------
+    TypeError if an attribute of the mesh or an item of data is not an
+    array, a scalar, a dtype or a dict of them.
+    """
+    arrays = {}
+    meta = {'version': 1}
+    # the quadrature point cache is rebuilt on demand
+    meta['mesh'] = _dump_object(mesh, 'mesh/', arrays,
+            skip={'ds', '_quadrature_cache'})
+    if hasattr(mesh, 'ds'):
+        meta['ds'] = _dump_object(mesh.ds, 'ds/', arrays)
+
+    meta['function'] = {}
+    if functions is not None:
+        for name, f in functions.items():
+            if f.space.mesh is not mesh:
+                raise ValueError(
+                    "the function `{}` is not defined on the mesh!".format(name))
+            arrays['function/' + name] = np.ascontiguousarray(f)
+            meta['function'][name] = _space_meta(f.space)
+
+    meta['data'] = []
+    if data is not None:
+        for name, val in data.items():
+            val = np.asarray(val)
+            if val.dtype.hasobject:
+                raise TypeError("the data `{}` can not be saved!".format(name))
+            arrays['data/' + name] = val
+            meta['data'].append(name)
+
+    arrays['__meta__'] = np.frombuffer(
+            json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+    np.savez(fname, **arrays)
+
+
+def load_checkpoint_arrays(fname, mmap_mode='r'):
+    """
+    Load all members of an uncompressed `.npz` file.
+
+    Parameters
+    ----------
+    fname : str, the file name
+    mmap_mode : None, 'r', 'r+' or 'c', see `np.memmap`. If it is None the
+        members will be read into memory.
+
+    Return
+    ------
+    arrays : dict, name -> array
+
+    Notes
+    -----
+    `np.load` ignores `mmap_mode` for `.npz` files. Here the offset of each
+    stored member is found from its zip local header and the member is
+    mapped by `np.memmap` directly.
+    """
+    if mmap_mode is None:
+        with np.load(fname) as f:
+            return {name: f[name] for name in f.files}
+
+    arrays = {}
+    with zipfile.ZipFile(fname) as zf, open(fname, 'rb') as fd:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(
+                    "the member `{}` is compressed and can not be mapped!".format(
+                        info.filename))
+            # the local file header has 30 bytes and the name and extra field
+            fd.seek(info.header_offset)
+            header = fd.read(30)
+            n = int.from_bytes(header[26:28], 'little')
+            m = int.from_bytes(header[28:30], 'little')
+            fd.seek(info.header_offset + 30 + n + m)
+            version = np.lib.format.read_magic(fd)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fd)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fd)
+            offset = fd.tell()
+            name = info.filename[:-4] # remove `.npy`
+            if np.prod(shape) == 0 or dtype.hasobject:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(fname, dtype=dtype, mode=mmap_mode,
+                        offset=offset, shape=shape,
+                        order='F' if fortran else 'C')
+    return arrays
+
+
+def load_checkpoint(fname, mmap_mode='r'):
+    """
+    Load a checkpoint file saved by `save_checkpoint`.
+
+    Parameters
+    ----------
+    fname : str, the file name
+    mmap_mode : None, 'r', 'r+' or 'c'. The default 'r' maps the arrays
+        read-only. Use 'c' (copy-on-write) if the mesh will be modified, e.g.
+        refined, after restart.
+
+    Return
+    ------
+    mesh : the mesh object
+    functions : dict, name -> `Function`
+    data : dict, name -> array
+    """
+    from ..functionspace.Function import Function
+
+    arrays = load_checkpoint_arrays(fname, mmap_mode=mmap_mode)
+    meta = json.loads(bytes(np.asarray(arrays.pop('__meta__'))).decode('utf-8'))
+
+    mesh = _load_object(meta['mesh'], 'mesh/', arrays)
+    if 'ds' in meta:
+        mesh.ds = _load_object(meta['ds'], 'ds/', arrays)
+
+    spaces = {}
+    functions = {}
+    for name, smeta in meta['function'].items():
+        key = json.dumps(smeta, sort_keys=True)
+        if key not in spaces:
+            cls = _import_class(smeta['class'])
+            spaces[key] = cls(mesh, **smeta['args'])
+        functions[name] = Function(spaces[key], array=arrays['function/' + name])
+
+    data = {name: arrays['data/' + name] for name in meta['data']}
+    return mesh, functions, data
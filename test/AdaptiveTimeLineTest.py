@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+from scipy.sparse import diags, eye
+from scipy.sparse.linalg import spsolve
+
+from fealpy.timeintegratoralg import AdaptiveTimeLine
+from fealpy.mesh import MeshFactory, PolygonMesh
+from fealpy.pde.parabolic_model_2d import SinSinExpData
+from fealpy.vem.ParabolicCVEMModel2d import ParabolicCVEMModel2d
+
+
+class BackwardEulerModel():
+    """
+    u_t = -S u, with a fast and a slow mode.
+    """
+    def __init__(self, lam):
+        self.S = diags(lam, format='csr')
+        self.M = eye(len(lam), format='csr')
+
+    def get_current_left_matrix(self, dt):
+        return self.M + dt*self.S
+
+    def get_current_right_vector(self, u0, t, dt):
+        return self.M@u0
+
+    def apply_boundary_condition(self, A, b, t):
+        return A, b
+
+    def solve(self, A, b):
+        return spsolve(A, b)
+
+
+class AdaptiveTimeLineTest:
+    def __init__(self):
+        pass
+
+    def step_doubling(self, tol=1e-4):
+        lam = np.array([1000.0, 1.0])
+        dmodel = BackwardEulerModel(lam)
+        timeline = AdaptiveTimeLine(0, 2, 1e-5, tol=tol, order=1)
+        u0 = np.ones(2, dtype=np.float)
+        uh = timeline.time_integration(u0, dmodel)
+        t = timeline.all_time_levels()
+        assert len(uh) == len(t)
+        assert abs(t[-1] - 2) < 1e-12
+        u = np.exp(-lam*t[-1])
+        print('accept:', timeline.stat['accept'], 'reject:', timeline.stat['reject'])
+        print('min dt:', np.min(np.diff(t)), 'max dt:', np.max(np.diff(t)))
+        print('error:', np.max(np.abs(uh[-1] - u)))
+        assert np.max(np.abs(uh[-1] - u)) < 100*tol
+
+    def advance(self):
+        timeline = AdaptiveTimeLine(0, 1, 0.1, tol=1e-3)
+        dt = timeline.current_time_step_length()
+        assert timeline.advance(2.0) is False
+        assert timeline.current_time_step_length() < dt
+        assert timeline.current_time_level_index() == 0
+        assert timeline.advance(0.1) is True
+        assert timeline.current_time_level_index() == 1
+        while not timeline.stop():
+            timeline.advance()
+        assert abs(timeline.current_time_level() - 1) < 1e-12
+
+    def heat(self):
+        """
+        The time error of the heat equation decreases with the tolerance.
+        """
+        pde = SinSinExpData()
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=8)
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        NC = cell.shape[0]
+        mesh = PolygonMesh(node, cell.reshape(-1), np.arange(0, 3*NC+1, 3))
+        dmodel = ParabolicCVEMModel2d(pde, mesh, p=1)
+
+        timeline = AdaptiveTimeLine(0, 1, 1e-3, tol=1e-6, order=1,
+                options={'extrapolation': True})
+        u = timeline.time_integration(dmodel.init_solution(0.0), dmodel)[-1]
+        e = []
+        for tol in [1e-2, 1e-3, 1e-4]:
+            timeline = AdaptiveTimeLine(0, 1, 1e-3, tol=tol, order=1)
+            uh = timeline.time_integration(dmodel.init_solution(0.0), dmodel)
+            e.append(np.max(np.abs(uh[-1] - u)))
+            print(tol, timeline.stat['accept'], timeline.stat['reject'], e[-1],
+                    dmodel.error(uh[-1], 1.0))
+            assert dmodel.error(uh[-1], 1.0) < 1e-2
+        assert e[0] > e[1] > e[2]
+        assert e[2] < 5e-4
+
+
+test = AdaptiveTimeLineTest()
+
+if sys.argv[1] == "step_doubling":
+    test.step_doubling()
+elif sys.argv[1] == "advance":
+    test.advance()
+elif sys.argv[1] == "heat":
+    test.heat()
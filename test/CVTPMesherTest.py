@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # 
+import sys
+import warnings
+
 import numpy as np
 import matplotlib.pyplot as plt
 from fealpy.mesh import HalfEdgeDomain, HalfEdgeMesh, CVTPMesher
 
-from scipy.spatial import Voronoi, voronoi_plot_2d
+from scipy.spatial import Voronoi, voronoi_plot_2d, Delaunay, ConvexHull
 from scipy.spatial import KDTree
 
 class CVTPMesherTest:
@@ -361,6 +364,132 @@ class CVTPMesherTest:
 
 
 
+    def circle_mesher(self, n=20):
+        h = 2*np.pi/n
+        theta = np.arange(0, 2*np.pi, h)
+        vertices = np.zeros((n, 2), dtype=np.float64)
+        vertices[:, 0] = np.cos(theta)
+        vertices[:, 1] = np.sin(theta)
+        fixed = np.zeros(n, dtype=np.bool_)
+        facets = np.zeros((n, 2), dtype=np.int_)
+        facets[:, 0] = range(0, n)
+        facets[:-1, 1] = range(1, n)
+        subdomain = np.zeros((n, 2), dtype=np.int_)
+        subdomain[:, 0] = 1
+        domain = HalfEdgeDomain.from_facets(vertices, facets, subdomain, fixed)
+        mesher = CVTPMesher(domain)
+        np.random.seed(0)
+        mesher.uniform_meshing(refine=0)
+        return mesher
+
+    def voronoi_centroid_test(self):
+        """
+        Compare the batched centroids and energies with the ones of the
+        bounded Voronoi regions computed region by region.
+        """
+        np.random.seed(0)
+        points = np.random.rand(200, 2)
+        vor = Voronoi(points)
+        rp = vor.ridge_points
+        rv = np.array(vor.ridge_vertices)
+        isKeeped = np.all(rv >= 0, axis=1)
+        mesher = CVTPMesher.__new__(CVTPMesher)
+        center, energy, area = mesher.voronoi_centroid(
+                points, vor.vertices, rp[isKeeped], rv[isKeeped])
+
+        n = 0
+        for i, j in enumerate(vor.point_region):
+            region = vor.regions[j]
+            if (len(region) == 0) or (-1 in region):
+                continue
+            # the triangles (v0, vk, vk+1) of the convex region
+            v = vor.vertices[region]
+            a = v[1:-1] - v[0]
+            b = v[2:] - v[0]
+            s = np.abs(np.cross(a, b))/2
+            g = (v[0] + v[1:-1] + v[2:])/3
+            m = np.sum((v[0] - g)**2 + (v[1:-1] - g)**2 + (v[2:] - g)**2, axis=-1)
+            e = s*(np.sum((g - points[i])**2, axis=-1) + m/12)
+            assert np.isclose(area[i], np.sum(s))
+            assert np.allclose(center[i], np.sum(s[:, None]*g, axis=0)/np.sum(s))
+            assert np.isclose(energy[i], np.sum(e))
+            n += 1
+        assert n > 100
+
+        # the signed regions of the Delaunay dual cover the convex hull
+        mesh = mesher.delaunay_mesh(points)
+        cell = mesh.entity('cell')
+        edge = mesh.entity('edge')
+        edge2cell = mesh.ds.edge_to_cell()
+        isBdEdge = edge2cell[:, 0] == edge2cell[:, 1]
+        bedge = edge[isBdEdge]
+        vertices = np.r_['0', mesher.circumcenter(points, cell),
+                (points[bedge[:, 0]] + points[bedge[:, 1]])/2]
+        rv = edge2cell[:, [1, 0]]
+        rv[isBdEdge, 0] = len(cell) + np.arange(len(bedge))
+        center1, energy1, area1 = mesher.voronoi_centroid(
+                points, vertices, edge, rv, signed=True)
+        assert np.isclose(np.sum(area1), ConvexHull(points).volume)
+        isBdNode = mesh.ds.boundary_node_flag()
+        isBounded = np.zeros(len(points), dtype=np.bool_)
+        for i, j in enumerate(vor.point_region):
+            isBounded[i] = (len(vor.regions[j]) > 0) and (-1 not in vor.regions[j])
+        # the regions far from the hull are not cut
+        flag = isBounded & ~isBdNode & np.all((points > 0.2) & (points < 0.8), axis=1)
+        assert np.allclose(area1[flag], area[flag])
+        assert np.allclose(energy1[flag], energy[flag])
+        assert np.allclose(center1[flag], center[flag])
+
+    def cvt_test(self, maxit=2000):
+        """
+        The energy is not increased, and the Anderson acceleration needs
+        fewer iterations than the Lloyd iteration.
+        """
+        result = {}
+        for method in ['lloyd', 'anderson']:
+            mesher = self.circle_mesher()
+            vor = mesher.cvt(maxit=maxit, tol=1e-8, method=method)
+            e = np.array(mesher.stat['energy'])
+            print(method, mesher.stat['iterations'], e[0], e[-1],
+                    mesher.stat['number_of_flips'],
+                    mesher.stat['number_of_rebuilds'])
+            assert mesher.stat['iterations'] < maxit
+            assert np.all(np.diff(e) <= 1e-12*e[1:])
+            result[method] = (mesher.stat['iterations'], e[-1])
+        assert result['anderson'][0] < result['lloyd'][0]
+        assert result['anderson'][1] <= result['lloyd'][1]*(1 + 1e-6)
+
+    def edge_flip_test(self):
+        """
+        A warning is given if the mesh is not Delaunay after `maxit` rounds.
+        """
+        np.random.seed(1)
+        points = np.random.rand(200, 2)
+        mesher = CVTPMesher.__new__(CVTPMesher)
+        mesh = mesher.delaunay_mesh(points)
+        NC = mesh.number_of_cells()
+
+        # move the nodes a little, so the topology is still valid
+        node = mesh.entity('node')
+        isBdNode = mesh.ds.boundary_node_flag()
+        h = np.mean(mesh.entity_measure('edge'))
+        node[~isBdNode] += 0.1*h*(np.random.rand((~isBdNode).sum(), 2) - 0.5)
+        assert np.all(mesh.entity_measure('cell') > 0)
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            mesh.edge_flip(maxit=1)
+            assert len([x for x in w if x.category is UserWarning]) == 1
+            mesh.edge_flip()
+            assert len([x for x in w if x.category is UserWarning]) == 1
+
+        # the result is the Delaunay triangulation
+        cell0 = np.sort(Delaunay(node).simplices, axis=1)
+        cell1 = np.sort(mesh.entity('cell'), axis=1)
+        assert mesh.number_of_cells() == NC
+        assert np.all(np.unique(cell0, axis=0) == np.unique(cell1, axis=0))
+
+
 test = CVTPMesherTest()
 #test.uniform_boundary_meshing_test()
 #test.uniform_meshing_test(domain='square')
@@ -369,7 +498,14 @@ test = CVTPMesherTest()
 #test.uniform_meshing_test(domain = 'partition1')
 #test.uniform_meshing_test(domain = 'partition2')
 #test.uniform_meshing_test(domain = 'hole1')
-test.uniform_meshing_test(domain='hole2',interior_nodes=False)
+if len(sys.argv) > 1 and sys.argv[1] == "voronoi_centroid":
+    test.voronoi_centroid_test()
+elif len(sys.argv) > 1 and sys.argv[1] == "cvt":
+    test.cvt_test()
+elif len(sys.argv) > 1 and sys.argv[1] == "edge_flip":
+    test.edge_flip_test()
+else:
+    test.uniform_meshing_test(domain='hole2',interior_nodes=False)
 #test.Lloyd_test(domain='square')
 #test.Lloyd_test(domain = 'LShape')
 #test.Lloyd_test(domain = 'circle')
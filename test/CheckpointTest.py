@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+from fealpy.mesh import MeshFactory, Tritree, HalfEdgeMesh2d
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.writer import save_checkpoint, load_checkpoint
+from fealpy.writer.checkpoint import load_checkpoint_arrays
+
+
+class CheckpointTest:
+    def __init__(self):
+        self.fname = os.path.join(tempfile.mkdtemp(), 'checkpoint.npz')
+
+    def meshes(self):
+        mf = MeshFactory()
+        mesh = mf.regular([0, 1, 0, 1], n=4)
+        yield mesh
+
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        tree = Tritree(node.copy(), cell.copy())
+        isMarkedCell = np.zeros(tree.number_of_cells(), dtype=np.bool_)
+        isMarkedCell[:4] = True
+        tree.refine_1(isMarkedCell)
+        yield tree
+
+        yield HalfEdgeMesh2d.from_mesh(mf.regular([0, 1, 0, 1], n=3))
+
+    def check(self, obj0, obj1, name):
+        for key, val in vars(obj0).items():
+            if isinstance(val, np.ndarray):
+                assert np.all(val == getattr(obj1, key)), (name, key)
+
+    def roundtrip(self):
+        for mesh in self.meshes():
+            if mesh.meshtype == 'tri':
+                space = LagrangeFiniteElementSpace(mesh, p=2)
+                uh = space.interpolation(lambda p: np.sin(p[..., 0])*p[..., 1])
+                functions = {'uh': uh}
+            else:
+                functions = {}
+            save_checkpoint(self.fname, mesh, functions=functions,
+                    data={'t': 0.5, 'step': 10, 'e': np.arange(3.0)})
+
+            arrays = load_checkpoint_arrays(self.fname, mmap_mode='r')
+            # the empty arrays can not be mapped
+            assert all(isinstance(v, np.memmap) for v in arrays.values()
+                    if v.size > 0)
+
+            for mmap_mode in ['r', None]:
+                mesh1, functions1, data = load_checkpoint(self.fname,
+                        mmap_mode=mmap_mode)
+                name = type(mesh).__name__
+                print(name, mmap_mode, sorted(functions1), sorted(data))
+                assert type(mesh1) is type(mesh)
+                self.check(mesh, mesh1, name)
+                self.check(mesh.ds, mesh1.ds, name)
+                assert np.all(mesh1.entity('edge') == mesh.entity('edge'))
+                assert np.allclose(mesh1.entity_measure('cell'),
+                        mesh.entity_measure('cell'))
+                for key, val in getattr(mesh, 'celldata', {}).items():
+                    assert np.all(mesh1.celldata[key][:] == val[:])
+                if 'uh' in functions:
+                    uh1 = functions1['uh']
+                    assert isinstance(uh1.base, np.memmap) == (mmap_mode == 'r')
+                    assert isinstance(mesh1.entity('node'), np.memmap) == \
+                            (mmap_mode == 'r')
+                    assert np.all(uh1 == uh)
+                    assert uh1.space.number_of_global_dofs() == \
+                            space.number_of_global_dofs()
+                assert data['t'] == 0.5 and data['step'] == 10
+                assert np.all(data['e'] == np.arange(3.0))
+
+    def unsupported(self):
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=2)
+        mesh.callback = lambda x: x
+        try:
+            save_checkpoint(self.fname, mesh)
+        except TypeError as e:
+            print(e)
+        else:
+            raise AssertionError("TypeError is not raised!")
+        del mesh.callback
+
+        mesh.celldata['name'] = [1, 'a']
+        try:
+            save_checkpoint(self.fname, mesh)
+        except TypeError as e:
+            print(e)
+        else:
+            raise AssertionError("TypeError is not raised!")
+        del mesh.celldata['name']
+
+        try:
+            save_checkpoint(self.fname, mesh, data={'f': lambda x: x})
+        except TypeError as e:
+            print(e)
+        else:
+            raise AssertionError("TypeError is not raised!")
+
+
+test = CheckpointTest()
+
+if sys.argv[1] == "roundtrip":
+    test.roundtrip()
+elif sys.argv[1] == "unsupported":
+    test.unsupported()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+import sys
+
+import numpy as np
+
+from fealpy.geometry import dcircle, drectangle, DistDomain2d, huniform
+from fealpy.mesh import DistMesh2d
+
+
+class DistMesh2dTest:
+    def __init__(self):
+        fd = lambda p: drectangle(p, [0.0, 1.0, 0.0, 1.0])
+        pfix = np.array([
+            (0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)], dtype=np.float64)
+        self.square = DistDomain2d(fd, huniform, [-0.2, 1.2, -0.2, 1.2], pfix)
+
+        fd = lambda p: dcircle(p, (0.0, 0.0), 1.0)
+        self.circle = DistDomain2d(fd, huniform, [-1.2, 1.2, -1.2, 1.2], None)
+
+    def incremental(self, maxit=1000):
+        """
+        The incremental mode converges to the result of the non-incremental
+        one.
+        """
+        for domain, h in [(self.square, 0.05), (self.circle, 0.05)]:
+            meshers = []
+            for incremental in [False, True]:
+                np.random.seed(0)
+                mesher = DistMesh2d(domain, h, incremental=incremental)
+                mesher.run(maxit=maxit)
+                meshers.append(mesher)
+                stat = mesher.stat
+                print(incremental, len(stat), stat[-1]['maxmove'],
+                        np.mean([s['number_of_active_nodes'] for s in stat]),
+                        sum(s['time'] for s in stat))
+                assert len(stat) < maxit
+                assert stat[-1]['maxmove'] < 0.001
+
+            # the final triangulation of the incremental mode is valid
+            assert np.all(meshers[1].mesh.entity_measure('cell') > 0)
+
+            assert abs(len(meshers[0].stat) - len(meshers[1].stat)) < 10
+            node0 = meshers[0].mesh.entity('node')
+            node1 = meshers[1].mesh.entity('node')
+            assert node0.shape == node1.shape
+            assert np.max(np.abs(node0 - node1)) < 0.05*h
+
+
+test = DistMesh2dTest()
+
+if sys.argv[1] == "incremental":
+    test.incremental()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+#
+import sys
+import time
+
+import numpy as np
+from scipy.sparse import spdiags
+import pyamg
+
+from fealpy.mesh import Tritree, Quadtree, MeshFactory
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.functionspace import ConformingVirtualElementSpace2d
+from fealpy.boundarycondition import DirichletBC
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.solver import GMGSolver
+from fealpy.solver.gmg import tree_prolongation, tree_level
+
+
+class GMGSolverTest:
+    def __init__(self):
+        self.pde = CosCosData()
+        self.node = np.array([
+            (0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)], dtype=np.float64)
+
+    def assemble(self, mesh):
+        pde = self.pde
+        space = LagrangeFiniteElementSpace(mesh, p=1)
+        A = space.stiff_matrix()
+        F = space.source_vector(pde.source)
+        uh = space.function()
+        A, F = DirichletBC(space, pde.dirichlet).apply(A, F, uh)
+        return A, F, space.boundary_dof()
+
+    def refine_corner(self, tree, n, r=4):
+        """
+        Refine the leaf cells within r*h of the origin n times.
+        """
+        for i in range(n):
+            bc = tree.entity_barycenter('cell')
+            h = np.sqrt(tree.entity_measure('cell'))
+            isMarkedCell = tree.is_leaf_cell() & (np.linalg.norm(bc, axis=1) < r*h)
+            tree.refine_1(isMarkedCell)
+
+    def tritree(self):
+        """
+        The iteration numbers do not depend on the number of the uniform or
+        the local refinements.
+        """
+        for n in range(3, 8):
+            tree = Tritree(self.node.copy(), np.array([(1, 2, 0), (3, 0, 2)]))
+            for i in range(n):
+                tree.refine_1()
+            self.refine_corner(tree, n)
+            mesh = tree.to_conformmesh()
+            A, F, isBdDof = self.assemble(mesh)
+
+            t0 = time.perf_counter()
+            solver = GMGSolver.from_tree(tree, A, isBdDof=isBdDof)
+            t1 = time.perf_counter()
+            x = solver.solve(F, tol=1e-10, accel='cg')
+            t2 = time.perf_counter()
+            ml = pyamg.ruge_stuben_solver(A.tocsr())
+            t3 = time.perf_counter()
+
+            NI = len(solver.residuals) - 1
+            e = np.max(np.abs(x - self.pde.solution(mesh.entity('node'))))
+            print(mesh.number_of_nodes(), solver.levels, NI, e,
+                    'gmg setup:', t1 - t0, 'solve:', t2 - t1, 'amg setup:', t3 - t2)
+            assert NI <= 12
+            assert np.linalg.norm(F - A@x) < 1e-9*np.linalg.norm(F)
+
+    def coarse(self):
+        """
+        The Galerkin and the rediscretised coarse operators with all the
+        cycles and smoothers.
+        """
+        tree = Tritree(self.node.copy(), np.array([(1, 2, 0), (3, 0, 2)]))
+        for i in range(5):
+            tree.refine_1()
+        self.refine_corner(tree, 3)
+        A, F, isBdDof = self.assemble(tree.to_conformmesh())
+        P, levelNode = tree_prolongation(tree)
+        def coarse(l):
+            mesh = tree_level(tree, l, levelNode).to_conformmesh()
+            return self.assemble(mesh)[0]
+
+        for options in [{}, {'coarse': coarse}, {'cycle': 'W'}, {'cycle': 'F'},
+                {'smoother': 'jacobi', 'nu': (2, 2)}, {'local': False},
+                {'ratio': 0.5, 'coarse': coarse}]:
+            solver = GMGSolver(A, P, isBdDof=isBdDof, **options)
+            x = solver.solve(F, tol=1e-10, accel='cg')
+            NI = len(solver.residuals) - 1
+            print(options.keys(), options.get('cycle'), solver.levels, NI)
+            assert NI <= 25
+            assert np.linalg.norm(F - A@x) < 1e-10*np.linalg.norm(F)
+
+    def quadtree(self):
+        """
+        The virtual element method on the polygon mesh of a Quadtree, the
+        hanging nodes are the vertices of the polygons.
+        """
+        for n in range(2, 6):
+            tree = Quadtree(self.node.copy(), np.array([(0, 1, 2, 3)]))
+            for i in range(3):
+                tree.refine_1()
+            self.refine_corner(tree, n, r=2)
+            mesh = tree.to_pmesh()
+            space = ConformingVirtualElementSpace2d(mesh, p=1)
+            A = space.stiff_matrix()
+            F = np.ones(A.shape[0], dtype=np.float64)/A.shape[0]
+            isBdDof = mesh.ds.boundary_node_flag()
+            T = spdiags(1.0 - isBdDof, 0, *A.shape)
+            A = T@A@T + spdiags(1.0*isBdDof, 0, *A.shape)
+            F[isBdDof] = 0
+
+            solver = GMGSolver.from_tree(tree, A, isBdDof=isBdDof)
+            x = solver.solve(F, tol=1e-10, accel='cg')
+            NI = len(solver.residuals) - 1
+            print(A.shape[0], solver.levels, NI)
+            assert NI <= 16
+
+    def uniform(self):
+        """
+        The interpolation matrices of `TriangleMesh.uniform_refine`.
+        """
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=4)
+        IM, _ = mesh.uniform_refine(n=5, returnim=True)
+        A, F, isBdDof = self.assemble(mesh)
+        solver = GMGSolver(A, IM, isBdDof=isBdDof)
+        x = solver.solve(F, tol=1e-10, accel='cg')
+        NI = len(solver.residuals) - 1
+        print(mesh.number_of_nodes(), NI)
+        assert NI <= 12
+
+
+test = GMGSolverTest()
+
+if sys.argv[1] == "tritree":
+    test.tritree()
+elif sys.argv[1] == "coarse":
+    test.coarse()
+elif sys.argv[1] == "quadtree":
+    test.quadtree()
+elif sys.argv[1] == "uniform":
+    test.uniform()
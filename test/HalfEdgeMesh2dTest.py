@@ -79,6 +79,83 @@ class HalfEdgeMesh2dTest:
         print('cellLocation:', cellLocation)
         plt.show()
 
+    def cell_halfedge_ordering(self):
+        node = np.array([
+            (0.0, 0.0), (0.0, 1.0), (0.0, 2.0),
+            (1.0, 0.0), (1.0, 1.0), (1.0, 2.0),
+            (2.0, 0.0), (2.0, 1.0), (2.0, 2.0)], dtype=np.float)
+        cell = np.array([0, 3, 4, 4, 1, 0,
+            1, 4, 5, 2, 3, 6, 7, 4, 4, 7, 8, 5], dtype=np.int)
+        cellLocation = np.array([0, 3, 6, 10, 14, 18], dtype=np.int)
+
+        mesh = PolygonMesh(node, cell, cellLocation)
+        mesh = HalfEdgeMesh2d.from_mesh(mesh)
+        for i in range(3):
+            mesh.uniform_refine()
+            ds = mesh.ds
+            halfedge = ds.halfedge
+            hedges, location, lidx = ds.cell_halfedge_ordering()
+
+            # walk the cells one by one
+            cstart = ds.cellstart
+            for c in range(ds.NC):
+                h = ds.hcell[c + cstart]
+                for k in range(location[c], location[c+1]):
+                    assert hedges[k] == h
+                    assert lidx[h] == k - location[c]
+                    h = halfedge[h, 2]
+                assert h == ds.hcell[c + cstart]
+
+            cell2node, cellLocation = ds.cell_to_node()
+            assert np.all(cellLocation == location)
+            assert np.all(cell2node == halfedge[halfedge[hedges, 3], 0])
+
+            cell2edge, _ = ds.cell_to_edge()
+            edge2cell = ds.edge_to_cell()
+            NE = mesh.number_of_edges()
+            assert np.all(cell2edge[location[edge2cell[:, 0]] + edge2cell[:, 2]] == np.arange(NE))
+            assert np.all(cell2edge[location[edge2cell[:, 1]] + edge2cell[:, 3]] == np.arange(NE))
+            print(ds.NC, 'cells: OK')
+
+    def free_halfedge(self):
+        node = np.array([
+            (0.0, 0.0), (0.0, 1.0), (0.0, 2.0),
+            (1.0, 0.0), (1.0, 1.0), (1.0, 2.0),
+            (2.0, 0.0), (2.0, 1.0), (2.0, 2.0)], dtype=np.float)
+        cell = np.array([0, 3, 4, 4, 1, 0,
+            1, 4, 5, 2, 3, 6, 7, 4, 4, 7, 8, 5], dtype=np.int)
+        cellLocation = np.array([0, 3, 6, 10, 14, 18], dtype=np.int)
+
+        mesh = PolygonMesh(node, cell, cellLocation)
+        mesh = HalfEdgeMesh2d.from_mesh(mesh)
+        # never compact, the removed halfedges stay in the free list
+        options = mesh.adaptive_options(method='numrefine', maxrefine=2,
+                maxcoarsen=2, HB=None, compact=np.inf)
+        for i in range(6):
+            NC = mesh.number_of_cells()
+            eta = np.random.randint(-2, 2, size=NC)
+            mesh.adaptive(eta, options)
+
+            ds = mesh.ds
+            halfedge = ds.halfedge
+            isValidHEdge = ds.valid_halfedge_flag()
+            idx, = np.nonzero(isValidHEdge)
+            assert np.all(isValidHEdge[halfedge[idx, 2:]])
+            assert np.all(halfedge[halfedge[idx, 2], 3] == idx)
+            assert np.all(halfedge[halfedge[idx, 4], 4] == idx)
+            assert 2*mesh.number_of_edges() == len(idx)
+            assert abs(np.sum(mesh.cell_area()) - 4) < 1e-12
+            print(mesh.number_of_cells(), 'cells,',
+                    ds.number_of_free_halfedges(), 'free halfedges')
+
+        cell2node, cellLocation = mesh.ds.cell_to_node()
+        mesh.compact()
+        assert mesh.ds.number_of_free_halfedges() == 0
+        assert len(mesh.ds.halfedge) == 2*mesh.number_of_edges()
+        c2n, loc = mesh.ds.cell_to_node()
+        assert np.all(c2n == cell2node) and np.all(loc == cellLocation)
+        print('compact: OK')
+
     def refine_halfedge(self, plot=True):
         node = np.array([[0,0],[1,0],[1,1],[0,1],[2,0],[2,1]], dtype = np.float)
         cell = np.array([[0,1,2],[0,2,3],[1,4,5],[2,1,5]],dtype = np.int)
@@ -292,5 +369,7 @@ elif sys.argv[1] == 'adaptive_poly':
     mesh = test.adaptive_poly()
 elif sys.argv[1] == 'cell_to_node':
     mesh = test.cell_to_node()
-
-
+elif sys.argv[1] == 'cell_halfedge_ordering':
+    test.cell_halfedge_ordering()
+elif sys.argv[1] == 'free_halfedge':
+    test.free_halfedge()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+import sys
+import time
+
+import numpy as np
+
+from fealpy.mesh import MeshFactory, TetrahedronMesh, MeshOptimizer
+from fealpy.mesh.simple_mesh_generator import unitcircledomainmesh
+from fealpy.mesh.meshquality import TetRadiusRatio
+from fealpy.geometry import CircleCurve
+
+
+class MeshOptimizerTest:
+    def __init__(self):
+        self.node = np.array([
+            [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+            [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], dtype=np.float64)
+        self.cell = np.array([
+            [0, 1, 2, 6], [0, 5, 1, 6], [0, 4, 5, 6],
+            [0, 7, 4, 6], [0, 3, 7, 6], [0, 2, 3, 6]], dtype=np.int_)
+
+    def perturb(self, mesh, h, s=0.4):
+        np.random.seed(0)
+        node = mesh.entity('node')
+        isBdNode = mesh.ds.boundary_node_flag()
+        GD = node.shape[1]
+        node[~isBdNode] += s*h*(np.random.rand((~isBdNode).sum(), GD) - 0.5)
+
+    def triangle(self, n=40):
+        """
+        Both the colored Gauss-Seidel iteration and the Jacobi one improve
+        the worst cells.
+        """
+        for method in ['odt', 'cpt', 'radius_ratio']:
+            q = []
+            for coloring in [True, False]:
+                mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+                self.perturb(mesh, 1/n)
+                opt = MeshOptimizer(mesh, method=method, coloring=coloring)
+                t0 = time.perf_counter()
+                stats = opt.run(maxit=50, tol=1e-3)
+                t1 = time.perf_counter()
+                print(method, coloring, len(stats) - 1, stats[0], stats[-1],
+                        t1 - t0)
+                assert stats[-1]['mean'] > stats[0]['mean']
+                assert stats[-1]['min'] >= stats[0]['min']
+                q.append(stats[-1]['min'])
+            assert min(q) > 0.75
+
+    def degenerate(self, n=32):
+        """
+        The long gradient steps of the radius ratio on the nearly degenerate
+        cells are cut, so the worst cells are improved.
+        """
+        for coloring in [True, False]:
+            mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+            self.perturb(mesh, 1/n, s=0.6)
+            opt = MeshOptimizer(mesh, method='radius_ratio', coloring=coloring)
+            stats = opt.run(maxit=50, tol=1e-3)
+            print(coloring, len(stats) - 1, stats[0], stats[-1])
+            assert stats[0]['min'] < 0.05
+            assert stats[-1]['min'] > 0.5
+            assert np.all(mesh.entity_measure('cell') > 0)
+
+    def tetrahedron(self):
+        for method in ['odt', 'cpt', 'radius_ratio']:
+            mesh = TetrahedronMesh(self.node.copy(), self.cell.copy())
+            mesh.uniform_refine(3)
+            self.perturb(mesh, 1/8, s=0.3)
+            opt = MeshOptimizer(mesh, method=method)
+            stats = opt.run(maxit=20, tol=1e-3)
+            print(method, len(stats) - 1, stats[0], stats[-1])
+            assert stats[-1]['min'] > 1.5*stats[0]['min']
+            assert np.all(mesh.entity_measure('cell') > 0)
+
+    def quality(self):
+        mesh = TetrahedronMesh(self.node.copy(), self.cell.copy())
+        mesh.uniform_refine(2)
+        self.perturb(mesh, 1/4, s=0.2)
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
+        q = TetRadiusRatio()
+        assert np.allclose(q.quality(node, cell), mesh.quality())
+        F, gradF = q.objective_function(node, cell)
+        assert np.allclose(gradF, mesh.grad_quality())
+
+    def boundary(self):
+        """
+        The boundary nodes slide on the circle.
+        """
+        circle = CircleCurve(radius=1.0)
+        for boundary in [circle, circle.__call__]:
+            mesh = unitcircledomainmesh(0.1)
+            self.perturb(mesh, 0.1)
+            node = mesh.entity('node')
+            isBdNode = mesh.ds.boundary_node_flag()
+            opt = MeshOptimizer(mesh, boundary=boundary)
+            stats = opt.run(maxit=50, tol=1e-4)
+            r = np.sqrt(np.sum(node[isBdNode]**2, axis=-1))
+            print(len(stats) - 1, stats[0], stats[-1], np.max(np.abs(r - 1)))
+            assert stats[-1]['min'] > stats[0]['min']
+            assert np.max(np.abs(r - 1)) < 1e-6
+
+
+test = MeshOptimizerTest()
+
+if sys.argv[1] == "triangle":
+    test.triangle()
+elif sys.argv[1] == "degenerate":
+    test.degenerate()
+elif sys.argv[1] == "tetrahedron":
+    test.tetrahedron()
+elif sys.argv[1] == "quality":
+    test.quality()
+elif sys.argv[1] == "boundary":
+    test.boundary()
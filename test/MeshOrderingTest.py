@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+
+from fealpy.mesh import TriangleMesh
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+from fealpy.mesh.mesh_ordering import bandwidth, hilbert_key
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.functionspace.femdof import dof_permutation
+
+
+class MeshOrderingTest:
+    def __init__(self):
+        pass
+
+    def hilbert(self):
+        n = 16
+        point = np.indices((n, n)).reshape(2, -1).T.astype(np.float)
+        idx = np.argsort(hilbert_key(point, m=4))
+        d = np.sum(np.abs(np.diff(point[idx], axis=0)), axis=1)
+        assert np.all(d == 1)
+
+    def reorder(self, p=2, method='rcm'):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=20, ny=20, meshtype='tri')
+        NN = mesh.number_of_nodes()
+        NC = mesh.number_of_cells()
+        nidx = np.random.permutation(NN)
+        inidx = np.zeros(NN, dtype=np.int)
+        inidx[nidx] = np.arange(NN)
+        cell = inidx[mesh.entity('cell')][np.random.permutation(NC)]
+        mesh = TriangleMesh(mesh.entity('node')[nidx], cell)
+
+        def u(p):
+            return np.sin(np.pi*p[..., 0])*p[..., 1]
+
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        uh = space.interpolation(u)
+        cell2dof = space.cell_to_dof()
+        b0 = bandwidth(space.stiff_matrix())
+
+        idx = mesh.reorder(method=method)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        uh = uh[dof_permutation(cell2dof, space.cell_to_dof(), idx['cell'])]
+        assert np.allclose(uh, u(space.interpolation_points()))
+        b1 = bandwidth(space.stiff_matrix())
+
+        idx = space.dof.reorder(method='rcm')
+        uh = uh[idx]
+        assert np.allclose(uh, u(space.interpolation_points()))
+        b2 = bandwidth(space.stiff_matrix())
+        print('bandwidth:', b0, b1, b2)
+        assert b2 < b0
+
+
+test = MeshOrderingTest()
+
+if sys.argv[1] == "hilbert":
+    test.hilbert()
+elif sys.argv[1] == "reorder":
+    test.reorder()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+import sys
+import time
+
+import numpy as np
+from scipy.sparse import spdiags
+from scipy.sparse.linalg import cg, spsolve
+
+from fealpy.mesh import MeshFactory
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.boundarycondition import DirichletBC
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.solver import PMGSolver
+from fealpy.solver.pmg import order_prolongation
+from fealpy.solver.hofsolver import HOFEMFastSovler
+
+
+class PMGSolverTest:
+    def __init__(self):
+        self.pde = CosCosData()
+
+    def assemble(self, n, p):
+        pde = self.pde
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        A = space.stiff_matrix()
+        F = space.source_vector(pde.source)
+        uh = space.function()
+        A, F = DirichletBC(space, pde.dirichlet).apply(A, F, uh)
+        return space, A, F
+
+    def prolongation(self):
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=4)
+        for q, p in [(1, 2), (2, 4), (2, 5), (3, 6)]:
+            space0 = LagrangeFiniteElementSpace(mesh, p=q)
+            space1 = LagrangeFiniteElementSpace(mesh, p=p)
+            u = lambda x: (x[..., 0] + 0.3*x[..., 1] + 0.1)**q
+            P = order_prolongation(space0, space1)
+            e = np.max(np.abs(P@space0.interpolation(u) - space1.interpolation(u)))
+            print(q, p, e)
+            assert e < 1e-12
+            assert order_prolongation(space0, space1) is P
+
+        # the cached matrix is rebuilt after the renumbering of the mesh
+        q, p = 1, 3
+        space0 = LagrangeFiniteElementSpace(mesh, p=q)
+        space1 = LagrangeFiniteElementSpace(mesh, p=p)
+        P = order_prolongation(space0, space1)
+        mesh.reorder('hilbert')
+        space0 = LagrangeFiniteElementSpace(mesh, p=q)
+        space1 = LagrangeFiniteElementSpace(mesh, p=p)
+        u = lambda x: x[..., 0] + 0.3*x[..., 1] + 0.1
+        P = order_prolongation(space0, space1)
+        e = np.max(np.abs(P@space0.interpolation(u) - space1.interpolation(u)))
+        print('reorder', e)
+        assert e < 1e-12
+
+    def poisson(self):
+        """
+        The iteration numbers of the p-multigrid preconditioned CG method do
+        not depend on h and p, but the ones of the Jacobi preconditioned CG
+        method explode with p.
+        """
+        for n in [8, 16]:
+            for p in [2, 4, 6]:
+                space, A, F = self.assemble(n, p)
+                t0 = time.perf_counter()
+                solver = PMGSolver(A, space, isBdDof=space.boundary_dof())
+                x = solver.solve(F, tol=1e-10, accel='cg')
+                t1 = time.perf_counter()
+                NI = len(solver.residuals) - 1
+
+                counter = []
+                M = spdiags(1/A.diagonal(), 0, *A.shape)
+                y, info = cg(A, F, tol=1e-10, atol=0, maxiter=10000, M=M,
+                        callback=lambda xk: counter.append(1))
+                t2 = time.perf_counter()
+                print(n, p, A.shape[0], solver.orders, 'pmg:', NI, t1 - t0,
+                        'jacobi:', len(counter), t2 - t1)
+                assert NI <= 15
+                assert np.linalg.norm(F - A@x) < 1e-9*np.linalg.norm(F)
+
+    def elasticity(self):
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=8)
+        space = LagrangeFiniteElementSpace(mesh, p=4)
+        A = space.linear_elasticity_matrix(1.0, 1.0)
+        F = np.ones(A.shape[0], dtype=np.float64)
+        isBdDof = np.tile(space.boundary_dof(), 2)
+        T = spdiags(1.0 - isBdDof, 0, *A.shape)
+        A = (T@A@T + spdiags(1.0*isBdDof, 0, *A.shape)).tocsr()
+        F[isBdDof] = 0
+
+        solver = PMGSolver(A, space, isBdDof=isBdDof)
+        x = solver.solve(F, tol=1e-10, accel='cg')
+        NI = len(solver.residuals) - 1
+        print(A.shape[0], NI)
+        assert NI <= 20
+        assert np.allclose(x, spsolve(A, F), atol=1e-8)
+
+    def hofsolver(self):
+        space, A, F = self.assemble(8, 3)
+        solver = HOFEMFastSovler(A, space)
+        x = solver.solve(F, tol=1e-12)
+        print(len(solver.residuals) - 1)
+        assert np.linalg.norm(F - A@x) < 1e-11*np.linalg.norm(F)
+
+
+test = PMGSolverTest()
+
+if sys.argv[1] == "prolongation":
+    test.prolongation()
+elif sys.argv[1] == "poisson":
+    test.poisson()
+elif sys.argv[1] == "elasticity":
+    test.elasticity()
+elif sys.argv[1] == "hofsolver":
+    test.hofsolver()
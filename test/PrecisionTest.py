@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+#
+import sys
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.boundarycondition import DirichletBC
+from fealpy.common.precision import precision, index_type, INT32_MAX
+
+
+class PrecisionTest:
+    def __init__(self):
+        self.pde = CosCosData()
+
+    def solve(self, p, n):
+        pde = self.pde
+        mesh = pde.init_mesh(n=n)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        A = space.stiff_matrix()
+        F = space.source_vector(pde.source)
+        uh = space.function()
+        A, F = DirichletBC(space, pde.dirichlet).apply(A, F, uh)
+        uh[:] = spsolve(A, F)
+        return mesh, space, A, space.integralalg.L2_error(pde.solution, uh)
+
+    def index(self, p=2, n=4):
+        assert index_type(INT32_MAX) == np.int32
+        assert index_type(INT32_MAX + 1) == np.int64
+
+        mesh, space, A, e0 = self.solve(p, n)
+        print('auto:', mesh.ds.cell.dtype, space.cell_to_dof().dtype, e0)
+        assert mesh.ds.cell.dtype == np.int32
+        assert mesh.ds.edge2cell.dtype == np.int32
+        assert space.cell_to_dof().dtype == np.int32
+
+        with precision(itype=np.int64):
+            mesh, space, A, e1 = self.solve(p, n)
+        print('int64:', mesh.ds.cell.dtype, space.cell_to_dof().dtype, e1)
+        assert mesh.ds.cell.dtype == np.int64
+        assert space.cell_to_dof().dtype == np.int64
+        assert e0 == e1
+
+    def float32(self, p=2, n=4):
+        mesh, space, A0, e0 = self.solve(p, n)
+        with precision(ftype=np.float32):
+            mesh, space, A1, e1 = self.solve(p, n)
+        print('float64:', e0, 'float32:', e1)
+        assert A1.dtype == np.float64
+        assert abs(A1 - A0).max() < 1e-5*abs(A0).max()
+        assert abs(e1 - e0) < 1e-2*e0
+
+
+test = PrecisionTest()
+
+if sys.argv[1] == "index":
+    test.index()
+elif sys.argv[1] == "float32":
+    test.float32()
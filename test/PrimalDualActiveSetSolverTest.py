@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+import sys
+import warnings
+
+import numpy as np
+from scipy.sparse import diags
+
+from fealpy.solver import PrimalDualActiveSetSolver, active_set_solver
+
+
+class ObstacleModel1d():
+    """
+    -u'' = f on (0, 1), u >= g, with the finite difference matrix.
+    """
+    def __init__(self, n):
+        h = 1/(n + 1)
+        x = np.linspace(h, 1 - h, n)
+        self.A = diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), format='csr')/h**2
+        self.b = -10*np.ones(n)
+        self.g = -0.2 - 0.5*(x - 0.5)**2
+
+    def get_left_matrix(self):
+        return self.A
+
+    def get_right_vector(self):
+        return self.b
+
+
+class PrimalDualActiveSetSolverTest:
+    def __init__(self):
+        pass
+
+    def solve(self, n=200):
+        model = ObstacleModel1d(n)
+        u0 = None
+        for solver in ['direct', 'cg', 'amg']:
+            u = np.zeros(n, dtype=np.float64)
+            pdas = PrimalDualActiveSetSolver(model.A, model.b, solver=solver)
+            u, lam = pdas.solve(u, model.g)
+            print(solver, pdas.stat['iterations'],
+                    pdas.stat['number_of_active_dofs'][-1])
+            assert pdas.stat['converged']
+            assert pdas.stat['linear_converged']
+            assert np.all(u >= model.g - 1e-12)
+            assert np.all(lam >= -1e-8)
+            assert np.max(np.abs(lam*(u - model.g))) < 1e-8
+            if u0 is None:
+                u0 = u
+            assert np.max(np.abs(u - u0)) < 1e-8
+
+    def stat(self, n=100):
+        model = ObstacleModel1d(n)
+        u = np.zeros(n, dtype=np.float64)
+        A, b, stat = active_set_solver(model, u, model.g, returnstat=True)
+        assert stat['converged']
+        assert stat['iterations'] == len(stat['number_of_active_dofs'])
+
+        u = np.zeros(n, dtype=np.float64)
+        pdas = PrimalDualActiveSetSolver(model.A, model.b, maxit=1)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            pdas.solve(u, model.g)
+        assert not pdas.stat['converged']
+        assert len([x for x in w if x.category is UserWarning]) == 1
+
+
+test = PrimalDualActiveSetSolverTest()
+
+if sys.argv[1] == "solve":
+    test.solve()
+elif sys.argv[1] == "stat":
+    test.stat()
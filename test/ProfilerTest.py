@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#
+import sys
+import json
+import tempfile
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.boundarycondition import DirichletBC
+from fealpy.common.profiler import Profiler, profiler, NULL_REGION
+from fealpy.solver import solve
+from scipy.sparse.linalg import spsolve
+
+
+class ProfilerTest:
+    def __init__(self):
+        self.pde = CosCosData()
+
+    def region(self):
+        p = Profiler()
+        assert p.region('a') is NULL_REGION
+        p.count('x') # ignored
+        p.enable()
+        for i in range(3):
+            with p.region('a'):
+                p.count('x', 2)
+                with p.region('b'):
+                    p.count('y')
+        s = p.summary()
+        print(p.report())
+        assert set(s) == {'a', 'a/b'}
+        assert s['a']['calls'] == 3 and s['a']['counters'] == {'x': 6}
+        assert s['a/b']['counters'] == {'y': 3}
+        assert s['a']['self'] <= s['a']['total']
+
+        @p.timed()
+        def f(n):
+            return np.ones(n).sum()
+        assert f(10) == 10
+        assert 'ProfilerTest.region.<locals>.f' in p.summary()
+
+        with tempfile.TemporaryDirectory() as path:
+            p.save(os.path.join(path, 'r.json'))
+            p.save(os.path.join(path, 'r.csv'))
+            p.save(os.path.join(path, 'r.trace.json'))
+            with open(os.path.join(path, 'r.trace.json')) as fd:
+                trace = json.load(fd)
+            assert len(trace['traceEvents']) == 7
+        p.disable()
+
+    def poisson(self, p=2, n=4):
+        mesh = self.pde.init_mesh(n=n)
+        profiler.reset()
+        profiler.enable(memory=True)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        with profiler.region('assembly'):
+            A = space.stiff_matrix()
+            F = space.source_vector(self.pde.source)
+            uh = space.function()
+            bc = DirichletBC(space, self.pde.dirichlet)
+            A, F = bc.apply(A, F, uh)
+        with profiler.region('solve'):
+            uh[:] = spsolve(A, F)
+        profiler.disable()
+        print(profiler.report())
+        s = profiler.summary()
+        assert s['assembly/LagrangeFiniteElementSpace.stiff_matrix']['counters']['dofs'] == space.number_of_global_dofs()
+        assert s['assembly']['peakmem'] > 0
+
+    def solve(self, p=1, n=4):
+        """
+        The solver statistics of `solve` are counted by the profiler.
+        """
+        mesh = self.pde.init_mesh(n=n)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+        A = space.stiff_matrix()
+        b = space.source_vector(self.pde.source)
+        A, b = DirichletBC(space, self.pde.dirichlet).apply(A, b, space.function())
+        model = SimpleNamespace(get_left_matrix=lambda: A,
+                get_right_vector=lambda: b)
+        for solver in ['cg', 'amg']:
+            profiler.reset()
+            profiler.enable()
+            uh = space.function()
+            solve(model, uh, solver=solver)
+            profiler.disable()
+            print(profiler.report())
+            assert np.linalg.norm(b - A@uh) < 1e-8*np.linalg.norm(b)
+            c = profiler.summary()['solve/solve']['counters']
+            assert c['iterations'] > 0
+            if solver == 'cg':
+                assert c['unconverged'] == 0
+            else:
+                assert c['amg_levels'] > 1
+                assert c['amg_operator_complexity'] >= 1
+
+
+test = ProfilerTest()
+
+if sys.argv[1] == "region":
+    test.region()
+elif sys.argv[1] == "poisson":
+    test.poisson()
+elif sys.argv[1] == "solve":
+    test.solve()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# 
+import sys
+from math import factorial
+
+import numpy as np
+
+from fealpy.quadrature import GaussLegendreQuadrature, GaussLobattoQuadrature
+from fealpy.quadrature import TriangleQuadrature, TetrahedronQuadrature
+from fealpy.quadrature import quadrature, quadrature_for_degree
+from fealpy.quadrature.QuadratureFactory import gauss_legendre_rule
+from fealpy.quadrature.QuadratureFactory import gauss_lobatto_rule
+from fealpy.quadrature.QuadratureFactory import TABLES
+from fealpy.functionspace.femdof import multi_index_matrix1d
+from fealpy.functionspace.femdof import multi_index_matrix2d
+from fealpy.functionspace.femdof import multi_index_matrix3d
+
+
+class QuadratureFactoryTest:
+
+    def error(self, qf, TD, p, relative=False):
+        """
+        The max error of the integrals of the monomials of degree p in the
+        barycentric coordinates on the simplex.
+        """
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        multiIndex = [multi_index_matrix1d, multi_index_matrix2d,
+                multi_index_matrix3d][TD-1](p)
+        e = 0.0
+        for alpha in multiIndex:
+            val = np.sum(ws*np.prod(bcs**alpha, axis=-1))
+            exact = factorial(TD)*np.prod([float(factorial(a)) for a in alpha])
+            exact /= float(factorial(p + TD))
+            e = max(e, abs(val - exact)/(exact if relative else 1))
+        return e
+
+    def interval(self):
+        for k in [3, 7, 20]:
+            bcs, ws = gauss_legendre_rule(k)
+            qf = GaussLegendreQuadrature(k)
+            assert np.allclose(bcs, qf.quadpts)
+            assert np.allclose(ws, qf.weights)
+        for k in [3, 7, 11]:
+            bcs, ws = gauss_lobatto_rule(k)
+            qf = GaussLobattoQuadrature(k)
+            assert np.allclose(bcs, qf.quadpts)
+            assert np.allclose(ws, qf.weights)
+        for k in [21, 30]:
+            assert self.error(GaussLegendreQuadrature(k), 1, 2*k-1) < 1e-14
+            assert self.error(GaussLobattoQuadrature(k), 1, 2*k-3) < 1e-14
+
+    def simplex(self):
+        for k in [12, 15]:
+            assert self.error(TriangleQuadrature(k), 2, 2*k-1) < 1e-14
+        for k in [8, 10]:
+            assert self.error(TetrahedronQuadrature(k), 3, 2*k-1) < 1e-14
+        for p in range(25):
+            qf = quadrature_for_degree('triangle', p)
+            e2 = self.error(qf, 2, p)
+            qf = quadrature_for_degree('tetrahedron', p)
+            e3 = self.error(qf, 3, p)
+            print(p, e2, e3, qf.number_of_quadrature_points())
+            assert e2 < 1e-12 and e3 < 1e-12
+        assert quadrature('triangle', 4) is quadrature('triangle', 4)
+
+    def minimal(self):
+        for etype, TD in [('triangle', 2), ('tetrahedron', 3)]:
+            # the tabulated degrees are the measured ones, the monomials of
+            # degree d span the polynomials of degree <= d on the simplex
+            rules = []
+            for k, (d, m) in TABLES[etype].items():
+                qf = quadrature(etype, k)
+                assert qf.number_of_quadrature_points() == m
+                assert self.error(qf, TD, d, relative=True) < 1e-10
+                assert self.error(qf, TD, d+1, relative=True) > 1e-10
+                rules.append((d, m))
+            for n in range(1, 14):
+                rules.append((2*n - 1, n**TD))
+
+            # the selected rule is the smallest one of the degree
+            for p in range(25):
+                qf = quadrature_for_degree(etype, p)
+                NQ = qf.number_of_quadrature_points()
+                assert self.error(qf, TD, p, relative=True) < 1e-10
+                assert NQ == min(m for d, m in rules if d >= p)
+
+
+test = QuadratureFactoryTest()
+
+if sys.argv[1] == "interval":
+    test.interval()
+elif sys.argv[1] == "simplex":
+    test.simplex()
+elif sys.argv[1] == "minimal":
+    test.minimal()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.mesh import TriangleMesh
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.decorator import cartesian, cacheable
+from fealpy.quadrature.QuadraturePointCache import quadrature_cache
+from fealpy.quadrature.QuadraturePointCache import mesh_modified
+
+
+class QuadraturePointCacheTest:
+    def __init__(self):
+        self.pde = CosCosData()
+        self.count = 0
+
+        @cacheable
+        @cartesian
+        def k(p):
+            self.count += 1
+            return 1 + p[..., 0]**2
+        self.k = k
+
+    def assemble(self):
+        pde = self.pde
+        mesh = pde.init_mesh(n=3)
+        space = LagrangeFiniteElementSpace(mesh, p=2)
+        A0 = space.stiff_matrix(self.k)
+        A1 = space.stiff_matrix(self.k)
+        assert self.count == 1
+        assert np.allclose(A0.toarray(), A1.toarray())
+
+        cache = quadrature_cache(mesh)
+        uI = space.interpolation(pde.solution)
+        e0 = space.integralalg.L2_error(pde.solution, uI)
+        e1 = space.integralalg.L2_error(pde.solution, uI)
+        assert e0 == e1
+        print('hits:', cache.hits, 'misses:', cache.misses, 'bytes:', cache.nbytes)
+
+        # the cache is cleared when the mesh is changed
+        mesh.node[:] *= 2
+        space.stiff_matrix(self.k)
+        assert self.count == 2
+        e2 = space.integralalg.L2_error(pde.solution, uI)
+        mesh.node[:] /= 2
+        assert abs(space.integralalg.L2_error(pde.solution, uI) - e0) < 1e-12
+        assert e2 != e0
+        mesh_modified(mesh)
+        space.stiff_matrix(self.k)
+        assert self.count == 3
+        space.stiff_matrix(self.k)
+        assert self.count == 3
+        mesh.uniform_refine()
+        space = LagrangeFiniteElementSpace(mesh, p=2)
+        space.stiff_matrix(self.k)
+        assert self.count == 4
+
+    def flip(self):
+        node = np.array([(0.0, 0.0), (1.0, -0.2), (2.0, 0.0), (1.0, 0.2)])
+        cell = np.array([(0, 1, 2), (0, 2, 3)])
+        mesh = TriangleMesh(node, cell)
+        space = LagrangeFiniteElementSpace(mesh, p=1)
+        A0 = space.stiff_matrix(self.k)
+        assert len(mesh.edge_flip()) == 1
+        # the flipping changes the cells in place and invalidates the cache
+        A1 = space.stiff_matrix(self.k)
+        assert self.count == 2
+        assert not np.allclose(A0.toarray(), A1.toarray())
+
+    def budget(self):
+        mesh = self.pde.init_mesh(n=3)
+        cache = quadrature_cache(mesh, maxbytes=2**12)
+        for q in range(1, 8):
+            qf = mesh.integrator(q)
+            bcs, ws = qf.get_quadrature_points_and_weights()
+            cache.points(bcs)
+            assert cache.nbytes <= cache.maxbytes
+
+
+test = QuadraturePointCacheTest()
+
+if sys.argv[1] == "assemble":
+    test.assemble()
+elif sys.argv[1] == "flip":
+    test.flip()
+elif sys.argv[1] == "budget":
+    test.budget()
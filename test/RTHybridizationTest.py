@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+from scipy.sparse import bmat
+from scipy.sparse.linalg import spsolve
+
+from fealpy.functionspace import RaviartThomasFiniteElementSpace2d
+from fealpy.functionspace import RaviartThomasFiniteElementSpace3d
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.pde.poisson_3d import CosCosCosData
+from fealpy.solver import RTHybridization
+
+
+class RTHybridizationTest:
+
+    def mixed_solve(self, space, pde):
+        A = space.stiff_matrix()
+        B = space.div_matrix()
+        F0 = space.set_neumann_bc(pde.dirichlet)
+        F1 = space.source_vector(pde.source)
+        AA = bmat([[A, -B], [-B.T, None]], format='csr')
+        x = spsolve(AA, np.r_[F0, F1])
+        gdof = space.number_of_global_dofs()
+        return x[:gdof], x[gdof:]
+
+    def poisson(self, p=1):
+        for pde, Space, n, meshtype in [
+                (CosCosData(), RaviartThomasFiniteElementSpace2d, 3, 'tri'),
+                (CosCosCosData(), RaviartThomasFiniteElementSpace3d, 1, 'tet')]:
+            mesh = pde.init_mesh(n=n, meshtype=meshtype)
+            space = Space(mesh, p=p)
+            u0, p0 = self.mixed_solve(space, pde)
+
+            hb = RTHybridization(space)
+            uh, ph, lam = hb.solve(pde.source, gD=pde.dirichlet)
+            print('gdof:', len(u0) + len(p0),
+                    'multipliers:', hb.number_of_global_dofs())
+            assert np.allclose(u0, uh)
+            assert np.allclose(p0, ph)
+
+    def amg(self, p=1, maxit=5):
+        import pyamg
+        pde = CosCosData()
+        mesh = pde.init_mesh(n=2, meshtype='tri')
+        def solver(A, b):
+            ml = pyamg.ruge_stuben_solver(A)
+            return ml.solve(b, tol=1e-12, accel='cg')
+        errorMatrix = np.zeros(maxit, dtype=np.float64)
+        for i in range(maxit):
+            space = RaviartThomasFiniteElementSpace2d(mesh, p=p)
+            hb = RTHybridization(space)
+            uh, ph, lam = hb.solve(pde.source, gD=pde.dirichlet, solver=solver)
+            u0, p0 = self.mixed_solve(space, pde)
+            assert np.allclose(u0, uh, atol=1e-10)
+            assert np.allclose(p0, ph, atol=1e-10)
+            errorMatrix[i] = space.integralalg.L2_error(pde.flux, uh)
+            mesh.uniform_refine()
+        order = np.log2(errorMatrix[:-1]/errorMatrix[1:])
+        print(errorMatrix)
+        print(order)
+        assert np.all(np.abs(order - (p + 1)) < 0.1)
+
+
+test = RTHybridizationTest()
+
+if sys.argv[1] == "poisson":
+    test.poisson()
+elif sys.argv[1] == "amg":
+    test.amg()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#
+import sys
+import time
+import tempfile
+import os
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from fealpy.mesh import MeshFactory
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.decorator import cartesian
+from fealpy.rom import AffineOperator, ReducedBasisModel
+
+
+class ReducedBasisModelTest:
+    def __init__(self):
+        np.random.seed(0)
+
+    def thermal_block(self, p=1, n=32):
+        """
+        The diffusion coefficient is mu_q on the 2x2 blocks of [0, 1]^2, the
+        source is 1 and u = x on the boundary.
+        """
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+
+        def indicator(i, j):
+            @cartesian
+            def chi(p):
+                x = p[..., 0]
+                y = p[..., 1]
+                return ((x >= i/2) & (x <= (i+1)/2) & (y >= j/2) &
+                        (y <= (j+1)/2)).astype(np.float64)
+            return chi
+
+        A = AffineOperator(lambda mu: mu, [
+            space.stiff_matrix(cfun=indicator(i, j))
+            for i in range(2) for j in range(2)])
+
+        @cartesian
+        def source(p):
+            return np.ones(p.shape[:-1])
+        F = AffineOperator(lambda mu: [1.0], [space.source_vector(source)])
+
+        @cartesian
+        def dirichlet(p):
+            return p[..., 0]
+
+        model = ReducedBasisModel.from_space(space, A, F, gD=dirichlet,
+                mu_ref=np.ones(4))
+        return space, A, F, model
+
+    def truth(self, space, A, F, model, mu):
+        u = model.ug.copy()
+        free = model.free
+        u[free] = spsolve(A(mu)[free, :][:, free],
+                (F(mu) - A(mu)@model.ug)[free])
+        return u
+
+    def greedy(self):
+        space, A, F, model = self.thermal_block()
+        train = 10**np.random.uniform(-1, 1, (100, 4))
+        errors = model.greedy(train, tol=1e-5, maxN=40)
+        print('N:', model.N, 'errors:', errors[-1])
+        assert errors[-1] < 1e-5
+
+        for mu in 10**np.random.uniform(-1, 1, (5, 4)):
+            u = self.truth(space, A, F, model, mu)
+            c = model.solve(mu)
+            e = model.energy_norm(u - model.reconstruct(c))
+            delta = model.error_bound(mu, c)
+            print('error:', e, 'bound:', delta, 'effectivity:', delta/e)
+            assert e <= delta*(1 + 1e-8)
+
+        mu = np.array([0.2, 3.0, 1.5, 0.7])
+        t = time.perf_counter()
+        for i in range(1000):
+            c = model.solve(mu)
+            model.error_bound(mu, c)
+        t = (time.perf_counter() - t)/1000
+        print('online time (s):', t)
+
+        with tempfile.TemporaryDirectory() as path:
+            fname = os.path.join(path, 'rb.npz')
+            model.save(fname)
+            online = ReducedBasisModel.load(fname, A, F)
+            c1 = online.solve(mu)
+            assert np.allclose(c, c1)
+            assert np.isclose(model.error_bound(mu, c), online.error_bound(mu, c1))
+            assert np.allclose(model.reconstruct(c), online.reconstruct(c1))
+
+    def pod(self):
+        space, A, F, model = self.thermal_block()
+        train = 10**np.random.uniform(-1, 1, (60, 4))
+        sigma = model.pod(train, tol=1e-6)
+        print('N:', model.N, 'sigma:', sigma[:model.N+1])
+        mu = 10**np.random.uniform(-1, 1, 4)
+        u = self.truth(space, A, F, model, mu)
+        c = model.solve(mu)
+        e = model.energy_norm(u - model.reconstruct(c))
+        print('error:', e/model.energy_norm(u), 'bound:', model.error_bound(mu, c))
+        assert e <= model.error_bound(mu, c)*(1 + 1e-8)
+        assert e < 1e-4*model.energy_norm(u)
+
+
+test = ReducedBasisModelTest()
+
+if sys.argv[1] == "greedy":
+    test.greedy()
+elif sys.argv[1] == "pod":
+    test.pod()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+from scipy.sparse import bmat
+from scipy.sparse.linalg import spsolve
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.functionspace import RaviartThomasFiniteElementSpace2d
+from fealpy.solver import saddle_point_solve
+
+
+class SaddlePointPreconditionerTest:
+    def __init__(self):
+        pass
+
+    def mixed_poisson(self, n=4):
+        pde = CosCosData()
+        mesh = pde.init_mesh(n=n, meshtype='tri')
+        space = RaviartThomasFiniteElementSpace2d(mesh, p=0)
+
+        A = space.stiff_matrix()
+        B = -space.div_matrix().T.tocsr()
+        F0 = space.set_neumann_bc(pde.dirichlet)
+        F1 = space.source_vector(pde.source)
+        AA = bmat([[A, B.T], [B, None]], format='csr')
+        x = spsolve(AA, np.r_[F0, F1])
+
+        for ptype in ['diagonal', 'lower', 'upper']:
+            for schur in ['diagonal', 'bfbt']:
+                u, p, info = saddle_point_solve(A, B, F0, F1, ptype=ptype,
+                        schur=schur, asolver='jacobi', ssolver='direct', tol=1e-10)
+                print(ptype, schur, info)
+                assert info['exitcode'] == 0
+                assert np.allclose(np.r_[u, p], x, atol=1e-6)
+
+
+test = SaddlePointPreconditionerTest()
+
+if sys.argv[1] == "mixed_poisson":
+    test.mixed_poisson()
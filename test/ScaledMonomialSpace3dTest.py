@@ -86,9 +86,58 @@ class ScaledMonomialSpace3dTest:
         phi = space.basis(point)
         print(phi)
 
+    def cell_mass_matrix(self, p=2):
+        from fealpy.mesh.simple_mesh_generator import boxmesh3d
+        from fealpy.mesh.PolyhedronMesh import PolyhedronMesh
+        # 四面体的面是平面, 所以可以扰动节点
+        tmesh = boxmesh3d([0, 1, 0, 1, 0, 1], nx=3, ny=3, nz=3, meshtype='tet')
+        tmesh.node += 0.05*np.sin(7*tmesh.node[:, [1, 2, 0]])
+        mesh = PolyhedronMesh.from_mesh(tmesh)
+        space = ScaledMonomialSpace3d(mesh, p=p)
 
-
-
+        # 精确积分和子四面体上数值积分的比较
+        H0 = space.cell_mass_matrix()
+        def u(x, index):
+            phi = space.basis(x, index=index)
+            return np.einsum('ijm, ijn->ijmn', phi, phi)
+        H1 = space.integralalg.integral(u, celltype=True, q=p+3)
+        e = np.max(np.abs(H0 - H1))
+        print('error:', e)
+        assert e < 1e-12
+        assert np.allclose(H0, H0.swapaxes(-1, -2))
+        assert np.all(np.linalg.eigvalsh(H0) > 0)
+
+        # 多面体网格的几何量和四面体网格的一致
+        vol = tmesh.entity_measure('cell')
+        print('volume:', np.max(np.abs(H0[:, 0, 0] - vol)))
+        assert np.allclose(mesh.entity_measure('cell'), vol)
+        assert np.allclose(H0[:, 0, 0], vol)
+        assert np.allclose(mesh.entity_barycenter('cell'),
+                tmesh.entity_barycenter('cell'))
+
+        # 六面体网格的面是四边形, 非均匀的长方体网格上和张量积 Gauss 积分比较
+        hmesh = boxmesh3d([0, 1, 0, 1, 0, 1], nx=3, ny=2, nz=4, meshtype='hex')
+        hmesh.node += 0.1*np.sin(np.pi*hmesh.node)
+        mesh = PolyhedronMesh.from_mesh(hmesh)
+        space = ScaledMonomialSpace3d(mesh, p=p)
+        H0 = space.cell_mass_matrix()
+
+        node = hmesh.entity('node')
+        cell = hmesh.entity('cell')
+        a = node[cell[:, 0]]
+        b = node[cell[:, 6]]
+        t, w = np.polynomial.legendre.leggauss(p+1)
+        t = np.stack(np.meshgrid(t, t, t, indexing='ij'), axis=-1).reshape(-1, 3)
+        w = np.einsum('i, j, k->ijk', w, w, w).reshape(-1)/8
+        x = a + (t[:, None, :] + 1)/2*(b - a)
+        phi = space.basis(x)
+        vol = np.prod(b - a, axis=-1)
+        H1 = np.einsum('q, qcm, qcn, c->cmn', w, phi, phi, vol)
+        e = np.max(np.abs(H0 - H1))
+        print('hex error:', e)
+        assert e < 1e-12
+        assert np.allclose(mesh.entity_measure('cell'), vol)
+        assert np.allclose(mesh.entity_barycenter('cell'), (a + b)/2)
 
 
 test = ScaledMonomialSpace3dTest()
@@ -96,3 +145,6 @@ test = ScaledMonomialSpace3dTest()
 if sys.argv[1] == "show_cell_basis_index": 
     p = int(sys.argv[2])
     test.show_cell_basis_index(p=p)
+elif sys.argv[1] == "cell_mass_matrix":
+    p = int(sys.argv[2])
+    test.cell_mass_matrix(p=p)
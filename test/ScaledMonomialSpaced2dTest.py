@@ -60,6 +60,66 @@ class ScaledMonomialSpace2dTest:
         print("new: p=", p, "\n", space.edge_mass_matrix(p=p))
         print("old: p=", p, "\n", space.edge_mass_matrix_1(p=p))
 
+    def matrix_H_test(self, p=2):
+        pde = CosCosData()
+        qtree = pde.init_mesh(n=3, meshtype='quadtree')
+        mesh = qtree.to_pmesh()
+        node = mesh.entity('node')
+        node += 0.02*np.sin(7*node[:, ::-1]) # non-convex polygons
+        space = ScaledMonomialSpace2d(mesh, p)
+        alg = space.integralalg
+
+        # the exact integrals by the edges against the sub-triangle rules
+        def f(x, index):
+            phi = space.basis(x, index=index)
+            return np.einsum('...k, ...m->...km', phi, phi)
+        H0 = alg.integral(f, celltype=True, q=2*p+1)
+        H = space.matrix_H()
+        print("matrix H: p=", p, np.max(np.abs(H - H0)))
+
+        def f(x, index):
+            gphi = space.grad_basis(x, index=index)
+            return np.einsum('...km, ...pm->...kp', gphi, gphi)
+        A0 = alg.integral(f, celltype=True, q=2*p+1)
+        cell2dof = space.cell_to_dof()
+        A = space.stiff_matrix().toarray()
+        A = A[cell2dof[:, :, None], cell2dof[:, None, :]]
+        print("stiff matrix: p=", p, np.max(np.abs(A - A0)))
+
+    def integralalg_update_test(self):
+        pde = CosCosData()
+        mesh = pde.init_mesh(n=2, meshtype='quadtree').to_pmesh()
+        space = ScaledMonomialSpace2d(mesh, 1)
+        alg = space.integralalg
+        one = lambda x, index: np.ones(x.shape[:-1], dtype=np.float64)
+
+        a = alg.integral(one, celltype=True)
+        assert np.allclose(a, mesh.entity_measure('cell'))
+
+        # move the nodes in place
+        node = mesh.entity('node')
+        node *= 2
+        a = alg.integral(one, celltype=True)
+        assert np.allclose(a, mesh.entity_measure('cell'))
+        assert abs(a.sum() - 4) < 1e-12
+
+        # split every polygon into triangles
+        node, cell = mesh.tri_refine()
+        v0 = node[cell[:, 1]] - node[cell[:, 0]]
+        v1 = node[cell[:, 2]] - node[cell[:, 0]]
+        flag = np.cross(v0, v1) < 0
+        cell[flag, 1:] = cell[flag, :0:-1]
+        NC = len(cell)
+        mesh.node = node
+        mesh.ds.reinit(len(node), cell.reshape(-1), np.arange(0, 3*NC+1, 3))
+        a = alg.integral(one, celltype=True)
+        assert len(a) == NC
+        assert np.allclose(a, mesh.entity_measure('cell'))
+        e = alg.polynomial_integral(
+                lambda x, index: np.ones(x.shape[:-1] + (1, )), [0])
+        assert np.allclose(e[:, 0], a)
+        print("integralalg update: NC =", NC, np.max(np.abs(a - e[:, 0])))
+
     def interpolation_test(self):
         pass
 
@@ -92,5 +152,7 @@ test.diff_index_1_test(p=3)
 test.diff_index_2_test(p=3)
 test.diff_index_2_test(p=4)
 
+test.matrix_H_test(p=3)
+test.integralalg_update_test()
 #test.edge_mass_matrix_test(p=3)
 #test.project_test()
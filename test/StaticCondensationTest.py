@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+from scipy.sparse import spdiags
+from scipy.sparse.linalg import spsolve
+
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh
+from fealpy.mesh import Quadtree
+from fealpy.functionspace import LagrangeFiniteElementSpace
+from fealpy.functionspace import ConformingVirtualElementSpace2d
+from fealpy.boundarycondition import DirichletBC
+from fealpy.solver import StaticCondensation
+
+
+class StaticCondensationTest:
+    def __init__(self):
+        def u(p):
+            x = p[..., 0]
+            y = p[..., 1]
+            return np.sin(np.pi*x)*np.sin(np.pi*y)
+
+        def f(p):
+            return 2*np.pi**2*u(p)
+        self.u = u
+        self.f = f
+
+    def lagrange(self, p=4):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=8, ny=8, meshtype='tri')
+        space = LagrangeFiniteElementSpace(mesh, p=p)
+
+        A = space.stiff_matrix()
+        F = space.source_vector(self.f)
+        uh = space.function()
+        A, F = DirichletBC(space, self.u).apply(A, F, uh)
+        u0 = spsolve(A, F)
+
+        sc = StaticCondensation(space)
+        uh = space.function()
+        isDDof = space.set_dirichlet_bc(uh, self.u)
+        A = space.cell_stiff_matrix()
+        F = space.cell_source_vector(self.f)
+        u1 = sc.solve(A, F, uh=uh, isDDof=isDDof)
+        print('gdof:', space.number_of_global_dofs(),
+                'skeleton dofs:', sc.number_of_skeleton_dofs())
+        assert np.allclose(u0, u1)
+
+    def vem(self, p=3):
+        # the hanging nodes of the local refinement are the vertices of the
+        # polygons, so there are cells with different numbers of dofs
+        node = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float)
+        tree = Quadtree(node, np.array([(0, 1, 2, 3)]))
+        tree.uniform_refine(2)
+        bc = tree.entity_barycenter('cell')
+        isMarkedCell = tree.is_leaf_cell() & (np.sum(bc, axis=1) < 0.6)
+        tree.refine_1(isMarkedCell)
+        mesh = tree.to_pmesh()
+        space = ConformingVirtualElementSpace2d(mesh, p=p)
+
+        uh = space.function()
+        isDDof = space.set_dirichlet_bc(uh, self.u)
+        A = space.stiff_matrix()
+        F = space.source_vector(self.f)
+        F -= A@uh
+        bdIdx = isDDof.astype(np.float)
+        T = spdiags(1 - bdIdx, 0, *A.shape)
+        A = T@A@T + spdiags(bdIdx, 0, *A.shape)
+        F[isDDof] = uh[isDDof]
+        u0 = spsolve(A.tocsr(), F)
+
+        sc = StaticCondensation(space)
+        A = space.cell_stiff_matrix()
+        F = space.cell_source_vector(self.f)
+        u1 = sc.solve(A, F, uh=uh, isDDof=isDDof)
+        print('gdof:', space.number_of_global_dofs(),
+                'skeleton dofs:', sc.number_of_skeleton_dofs(),
+                'groups:', len(sc.group))
+        assert len(sc.group) > 1
+        assert np.allclose(u0, u1)
+
+
+test = StaticCondensationTest()
+
+if sys.argv[1] == "lagrange":
+    test.lagrange()
+elif sys.argv[1] == "vem":
+    test.vem()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+#
+import sys
+
+import numpy as np
+
+from fealpy.mesh import MeshFactory
+from fealpy.fem import StokesFEMModel2d
+
+
+class SinCosData():
+    """
+    -\Delta u + \nabla p = f, div u = 0 on [0, 1]^2 with
+
+        u = (sin(pi x) cos(pi y), -cos(pi x) sin(pi y)),
+        p = cos(pi x) cos(pi y).
+    """
+    def velocity(self, p):
+        x = p[..., 0]
+        y = p[..., 1]
+        pi = np.pi
+        val = np.zeros(p.shape, dtype=np.float64)
+        val[..., 0] = np.sin(pi*x)*np.cos(pi*y)
+        val[..., 1] = -np.cos(pi*x)*np.sin(pi*y)
+        return val
+
+    def pressure(self, p):
+        x = p[..., 0]
+        y = p[..., 1]
+        pi = np.pi
+        return np.cos(pi*x)*np.cos(pi*y)
+
+    def source(self, p):
+        x = p[..., 0]
+        y = p[..., 1]
+        pi = np.pi
+        val = 2*pi**2*self.velocity(p)
+        val[..., 0] -= pi*np.sin(pi*x)*np.cos(pi*y)
+        val[..., 1] -= pi*np.cos(pi*x)*np.sin(pi*y)
+        return val
+
+    def dirichlet(self, p):
+        return self.velocity(p)
+
+
+class StokesFEMModel2dTest:
+    def __init__(self):
+        self.pde = SinCosData()
+
+    def block_solve(self, n=8):
+        """
+        The block preconditioners with the pressure mass matrix give the
+        solution of the direct solver.
+        """
+        mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+        fem = StokesFEMModel2d(self.pde, mesh, p=2)
+        fem.solve()
+        u = fem.uh.copy()
+        p = fem.ph.copy()
+        for ptype in ['diagonal', 'lower', 'upper']:
+            info = fem.block_solve(ptype=ptype, schur='mass', tol=1e-10)
+            print(ptype, info)
+            assert info['exitcode'] == 0
+            assert info['iterations'] < 80
+            assert np.max(np.abs(fem.uh - u)) < 1e-6
+            assert np.max(np.abs(fem.ph - p)) < 1e-6
+
+    def convergence(self):
+        """
+        The errors of the P2-P1 element are O(h^3) and O(h^2), and the
+        iterations do not grow with n.
+        """
+        e = []
+        it = []
+        for n in [4, 8, 16]:
+            mesh = MeshFactory().regular([0, 1, 0, 1], n=n)
+            fem = StokesFEMModel2d(self.pde, mesh, p=2)
+            info = fem.block_solve(ptype='lower', schur='mass', tol=1e-10)
+            e.append((fem.velocity_L2_error(), fem.pressure_L2_error()))
+            it.append(info['iterations'])
+        e = np.array(e)
+        order = np.log2(e[:-1]/e[1:])
+        print(e, order, it)
+        assert np.all(order[:, 0] > 2.8)
+        assert np.all(order[:, 1] > 1.8)
+        assert max(it) < 2*min(it)
+
+
+test = StokesFEMModel2dTest()
+
+if sys.argv[1] == "block_solve":
+    test.block_solve()
+elif sys.argv[1] == "convergence":
+    test.convergence()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# 
+import sys
+import time
+
+import numpy as np
+import sympy as sp
+
+from fealpy.pde.poisson_2d import CosCosData
+from fealpy.pde.sympy_pde_data import SympyPDEData, generate_code
+
+
+class SympyPDEDataTest:
+    def __init__(self):
+        self.x, self.y = sp.symbols('x, y')
+
+    def poisson(self):
+        x, y = self.x, self.y
+        u = sp.cos(sp.pi*x)*sp.cos(sp.pi*y)
+        pde = SympyPDEData(u, [x, y], cache=False)
+        data = CosCosData()
+        p = np.random.rand(10, 4, 2)
+        for name in ['solution', 'gradient', 'source', 'flux']:
+            assert np.allclose(getattr(pde, name)(p), getattr(data, name)(p))
+        assert pde.source.coordtype == 'cartesian'
+        assert pde.hessian(p).shape == (10, 4, 2, 2)
+
+    def vector(self):
+        x, y = self.x, self.y
+        u = [sp.sin(x)*y**2, x*y]
+        pde = SympyPDEData(u, [x, y])
+        p = np.random.rand(10, 2)
+        assert pde.gradient(p).shape == (10, 2, 2)
+        assert pde.hessian(p).shape == (10, 2, 2, 2)
+        f = pde.source(p)
+        assert np.allclose(f[:, 0], (p[:, 1]**2 - 2)*np.sin(p[:, 0]))
+        assert np.allclose(f[:, 1], 0)
+
+    def cse(self):
+        x, y = self.x, self.y
+        u = sp.exp(sp.sin(sp.pi*x)*sp.cos(sp.pi*y))*sp.atan(x**2 + y**2)
+        print(generate_code(-sp.diff(u, x, 2) - sp.diff(u, y, 2), [x, y],
+            name='source'))
+        t = time.time()
+        pde = SympyPDEData(u, [x, y])
+        print('build:', time.time() - t)
+
+        f = sp.lambdify((x, y), -sp.diff(u, x, 2) - sp.diff(u, y, 2), 'numpy')
+        p = np.random.rand(200000, 2)
+        t = time.time()
+        v0 = f(p[..., 0], p[..., 1])
+        t0 = time.time() - t
+        t = time.time()
+        v1 = pde.source(p)
+        t1 = time.time() - t
+        print('lambdify:', t0, 'cse:', t1)
+        assert np.allclose(v0, v1)
+
+
+test = SympyPDEDataTest()
+
+if sys.argv[1] == "poisson":
+    test.poisson()
+elif sys.argv[1] == "vector":
+    test.vector()
+elif sys.argv[1] == "cse":
+    test.cse()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# 
+import sys
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from fealpy.mesh.simple_mesh_generator import rectangledomainmesh, cubehexmesh
+from fealpy.functionspace import TensorProductFiniteElementSpace
+
+
+class TensorProductFiniteElementSpaceTest:
+    def __init__(self):
+        pass
+
+    def matrix_free(self, p=3):
+        mesh = rectangledomainmesh([0, 1, 0, 1], nx=4, ny=4, meshtype='quad')
+        node = mesh.entity('node')
+        node += 0.03*np.sin(2*np.pi*node[:, [1, 0]])
+        space = TensorProductFiniteElementSpace(mesh, p)
+        A = space.stiff_matrix()
+        M = space.mass_matrix()
+        u = np.random.rand(space.number_of_global_dofs())
+        assert np.allclose(A@u, space.stiff_apply(u))
+        assert np.allclose(M@u, space.mass_apply(u))
+        assert np.allclose(A.diagonal(), space.stiff_diagonal())
+        assert np.allclose(M.diagonal(), space.mass_diagonal())
+
+        mesh = cubehexmesh([0, 1, 0, 1, 0, 1], nx=2, ny=2, nz=2)
+        space = TensorProductFiniteElementSpace(mesh, p)
+        A = space.stiff_operator()
+        u = np.ones(space.number_of_global_dofs())
+        assert np.allclose(A@u, 0)
+
+    def poisson(self, p=3):
+        def u(p):
+            x = p[..., 0]
+            y = p[..., 1]
+            return np.sin(np.pi*x)*np.sin(np.pi*y)
+
+        def f(p):
+            return 2*np.pi**2*u(p)
+
+        error = []
+        for n in [4, 8]:
+            mesh = rectangledomainmesh([0, 1, 0, 1], nx=n, ny=n, meshtype='quad')
+            space = TensorProductFiniteElementSpace(mesh, p)
+            A = space.stiff_matrix()
+            uh = space.function()
+            isDDof = space.set_dirichlet_bc(uh, u)
+            b = space.source_vector(f) - A@uh
+            isFree = ~isDDof
+            uh[isFree] = spsolve(A[isFree][:, isFree].tocsc(), b[isFree])
+            error.append(space.L2_error(u, uh))
+        print('error:', error)
+        assert error[0]/error[1] > 2**(p + 1)*0.8
+
+
+test = TensorProductFiniteElementSpaceTest()
+
+if sys.argv[1] == "matrix_free":
+    test.matrix_free()
+elif sys.argv[1] == "poisson":
+    test.poisson()
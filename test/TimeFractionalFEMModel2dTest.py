@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+#
+import sys
+import time
+
+import numpy as np
+
+from fealpy.pde.time_fractional_2d import FisherData2d
+from fealpy.fem.TimeFractionalFEMModel2d import TimeFractionalFEMModel2d
+
+
+class TimeFractionalFEMModel2dTest:
+    def __init__(self):
+        pass
+
+    def sum_of_exp(self, b=0.5, eps=1e-10):
+        pde = FisherData2d()
+        model = TimeFractionalFEMModel2d(pde, pde.init_mesh(n=1))
+        for NT in [10, 1000, 100000]:
+            dt = 1/NT
+            s, w = model.sum_of_exp_approximation(b, dt, 1, eps=eps)
+            t = np.geomspace(dt, 1, 2000)
+            e = np.max(np.abs(np.exp(-np.outer(t, s))@w*t**b - 1))
+            print(NT, 'the number of exponentials:', len(s), 'error:', e)
+            assert np.all(s > 0) and np.all(w > 0)
+            assert e < 10*eps
+
+    def fast_solve(self, n=4, NT=320):
+        pde = FisherData2d()
+        mesh = pde.init_mesh(n=n)
+        model = TimeFractionalFEMModel2d(pde, mesh, p=1)
+
+        t = time.time()
+        u0 = model.solve(0, 1, NT)
+        print('L1:', time.time() - t, 'error:', model.error())
+
+        t = time.time()
+        u1 = model.fast_solve(0, 1, NT)
+        print('fast L1:', time.time() - t, 'error:', model.error(),
+                'the number of exponentials:', model.nexp)
+        print('difference:', np.max(np.abs(u0 - u1)))
+        assert np.max(np.abs(u0 - u1)) < 1e-8
+
+
+test = TimeFractionalFEMModel2dTest()
+
+if sys.argv[1] == "sum_of_exp":
+    test.sum_of_exp()
+elif sys.argv[1] == "fast_solve":
+    test.fast_solve()